@@ -4,7 +4,8 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 from decimal import Decimal
 from suppliers.models import SupplierOrder, SupplierOrderItem
-from inventory.models import InventoryAdjustment
+from inventory.models import InventoryAdjustment, Product
+from inventory.services import StockLedgerService
 from utils.models import ExchangeRate
 
 class Command(BaseCommand):
@@ -223,15 +224,17 @@ class Command(BaseCommand):
         created_count = 0
         for order in orders:
             for item in order.items.all():
-                InventoryAdjustment.objects.create(
-                    product=item.product,
-                    adjustment_type='add',
-                    quantity=item.quantity,
-                    previous_stock=item.product.stock - item.quantity,
-                    new_stock=item.product.stock,
-                    reason=f'Recepción orden #{order.id} (ajuste retroactivo)',
+                # El stock ya incluye la recepción: un 'set' al stock actual
+                # la deja en el libro sin cambiar el stock (ver StockLedgerService)
+                product = Product.objects.get(pk=item.product_id)
+                StockLedgerService.record(InventoryAdjustment(
+                    product=product,
+                    adjustment_type='set',
+                    source='reception',
+                    quantity=product.stock,
+                    reason=f'Recepción orden #{order.id}: {item.quantity} (ajuste retroactivo)',
                     adjusted_by=system_user
-                )
+                ))
                 created_count += 1
         
         self.stdout.write(self.style.SUCCESS(f'{created_count} ajustes creados'))
\ No newline at end of file
@@ -1,12 +1,21 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
 
+from utils.versions import VersionedQuerySet
+
+
+class UserManager(DjangoUserManager.from_queryset(VersionedQuerySet)):
+    """UserManager cuyas lecturas se pueden cachear con cached()"""
+
+
 class User(AbstractUser):
     """
     Modelo de usuario personalizado con roles específicos para el sistema
     """
     is_admin = models.BooleanField(default=False)
     is_employee = models.BooleanField(default=False)
+
+    objects = UserManager()
     
     class Meta:
         verbose_name = 'Usuario'
@@ -0,0 +1,13 @@
+# accounts/signals.py - VERSIONES DE LA TABLA DE USUARIOS
+
+"""
+Registra User en TableVersions para la lista de empleados de los filtros
+(cached()) y los nombres que muestran los reportes cacheados. Solo cuentan
+los campos que se muestran o filtran: el login (last_login) no invalida nada.
+"""
+
+from utils.versions import TableVersions
+
+from .models import User
+
+TableVersions.register(User, fields=('username', 'first_name', 'last_name', 'is_active'))
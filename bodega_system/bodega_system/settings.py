@@ -82,7 +82,46 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',  # Cambiamos a PostgreSQL en producción
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            # Bloqueo de escritura al empezar cada transacción (ver utils/sqlite.py)
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Ventas, ajustes e historial de meses cerrados (utils/archive.py). Se
+    # crea con `manage.py archive_old_data`; puede moverse a otro disco y
+    # los reportes de períodos viejos lo leen si está disponible
+    'archive': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'archive.sqlite3',
+    },
+}
+DATABASE_ROUTERS = ['utils.archive.ArchiveRouter']
+
+# Caché compartida por todos los procesos (workers web, comandos de cron):
+# ahí viven los contadores de utils/versions.py y los reportes cacheados. La
+# LocMemCache por defecto es de cada proceso: una escritura en un worker no
+# invalidaría lo que cachearon los demás. En disco porque con SQLite todo
+# corre en el mismo servidor
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        # Consultas y reportes de varios períodos; un contador que se
+        # descarte vuelve con un valor mayor (utils/versions.py)
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# PRAGMA de cada conexión SQLite nueva (utils/sqlite.py): WAL para que los
+# reportes no esperen a las ventas, espera de hasta 5 s por el bloqueo de
+# escritura y lecturas con mmap y caché de 20 MB
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
 }
 
 # Custom user model
@@ -168,5 +207,18 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Historial de productos (simple_history): por defecto un save() que solo
+# cambia los campos de Product.HISTORY_IGNORED_FIELDS no escribe fila de
+# historial. Para cambiar esa lista (o () para historial completo):
+# PRODUCT_HISTORY_IGNORED_FIELDS = ()
+
+# Intentos de retry_on_conflict (utils/concurrency.py) cuando otra
+# transacción modificó las mismas filas
+CONFLICT_RETRY_ATTEMPTS = 3
+
+# Meses completos que se mantienen en la base principal; lo anterior se
+# mueve a la base de archivo con `manage.py archive_old_data`
+ARCHIVE_HORIZON_MONTHS = 24
+
 # Backup settings
 BACKUP_ROOT = os.path.join(BASE_DIR, 'backups')
\ No newline at end of file
@@ -22,6 +22,7 @@ def dashboard(request):
     # Importar modelos aquí para evitar circular imports
     from sales.models import Sale
     from inventory.models import Product
+    from inventory.services import StockStateService
     from customers.models import Customer, CustomerCredit
     
     # MÉTRICAS DE VENTAS
@@ -50,11 +51,9 @@ def dashboard(request):
         }
         
         # MÉTRICAS DE INVENTARIO - Solo para administradores
-        total_products = Product.objects.filter(is_active=True).count()
-        low_stock_products = Product.objects.filter(
-            is_active=True,
-            stock__lte=F('min_stock')
-        ).count()
+        stock_summary = StockStateService.summary()
+        total_products = stock_summary['total']
+        low_stock_products = sum(stock_summary[state] for state in Product.RESTOCK_STATES)
         
         context_data.update({
             'total_products': total_products,
@@ -1,8 +1,8 @@
 from django.http import JsonResponse
-from django.db.models import Q
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from .models import Customer
+from .search import search_customers
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -10,16 +10,12 @@ def customer_search_api(request):
     """API para buscar clientes en el formulario de ventas"""
     try:
         query = request.GET.get('q', '').strip()
-        limit = min(int(request.GET.get('limit', 10)), 20)
+        limit = int(request.GET.get('limit', 10))
         
         if not query or len(query) < 2:
             return JsonResponse({'customers': []})
             
-        customers = Customer.objects.filter(
-            Q(name__icontains=query) |
-            Q(phone__icontains=query) |
-            Q(email__icontains=query)
-        ).order_by('name')[:limit]
+        customers = search_customers(Customer.objects.all(), query, limit=limit)
         
         results = []
         for customer in customers:
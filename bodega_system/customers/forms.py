@@ -1,9 +1,11 @@
 # customers/forms.py
 
 from django import forms
+from django.urls import reverse_lazy
 from django.utils import timezone
 from datetime import timedelta
 from .models import Customer, CustomerCredit, CreditPayment
+from utils.autocomplete import AutocompleteModelChoiceField, AutocompleteModelFormMixin
 
 class CustomerForm(forms.ModelForm):
     """Formulario para clientes"""
@@ -29,14 +31,24 @@ class CustomerForm(forms.ModelForm):
             'credit_limit_usd': 'Límite de crédito en dólares. El equivalente en Bs se calcula automáticamente.',
         }
 
-class CreditForm(forms.ModelForm):
+class CreditForm(AutocompleteModelFormMixin, forms.ModelForm):
     """Formulario para créditos de clientes"""
 
+    # Solo clientes activos con crédito disponible (usar USD)
+    customer = AutocompleteModelChoiceField(
+        queryset=Customer.objects.filter(is_active=True, credit_limit_usd__gt=0),
+        url=reverse_lazy('customer_search'),
+        results_key='customers',
+        detail_key='phone',
+        placeholder='Buscar por nombre o teléfono...',
+        attrs={'class': 'form-input'},
+        label='Cliente',
+    )
+
     class Meta:
         model = CustomerCredit
         fields = ['customer', 'amount_bs', 'date_due', 'notes']
         widgets = {
-            'customer': forms.Select(attrs={'class': 'form-select'}),
             'amount_bs': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.01'}),
             'date_due': forms.DateInput(attrs={'class': 'form-input', 'type': 'date'}),
             'notes': forms.Textarea(attrs={'class': 'form-input', 'rows': 3}),
@@ -55,12 +67,6 @@ class CreditForm(forms.ModelForm):
         if not self.instance.pk and not self.initial.get('date_due'):
             self.initial['date_due'] = (timezone.now() + timedelta(days=30)).date()
 
-        # Filtrar solo clientes con crédito disponible (usar USD)
-        self.fields['customer'].queryset = Customer.objects.filter(
-            is_active=True,
-            credit_limit_usd__gt=0
-        )
-
     def clean(self):
         """Validaciones adicionales"""
         cleaned_data = super().clean()
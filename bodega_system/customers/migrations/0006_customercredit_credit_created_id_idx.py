@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0005_customergeneralpayment_creditpayment_general_payment'),
+        ('sales', '0004_sale_sale_customer_date_idx_sale_sale_user_date_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customercredit',
+            index=models.Index(fields=['-date_created', '-id'], name='credit_created_id_idx'),
+        ),
+    ]
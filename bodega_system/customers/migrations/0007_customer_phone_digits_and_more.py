@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+def fill_phone_digits(apps, schema_editor):
+    from customers.search import normalize_phone
+    Customer = apps.get_model('customers', 'Customer')
+    customers = list(Customer.objects.exclude(phone=''))
+    for customer in customers:
+        customer.phone_digits = normalize_phone(customer.phone)
+    Customer.objects.bulk_update(customers, ['phone_digits'], batch_size=500)
+
+
+def install_search_index(apps, schema_editor):
+    from customers.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from customers.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0006_customercredit_credit_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=20, verbose_name='Teléfono (dígitos)'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_digits'], name='customer_phone_digits_idx'),
+        ),
+        migrations.RunPython(fill_phone_digits, migrations.RunPython.noop),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
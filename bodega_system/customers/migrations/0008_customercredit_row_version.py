@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0007_customer_phone_digits_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customercredit',
+            name='row_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+    ]
@@ -3,6 +3,11 @@
 from django.db import models
 from django.urls import reverse
 
+from utils.concurrency import OptimisticLockModel
+from utils.dirty import DirtyFieldsMixin
+
+from .search import normalize_phone
+
 class Customer(models.Model):
     """Modelo para los clientes"""
     name = models.CharField(
@@ -14,6 +19,13 @@ class Customer(models.Model):
         blank=True,
         verbose_name="Teléfono"
     )
+    # Solo dígitos, para buscar por prefijo sin importar el formato
+    phone_digits = models.CharField(
+        max_length=20,
+        blank=True,
+        editable=False,
+        verbose_name="Teléfono (dígitos)"
+    )
     email = models.EmailField(
         blank=True,
         verbose_name="Email"
@@ -57,9 +69,19 @@ class Customer(models.Model):
         verbose_name = "Cliente"
         verbose_name_plural = "Clientes"
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['phone_digits'], name='customer_phone_digits_idx'),
+        ]
     
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.phone_digits = normalize_phone(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'phone_digits'}
+        super().save(*args, **kwargs)
     
     def get_absolute_url(self):
         return reverse('customers:customer_detail', args=[str(self.id)])
@@ -110,7 +132,7 @@ class Customer(models.Model):
             return self.credit_limit_usd * rate.bs_to_usd
         return 0
 
-class CustomerCredit(models.Model):
+class CustomerCredit(DirtyFieldsMixin, OptimisticLockModel):
     """Modelo para los créditos de clientes"""
     customer = models.ForeignKey(
         Customer,
@@ -165,6 +187,10 @@ class CustomerCredit(models.Model):
         verbose_name = "Crédito de Cliente"
         verbose_name_plural = "Créditos de Clientes"
         ordering = ['-date_created']
+        indexes = [
+            # Paginación por cursor (-date_created, -id) en credit_list
+            models.Index(fields=['-date_created', '-id'], name='credit_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"Crédito de {self.customer.name} - {self.amount_bs} Bs"
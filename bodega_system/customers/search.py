@@ -0,0 +1,240 @@
+# customers/search.py - BÚSQUEDA INDEXADA DE CLIENTES
+
+"""
+Servicio único de búsqueda de clientes
+
+Lo usan la API del POS (/api/customers/search/), la API de la app
+(customers:customer_search_api) y el listado de clientes.
+
+- Si la consulta es un teléfono (solo dígitos y separadores) se busca por
+  prefijo en `phone_digits`, una columna normalizada e indexada: "0414-555",
+  "0414 555" y "+58 414 555" encuentran el mismo cliente
+- Si tiene letras se busca por nombre/email: FTS5 con prefijo por palabra
+  en SQLite (tabla `customers_customer_fts`, mantenida por triggers) o
+  icontains donde no hay índice
+"""
+
+import logging
+import re
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Case, When, Value, IntegerField, Q
+
+from utils.search import (
+    build_match_expression, fts_table_exists, reset_fts_cache, search_terms,
+)
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'customers_customer_fts'
+
+# Peso de cada columna en bm25: name, email
+FTS_WEIGHTS = (10.0, 1.0)
+
+# Tope de resultados para las APIs de autocompletado
+MAX_RESULTS = 20
+
+# Dígitos mínimos para tratar la consulta como teléfono
+MIN_PHONE_DIGITS = 3
+
+_NON_DIGITS_RE = re.compile(r'\D')
+_LETTERS_RE = re.compile(r'[^\W\d_]', re.UNICODE)
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, email,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customers_customer_fts_ai
+    AFTER INSERT ON customers_customer BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customers_customer_fts_ad
+    AFTER DELETE ON customers_customer BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS customers_customer_fts_au
+    AFTER UPDATE OF name, email ON customers_customer BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, name, email) VALUES (new.id, new.name, new.email);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS customers_customer_fts_au",
+    "DROP TRIGGER IF EXISTS customers_customer_fts_ad",
+    "DROP TRIGGER IF EXISTS customers_customer_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+SQLITE_POPULATE = f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, email)
+    SELECT id, name, email FROM customers_customer
+"""
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS customer_name_trgm_idx "
+    "ON customers_customer USING gin (UPPER(name) gin_trgm_ops)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS customer_name_trgm_idx",
+]
+
+
+def normalize_phone(value):
+    """
+    Deja solo los dígitos de un teléfono, en formato local venezolano
+
+    "0414-555.12.34" -> "04145551234"; "+58 414 5551234" -> "04145551234"
+    """
+    digits = _NON_DIGITS_RE.sub('', value or '')
+    if digits.startswith('0058'):
+        digits = digits[4:]
+    elif digits.startswith('58') and len(digits) > 2:
+        digits = digits[2:]
+    else:
+        return digits
+    return '0' + digits
+
+
+def install_search_index(connection):
+    """
+    Crea el índice de nombres de clientes y lo llena
+
+    Returns:
+        True si el índice quedó instalado
+    """
+    reset_fts_cache()
+    try:
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                for statement in SQLITE_INSTALL:
+                    cursor.execute(statement)
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+                cursor.execute(SQLITE_POPULATE)
+            return True
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for statement in POSTGRES_INSTALL:
+                    cursor.execute(statement)
+            return True
+    except DatabaseError as e:
+        logger.warning(
+            "No se pudo crear el índice de búsqueda de clientes",
+            extra={'vendor': connection.vendor, 'error': str(e)}
+        )
+        return False
+    return False
+
+
+def uninstall_search_index(connection):
+    """Elimina el índice de búsqueda (reverso de la migración)"""
+    reset_fts_cache()
+    statements = {
+        'sqlite': SQLITE_UNINSTALL,
+        'postgresql': POSTGRES_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """'fts5' si existe la tabla del índice, si no 'basic'"""
+    return 'fts5' if fts_table_exists(FTS_TABLE, using) else 'basic'
+
+
+def is_phone_query(query):
+    """La consulta no tiene letras y trae suficientes dígitos"""
+    return (
+        not _LETTERS_RE.search(query)
+        and len(_NON_DIGITS_RE.sub('', query)) >= MIN_PHONE_DIGITS
+    )
+
+
+def search_customers(queryset, query, limit=None, backend=None):
+    """
+    Filtra `queryset` por `query` y lo ordena por relevancia
+
+    Args:
+        queryset: QuerySet de Customer (puede traer otros filtros)
+        query: Nombre, email o teléfono (completo o el comienzo)
+        limit: Si se indica, recorta a min(limit, MAX_RESULTS)
+        backend: Fuerza 'fts5' o 'basic' para la búsqueda por nombre
+
+    Returns:
+        QuerySet ordenado: coincidencia exacta primero, luego por nombre
+    """
+    query = (query or '').strip()
+    terms = search_terms(query)
+
+    if not terms:
+        results = queryset.none()
+    elif is_phone_query(query):
+        results = _search_phone(queryset, query)
+    elif (backend or search_backend(queryset.db)) == 'fts5':
+        results = _search_fts5(queryset, query)
+    else:
+        results = _search_basic(queryset, terms)
+
+    if limit is not None:
+        results = results[:max(0, min(limit, MAX_RESULTS))]
+    return results
+
+
+def _phone_prefix(prefix):
+    # Rango [prefijo, prefijo + ':') — ':' es el carácter siguiente a '9',
+    # así la búsqueda recorre el índice de phone_digits en cualquier motor
+    return Q(phone_digits__gte=prefix, phone_digits__lt=prefix + ':')
+
+
+def _search_phone(queryset, query):
+    digits = normalize_phone(query)
+    condition = _phone_prefix(digits)
+    if not digits.startswith('0'):
+        # "414 555" sin el cero inicial
+        condition |= _phone_prefix('0' + digits)
+    return queryset.filter(condition).annotate(
+        search_rank=Case(
+            When(phone_digits=digits, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ),
+    ).order_by('search_rank', 'name')
+
+
+def _search_fts5(queryset, query):
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = customers_customer.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[build_match_expression(query)],
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+    ).order_by('search_rank', 'name')
+
+
+def _search_basic(queryset, terms):
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(email__icontains=term)
+    return queryset.filter(condition).annotate(
+        search_rank=Case(
+            When(name__istartswith=terms[0], then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        ),
+    ).order_by('search_rank', 'name')
@@ -0,0 +1,167 @@
+# customers/tests_search.py
+"""
+Tests para la búsqueda unificada de clientes (customers/search.py):
+- Normalización de teléfonos y columna phone_digits
+- Búsqueda por prefijo de teléfono sin importar el formato
+- Nombre por FTS5 (prefijo, acentos) y respaldo icontains
+- Las dos APIs y customer_list usan el mismo servicio, con tope de resultados
+"""
+
+import json
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from customers.api_views import customer_search_api
+
+from customers.models import Customer
+from customers.search import (
+    FTS_TABLE, MAX_RESULTS, normalize_phone, search_backend, search_customers,
+)
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def make_customer(name, phone='', email=''):
+    return Customer.objects.create(name=name, phone=phone, email=email)
+
+
+def names(queryset):
+    return [c.name for c in queryset]
+
+
+# ─────────────────────────────────────────────
+# TELÉFONOS
+# ─────────────────────────────────────────────
+
+class NormalizePhoneTest(TestCase):
+
+    def test_formats_collapse_to_local_digits(self):
+        for value in ('0414-555.12.34', '(0414) 555 1234', '+58 414 5551234', '0058-414-5551234'):
+            self.assertEqual(normalize_phone(value), '04145551234', value)
+
+    def test_empty(self):
+        self.assertEqual(normalize_phone(''), '')
+        self.assertEqual(normalize_phone(None), '')
+
+    def test_save_fills_phone_digits(self):
+        customer = make_customer('Ana', '0424-111-2233')
+        self.assertEqual(customer.phone_digits, '04241112233')
+        customer.phone = '+58 412 9990000'
+        customer.save(update_fields=['phone'])
+        customer.refresh_from_db()
+        self.assertEqual(customer.phone_digits, '04129990000')
+
+
+# ─────────────────────────────────────────────
+# SERVICIO
+# ─────────────────────────────────────────────
+
+class CustomerSearchTest(TestCase):
+    backend = None
+
+    def setUp(self):
+        self.maria = make_customer('María González', '0414-555-1234', 'maria@correo.com')
+        self.mario = make_customer('Mario Pérez', '0424 555 9999')
+        self.jose = make_customer('José Mariño', '+58 412 7770000')
+        self.luis = make_customer('Luis Rojas', '04145551299')
+
+    def search(self, query, **kwargs):
+        return names(search_customers(Customer.objects.all(), query, backend=self.backend, **kwargs))
+
+    def test_phone_prefix_any_format(self):
+        self.assertEqual(self.search('0414 555'), ['Luis Rojas', 'María González'])
+        self.assertEqual(self.search('0414-555-123'), ['María González'])
+
+    def test_phone_without_leading_zero_or_with_country_code(self):
+        self.assertEqual(self.search('412 777'), ['José Mariño'])
+        self.assertEqual(self.search('+58 424 555'), ['Mario Pérez'])
+
+    def test_exact_phone_ranks_first(self):
+        self.assertEqual(self.search('04145551234')[0], 'María González')
+
+    def test_name_prefix(self):
+        self.assertEqual(self.search('mario'), ['Mario Pérez'])
+        self.assertCountEqual(self.search('mar'), ['María González', 'Mario Pérez', 'José Mariño'])
+        self.assertEqual(self.search('luis roj'), ['Luis Rojas'])
+
+    def test_email_matches(self):
+        self.assertEqual(self.search('correo'), ['María González'])
+
+    def test_limit_is_capped(self):
+        for i in range(MAX_RESULTS + 5):
+            make_customer(f'Cliente Tope {i:02d}')
+        self.assertEqual(len(self.search('tope', limit=100)), MAX_RESULTS)
+        self.assertEqual(len(self.search('tope', limit=3)), 3)
+
+    def test_empty_query(self):
+        self.assertEqual(self.search('  -- '), [])
+
+
+class CustomerSearchFTSTest(CustomerSearchTest):
+    backend = 'fts5'
+
+    def setUp(self):
+        if search_backend() != 'fts5':
+            self.skipTest('SQLite sin FTS5')
+        super().setUp()
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.search('maria'), ['María González'])
+        self.assertEqual(self.search('jose mar'), ['José Mariño'])
+
+    def test_index_follows_renames_and_deletes(self):
+        Customer.objects.filter(pk=self.luis.pk).update(name='Luisa Rondón')
+        self.assertEqual(self.search('rondon'), ['Luisa Rondón'])
+        self.luis.delete()
+        self.assertEqual(self.search('rondon'), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+
+class CustomerSearchBasicTest(CustomerSearchTest):
+    backend = 'basic'
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class CustomerSearchViewsTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='cs_admin', password='pass123', is_admin=True)
+        self.client.login(username='cs_admin', password='pass123')
+        make_customer('Pedro Alcalá', '0416-321-0000')
+        make_customer('Carmen Alcántara', '0426-000-1111')
+
+    def test_pos_api_finds_by_phone(self):
+        response = self.client.get('/api/customers/search/', {'q': '0416 321'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['name'] for c in response.json()['customers']], ['Pedro Alcalá'])
+
+    def test_customers_api_finds_by_name(self):
+        # customer_search_api no tiene ruta propia: se llama directo
+        request = APIRequestFactory().get('/', {'q': 'alcan'})
+        force_authenticate(request, user=User.objects.get(username='cs_admin'))
+        response = customer_search_api(request)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual([c['name'] for c in data['customers']], ['Carmen Alcántara'])
+        self.assertEqual(data['count'], 1)
+
+    def test_customer_list_uses_search(self):
+        response = self.client.get(reverse('customers:customer_list'), {'q': '04263'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(names(response.context['page_obj']), [])
+        response = self.client.get(reverse('customers:customer_list'), {'q': '0426-000'})
+        self.assertEqual(names(response.context['page_obj']), ['Carmen Alcántara'])
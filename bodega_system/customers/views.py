@@ -4,16 +4,20 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from django.db.models import Sum, F, Q
+from django.db.models import Sum, F
 from django.core.paginator import Paginator
 from django.db import transaction
+from django.forms.models import construct_instance
 from decimal import Decimal
 
 from .models import Customer, CustomerCredit, CreditPayment, CustomerGeneralPayment
 from .forms import CustomerForm, CreditForm, CreditPaymentForm, CustomerGeneralPaymentForm
+from .search import search_customers
 from sales.models import Sale
+from utils.concurrency import retry_on_conflict
 from utils.decorators import admin_required, employee_or_admin_required, customer_access_required
 from utils.models import ExchangeRate
+from utils.pagination import paginate_keyset, htmx_fragment
 
 @customer_access_required
 def customer_list(request):
@@ -26,13 +30,6 @@ def customer_list(request):
     customers = Customer.objects.all()
     
     # Aplicar filtros
-    if search_query:
-        customers = customers.filter(
-            Q(name__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
-    
     if credit_filter == 'with_credit':
         customers = customers.filter(credit_limit_usd__gt=0)
     elif credit_filter == 'with_pending':
@@ -42,8 +39,11 @@ def customer_list(request):
         
         customers = customers.filter(id__in=customers_with_pending)
     
-    # Ordenar
-    customers = customers.order_by('name')
+    # Ordenar: por relevancia si hay búsqueda
+    if search_query:
+        customers = search_customers(customers, search_query)
+    else:
+        customers = customers.order_by('name')
     
     # Paginación
     paginator = Paginator(customers, 20)
@@ -154,8 +154,10 @@ def credit_list(request):
     customer_id = request.GET.get('customer')
     status = request.GET.get('status')
     
-    # Consulta base
-    credits = CustomerCredit.objects.all()
+    # Consulta base (abonos sumados en la misma consulta, sin N+1 por fila)
+    credits = CustomerCredit.objects.select_related('customer').annotate(
+        total_paid_usd=Sum('payments__amount_usd')
+    )
     
     # Aplicar filtros
     if customer_id:
@@ -169,18 +171,9 @@ def credit_list(request):
         today = timezone.now().date()
         credits = credits.filter(is_paid=False, date_due__lt=today)
     
-    # Ordenar
-    credits = credits.order_by('-date_created')
-    
-    # Paginación
-    paginator = Paginator(credits, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Obtener clientes para el filtro
-    customers = Customer.objects.filter(
-        is_active=True
-    ).order_by('name')
+    # Paginación por cursor sobre (-date_created, -id)
+    page_obj = paginate_keyset(request, credits, per_page=20,
+                               date_field='date_created', with_total=True)
 
     # ⭐ NUEVO: Calcular montos en Bs a tasa actual
     from utils.models import ExchangeRate
@@ -190,12 +183,20 @@ def credit_list(request):
 
     for credit in page_obj:
         # Calcular saldo pendiente en USD
-        total_paid_usd = credit.payments.aggregate(total=Sum('amount_usd'))['total'] or Decimal('0.00')
-        pending_amount_usd = credit.amount_usd - total_paid_usd
+        pending_amount_usd = credit.amount_usd - (credit.total_paid_usd or Decimal('0.00'))
         
         # Calcular equivalentes en Bs
         credit.amount_bs_current = round(credit.amount_usd * rate_value, 2)
         credit.pending_amount_bs_current = round(pending_amount_usd * rate_value, 2)
+
+    fragment = htmx_fragment(request)
+    if fragment:
+        return render(request, f'customers/credit_list_{fragment}.html', {'page_obj': page_obj})
+    
+    # Obtener clientes para el filtro
+    customers = Customer.objects.filter(
+        is_active=True
+    ).order_by('name')
     
     return render(request, 'customers/credit_list.html', {
         'page_obj': page_obj,
@@ -289,40 +290,20 @@ def credit_payment(request, pk):
             current_rate = ExchangeRate.get_latest_rate()
             rate_value = current_rate.bs_to_usd if current_rate else Decimal('36.00')
 
-            with transaction.atomic():
-                # Re-leer el crédito con lock para evitar race condition
-                credit = CustomerCredit.objects.select_for_update().get(pk=pk)
-
-                if credit.is_paid:
-                    messages.error(request, 'Este crédito ya fue pagado por otra transacción.')
-                    return redirect('customers:credit_detail', pk=credit.pk)
-
-                payment = form.save(commit=False)
-                payment.credit = credit
-                payment.received_by = request.user
-                payment.exchange_rate_used = rate_value
-                payment.amount_usd = round(payment.amount_bs / rate_value, 2)
-                payment.save()
-
-                total_paid_usd = credit.payments.aggregate(
-                    total=Sum('amount_usd')
-                )['total'] or Decimal('0.00')
-
-                total_paid_rounded = round(total_paid_usd, 2)
-                credit_amount_rounded = round(credit.amount_usd, 2)
-
-                if total_paid_rounded >= credit_amount_rounded:
-                    credit.is_paid = True
-                    credit.date_paid = timezone.now()
-                    credit.save()
-                    messages.success(request, 'Crédito pagado completamente.')
-                else:
-                    remaining_usd = credit_amount_rounded - total_paid_rounded
-                    remaining_bs_current = remaining_usd * rate_value
-                    messages.success(
-                        request,
-                        f'Pago registrado exitosamente. Saldo pendiente: ${remaining_usd:.2f} USD (Bs {remaining_bs_current:.2f} a tasa actual)'
-                    )
+            credit, remaining_usd = _register_credit_payment(pk, form, request.user, rate_value)
+
+            if remaining_usd is None:
+                messages.error(request, 'Este crédito ya fue pagado por otra transacción.')
+                return redirect('customers:credit_detail', pk=credit.pk)
+
+            if remaining_usd <= 0:
+                messages.success(request, 'Crédito pagado completamente.')
+            else:
+                remaining_bs_current = remaining_usd * rate_value
+                messages.success(
+                    request,
+                    f'Pago registrado exitosamente. Saldo pendiente: ${remaining_usd:.2f} USD (Bs {remaining_bs_current:.2f} a tasa actual)'
+                )
 
             return redirect('customers:customer_detail', pk=credit.customer.pk)
     else:
@@ -359,6 +340,49 @@ def credit_payment(request, pk):
     })
 
 
+@retry_on_conflict
+def _register_credit_payment(pk, form, user, rate_value):
+    """
+    Registra el pago de un crédito releído dentro de la transacción
+
+    Si otro pago guardó el crédito primero, el compare-and-swap de
+    CustomerCredit falla y el pago se repite con el saldo actualizado.
+
+    Returns:
+        tuple: (crédito, saldo pendiente en USD); saldo None si el crédito
+            ya estaba pagado (no se registra nada)
+    """
+    with transaction.atomic():
+        # Re-leer el crédito con lock para evitar race condition
+        credit = CustomerCredit.objects.select_for_update().get(pk=pk)
+
+        if credit.is_paid:
+            return credit, None
+
+        # Instancia nueva en cada intento (form.save(commit=False) devolvería
+        # la misma, con el pk del intento revertido)
+        payment = construct_instance(form, CreditPayment())
+        payment.credit = credit
+        payment.received_by = user
+        payment.exchange_rate_used = rate_value
+        payment.amount_usd = round(payment.amount_bs / rate_value, 2)
+        payment.save()
+
+        total_paid_usd = credit.payments.aggregate(
+            total=Sum('amount_usd')
+        )['total'] or Decimal('0.00')
+
+        total_paid_rounded = round(total_paid_usd, 2)
+        credit_amount_rounded = round(credit.amount_usd, 2)
+
+        if total_paid_rounded >= credit_amount_rounded:
+            credit.is_paid = True
+            credit.date_paid = timezone.now()
+            credit.save()
+
+        return credit, credit_amount_rounded - total_paid_rounded
+
+
 # ─────────────────────────────────────────────
 # PAGOS GENERALES FIFO
 # ─────────────────────────────────────────────
@@ -409,6 +433,24 @@ def _apply_fifo_payment(general_payment, customer, rate):
             credit.save()
 
 
+@retry_on_conflict
+def _register_general_payment(customer, form, user, amount_bs, amount_usd, rate_value):
+    """Crea el pago general y lo reparte; se repite si otro pago tocó los mismos créditos"""
+    with transaction.atomic():
+        gp = CustomerGeneralPayment.objects.create(
+            customer=customer,
+            amount_bs=amount_bs,
+            amount_usd=amount_usd,
+            exchange_rate_used=rate_value,
+            payment_method=form.cleaned_data['payment_method'],
+            mobile_reference=form.cleaned_data.get('mobile_reference') or '',
+            received_by=user,
+            notes=form.cleaned_data.get('notes') or '',
+        )
+        _apply_fifo_payment(gp, customer, rate_value)
+        return gp
+
+
 @customer_access_required
 def customer_general_payment_create(request, pk):
     """Pago general FIFO contra deuda total de un cliente."""
@@ -427,18 +469,7 @@ def customer_general_payment_create(request, pk):
             amount_bs = form.cleaned_data['amount_bs']
             amount_usd = round(amount_bs / rate_value, 2)
 
-            with transaction.atomic():
-                gp = CustomerGeneralPayment.objects.create(
-                    customer=customer,
-                    amount_bs=amount_bs,
-                    amount_usd=amount_usd,
-                    exchange_rate_used=rate_value,
-                    payment_method=form.cleaned_data['payment_method'],
-                    mobile_reference=form.cleaned_data.get('mobile_reference') or '',
-                    received_by=request.user,
-                    notes=form.cleaned_data.get('notes') or '',
-                )
-                _apply_fifo_payment(gp, customer, rate_value)
+            _register_general_payment(customer, form, request.user, amount_bs, amount_usd, rate_value)
 
             messages.success(request, f'Pago de Bs {amount_bs:.2f} registrado y distribuido exitosamente.')
             return redirect('customers:customer_detail', pk=customer.pk)
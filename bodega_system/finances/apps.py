@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class FinancesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finances'
-    verbose_name = 'Gestión Financiera'
\ No newline at end of file
+    verbose_name = 'Gestión Financiera'
+
+    def ready(self):
+        from . import signals  # noqa: F401
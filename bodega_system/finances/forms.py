@@ -156,7 +156,7 @@ class ReportFilterForm(forms.Form):
 class SalesReportFilterForm(ReportFilterForm):
     """Filtros extendidos para reporte de ventas"""
     employee = forms.ModelChoiceField(
-        queryset=User.objects.filter(is_active=True),
+        queryset=User.objects.filter(is_active=True).cached(),
         required=False,
         label="Empleado",
         empty_label="Todos",
@@ -173,7 +173,7 @@ class SalesReportFilterForm(ReportFilterForm):
 class PurchasesReportFilterForm(ReportFilterForm):
     """Filtros extendidos para reporte de compras"""
     supplier = forms.ModelChoiceField(
-        queryset=Supplier.objects.filter(is_active=True),
+        queryset=Supplier.objects.filter(is_active=True).cached(),
         required=False,
         label="Proveedor",
         empty_label="Todos",
@@ -190,7 +190,7 @@ class PurchasesReportFilterForm(ReportFilterForm):
 class InventoryFilterForm(forms.Form):
     """Filtros para reporte de inventario"""
     category = forms.ModelChoiceField(
-        queryset=Category.objects.all(),
+        queryset=Category.objects.cached(),
         required=False,
         label="Categoría",
         empty_label="Todas",
@@ -210,6 +210,23 @@ class InventoryFilterForm(forms.Form):
     )
 
 
+class StockHistoryFilterForm(ReportFilterForm):
+    """Filtros para el reporte de stock a una fecha y movimientos"""
+    category = forms.ModelChoiceField(
+        queryset=Category.objects.cached(),
+        required=False,
+        label="Categoría",
+        empty_label="Todas",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    group_by = forms.ChoiceField(
+        choices=[('category', 'Por categoría'), ('product', 'Por producto')],
+        required=False,
+        label="Valor al cierre",
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+
 class CreditsReportFilterForm(ReportFilterForm):
     """Filtros para reporte de cuentas por cobrar"""
     credit_status = forms.ChoiceField(
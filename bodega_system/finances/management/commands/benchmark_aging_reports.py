@@ -0,0 +1,134 @@
+# finances/management/commands/benchmark_aging_reports.py
+
+import random
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer, CustomerCredit, CreditPayment
+from finances.services import AgingService
+from sales.models import Sale
+from suppliers.models import Supplier, SupplierOrder
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los reportes de antigüedad (cuentas por cobrar y deuda a '
+        'proveedores): SQL contra el recorrido anterior en Python. '
+        'Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Créditos y órdenes a generar (default 100000)')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        user = get_user_model().objects.filter(is_superuser=True).first() \
+            or get_user_model().objects.first()
+        if user is None:
+            self.stdout.write(self.style.WARNING('Se necesita al menos un usuario'))
+            return
+
+        today = date.today()
+        results = {}
+        with transaction.atomic():
+            self.stdout.write(f'Generando {rows} créditos y {rows} órdenes...')
+            self._make_data(rows, user, today)
+            for name, run in (
+                ('cobrar SQL', lambda: self._receivables_sql(today)),
+                ('cobrar Python', lambda: self._receivables_python(today)),
+                ('pagar SQL', lambda: AgingService.payables(today=today)),
+                ('pagar Python', self._payables_python),
+            ):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    run()
+                    elapsed = (time.perf_counter() - start) * 1000
+                results[name] = (elapsed, len(ctx.captured_queries))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"\n{'reporte':<16}{'ms':>10}{'consultas':>12}")
+        for name, (elapsed, queries) in results.items():
+            self.stdout.write(f'{name:<16}{elapsed:>10.1f}{queries:>12}')
+
+    def _make_data(self, rows, user, today):
+        rng = random.Random(42)
+        customers = Customer.objects.bulk_create([
+            Customer(name=f'Bench aging {i}', credit_limit_usd=Decimal('1000'))
+            for i in range(200)
+        ])
+        sales = Sale.objects.bulk_create([
+            Sale(customer=rng.choice(customers), user=user, total_usd=Decimal('10'),
+                 total_bs=Decimal('400'), exchange_rate_used=Decimal('40'), is_credit=True)
+            for _ in range(rows)
+        ], batch_size=2000)
+        credits = CustomerCredit.objects.bulk_create([
+            CustomerCredit(
+                customer=sale.customer, sale=sale, amount_usd=Decimal('10'),
+                amount_bs=Decimal('400'), exchange_rate_used=Decimal('40'),
+                date_due=today - timedelta(days=rng.randint(-30, 120)),
+                is_paid=rng.random() < 0.3,
+            )
+            for sale in sales
+        ], batch_size=2000)
+        CreditPayment.objects.bulk_create([
+            CreditPayment(credit=credit, amount_usd=Decimal('4'), amount_bs=Decimal('160'),
+                          exchange_rate_used=Decimal('40'), payment_date=datetime.now(),
+                          received_by=user)
+            for credit in credits[::3]
+        ], batch_size=2000)
+
+        suppliers = Supplier.objects.bulk_create([
+            Supplier(name=f'Bench aging {i}') for i in range(100)
+        ])
+        SupplierOrder.objects.bulk_create([
+            SupplierOrder(
+                supplier=rng.choice(suppliers), created_by=user, status='received',
+                total_usd=Decimal('50'), paid_amount_usd=Decimal(rng.choice(['0', '20', '50'])),
+                received_date=datetime.now() - timedelta(days=rng.randint(0, 150)),
+            )
+            for _ in range(rows)
+        ], batch_size=2000)
+
+    def _receivables_sql(self, today):
+        credits = AgingService.credits_with_balance(
+            CustomerCredit.objects.filter(is_paid=False)
+        ).order_by('-date_created', '-id')
+        AgingService.receivables_summary(credits, today=today)
+        list(AgingService.credit_rows(credits[:50], today=today))
+
+    def _receivables_python(self, today):
+        """credits_report anterior: todos los créditos a Python con float"""
+        aging = {'current': 0.0, 'days_1_30': 0.0, 'days_31_60': 0.0, 'over_60': 0.0}
+        credits = CustomerCredit.objects.filter(is_paid=False).select_related(
+            'customer', 'sale'
+        ).annotate(paid_amount=Sum('payments__amount_usd'))
+        for c in credits:
+            balance = max(float(c.amount_usd) - float(c.paid_amount or 0), 0.0)
+            days = max((today - c.date_due).days, 0)
+            if days == 0:
+                aging['current'] += balance
+            elif days <= 30:
+                aging['days_1_30'] += balance
+            elif days <= 60:
+                aging['days_31_60'] += balance
+            else:
+                aging['over_60'] += balance
+
+    def _payables_python(self):
+        """supplier_debt_report anterior: todas las órdenes recibidas a Python"""
+        suppliers = {}
+        for order in SupplierOrder.objects.filter(status='received').select_related('supplier'):
+            owed = float(order.outstanding_balance_usd)
+            if owed <= 0:
+                continue
+            data = suppliers.setdefault(order.supplier_id, {'debt_usd': 0.0, 'orders': []})
+            data['debt_usd'] += owed
+            data['orders'].append(order)
@@ -0,0 +1,131 @@
+# finances/management/commands/benchmark_pdf_reports.py
+
+import gc
+import os
+import threading
+import time
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table
+
+from finances.pdf_generators import MAIN_TABLE_STYLE
+from finances.report_definitions import SalesReport
+from finances.reports import PdfBackend
+from sales.models import Sale
+
+
+class PeakRSS:
+    """Muestrea la memoria residente del proceso mientras dura el bloque"""
+
+    INTERVAL = 0.01
+
+    def __init__(self):
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _rss(self):
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * self.page_size
+
+    def _sample(self):
+        while not self._stop.wait(self.INTERVAL):
+            self.peak = max(self.peak, self._rss())
+
+    def __enter__(self):
+        gc.collect()
+        self.base = self.peak = self._rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._rss())
+
+    @property
+    def growth_mb(self):
+        return (self.peak - self.base) / (1024 * 1024)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el PDF del reporte de ventas (tiempo, memoria y tamaño): tabla '
+        'por páginas contra la tabla única anterior. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='10000,100000,500000',
+                            help='Tamaños a medir, separados por coma (default 10000,100000,500000)')
+        parser.add_argument('--legacy-max', type=int, default=20000,
+                            help='Tamaño máximo para la tabla única, que crece '
+                                 'de forma cuadrática (default 20000)')
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/statm'):
+            self.stdout.write(self.style.WARNING('La memoria se mide con /proc (solo Linux)'))
+            return
+        sizes = sorted(int(size) for size in options['rows'].split(','))
+
+        results = []
+        with transaction.atomic():
+            # Las ventas del benchmark se filtran por su empleado
+            user = get_user_model().objects.create_user(username='benchmark_pdf_reports')
+            self.params = {'employee': str(user.pk)}
+            created = 0
+            for size in sizes:
+                self.stdout.write(f'Generando ventas hasta {size}...')
+                self._make_sales(size - created, user)
+                created = size
+
+                results.append((size, 'por páginas') + self._measure(self._paged))
+                if size <= options['legacy_max']:
+                    results.append((size, 'tabla única') + self._measure(self._single_table))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"\n{'filas':>8}  {'método':<12}{'s':>9}{'MB pico':>10}{'MB PDF':>9}")
+        for size, name, elapsed, peak, pdf_size in results:
+            self.stdout.write(f'{size:>8}  {name:<12}{elapsed:>9.1f}{peak:>10.1f}{pdf_size:>9.1f}')
+
+    def _make_sales(self, count, user):
+        Sale.objects.bulk_create([
+            Sale(user=user, total_usd=Decimal('12.50'), total_bs=Decimal('500'),
+                 exchange_rate_used=Decimal('40'), payment_method='cash')
+            for _ in range(count)
+        ], batch_size=2000)
+
+    def _measure(self, run):
+        with PeakRSS() as memory:
+            start = time.perf_counter()
+            pdf_size = run(SalesReport(self.params))
+            elapsed = time.perf_counter() - start
+        return elapsed, memory.growth_mb, pdf_size / (1024 * 1024)
+
+    def _paged(self, report):
+        response = PdfBackend().render(None, report)
+        size = sum(len(chunk) for chunk in response.streaming_content)
+        # response.close() cerraría también la conexión (request_finished)
+        response.file_to_stream.close()
+        return size
+
+    def _single_table(self, report):
+        """generate_pdf_response anterior: todas las filas en una Table y en BytesIO"""
+        columns = report.export_columns()
+        headers = [c.label for c in columns]
+        rows = [[c.text(record) for c in columns] for record in report.records(stream=True)]
+        pagesize = landscape(A4) if report.landscape else A4
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=pagesize, rightMargin=1.5 * cm,
+                                leftMargin=1.5 * cm, topMargin=1.5 * cm, bottomMargin=1.5 * cm)
+        col_width = (pagesize[0] - 3 * cm) / len(headers)
+        table = Table([headers] + rows, colWidths=[col_width] * len(headers), repeatRows=1)
+        table.setStyle(MAIN_TABLE_STYLE)
+        doc.build([table])
+        return len(buffer.getvalue())
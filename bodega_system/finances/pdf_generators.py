@@ -1,16 +1,18 @@
 # finances/pdf_generators.py
 # Generadores de PDF para reportes usando ReportLab
+# (las columnas y totales de cada reporte salen de report_definitions.py)
 
-from datetime import date, datetime
-from io import BytesIO
+from datetime import datetime
+from itertools import islice
 
-from django.http import HttpResponse
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
+from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream, PDFZCompress
+from reportlab.pdfgen.canvas import Canvas
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
+    Flowable, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, HRFlowable
 )
 
 
@@ -27,24 +29,143 @@ RED = colors.HexColor('#dc2626')
 ORANGE = colors.HexColor('#ea580c')
 
 
-def generate_pdf_response(title, headers, rows, summary=None, metadata=None,
-                          landscape_mode=False, filename='reporte.pdf'):
+
+# Estilo de la tabla principal (cabecera en la fila 0 de cada página)
+MAIN_TABLE_STYLE = TableStyle([
+    # Cabecera
+    ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('TOPPADDING', (0, 0), (-1, 0), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+    # Filas
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('TOPPADDING', (0, 1), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+    ('LEFTPADDING', (0, 0), (-1, -1), 5),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, ROW_ALT]),
+])
+
+
+class _RowSource:
+    """Iterador de filas al que se le pueden devolver filas ya leídas"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = []
+
+    def take(self, count):
+        taken = self._pending[:count]
+        del self._pending[:count]
+        taken.extend(islice(self._rows, count - len(taken)))
+        return taken
+
+    def give_back(self, rows):
+        self._pending[0:0] = rows
+
+    def has_more(self):
+        if not self._pending:
+            self._pending.extend(islice(self._rows, 1))
+        return bool(self._pending)
+
+
+class StreamedTable(Flowable):
+    """
+    Tabla que se maqueta página a página a partir de un iterador de filas
+
+    Nunca cabe entera en el frame, así que ReportLab siempre la parte: cada
+    split devuelve una Table con la cabecera y las filas que caben en el
+    espacio que queda, seguida de otra StreamedTable con el resto. Solo se
+    leen y maquetan las filas de una página a la vez (una Table gigante se
+    maqueta completa y se vuelve a copiar en cada salto de página).
+    """
+
+    def __init__(self, headers, source, col_widths, row_height=None):
+        super().__init__()
+        self.headers = headers
+        self.source = source
+        self.col_widths = col_widths
+        self.header_height = self._table([]).wrap(0, 0)[1]
+        if row_height is None:
+            first = source.take(1)
+            source.give_back(first)
+            row_height = self._table(first).wrap(0, 0)[1] - self.header_height
+        self.row_height = row_height
+
+    def _table(self, rows):
+        table = Table([self.headers] + rows, colWidths=self.col_widths)
+        table.setStyle(MAIN_TABLE_STYLE)
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        # Más alta que el espacio disponible: el frame llama a split()
+        return availWidth, availHeight + self.row_height
+
+    def split(self, availWidth, availHeight):
+        count = int((availHeight - self.header_height) // self.row_height)
+        if count < 1:
+            return []
+        rows = self.source.take(count)
+        table = self._table(rows)
+        height = table.wrap(availWidth, availHeight)[1]
+        # Filas de varias líneas: las que no caben pasan a la página siguiente
+        while height > availHeight and len(rows) > 1:
+            extra = max(int((height - availHeight) // self.row_height), 1)
+            keep = max(len(rows) - extra, 1)
+            self.source.give_back(rows[keep:])
+            rows = rows[:keep]
+            table = self._table(rows)
+            height = table.wrap(availWidth, availHeight)[1]
+        if not self.source.has_more():
+            return [table]
+        return [table, StreamedTable(self.headers, self.source, self.col_widths, self.row_height)]
+
+    def draw(self):
+        pass
+
+
+class CompressedPagesCanvas(Canvas):
+    """
+    Canvas que comprime cada página al cerrarla
+
+    ReportLab guarda el contenido de todas las páginas sin comprimir hasta
+    save(); con miles de páginas eso es lo que más memoria ocupa.
+    """
+
+    def showPage(self):
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.compression and page.stream and not page.Contents:
+            page.Contents = PDFStream(
+                PDFDictionary({'Filter': PDFArray([PDFName(PDFZCompress.pdfname)])}),
+                PDFZCompress.encode(page.stream),
+            )
+            page.stream = None
+
+
+def write_pdf(fileobj, title, headers, rows, summary=None, metadata=None,
+              landscape_mode=False):
     """
-    Genera una HttpResponse con PDF usando ReportLab.
+    Escribe el PDF de un reporte en `fileobj`
 
     Args:
+        fileobj: Archivo binario abierto para escritura (p. ej. SpooledTemporaryFile)
         title: Título del reporte
         headers: Lista de strings para cabeceras de columnas
-        rows: Lista de listas con los datos de cada fila
+        rows: Iterable de filas (listas de strings); se consume una sola vez
         summary: Lista de tuplas (etiqueta, valor) para la tabla de totales
         metadata: Lista de tuplas (etiqueta, valor) para mostrar en el header del reporte
         landscape_mode: Si True usa orientación horizontal
-        filename: Nombre del archivo a descargar
     """
-    buffer = BytesIO()
     pagesize = landscape(A4) if landscape_mode else A4
     doc = SimpleDocTemplate(
-        buffer,
+        fileobj,
         pagesize=pagesize,
         rightMargin=1.5 * cm,
         leftMargin=1.5 * cm,
@@ -103,37 +224,12 @@ def generate_pdf_response(title, headers, rows, summary=None, metadata=None,
     story.append(Spacer(1, 0.5 * cm))
 
     # --- Tabla principal ---
-    if rows:
+    source = _RowSource(rows)
+    if source.has_more():
         # Calcular anchos de columna distribuyendo el espacio disponible
-        usable_width = (landscape(A4)[0] if landscape_mode else A4[0]) - 3 * cm
-        col_count = len(headers)
-        col_width = usable_width / col_count
-
-        table_data = [headers] + rows
-        main_table = Table(table_data, colWidths=[col_width] * col_count, repeatRows=1)
-
-        table_style_cmds = [
-            # Cabecera
-            ('BACKGROUND', (0, 0), (-1, 0), HEADER_BG),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('TOPPADDING', (0, 0), (-1, 0), 6),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            # Filas
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            ('LEFTPADDING', (0, 0), (-1, -1), 5),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 0.25, colors.lightgrey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, ROW_ALT]),
-        ]
-        main_table.setStyle(TableStyle(table_style_cmds))
-        story.append(main_table)
+        usable_width = pagesize[0] - 3 * cm
+        col_width = usable_width / len(headers)
+        story.append(StreamedTable(list(headers), source, [col_width] * len(headers)))
     else:
         story.append(Paragraph('No hay datos para mostrar en este período.', styles['Normal']))
 
@@ -165,194 +261,4 @@ def generate_pdf_response(title, headers, rows, summary=None, metadata=None,
         ]))
         story.append(summary_table)
 
-    doc.build(story)
-    pdf = buffer.getvalue()
-    buffer.close()
-
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    response.write(pdf)
-    return response
-
-
-# ============================================================================
-# FUNCIONES ESPECÍFICAS POR REPORTE
-# ============================================================================
-
-def pdf_sales_report(sales_qs, totals, metadata=None):
-    """PDF para reporte de ventas"""
-    headers = ['#Venta', 'Fecha', 'Cliente', 'Empleado', 'Método', 'Total USD', 'Total Bs']
-
-    rows = []
-    for sale in sales_qs:
-        customer = sale.customer.name if sale.customer else 'Cliente General'
-        employee = sale.user.get_full_name() or sale.user.username if sale.user else '-'
-        if sale.is_credit:
-            method = 'Crédito'
-        else:
-            method = sale.get_payment_method_display()
-        rows.append([
-            f'#{sale.id}',
-            sale.date.strftime('%d/%m/%Y %H:%M'),
-            customer,
-            employee,
-            method,
-            f'${float(sale.total_usd):.2f}',
-            f'Bs {float(sale.total_bs):.2f}',
-        ])
-
-    summary = [
-        ('Total USD', f'${float(totals.get("total_usd") or 0):.2f}'),
-        ('Total Bs', f'Bs {float(totals.get("total_bs") or 0):.2f}'),
-        ('Cantidad de Ventas', str(totals.get('count') or 0)),
-    ]
-
-    return generate_pdf_response(
-        title='Reporte de Ventas',
-        headers=headers,
-        rows=rows,
-        summary=summary,
-        metadata=metadata,
-        landscape_mode=True,
-        filename=f'reporte_ventas_{date.today().strftime("%Y%m%d")}.pdf',
-    )
-
-
-def pdf_purchases_report(orders_qs, totals, metadata=None):
-    """PDF para reporte de compras"""
-    headers = ['#Orden', 'Fecha', 'Proveedor', 'Total USD', 'Total Bs', 'Estado Pago']
-
-    rows = []
-    for order in orders_qs:
-        rows.append([
-            f'#{order.id}',
-            order.order_date.strftime('%d/%m/%Y %H:%M'),
-            order.supplier.name,
-            f'${float(order.total_usd):.2f}',
-            f'Bs {float(order.total_bs):.2f}',
-            order.payment_status_display,
-        ])
-
-    summary = [
-        ('Total USD', f'${float(totals.get("total_usd") or 0):.2f}'),
-        ('Total Bs', f'Bs {float(totals.get("total_bs") or 0):.2f}'),
-        ('Cantidad de Órdenes', str(totals.get('count') or 0)),
-    ]
-
-    return generate_pdf_response(
-        title='Reporte de Compras',
-        headers=headers,
-        rows=rows,
-        summary=summary,
-        metadata=metadata,
-        landscape_mode=True,
-        filename=f'reporte_compras_{date.today().strftime("%Y%m%d")}.pdf',
-    )
-
-
-def pdf_inventory_report(products_list, totals, metadata=None):
-    """PDF para reporte de inventario"""
-    headers = ['Producto', 'Código', 'Categoría', 'Stock', 'Mín', 'P.Compra USD', 'P.Venta USD', 'Valor USD']
-
-    rows = []
-    for p in products_list:
-        value = float(p.stock) * float(p.purchase_price_usd)
-        rows.append([
-            p.name[:30],
-            p.barcode or '-',
-            p.category.name if p.category else '-',
-            str(float(p.stock)),
-            str(float(p.min_stock)),
-            f'${float(p.purchase_price_usd):.2f}',
-            f'${float(p.selling_price_usd):.2f}',
-            f'${value:.2f}',
-        ])
-
-    summary = [
-        ('Total Productos', str(totals.get('count', 0))),
-        ('Valor Total USD', f'${float(totals.get("total_value_usd", 0)):.2f}'),
-        ('Productos Bajo Stock', str(totals.get('low_stock_count', 0))),
-        ('Sin Stock', str(totals.get('out_of_stock_count', 0))),
-    ]
-
-    return generate_pdf_response(
-        title='Reporte de Inventario',
-        headers=headers,
-        rows=rows,
-        summary=summary,
-        metadata=metadata,
-        landscape_mode=True,
-        filename=f'reporte_inventario_{date.today().strftime("%Y%m%d")}.pdf',
-    )
-
-
-def pdf_credits_report(credits_data, aging, metadata=None):
-    """PDF para reporte de cuentas por cobrar"""
-    headers = ['#', 'Cliente', 'Venta #', 'Monto USD', 'Pagado', 'Saldo', 'Vencimiento', 'Días Mora']
-
-    rows = []
-    for i, c in enumerate(credits_data, 1):
-        rows.append([
-            str(i),
-            c['customer'][:25],
-            f'#{c["sale_id"]}',
-            f'${c["amount"]:.2f}',
-            f'${c["paid"]:.2f}',
-            f'${c["balance"]:.2f}',
-            c['date_due'].strftime('%d/%m/%Y') if c['date_due'] else '-',
-            str(c['days_overdue']) if c['days_overdue'] > 0 else '-',
-        ])
-
-    total_balance = sum(c['balance'] for c in credits_data)
-    total_amount = sum(c['amount'] for c in credits_data)
-
-    summary = [
-        ('Total Créditos', str(len(credits_data))),
-        ('Monto Total USD', f'${total_amount:.2f}'),
-        ('Saldo Pendiente USD', f'${total_balance:.2f}'),
-        ('Vigente', f'${aging["current"]:.2f}'),
-        ('1-30 días', f'${aging["days_1_30"]:.2f}'),
-        ('31-60 días', f'${aging["days_31_60"]:.2f}'),
-        ('+60 días', f'${aging["over_60"]:.2f}'),
-    ]
-
-    return generate_pdf_response(
-        title='Reporte de Cuentas por Cobrar',
-        headers=headers,
-        rows=rows,
-        summary=summary,
-        metadata=metadata,
-        landscape_mode=True,
-        filename=f'reporte_creditos_{date.today().strftime("%Y%m%d")}.pdf',
-    )
-
-
-def pdf_supplier_debt_report(suppliers_data, total_debt, metadata=None):
-    """PDF para reporte de deuda a proveedores"""
-    headers = ['Proveedor', 'Teléfono', '# Órdenes', 'Total Comprado USD', 'Pagado USD', 'Deuda USD']
-
-    rows = []
-    for s in suppliers_data.values():
-        rows.append([
-            s['name'][:30],
-            s['phone'] or '-',
-            str(s['order_count']),
-            f'${s["total_usd"]:.2f}',
-            f'${s["paid_usd"]:.2f}',
-            f'${s["debt_usd"]:.2f}',
-        ])
-
-    summary = [
-        ('Total Proveedores con Deuda', str(len(suppliers_data))),
-        ('Deuda Total USD', f'${total_debt:.2f}'),
-    ]
-
-    return generate_pdf_response(
-        title='Reporte de Deuda a Proveedores',
-        headers=headers,
-        rows=rows,
-        summary=summary,
-        metadata=metadata,
-        landscape_mode=False,
-        filename=f'reporte_deuda_proveedores_{date.today().strftime("%Y%m%d")}.pdf',
-    )
+    doc.build(story, canvasmaker=CompressedPagesCanvas)
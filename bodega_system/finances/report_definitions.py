@@ -0,0 +1,449 @@
+# finances/report_definitions.py - REPORTES FINANCIEROS
+
+"""
+Definiciones de los reportes de finanzas sobre el motor de reports.py
+
+Cada clase describe filtros, columnas y medidas; las vistas solo crean el
+reporte desde el formulario y llaman a render_report().
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, CharField, Count, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Coalesce, Concat, NullIf, Trim
+from django.utils.functional import cached_property
+
+from customers.models import Customer
+from inventory.models import InventoryAdjustment, Product
+from sales.models import Sale, SaleItem
+from suppliers.models import SupplierOrder
+
+from .models import Expense
+
+from .reports import Column, DateRangeFilter, Filter, Measure, Report, money_sum
+from .services import AgingService, MONEY
+
+
+# ─────────────────────────────────────────
+# Ventas
+# ─────────────────────────────────────────
+
+# Los créditos se muestran como un método más
+SALE_METHODS = Sale.PAYMENT_METHODS + (('credit', 'Crédito'),)
+
+
+def user_name(prefix):
+    """Nombre completo del usuario en `prefix` (o su username si no lo tiene)"""
+    return Coalesce(
+        NullIf(Trim(Concat(f'{prefix}__first_name', Value(' '), f'{prefix}__last_name')), Value('')),
+        f'{prefix}__username',
+        output_field=CharField(),
+    )
+
+
+def sale_method(prefix=''):
+    """'credit' para ventas a crédito; si no, el método de pago"""
+    return Case(
+        When(**{f'{prefix}is_credit': True}, then=Value('credit')),
+        default=F(f'{prefix}payment_method'),
+        output_field=CharField(),
+    )
+
+
+def sale_method_filter(prefix=''):
+    def apply(report, queryset, value):
+        if value == 'credit':
+            return queryset.filter(**{f'{prefix}is_credit': True})
+        return queryset.filter(**{f'{prefix}payment_method': value, f'{prefix}is_credit': False})
+    return apply
+
+
+class SalesReport(Report):
+    title = 'Reporte de Ventas'
+    filename = 'reporte_ventas'
+
+    filters = (
+        DateRangeFilter('date'),
+        Filter('employee', lookup='user'),
+        Filter('payment_method', apply=sale_method_filter()),
+    )
+    columns = (
+        Column('id', '#Venta', kind='id'),
+        Column('date', 'Fecha', kind='datetime'),
+        Column('customer', 'Cliente', max_length=25,
+               source=Coalesce('customer__name', Value('Cliente General'))),
+        Column('employee', 'Empleado', source=user_name('user'), max_length=25),
+        Column('method', 'Método', source=sale_method(), choices=SALE_METHODS),
+        Column('total_usd', 'Total USD', kind='usd'),
+        Column('total_bs', 'Total Bs', kind='bs'),
+    )
+    measures = (
+        Measure('total_usd', 'Total USD', money_sum('total_usd')),
+        Measure('total_bs', 'Total Bs', money_sum('total_bs'), kind='bs'),
+        Measure('count', 'Cantidad de Ventas', Count('pk'), kind='int'),
+    )
+    ordering = ('-date', '-id')
+    cache_tables = (Sale, Customer, get_user_model())
+    archive = True
+
+    def get_queryset(self):
+        return Sale.objects.all()
+
+    @cached_property
+    def method_breakdown(self):
+        """Totales por método de pago (los créditos aparte)"""
+        return self.breakdown('method')
+
+
+def line_total(price_field):
+    return ExpressionWrapper(F('quantity') * F(price_field), output_field=MONEY)
+
+
+class SaleItemsReport(Report):
+    """Ítems vendidos, con los mismos filtros del reporte de ventas"""
+
+    title = 'Ítems Vendidos'
+    filename = 'reporte_items_vendidos'
+
+    filters = (
+        DateRangeFilter('sale__date'),
+        Filter('employee', lookup='sale__user'),
+        Filter('payment_method', apply=sale_method_filter('sale__')),
+    )
+    columns = (
+        Column('sale_id', '#Venta', kind='id'),
+        Column('date', 'Fecha', source='sale__date', kind='datetime'),
+        Column('customer', 'Cliente', max_length=25,
+               source=Coalesce('sale__customer__name', Value('Cliente General'))),
+        Column('employee', 'Empleado', source=user_name('sale__user'), max_length=25),
+        Column('method', 'Método', source=sale_method('sale__'), choices=SALE_METHODS),
+        Column('product', 'Producto', source=Coalesce('product__name', 'combo__name'), max_length=30),
+        Column('barcode', 'Código', source='product__barcode'),
+        Column('quantity', 'Cantidad', kind='number'),
+        Column('price_usd', 'Precio USD', kind='usd'),
+        Column('price_bs', 'Precio Bs', kind='bs'),
+        Column('subtotal_usd', 'Subtotal USD', source=line_total('price_usd'), kind='usd'),
+        Column('subtotal_bs', 'Subtotal Bs', source=line_total('price_bs'), kind='bs'),
+    )
+    measures = (
+        Measure('count', 'Ítems', Count('pk'), kind='int'),
+        Measure('subtotal_usd', 'Total USD', money_sum(line_total('price_usd'))),
+        Measure('subtotal_bs', 'Total Bs', money_sum(line_total('price_bs')), kind='bs'),
+    )
+    ordering = ('-date', '-sale_id', 'id')
+    archive = True
+
+    def get_queryset(self):
+        return SaleItem.objects.all()
+
+
+# ─────────────────────────────────────────
+# Compras
+# ─────────────────────────────────────────
+
+PAYMENT_STATUSES = (
+    ('paid', 'Pagado'),
+    ('partial', 'Pago Parcial'),
+    ('unpaid', 'Sin Pagar'),
+)
+
+
+class PurchasesReport(Report):
+    title = 'Reporte de Compras'
+    filename = 'reporte_compras'
+
+    filters = (
+        DateRangeFilter('order_date'),
+        Filter('supplier'),
+        Filter('payment_status', apply=lambda report, qs, value: qs.filter(paid=(value == 'paid'))),
+    )
+    columns = (
+        Column('id', '#Orden', kind='id'),
+        Column('order_date', 'Fecha', kind='datetime'),
+        Column('supplier', 'Proveedor', source='supplier__name', max_length=30),
+        Column('supplier_phone', 'Teléfono', source='supplier__phone', export=False),
+        Column('total_usd', 'Total USD', kind='usd'),
+        Column('total_bs', 'Total Bs', kind='bs'),
+        Column('paid_amount_usd', 'Pagado USD', kind='usd'),
+        Column('paid', 'Pagada', kind='bool', export=False),
+        # Mismo criterio que SupplierOrder.payment_status
+        Column('payment_status', 'Estado Pago', choices=PAYMENT_STATUSES, source=Case(
+            When(paid_amount_usd__gte=F('total_usd'), then=Value('paid')),
+            When(paid_amount_usd__gt=0, then=Value('partial')),
+            default=Value('unpaid'),
+            output_field=CharField(),
+        )),
+    )
+    measures = (
+        Measure('total_usd', 'Total USD', money_sum('total_usd')),
+        Measure('total_bs', 'Total Bs', money_sum('total_bs'), kind='bs'),
+        Measure('count', 'Cantidad de Órdenes', Count('pk'), kind='int'),
+    )
+    ordering = ('-order_date', '-id')
+
+    def get_queryset(self):
+        return SupplierOrder.objects.filter(status='received')
+
+
+# ─────────────────────────────────────────
+# Inventario
+# ─────────────────────────────────────────
+
+STOCK_VALUE = ExpressionWrapper(F('stock') * F('purchase_price_usd'), output_field=MONEY)
+
+INVENTORY_ORDERINGS = {
+    'name': ('name',),
+    'category': ('category', 'name'),
+    'stock': ('stock', 'name'),
+    'value': ('-value_usd', 'name'),
+}
+
+
+class InventoryReport(Report):
+    title = 'Reporte de Inventario'
+    filename = 'reporte_inventario'
+
+    filters = (
+        Filter('category'),
+        Filter('stock_status', lookup='stock_state'),
+    )
+    columns = (
+        Column('id', '#', export=False),
+        Column('name', 'Producto', max_length=30),
+        Column('barcode', 'Código'),
+        Column('category', 'Categoría', source='category__name'),
+        Column('unit_type', 'Unidad', choices=Product.UNIT_TYPES, export=False),
+        Column('stock', 'Stock', kind='number'),
+        Column('min_stock', 'Mín', kind='number'),
+        Column('stock_state', 'Estado', choices=Product.STOCK_STATES, export=False),
+        Column('purchase_price_usd', 'P.Compra USD', kind='usd'),
+        Column('selling_price_usd', 'P.Venta USD', kind='usd'),
+        Column('value_usd', 'Valor USD', kind='usd', source=STOCK_VALUE),
+    )
+    measures = (
+        Measure('count', 'Total Productos', Count('pk'), kind='int'),
+        Measure('total_value_usd', 'Valor Total USD', money_sum(STOCK_VALUE)),
+        Measure('low_stock_count', 'Productos Bajo Stock',
+                Count('pk', filter=Q(stock_state='low')), kind='int'),
+        Measure('out_of_stock_count', 'Sin Stock',
+                Count('pk', filter=Q(stock_state='out')), kind='int'),
+    )
+
+    def get_queryset(self):
+        return Product.objects.filter(is_active=True)
+
+    def get_ordering(self):
+        return INVENTORY_ORDERINGS.get(self.params.get('sort_by'), INVENTORY_ORDERINGS['name'])
+
+    def totals(self):
+        # Sin filtro de estado el valor sale del libro de valoración (total o
+        # de la categoría), igual que en el resto de pantallas de inventario
+        if self._totals is None:
+            totals = super().totals()
+            if not self.params.get('stock_status'):
+                from inventory.services import ValuationService
+
+                totals['total_value_usd'] = ValuationService.totals(
+                    self.params.get('category')
+                )['purchase_value_usd']
+        return self._totals
+
+
+class AdjustmentsReport(Report):
+    """Ajustes de inventario; filtros de la lista de ajustes (?product=&type=)"""
+
+    title = 'Ajustes de Inventario'
+    filename = 'ajustes_inventario'
+
+    filters = (
+        DateRangeFilter('adjusted_at'),
+        Filter('product', lookup='product_id'),
+        Filter('type', lookup='adjustment_type'),
+    )
+    columns = (
+        Column('id', '#', kind='id'),
+        Column('adjusted_at', 'Fecha', kind='datetime'),
+        Column('product', 'Producto', source='product__name', max_length=30),
+        Column('barcode', 'Código', source='product__barcode'),
+        Column('adjustment_type', 'Tipo', choices=InventoryAdjustment.ADJUSTMENT_TYPES),
+        Column('quantity', 'Cantidad', kind='number'),
+        Column('previous_stock', 'Stock Previo', kind='number'),
+        Column('new_stock', 'Nuevo Stock', kind='number'),
+        Column('reason', 'Razón', max_length=40),
+        Column('adjusted_by', 'Ajustado por', source=user_name('adjusted_by'), max_length=25),
+    )
+    measures = (
+        Measure('count', 'Total Ajustes', Count('pk'), kind='int'),
+    )
+    ordering = ('-adjusted_at', '-id')
+    archive = True
+
+    def get_queryset(self):
+        return InventoryAdjustment.objects.all()
+
+
+# ─────────────────────────────────────────
+# Cuentas por cobrar
+# ─────────────────────────────────────────
+
+RECEIVABLE_LABELS = (
+    ('current', 'Vigente'),
+    ('days_1_30', '1-30 días'),
+    ('days_31_60', '31-60 días'),
+    ('over_60', '+60 días'),
+)
+
+
+def _filter_credit_status(report, queryset, value):
+    if value == 'pending':
+        return queryset.filter(is_paid=False)
+    if value == 'overdue':
+        return queryset.filter(is_paid=False, date_due__lt=report.today)
+    if value == 'paid':
+        return queryset.filter(is_paid=True)
+    return queryset  # 'all'
+
+
+def _days_overdue(report, record):
+    if record['date_due'] and not record['is_paid']:
+        return max((report.today - record['date_due']).days, 0)
+    return 0
+
+
+class CreditsReport(Report):
+    title = 'Reporte de Cuentas por Cobrar'
+    filename = 'reporte_creditos'
+
+    filters = (
+        DateRangeFilter('date_created'),
+        Filter('credit_status', apply=_filter_credit_status, default='pending'),
+    )
+    columns = (
+        Column('id', '#', kind='id'),
+        Column('customer', 'Cliente', source='customer__name', max_length=25),
+        Column('sale_id', 'Venta #', kind='id'),
+        Column('amount', 'Monto USD', source='amount_usd', kind='usd'),
+        Column('paid', 'Pagado', source='paid_amount', kind='usd'),
+        Column('balance', 'Saldo', kind='usd'),
+        Column('date_due', 'Vencimiento', kind='date'),
+        Column('is_paid', 'Pagado', kind='bool', export=False),
+        Column('days_overdue', 'Días Mora', kind='int', compute=_days_overdue),
+    )
+    ordering = ('-date_created', '-id')
+
+    @property
+    def credit_status(self):
+        return self.filters[1].value(self)
+
+    def get_queryset(self):
+        from customers.models import CustomerCredit
+
+        return AgingService.credits_with_balance(CustomerCredit.objects.all())
+
+    def get_measures(self):
+        buckets = AgingService.receivable_buckets(self.today)
+        return [
+            Measure('count', 'Total Créditos', Count('pk'), kind='int'),
+            Measure('amount', 'Monto Total USD', money_sum('amount_usd')),
+            Measure('paid', 'Pagado USD', money_sum('paid_amount'), summary=False),
+            Measure('balance', 'Saldo Pendiente USD', money_sum('balance')),
+        ] + [Measure(key, label, buckets[key]) for key, label in RECEIVABLE_LABELS]
+
+    def aging(self):
+        totals = self.totals()
+        return {key: totals[key] for key, _ in RECEIVABLE_LABELS}
+
+    def metadata(self):
+        return super().metadata() + [('Estado', self.credit_status.capitalize())]
+
+
+# ─────────────────────────────────────────
+# Cuentas por pagar
+# ─────────────────────────────────────────
+
+PAYABLE_LABELS = (
+    ('days_0_30', '0-30 días'),
+    ('days_31_60', '31-60 días'),
+    ('days_61_90', '61-90 días'),
+    ('over_90', '+90 días'),
+)
+
+
+class SupplierDebtReport(Report):
+    title = 'Reporte de Deuda a Proveedores'
+    filename = 'reporte_deuda_proveedores'
+    landscape = False
+    per_page = None
+
+    group_by = ('id', 'name', 'phone')
+    columns = (
+        Column('id', '#', source='supplier_id', export=False),
+        Column('name', 'Proveedor', source='supplier__name', max_length=30),
+        Column('phone', 'Teléfono', source='supplier__phone'),
+        Column('order_count', '# Órdenes', kind='int', measure='order_count'),
+        Column('total_usd', 'Total Comprado USD', kind='usd', measure='total_usd'),
+        Column('paid_usd', 'Pagado USD', kind='usd', measure='paid_usd'),
+        Column('debt_usd', 'Deuda USD', kind='usd', measure='debt_usd'),
+    )
+    ordering = ('-debt_usd', 'name')
+
+    def get_queryset(self):
+        return AgingService.outstanding_orders()
+
+    def get_measures(self):
+        buckets = AgingService.payable_buckets(self.today)
+        return [
+            Measure('supplier_count', 'Total Proveedores con Deuda',
+                    Count('supplier', distinct=True), kind='int'),
+            Measure('order_count', 'Órdenes Pendientes', Count('pk'), kind='int'),
+            Measure('total_usd', 'Total Comprado USD', money_sum('total_usd'), summary=False),
+            Measure('paid_usd', 'Pagado USD', money_sum('paid_amount_usd'), summary=False),
+            Measure('debt_usd', 'Deuda Total USD', money_sum('debt_usd')),
+        ] + [Measure(key, label, buckets[key]) for key, label in PAYABLE_LABELS]
+
+    def aging(self):
+        totals = self.totals()
+        return {key: totals[key] for key, _ in PAYABLE_LABELS}
+
+    def prepare_records(self, records):
+        # En pantalla cada proveedor lista sus órdenes pendientes más recientes
+        orders = AgingService.recent_outstanding_orders([r['id'] for r in records])
+        for record in records:
+            record['orders'] = orders[record['id']]
+        return records
+
+
+# ─────────────────────────────────────────
+# Gastos
+# ─────────────────────────────────────────
+
+class ExpensesReport(Report):
+    """Gastos; filtros de la lista de gastos (?category=&start_date=&end_date=)"""
+
+    title = 'Gastos'
+    filename = 'gastos'
+
+    filters = (
+        Filter('category'),
+        Filter('start_date', lookup='date__gte'),
+        Filter('end_date', lookup='date__lte'),
+    )
+    columns = (
+        Column('id', '#', kind='id'),
+        Column('date', 'Fecha', kind='date'),
+        Column('category', 'Categoría', choices=Expense.EXPENSE_CATEGORIES),
+        Column('description', 'Descripción', max_length=40),
+        Column('amount_bs', 'Monto Bs', kind='bs'),
+        Column('amount_usd', 'Monto USD', kind='usd'),
+        Column('exchange_rate_used', 'Tasa', kind='number'),
+        Column('receipt_number', 'Comprobante'),
+        Column('created_by', 'Registrado por', source=user_name('created_by'), max_length=25),
+    )
+    measures = (
+        Measure('count', 'Total Gastos', Count('pk'), kind='int'),
+        Measure('amount_bs', 'Total Bs', money_sum('amount_bs'), kind='bs'),
+        Measure('amount_usd', 'Total USD', money_sum('amount_usd')),
+    )
+    ordering = ('-date', '-id')
+
+    def get_queryset(self):
+        return Expense.objects.all()
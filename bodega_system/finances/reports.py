@@ -0,0 +1,772 @@
+# finances/reports.py - MOTOR DE REPORTES
+
+"""
+Reportes declarativos compartidos por HTML, PDF, CSV y XLSX
+
+Cada reporte (ver report_definitions.py) declara:
+- filters: Filter que aplican los valores del formulario al queryset
+- columns: Column de cada fila (campo, ruta o expresión SQL)
+- measures: Measure agregadas sobre todas las filas filtradas
+- group_by: claves de columnas; si se indica, cada fila es un grupo
+  (GROUP BY) y las columnas con `measure` leen el agregado del grupo
+
+A partir de eso el motor arma siempre las mismas consultas: un aggregate()
+con todas las medidas (totales) y un values_list() de las columnas que se
+recorre por bloques con iterator(). Los backends solo dan formato, así que
+la pantalla y las exportaciones muestran los mismos números; las de CSV,
+XLSX y PDF escriben mientras leen, sin cargar todas las filas en memoria.
+
+Los reportes que declaran `cache_tables` guardan totales, páginas y PDF en
+la caché con una clave que incluye los filtros y la versión de esas tablas
+(ver ReportCache).
+
+Los reportes con `archive = True` leen también la base de archivo
+(utils/archive.py) cuando el período empieza en un mes archivado: las
+medidas se suman entre bases y las filas archivadas siguen a las de la
+base principal.
+"""
+
+import csv
+import hashlib
+import tempfile
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import render
+
+from utils.archive import DEFAULT_DB, ArchiveService
+from utils.versions import TableVersions
+from utils.xlsx import CONTENT_TYPE as XLSX_CONTENT_TYPE, write_xlsx
+
+from .services import MONEY, ZERO
+
+# Filas por bloque al recorrer el resultado completo (PDF, CSV, XLSX)
+CHUNK_SIZE = 2000
+
+# Bytes que un archivo generado (XLSX, PDF) puede ocupar en memoria antes de pasar a disco
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+# Vida de un resultado cacheado. Con las versiones en la clave no hace falta
+# borrar nada; el plazo corto de los períodos abiertos solo acota lo que
+# escriba sin pasar por TableVersions. Los cerrados casi nunca se recalculan.
+REPORT_CACHE_TIMEOUT = 15 * 60
+CLOSED_REPORT_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+
+# PDF más grande que se guarda en la caché (los mayores se generan siempre)
+PDF_CACHE_MAX_SIZE = 1024 * 1024
+
+
+class ChainedRows:
+    """
+    values_list de varias bases leídos uno tras otro
+
+    Soporta lo que usan Paginator y records(): count(), cortes e iterator().
+    """
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+        self._counts = None
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = [queryset.count() for queryset in self.querysets]
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        for queryset in self.querysets:
+            yield from queryset
+
+    def iterator(self, chunk_size=None):
+        for queryset in self.querysets:
+            yield from queryset.iterator(chunk_size=chunk_size)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        rows = []
+        for queryset, count in zip(self.querysets, self.counts()):
+            if stop is not None and stop <= 0:
+                break
+            if start < count:
+                rows.extend(queryset[start:stop])
+            start = max(start - count, 0)
+            stop = None if stop is None else stop - count
+        return rows
+
+
+def money_sum(expression, **kwargs):
+    """SUM de montos que devuelve 0 (no None) cuando no hay filas"""
+    return Coalesce(Sum(expression, **kwargs), Value(ZERO), output_field=MONEY)
+
+
+def get_date_range(form_data):
+    """Helper para obtener rango de fechas desde el formulario"""
+    period = form_data.get('period')
+    today = date.today()
+
+    if period == 'today':
+        return today, today
+    elif period == 'yesterday':
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    elif period == 'this_week':
+        start = today - timedelta(days=today.weekday())
+        return start, today
+    elif period == 'last_week':
+        start = today - timedelta(days=today.weekday() + 7)
+        end = start + timedelta(days=6)
+        return start, end
+    elif period == 'this_month':
+        start = today.replace(day=1)
+        return start, today
+    elif period == 'last_month':
+        first_this_month = today.replace(day=1)
+        last_month_end = first_this_month - timedelta(days=1)
+        last_month_start = last_month_end.replace(day=1)
+        return last_month_start, last_month_end
+    elif period == 'this_year':
+        start = today.replace(month=1, day=1)
+        return start, today
+    elif period == 'custom':
+        return form_data.get('start_date'), form_data.get('end_date')
+
+    return None, None
+
+
+# ─────────────────────────────────────────
+# Formato de valores
+# ─────────────────────────────────────────
+
+def format_value(value, kind):
+    """Texto de un valor para mostrar (PDF)"""
+    if value is None or value == '':
+        return '-'
+    if kind == 'usd':
+        return f'${value:.2f}'
+    if kind == 'bs':
+        return f'Bs {value:.2f}'
+    if kind == 'id':
+        return f'#{value}'
+    if kind == 'number':
+        return f'{value:.2f}'.rstrip('0').rstrip('.')
+    if kind == 'date':
+        return value.strftime('%d/%m/%Y')
+    if kind == 'datetime':
+        return value.strftime('%d/%m/%Y %H:%M')
+    if kind == 'bool':
+        return 'Sí' if value else 'No'
+    return str(value)
+
+
+def export_value(value, kind):
+    """Valor crudo para exportar (CSV): punto decimal y fechas ISO"""
+    if value is None:
+        return ''
+    if kind in ('usd', 'bs'):
+        return f'{value:.2f}'
+    if kind == 'datetime':
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if kind == 'date':
+        return value.isoformat()
+    if kind == 'bool':
+        return 'Sí' if value else 'No'
+    return value
+
+
+# ─────────────────────────────────────────
+# Declaraciones
+# ─────────────────────────────────────────
+
+class Filter:
+    """
+    Filtro del reporte: aplica params[key] al queryset
+
+    Los valores vacíos no filtran (salvo que haya `default`). `lookup` es
+    el campo a comparar (default: key); los casos especiales pasan
+    `apply(report, queryset, value)`.
+    """
+
+    def __init__(self, key, lookup=None, apply=None, default=None):
+        self.key = key
+        self.lookup = lookup or key
+        self.apply = apply
+        self.default = default
+
+    def value(self, report):
+        value = report.params.get(self.key)
+        return self.default if value in (None, '') else value
+
+    def __call__(self, report, queryset):
+        value = self.value(report)
+        if value in (None, ''):
+            return queryset
+        if self.apply is not None:
+            return self.apply(report, queryset, value)
+        return queryset.filter(**{self.lookup: value})
+
+
+class DateRangeFilter(Filter):
+    """Rango params['start_date']..params['end_date'] sobre la fecha de un DateTimeField"""
+
+    def __init__(self, lookup):
+        super().__init__('start_date', lookup=lookup)
+
+    def __call__(self, report, queryset):
+        start, end = report.params.get('start_date'), report.params.get('end_date')
+        if not (start and end):
+            return queryset
+        return queryset.filter(**{
+            f'{self.lookup}__date__gte': start,
+            f'{self.lookup}__date__lte': end,
+        })
+
+
+class Column:
+    """
+    Columna del reporte
+
+    Args:
+        key: Clave en cada fila (dict)
+        label: Cabecera en PDF y CSV
+        source: Campo o ruta ('supplier__name') o expresión SQL (default: key)
+        kind: 'text', 'id', 'int', 'number', 'usd', 'bs', 'date', 'datetime', 'bool'
+        choices: Pares (valor, etiqueta); la fila trae además '<key>_display'
+        measure: En reportes agrupados, clave de la Measure que da el valor
+        compute: compute(report, fila) calculado en Python (no va a la consulta)
+        export: Si sale en PDF y CSV (las de solo pantalla van con False)
+        max_length: Recorte del texto en el PDF
+    """
+
+    def __init__(self, key, label, source=None, kind='text', choices=None, measure=None,
+                 compute=None, export=True, max_length=None):
+        self.key = key
+        self.label = label
+        self.source = source if source is not None else key
+        self.kind = kind
+        self.choices = dict(choices or ())
+        self.measure = measure
+        self.compute = compute
+        self.export = export
+        self.max_length = max_length
+
+    @property
+    def is_expression(self):
+        return self.measure is None and self.compute is None and not isinstance(self.source, str)
+
+    @property
+    def alias(self):
+        """Nombre de la columna en el values_list (None si se calcula en Python)"""
+        if self.compute is not None:
+            return None
+        if self.measure is not None:
+            return f'measure_{self.measure}'
+        if self.is_expression:
+            return f'report_{self.key}'
+        return self.source
+
+    def raw(self, record):
+        if self.choices:
+            return record[f'{self.key}_display']
+        return record[self.key]
+
+    def text(self, record):
+        text = format_value(self.raw(record), self.kind)
+        if self.max_length:
+            text = text[:self.max_length]
+        return text
+
+    def export_value(self, record):
+        return export_value(self.raw(record), self.kind)
+
+    def typed_value(self, record):
+        """Valor con su tipo (número, fecha) para hojas de cálculo"""
+        value = self.raw(record)
+        if self.kind == 'bool':
+            return 'Sí' if value else 'No'
+        return value
+
+
+class Measure:
+    """Agregado sobre las filas filtradas (o sobre cada grupo)"""
+
+    def __init__(self, key, label, aggregate, kind='usd', summary=True):
+        self.key = key
+        self.label = label
+        self.aggregate = aggregate
+        self.kind = kind
+        self.summary = summary
+
+    @property
+    def alias(self):
+        # Prefijo propio: no choca con campos ni anotaciones del modelo
+        return f'measure_{self.key}'
+
+
+# ─────────────────────────────────────────
+# Caché
+# ─────────────────────────────────────────
+
+def normalize_params(params):
+    """Filtros como texto estable: ordenados, sin vacíos, instancias por pk"""
+    items = []
+    for key, value in sorted(params.items()):
+        if value is None or value == '':
+            continue
+        if hasattr(value, 'pk'):
+            value = value.pk
+        elif isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        items.append(f'{key}={value}')
+    return '&'.join(items)
+
+
+class ReportCache:
+    """
+    Resultados de reportes cacheados por (reporte, filtros, versión de datos)
+
+    La versión sale de TableVersions: cualquier escritura en las tablas del
+    reporte cambia la clave. Para un período cerrado (termina antes de hoy)
+    solo cuentan las escrituras de filas con fecha anterior a hoy, así que
+    las ventas del día no lo invalidan.
+    """
+
+    _MISSING = object()
+
+    @staticmethod
+    def key(name, params, tables, closed=False):
+        digest = hashlib.sha1(normalize_params(params).encode('utf-8')).hexdigest()
+        return f'report:{name}:{digest}:{TableVersions.get(tables, closed)}'
+
+    @staticmethod
+    def timeout(closed=False):
+        return CLOSED_REPORT_CACHE_TIMEOUT if closed else REPORT_CACHE_TIMEOUT
+
+    @staticmethod
+    def get_or_set(key, compute, closed=False):
+        """Valor cacheado en `key`, o compute() guardado con el plazo que corresponde"""
+        value = cache.get(key, ReportCache._MISSING)
+        if value is ReportCache._MISSING:
+            value = compute()
+            cache.set(key, value, ReportCache.timeout(closed))
+        return value
+
+    @staticmethod
+    def cached(name, params, tables, compute, end_date=None, today=None):
+        """
+        Atajo para resultados fuera del motor (p. ej. profits_report)
+
+        Args:
+            name: Nombre del resultado
+            params: Filtros que lo determinan
+            tables: Modelos que lee compute()
+            compute: Función sin argumentos que calcula el resultado
+            end_date: Fin del período; si es anterior a hoy el período está cerrado
+        """
+        closed = end_date is not None and end_date < (today or date.today())
+        key = ReportCache.key(name, params, tables, closed)
+        return ReportCache.get_or_set(key, compute, closed)
+
+
+# ─────────────────────────────────────────
+# Reporte
+# ─────────────────────────────────────────
+
+class Report:
+    """
+    Base de los reportes declarativos
+
+    Las subclases definen get_queryset() y las declaraciones; lo demás
+    (totales, filas, paginación, metadatos) sale de aquí.
+    """
+
+    title = ''
+    filename = 'reporte'
+    landscape = True
+    filters = ()
+    columns = ()
+    measures = ()
+    group_by = ()
+    ordering = ()
+    # None: sin paginación (todas las filas en la pantalla)
+    per_page = 50
+    # Modelos que lee el reporte; si se indican, totales, páginas y PDF se
+    # cachean (ReportCache) con la versión de estas tablas en la clave
+    cache_tables = ()
+    # Si el modelo se archiva (utils/archive.py): los períodos viejos leen
+    # también la base de archivo. Solo para reportes sin group_by y
+    # ordenados por fecha descendente (lo archivado va al final)
+    archive = False
+
+    def __init__(self, params=None, today=None):
+        self.params = dict(params or {})
+        self.today = today or date.today()
+        self._totals = None
+
+    @classmethod
+    def from_form(cls, form, **kwargs):
+        """Reporte con los filtros de un formulario (vacío si no es válido)"""
+        params = {}
+        if form.is_valid():
+            params.update(form.cleaned_data)
+            if 'period' in form.cleaned_data:
+                params['start_date'], params['end_date'] = get_date_range(form.cleaned_data)
+        return cls(params, **kwargs)
+
+    # --- Declaraciones (sobrescribibles cuando dependen de params/today) ---
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def get_columns(self):
+        return list(self.columns)
+
+    def get_measures(self):
+        return list(self.measures)
+
+    def get_ordering(self):
+        return list(self.ordering)
+
+    def get_column(self, key):
+        return next(c for c in self.get_columns() if c.key == key)
+
+    def export_columns(self):
+        return [c for c in self.get_columns() if c.export]
+
+    def get_filename(self, extension):
+        return f'{self.filename}_{self.today.strftime("%Y%m%d")}.{extension}'
+
+    # --- Caché ---
+
+    @property
+    def closed(self):
+        """Si el período del reporte terminó antes de hoy"""
+        end = self.params.get('end_date')
+        return end is not None and end < self.today
+
+    def cache_key(self, part):
+        """Clave de una parte del resultado, o None si el reporte no se cachea"""
+        if not self.cache_tables:
+            return None
+        return ReportCache.key(f'{type(self).__name__}:{part}', self.params,
+                               self.cache_tables, self.closed)
+
+    def cached(self, part, compute):
+        key = self.cache_key(part)
+        if key is None:
+            return compute()
+        return ReportCache.get_or_set(key, compute, self.closed)
+
+    # --- Consultas ---
+
+    def databases(self):
+        """Bases que lee el reporte para su período"""
+        if not self.archive:
+            return [DEFAULT_DB]
+        return ArchiveService.databases(self.params.get('start_date'))
+
+    def queryset(self, using=DEFAULT_DB):
+        """Queryset base con los filtros aplicados"""
+        queryset = self.get_queryset().using(using)
+        for report_filter in self.filters:
+            queryset = report_filter(self, queryset)
+        return queryset
+
+    def totals(self):
+        """Todas las medidas en un solo aggregate (se calcula una vez)"""
+        if self._totals is None:
+            self._totals = self.cached('totals', self._compute_totals)
+        return self._totals
+
+    def _compute_totals(self):
+        measures = self.get_measures()
+        totals = {}
+        for using in self.databases() if measures else ():
+            values = self.queryset(using).order_by().aggregate(
+                **{m.alias: m.aggregate for m in measures}
+            )
+            for m in measures:
+                totals[m.key] = _add(totals.get(m.key), values[m.alias])
+        return totals
+
+    def rows(self):
+        """values_list con las columnas del reporte, sin evaluar (se puede paginar)"""
+        databases = self.databases()
+        if len(databases) == 1:
+            return self._rows(databases[0])
+        return ChainedRows([self._rows(using) for using in databases])
+
+    def _rows(self, using):
+        selected = [c for c in self.get_columns() if c.alias]
+        queryset = self.queryset(using)
+        annotations = {c.alias: c.source for c in selected if c.is_expression}
+
+        if self.group_by:
+            groups = [c for c in selected if c.key in self.group_by]
+            queryset = queryset.annotate(**{
+                c.alias: c.source for c in groups if c.is_expression
+            }).order_by().values(*[c.alias for c in groups]).annotate(**{
+                m.alias: m.aggregate for m in self.get_measures()
+            })
+        elif annotations:
+            queryset = queryset.annotate(**annotations)
+
+        return queryset.values_list(*[c.alias for c in selected]).order_by(*self._order_by())
+
+    def _order_by(self):
+        """get_ordering() usa claves de columnas; se traducen a su alias"""
+        aliases = {c.key: c.alias for c in self.get_columns() if c.alias}
+        order_by = []
+        for item in self.get_ordering():
+            descending = item.startswith('-')
+            key = item.lstrip('-')
+            order_by.append(('-' if descending else '') + aliases.get(key, key))
+        return order_by
+
+    def records(self, rows=None, stream=False):
+        """
+        Filas como dicts (clave de columna → valor)
+
+        Args:
+            rows: values_list a recorrer (una página); default: rows()
+            stream: Recorrer por bloques de CHUNK_SIZE sin cachear el resultado
+        """
+        columns = self.get_columns()
+        selected = [c for c in columns if c.alias]
+        computed = [c for c in columns if c.compute is not None]
+        if rows is None:
+            rows = self.rows()
+        if stream:
+            rows = rows.iterator(chunk_size=CHUNK_SIZE)
+
+        for values in rows:
+            record = dict(zip((c.key for c in selected), values))
+            for column in selected:
+                if column.choices:
+                    value = record[column.key]
+                    record[f'{column.key}_display'] = column.choices.get(value, value)
+            for column in computed:
+                record[column.key] = column.compute(self, record)
+            yield record
+
+    def breakdown(self, key):
+        """Medidas agrupadas por una columna (una consulta)"""
+        return self.cached(f'breakdown:{key}', lambda: self._compute_breakdown(key))
+
+    def _compute_breakdown(self, key):
+        column = self.get_column(key)
+        measures = self.get_measures()
+        groups = {}
+        for using in self.databases():
+            queryset = self.queryset(using).order_by()
+            if column.is_expression:
+                queryset = queryset.annotate(**{column.alias: column.source})
+            grouped = queryset.values(column.alias).annotate(
+                **{m.alias: m.aggregate for m in measures}
+            )
+            for row in grouped:
+                value = row[column.alias]
+                item = groups.setdefault(value, {key: value, f'{key}_display': column.choices.get(value, value)})
+                for m in measures:
+                    item[m.key] = _add(item.get(m.key), row[m.alias])
+        return [groups[value] for value in sorted(groups, key=lambda value: (value is None, value))]
+
+    def page(self, number):
+        """Página de filas para la pantalla"""
+        paginator = Paginator(self.rows(), self.per_page)
+        totals = self.totals()
+        if 'count' in totals and not self.group_by:
+            paginator.count = totals['count']  # ya contado en el aggregate
+        page_obj = paginator.get_page(number)
+        rows = page_obj.object_list
+        records = self.cached(f'page:{page_obj.number}', lambda: list(self.records(rows)))
+        page_obj.object_list = self.prepare_records(records)
+        return page_obj
+
+    def prepare_records(self, records):
+        """Gancho para completar las filas que se muestran en pantalla"""
+        return records
+
+    # --- Textos ---
+
+    def metadata(self):
+        """Pares (etiqueta, valor) del encabezado del PDF"""
+        start, end = self.params.get('start_date'), self.params.get('end_date')
+        if start and end:
+            return [('Período', f'{start.strftime("%d/%m/%Y")} - {end.strftime("%d/%m/%Y")}')]
+        return []
+
+    def summary(self):
+        """Pares (etiqueta, valor) de la tabla de totales"""
+        totals = self.totals()
+        return [
+            (m.label, format_value(totals[m.key], m.kind))
+            for m in self.get_measures() if m.summary
+        ]
+
+
+def _add(total, value):
+    """Suma de medidas de varias bases (None si ninguna tiene valor)"""
+    if value is None:
+        return total
+    return value if total is None else total + value
+
+
+# ─────────────────────────────────────────
+# Backends
+# ─────────────────────────────────────────
+
+class HtmlBackend:
+    """Pantalla: una página de filas (o todas si per_page es None) y los totales"""
+
+    def render(self, request, report, template, context=None):
+        data = {
+            'report': report,
+            'totals': report.totals(),
+            'start_date': report.params.get('start_date'),
+            'end_date': report.params.get('end_date'),
+        }
+        if report.per_page:
+            data['page_obj'] = report.page(request.GET.get('page'))
+        else:
+            data['rows'] = report.prepare_records(list(report.records()))
+        data.update(context() if callable(context) else (context or {}))
+        return render(request, template, data)
+
+
+class PdfBackend:
+    """
+    PDF con las columnas exportables y el resumen de medidas
+
+    Las filas se leen por bloques y se maquetan página a página; el PDF se
+    escribe en un archivo temporal (como el XLSX) y se envía con FileResponse.
+    Si el reporte se cachea, los PDF de hasta PDF_CACHE_MAX_SIZE se guardan.
+    """
+
+    def render(self, request, report):
+        from .pdf_generators import write_pdf
+
+        key = report.cache_key('pdf')
+        content = cache.get(key) if key else None
+        if content is not None:
+            return self._response(BytesIO(content), report)
+
+        columns = report.export_columns()
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        write_pdf(
+            output,
+            title=report.title,
+            headers=[c.label for c in columns],
+            rows=([c.text(record) for c in columns] for record in report.records(stream=True)),
+            summary=report.summary(),
+            metadata=report.metadata(),
+            landscape_mode=report.landscape,
+        )
+        if key and output.tell() <= PDF_CACHE_MAX_SIZE:
+            output.seek(0)
+            cache.set(key, output.read(), ReportCache.timeout(report.closed))
+        output.seek(0)
+        return self._response(output, report)
+
+    def _response(self, fileobj, report):
+        return FileResponse(
+            fileobj,
+            as_attachment=True,
+            filename=report.get_filename('pdf'),
+            content_type='application/pdf',
+        )
+
+
+class _Echo:
+    """Buffer de csv.writer que devuelve la línea en vez de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+class CsvBackend:
+    """CSV en streaming: las filas se escriben mientras se leen por bloques"""
+
+    def render(self, request, report):
+        columns = report.export_columns()
+        writer = csv.writer(_Echo())
+
+        def lines():
+            # BOM para que Excel abra el archivo como UTF-8
+            yield '\ufeff' + writer.writerow([c.label for c in columns])
+            for record in report.records(stream=True):
+                yield writer.writerow([c.export_value(record) for c in columns])
+
+        response = StreamingHttpResponse(lines(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{report.get_filename("csv")}"'
+        return response
+
+
+class XlsxBackend:
+    """
+    Hoja de Excel con valores tipados (números y fechas, no texto)
+
+    El zip necesita su índice al final, así que el libro se escribe en un
+    archivo temporal (en memoria hasta SPOOL_MAX_SIZE, luego en disco) y
+    se envía por bloques con FileResponse.
+    """
+
+    def render(self, request, report):
+        columns = report.export_columns()
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        write_xlsx(
+            output,
+            [c.label for c in columns],
+            ([c.typed_value(record) for c in columns] for record in report.records(stream=True)),
+            sheet_name=report.title,
+        )
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=report.get_filename('xlsx'),
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+
+EXPORT_BACKENDS = {
+    'pdf': PdfBackend(),
+    'csv': CsvBackend(),
+    'xlsx': XlsxBackend(),
+}
+
+
+def export_report(request, report, default=None):
+    """
+    Respuesta de exportación si se pidió ?format=pdf|csv|xlsx (o `default`)
+
+    Returns:
+        HttpResponse, o None si la petición es para la pantalla
+    """
+    backend = EXPORT_BACKENDS.get(request.GET.get('format') or default)
+    if backend is None:
+        return None
+    return backend.render(request, report)
+
+
+def render_report(request, report, template, context=None):
+    """
+    Responde el reporte en el formato pedido (?format=pdf|csv|xlsx, o HTML)
+
+    `context` (dict o callable que lo devuelve) solo se usa en la pantalla.
+    """
+    response = export_report(request, report)
+    if response is not None:
+        return response
+    return HtmlBackend().render(request, report, template, context)
@@ -0,0 +1,422 @@
+# finances/services.py - Service Layer para Reportes Financieros
+
+import logging
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Any
+
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum,
+    Value, When, Window,
+)
+from django.db.models.functions import Coalesce, Greatest, RowNumber
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Decimal('0')
+
+
+def _bucket_sum(amount, condition):
+    """SUM(CASE WHEN condition THEN amount ELSE 0 END)"""
+    return Coalesce(
+        Sum(Case(When(condition, then=amount), default=Value(ZERO), output_field=MONEY)),
+        Value(ZERO),
+        output_field=MONEY,
+    )
+
+
+class AgingService:
+    """
+    Service para los reportes de antigüedad de saldos
+
+    Cuentas por cobrar (créditos de clientes) y por pagar (órdenes a
+    proveedores) se calculan en la base de datos: el saldo de cada fila es
+    una expresión, los tramos de antigüedad son CASE sobre la fecha y los
+    totales un solo aggregate/GROUP BY. A Python solo llegan las filas que
+    se muestran (una página, o el PDF fila por fila).
+    """
+
+    # Tramos de cuentas por cobrar: días de mora (hasta, clave)
+    RECEIVABLE_BUCKETS = ((30, 'days_1_30'), (60, 'days_31_60'))
+    RECEIVABLE_OVERFLOW = 'over_60'
+
+    # Tramos de cuentas por pagar: días desde la recepción (hasta, clave)
+    PAYABLE_BUCKETS = ((30, 'days_0_30'), (60, 'days_31_60'), (90, 'days_61_90'))
+    PAYABLE_OVERFLOW = 'over_90'
+
+    # Órdenes pendientes listadas bajo cada proveedor en el reporte
+    ORDERS_PER_SUPPLIER = 20
+
+    # ─────────────────────────────────────────
+    # Cuentas por cobrar
+    # ─────────────────────────────────────────
+
+    @staticmethod
+    def credits_with_balance(queryset):
+        """
+        Anota paid_amount y balance (USD) en un queryset de CustomerCredit
+
+        El pagado sale de una subconsulta por crédito: no multiplica filas
+        ni obliga a agrupar el queryset principal.
+        """
+        from customers.models import CreditPayment
+
+        paid = Coalesce(
+            Subquery(
+                CreditPayment.objects.filter(credit=OuterRef('pk'))
+                .order_by().values('credit').annotate(total=Sum('amount_usd')).values('total')
+            ),
+            Value(ZERO),
+            output_field=MONEY,
+        )
+        return queryset.annotate(paid_amount=paid).annotate(
+            balance=Greatest(
+                ExpressionWrapper(F('amount_usd') - F('paid_amount'), output_field=MONEY),
+                Value(ZERO),
+                output_field=MONEY,
+            ),
+        )
+
+    @staticmethod
+    def receivable_buckets(today=None) -> Dict[str, Any]:
+        """
+        Expresiones SUM por tramo de mora sobre el saldo (balance) de los créditos
+
+        Sirven para aggregate() o annotate() de un queryset anotado con
+        credits_with_balance(). Claves: current, days_1_30, days_31_60, over_60.
+        """
+        today = today or date.today()
+        unpaid = Q(is_paid=False)
+
+        # Vigente: sin vencimiento o vence hoy o después
+        buckets = {
+            'current': _bucket_sum('balance', unpaid & (Q(date_due__isnull=True) | Q(date_due__gte=today))),
+        }
+        lower = today
+        for days, key in AgingService.RECEIVABLE_BUCKETS:
+            since = today - timedelta(days=days)
+            buckets[key] = _bucket_sum('balance', unpaid & Q(date_due__lt=lower, date_due__gte=since))
+            lower = since
+        buckets[AgingService.RECEIVABLE_OVERFLOW] = _bucket_sum('balance', unpaid & Q(date_due__lt=lower))
+        return buckets
+
+    @staticmethod
+    def receivables_summary(queryset, today=None) -> Dict[str, Any]:
+        """
+        Totales y tramos de antigüedad de un queryset de créditos (una consulta)
+
+        Args:
+            queryset: CustomerCredit ya filtrado y anotado con credits_with_balance()
+            today: Fecha de corte (default: hoy)
+
+        Returns:
+            dict: {'aging': {'current', 'days_1_30', 'days_31_60', 'over_60'},
+                   'count', 'amount', 'paid', 'balance'}
+        """
+        buckets = AgingService.receivable_buckets(today)
+
+        # Los alias no pueden repetir los de la anotación ('balance')
+        totals = queryset.order_by().aggregate(
+            total_count=Count('pk'),
+            total_amount=Coalesce(Sum('amount_usd'), Value(ZERO), output_field=MONEY),
+            total_paid=Coalesce(Sum('paid_amount'), Value(ZERO), output_field=MONEY),
+            total_balance=Coalesce(Sum('balance'), Value(ZERO), output_field=MONEY),
+            **buckets,
+        )
+        return {
+            'aging': {key: totals[key] for key in buckets},
+            'count': totals['total_count'],
+            'amount': totals['total_amount'],
+            'paid': totals['total_paid'],
+            'balance': totals['total_balance'],
+        }
+
+    @staticmethod
+    def credit_rows(queryset, today=None, stream=False):
+        """
+        Filas a mostrar de un queryset anotado con credits_with_balance()
+
+        Solo lee las columnas del reporte. Para una página se pasa el slice;
+        con stream=True se recorre todo el resultado por bloques (PDF) sin
+        cargarlo entero en memoria.
+        """
+        today = today or date.today()
+        values = queryset.values_list(
+            'pk', 'customer__name', 'sale_id', 'amount_usd', 'paid_amount', 'balance',
+            'date_due', 'is_paid',
+        )
+        if stream:
+            values = values.iterator(chunk_size=2000)
+        for pk, customer, sale_id, amount, paid, balance, date_due, is_paid in values:
+            days_overdue = 0
+            if date_due and not is_paid:
+                days_overdue = max((today - date_due).days, 0)
+            yield {
+                'id': pk,
+                'customer': customer or '-',
+                'sale_id': sale_id or '-',
+                'amount': amount,
+                'paid': paid,
+                'balance': balance,
+                'date_due': date_due,
+                'days_overdue': days_overdue,
+                'is_paid': is_paid,
+            }
+
+    # ─────────────────────────────────────────
+    # Cuentas por pagar
+    # ─────────────────────────────────────────
+
+    @staticmethod
+    def outstanding_orders():
+        """Órdenes recibidas con saldo pendiente, anotadas con debt_usd y aged_from"""
+        from suppliers.models import SupplierOrder
+
+        return SupplierOrder.objects.filter(
+            status='received', total_usd__gt=F('paid_amount_usd'),
+        ).annotate(
+            debt_usd=ExpressionWrapper(F('total_usd') - F('paid_amount_usd'), output_field=MONEY),
+            # Antigüedad desde la recepción (órdenes viejas sin fecha: la del pedido)
+            aged_from=Coalesce('received_date', 'order_date'),
+        )
+
+    @staticmethod
+    def payable_buckets(today=None) -> Dict[str, Any]:
+        """
+        Expresiones SUM por tramo de antigüedad sobre debt_usd de outstanding_orders()
+
+        Claves: days_0_30, days_31_60, days_61_90, over_90.
+        """
+        today = today or date.today()
+        buckets = {}
+        upper = None
+        for days, key in AgingService.PAYABLE_BUCKETS:
+            since = datetime.combine(today - timedelta(days=days), time.min)
+            condition = Q(aged_from__gte=since)
+            if upper is not None:
+                condition &= Q(aged_from__lt=upper)
+            buckets[key] = _bucket_sum('debt_usd', condition)
+            upper = since
+        buckets[AgingService.PAYABLE_OVERFLOW] = _bucket_sum('debt_usd', Q(aged_from__lt=upper))
+        return buckets
+
+    @staticmethod
+    def recent_outstanding_orders(supplier_ids):
+        """
+        Órdenes pendientes más recientes de cada proveedor (una consulta)
+
+        Trae a lo sumo ORDERS_PER_SUPPLIER por proveedor (ROW_NUMBER por
+        proveedor); el reporte muestra el total con order_count.
+
+        Returns:
+            dict: {supplier_id: [SupplierOrder, ...]}
+        """
+        recent = AgingService.outstanding_orders().filter(
+            supplier_id__in=supplier_ids,
+        ).annotate(
+            supplier_rank=Window(
+                RowNumber(),
+                partition_by=[F('supplier_id')],
+                order_by=[F('order_date').desc(), F('id').desc()],
+            ),
+        ).filter(
+            supplier_rank__lte=AgingService.ORDERS_PER_SUPPLIER,
+        ).only(
+            'id', 'supplier_id', 'order_date', 'total_usd', 'paid_amount_usd',
+        ).order_by('supplier_id', '-order_date', '-id')
+
+        orders = {supplier_id: [] for supplier_id in supplier_ids}
+        for order in recent:
+            orders[order.supplier_id].append(order)
+        return orders
+
+    @staticmethod
+    def payables(today=None) -> Dict[str, Any]:
+        """
+        Deuda a proveedores agrupada por proveedor, con tramos de antigüedad
+
+        Tres consultas (SupplierDebtReport): los totales, el GROUP BY por
+        proveedor y las órdenes pendientes que se listan bajo cada uno.
+
+        Args:
+            today: Fecha de corte (default: hoy)
+
+        Returns:
+            dict: {'suppliers': [...ordenados por deuda], 'total_debt',
+                   'aging': {'days_0_30', 'days_31_60', 'days_61_90', 'over_90'}}
+        """
+        from .report_definitions import SupplierDebtReport
+
+        report = SupplierDebtReport(today=today)
+        return {
+            'suppliers': report.prepare_records(list(report.records())),
+            'total_debt': report.totals()['debt_usd'],
+            'aging': report.aging(),
+        }
+
+
+class ProfitReportService:
+    """
+    Service para los reportes de ganancias y rentabilidad por producto
+
+    Lo que depende solo de ventas, compras y gastos del período (totales,
+    cantidades e ingresos por producto, serie diaria) se calcula con
+    consultas agrupadas y se cachea con ReportCache. El costo actual de cada
+    producto y la tasa del día se aplican al leer, así que no entran en la
+    clave y un cambio de precio de compra se ve sin recalcular el período.
+    """
+
+    @staticmethod
+    def tables():
+        from sales.models import Sale, SaleItem
+        from suppliers.models import SupplierOrder
+        from .models import Expense
+
+        return (Sale, SaleItem, SupplierOrder, Expense)
+
+    @staticmethod
+    def period_data(start_date, end_date, today=None) -> Dict[str, Any]:
+        """
+        Agregados del período (cacheados por fechas y versión de las tablas)
+
+        Returns:
+            dict: sales, purchases y expenses (aggregates), sold
+                  [(product_id, cantidad, ingreso USD, líneas)] y daily
+                  [(fecha, ventas Bs, compras Bs, gastos USD)]
+        """
+        from .reports import ReportCache
+
+        return ReportCache.cached(
+            'profits:period',
+            {'start_date': start_date, 'end_date': end_date},
+            ProfitReportService.tables(),
+            lambda: ProfitReportService._compute_period(start_date, end_date),
+            end_date=end_date,
+            today=today,
+        )
+
+    @staticmethod
+    def _compute_period(start_date, end_date):
+        from django.db.models.functions import TruncDate
+        from sales.models import Sale, SaleDaySummary, SaleItem, SaleItemDaySummary
+        from suppliers.models import SupplierOrder
+        from .models import Expense
+
+        sales = Sale.objects.filter(date__date__gte=start_date, date__date__lte=end_date)
+        # Días archivados (utils/archive.py): solo quedan sus resúmenes
+        archived = SaleDaySummary.objects.filter(day__gte=start_date, day__lte=end_date).order_by()
+        archived_items = SaleItemDaySummary.objects.filter(
+            day__gte=start_date, day__lte=end_date,
+        ).values('product_id').annotate(
+            sold_quantity=Sum('quantity'), revenue_usd=Sum('revenue_usd'), lines=Sum('lines'),
+        ).order_by()
+        purchases = SupplierOrder.objects.filter(
+            order_date__date__gte=start_date, order_date__date__lte=end_date, status='received',
+        )
+        expenses = Expense.objects.filter(date__gte=start_date, date__lte=end_date)
+
+        sold = SaleItem.objects.filter(
+            sale__date__date__gte=start_date,
+            sale__date__date__lte=end_date,
+            product__isnull=False,  # Solo productos, no combos
+        ).values('product_id').annotate(
+            sold_quantity=Sum('quantity'),
+            revenue_usd=Coalesce(
+                Sum(ExpressionWrapper(F('quantity') * F('price_usd'), output_field=MONEY)),
+                Value(ZERO), output_field=MONEY,
+            ),
+            lines=Count('id'),
+        ).order_by()
+
+        totals_by_product = {}
+        for row in [*sold, *archived_items]:
+            current = totals_by_product.setdefault(row['product_id'], [ZERO, ZERO, 0])
+            current[0] += row['sold_quantity']
+            current[1] += row['revenue_usd']
+            current[2] += row['lines']
+
+        daily = {}
+        for day, sales_bs in [
+            *sales.annotate(day=TruncDate('date')).values('day').annotate(
+                total=Sum('total_bs')).values_list('day', 'total').order_by(),
+            *archived.values_list('day', 'total_bs'),
+        ]:
+            daily.setdefault(day, [ZERO, ZERO, ZERO])[0] += sales_bs or ZERO
+        for day, purchases_bs in purchases.annotate(day=TruncDate('order_date')).values('day').annotate(
+                total=Sum('total_bs')).values_list('day', 'total').order_by():
+            daily.setdefault(day, [ZERO, ZERO, ZERO])[1] = purchases_bs or ZERO
+        for day, expenses_usd in expenses.values('date').annotate(
+                total=Sum('amount_usd')).values_list('date', 'total').order_by():
+            daily.setdefault(day, [ZERO, ZERO, ZERO])[2] = expenses_usd or ZERO
+
+        days = []
+        current = start_date
+        while current <= end_date:
+            days.append((current, *daily.get(current, (ZERO, ZERO, ZERO))))
+            current += timedelta(days=1)
+
+        sales_totals = sales.aggregate(
+            total_sales_bs=Sum('total_bs'),
+            total_sales_usd=Sum('total_usd'),
+            sales_count=Count('id'),
+        )
+        archived_totals = archived.aggregate(
+            total_sales_bs=Sum('total_bs'),
+            total_sales_usd=Sum('total_usd'),
+            sales_count=Sum('sales_count'),
+        )
+        if archived_totals['sales_count']:
+            for key, value in archived_totals.items():
+                sales_totals[key] = (sales_totals[key] or 0) + value
+
+        return {
+            'sales': sales_totals,
+            'purchases': purchases.aggregate(
+                total_purchases_bs=Sum('total_bs'),
+                total_purchases_usd=Sum('total_usd'),
+                purchases_count=Count('id'),
+            ),
+            'expenses': expenses.aggregate(
+                total_expenses_usd=Sum('amount_usd'),
+                expenses_count=Count('id'),
+            ),
+            'sold': [
+                (product_id, quantity, revenue, lines)
+                for product_id, (quantity, revenue, lines) in totals_by_product.items()
+            ],
+            'daily': days,
+        }
+
+    @staticmethod
+    def product_rows(sold):
+        """
+        Rentabilidad por producto con el precio de compra actual
+
+        Args:
+            sold: period_data()['sold']
+
+        Returns:
+            list de dicts: product, total_quantity_sold, total_revenue_usd,
+            total_cost_usd, total_profit_usd, profit_margin, sales_count
+        """
+        from inventory.models import Product
+
+        products = Product.objects.in_bulk([product_id for product_id, *_ in sold])
+        rows = []
+        for product_id, quantity, revenue, lines in sold:
+            product = products.get(product_id)
+            if product is None:
+                continue
+            cost = (product.purchase_price_usd or ZERO) * quantity
+            profit = revenue - cost
+            rows.append({
+                'product': product,
+                'total_quantity_sold': quantity,
+                'total_revenue_usd': revenue,
+                'total_cost_usd': cost,
+                'total_profit_usd': profit,
+                'profit_margin': (profit / revenue) * 100 if revenue > 0 else Decimal('0.00'),
+                'sales_count': lines,
+            })
+        return rows
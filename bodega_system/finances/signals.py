@@ -0,0 +1,34 @@
+# finances/signals.py - VERSIONES DE LAS TABLAS DE LOS REPORTES
+
+"""
+Registra en TableVersions las tablas que leen los reportes cacheados
+(ver ReportCache en reports.py): cada save()/delete() sube su contador y
+los resultados cacheados con la versión anterior dejan de usarse.
+
+Los usuarios (nombres de empleados) se registran en accounts/signals.py.
+"""
+
+from customers.models import Customer, CustomerCredit
+from sales.models import Sale, SaleItem
+from suppliers.models import SupplierOrder
+from utils.versions import TableVersions
+
+from .models import Expense
+
+
+def _sale_item_date(item):
+    # Solo si la venta ya está cargada (al crear la venta siempre lo está);
+    # si no, la escritura cuenta como histórica
+    if SaleItem.sale.is_cached(item):
+        return item.sale.date
+    return None
+
+
+TableVersions.register(Sale, date_of=lambda sale: sale.date)
+TableVersions.register(SaleItem, date_of=_sale_item_date)
+TableVersions.register(Expense, date_of=lambda expense: expense.date)
+TableVersions.register(SupplierOrder, date_of=lambda order: order.order_date)
+TableVersions.register(CustomerCredit, date_of=lambda credit: credit.date_created)
+
+# Nombres de clientes que muestran las filas de los reportes
+TableVersions.register(Customer)
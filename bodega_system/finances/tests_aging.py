@@ -0,0 +1,207 @@
+# finances/tests_aging.py
+"""
+Tests para la antigüedad de saldos calculada en SQL (AgingService):
+- Tramos de cuentas por cobrar iguales al cálculo anterior en Python
+- Deuda a proveedores agrupada por proveedor con tramos por recepción
+- Las vistas y su PDF usan el mismo resultado; consultas fijas
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from customers.models import Customer, CustomerCredit, CreditPayment
+from finances.services import AgingService
+from sales.models import Sale
+from suppliers.models import Supplier, SupplierOrder
+
+User = get_user_model()
+
+TODAY = date(2026, 3, 31)
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+class AgingTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='ag_admin', password='pass123', is_admin=True)
+        self.customer = Customer.objects.create(name='Cliente Mora', credit_limit_usd=Decimal('1000'))
+
+    def make_credit(self, amount, days_overdue, paid=Decimal('0'), is_paid=False):
+        sale = Sale.objects.create(
+            customer=self.customer, user=self.admin, total_usd=amount,
+            total_bs=amount * 40, exchange_rate_used=Decimal('40'), is_credit=True,
+        )
+        credit = CustomerCredit.objects.create(
+            customer=self.customer, sale=sale, amount_usd=amount, amount_bs=amount * 40,
+            exchange_rate_used=Decimal('40'), date_due=TODAY - timedelta(days=days_overdue),
+            is_paid=is_paid,
+        )
+        if paid:
+            CreditPayment.objects.create(
+                credit=credit, amount_usd=paid, amount_bs=paid * 40,
+                exchange_rate_used=Decimal('40'), received_by=self.admin,
+            )
+        return credit
+
+    def make_order(self, supplier, total, paid, days_ago, status='received'):
+        return SupplierOrder.objects.create(
+            supplier=supplier, created_by=self.admin, status=status,
+            total_usd=total, paid_amount_usd=paid,
+            received_date=datetime.combine(TODAY, datetime.min.time()) - timedelta(days=days_ago),
+        )
+
+
+def python_aging(credits, today):
+    """Cálculo anterior de credits_report (referencia)"""
+    aging = {'current': 0, 'days_1_30': 0, 'days_31_60': 0, 'over_60': 0}
+    for c in credits:
+        paid = sum(p.amount_usd for p in c.payments.all())
+        balance = max(c.amount_usd - paid, 0)
+        days = max((today - c.date_due).days, 0) if not c.is_paid else 0
+        if c.is_paid:
+            continue
+        if days == 0:
+            aging['current'] += balance
+        elif days <= 30:
+            aging['days_1_30'] += balance
+        elif days <= 60:
+            aging['days_31_60'] += balance
+        else:
+            aging['over_60'] += balance
+    return aging
+
+
+# ─────────────────────────────────────────────
+# CUENTAS POR COBRAR
+# ─────────────────────────────────────────────
+
+class ReceivablesAgingTest(AgingTestMixin, TestCase):
+
+    def test_buckets_match_python_calculation(self):
+        for amount, days, paid in [
+            ('10', -5, '0'), ('20', 0, '5'), ('30', 1, '0'), ('40', 30, '10'),
+            ('50', 31, '0'), ('60', 60, '60'), ('70', 61, '20'), ('80', 400, '0'),
+        ]:
+            self.make_credit(Decimal(amount), days, paid=Decimal(paid))
+        self.make_credit(Decimal('99'), 90, is_paid=True)
+
+        credits = AgingService.credits_with_balance(CustomerCredit.objects.all())
+        summary = AgingService.receivables_summary(credits, today=TODAY)
+        expected = python_aging(CustomerCredit.objects.all(), TODAY)
+
+        self.assertEqual(summary['aging'], {k: Decimal(v) for k, v in expected.items()})
+        self.assertEqual(summary['aging']['current'], Decimal('25'))
+        self.assertEqual(summary['aging']['days_1_30'], Decimal('60'))
+        self.assertEqual(summary['aging']['days_31_60'], Decimal('50'))
+        self.assertEqual(summary['aging']['over_60'], Decimal('130'))
+        self.assertEqual(summary['count'], 9)
+        self.assertEqual(summary['paid'], Decimal('95'))
+
+    def test_rows_and_overpayment(self):
+        self.make_credit(Decimal('10'), 12, paid=Decimal('15'))
+        credits = AgingService.credits_with_balance(CustomerCredit.objects.all())
+        rows = list(AgingService.credit_rows(credits, today=TODAY))
+        self.assertEqual(rows[0]['balance'], Decimal('0'))
+        self.assertEqual(rows[0]['paid'], Decimal('15'))
+        self.assertEqual(rows[0]['days_overdue'], 12)
+        self.assertEqual(rows[0]['customer'], 'Cliente Mora')
+
+
+# ─────────────────────────────────────────────
+# CUENTAS POR PAGAR
+# ─────────────────────────────────────────────
+
+class PayablesAgingTest(AgingTestMixin, TestCase):
+
+    def test_grouped_by_supplier(self):
+        polar = Supplier.objects.create(name='Polar', phone='0212')
+        nestle = Supplier.objects.create(name='Nestlé')
+        self.make_order(polar, Decimal('100'), Decimal('40'), days_ago=5)
+        self.make_order(polar, Decimal('50'), Decimal('0'), days_ago=45)
+        self.make_order(nestle, Decimal('300'), Decimal('0'), days_ago=120)
+        # Sin saldo, pendiente de recibir o cancelada: no cuentan
+        self.make_order(polar, Decimal('80'), Decimal('80'), days_ago=1)
+        self.make_order(nestle, Decimal('500'), Decimal('0'), days_ago=1, status='pending')
+
+        payables = AgingService.payables(today=TODAY)
+        self.assertEqual([s['name'] for s in payables['suppliers']], ['Nestlé', 'Polar'])
+        polar_row = payables['suppliers'][1]
+        self.assertEqual(polar_row['order_count'], 2)
+        self.assertEqual(polar_row['debt_usd'], Decimal('110'))
+        self.assertEqual(polar_row['paid_usd'], Decimal('40'))
+        self.assertEqual(polar_row['phone'], '0212')
+        self.assertEqual(len(polar_row['orders']), 2)
+        self.assertEqual(payables['total_debt'], Decimal('410'))
+        self.assertEqual(payables['aging'], {
+            'days_0_30': Decimal('60'), 'days_31_60': Decimal('50'),
+            'days_61_90': Decimal('0'), 'over_90': Decimal('300'),
+        })
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class AgingViewsTest(AgingTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.login(username='ag_admin', password='pass123')
+
+    def test_credits_report_query_count_is_flat(self):
+        counts = []
+        for size in (3, 30):
+            for i in range(size):
+                self.make_credit(Decimal('10'), i, paid=Decimal('1'))
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('finances:credits_report'))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(response.context['page_obj'].paginator.count, 33)
+        self.assertEqual(response.context['page_obj'][0]['paid'], Decimal('1'))
+
+    def test_credits_report_pdf(self):
+        self.make_credit(Decimal('10'), 3)
+        response = self.client.get(reverse('finances:credits_report'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_supplier_debt_report_and_pdf(self):
+        supplier = Supplier.objects.create(name='Distribuidora')
+        for _ in range(3):
+            self.make_order(supplier, Decimal('10'), Decimal('0'), days_ago=2)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('finances:supplier_debt_report'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_debt'], Decimal('30'))
+        self.assertContains(response, '0-30 días')
+        # Totales, GROUP BY por proveedor y órdenes recientes
+        data_queries = [q for q in ctx.captured_queries if 'suppliers_supplierorder' in q['sql']]
+        self.assertEqual(len(data_queries), 3)
+
+        response = self.client.get(reverse('finances:supplier_debt_report'), {'format': 'pdf'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+    def test_orders_listed_per_supplier_are_capped(self):
+        supplier = Supplier.objects.create(name='Muchas Órdenes')
+        extra = AgingService.ORDERS_PER_SUPPLIER + 5
+        for i in range(extra):
+            self.make_order(supplier, Decimal('10'), Decimal('0'), days_ago=i)
+        row = AgingService.payables(today=TODAY)['suppliers'][0]
+        self.assertEqual(row['order_count'], extra)
+        self.assertEqual(row['debt_usd'], Decimal('10') * extra)
+        self.assertEqual(len(row['orders']), AgingService.ORDERS_PER_SUPPLIER)
+        response = self.client.get(reverse('finances:supplier_debt_report'))
+        self.assertContains(response, f'Ver las {extra} órdenes pendientes')
@@ -0,0 +1,161 @@
+# finances/tests_report_cache.py
+"""
+Tests de la caché de reportes (ReportCache + TableVersions):
+- Las escrituras en las tablas del reporte cambian la clave
+- Un período cerrado no se invalida por las ventas del día
+- profits_report aplica el costo actual sobre el período cacheado
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from finances.models import Expense
+from inventory.models import Category, Product
+from sales.models import Sale, SaleItem
+from utils.versions import TableVersions
+
+User = get_user_model()
+
+
+def sale_queries(ctx):
+    return [q for q in ctx.captured_queries if 'sales_sale' in q['sql']]
+
+
+class TableVersionsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tv_user', password='pass123')
+
+    def test_save_and_delete_bump(self):
+        before = TableVersions.get([Expense])
+        expense = Expense.objects.create(
+            category='rent', description='Local', amount_bs=Decimal('400'),
+            amount_usd=Decimal('10'), exchange_rate_used=Decimal('40'),
+            date=date.today(), created_by=self.user,
+        )
+        after_save = TableVersions.get([Expense])
+        self.assertNotEqual(before, after_save)
+        expense.delete()
+        self.assertNotEqual(after_save, TableVersions.get([Expense]))
+
+    def test_history_only_for_past_rows(self):
+        closed = TableVersions.get([Expense], closed=True)
+        Expense.objects.create(
+            category='rent', description='Hoy', amount_bs=Decimal('400'), amount_usd=Decimal('10'),
+            exchange_rate_used=Decimal('40'), date=date.today(), created_by=self.user,
+        )
+        self.assertEqual(closed, TableVersions.get([Expense], closed=True))
+        Expense.objects.create(
+            category='rent', description='Mes pasado', amount_bs=Decimal('400'), amount_usd=Decimal('10'),
+            exchange_rate_used=Decimal('40'), date=date.today() - timedelta(days=40), created_by=self.user,
+        )
+        self.assertNotEqual(closed, TableVersions.get([Expense], closed=True))
+
+    def test_login_does_not_bump_users(self):
+        version = TableVersions.get([User])
+        self.client.login(username='tv_user', password='pass123')
+        self.assertEqual(version, TableVersions.get([User]))
+        self.user.first_name = 'Luis'
+        self.user.save()
+        self.assertNotEqual(version, TableVersions.get([User]))
+
+
+class ReportCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='rc_admin', password='pass123', is_admin=True)
+        self.client = Client()
+        self.client.login(username='rc_admin', password='pass123')
+        self.make_sale(Decimal('10'))
+
+    def make_sale(self, total_usd):
+        return Sale.objects.create(
+            user=self.admin, total_usd=total_usd, total_bs=total_usd * 40,
+            exchange_rate_used=Decimal('40'), payment_method='cash',
+        )
+
+    def test_sales_report_cached_until_a_sale_changes(self):
+        url = reverse('finances:sales_report')
+        params = {'period': 'this_month'}
+        self.client.get(url, params)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(sale_queries(ctx), [])
+        self.assertEqual(response.context['totals']['total_usd'], Decimal('10'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+        self.make_sale(Decimal('5'))
+        response = self.client.get(url, params)
+        self.assertEqual(response.context['totals']['total_usd'], Decimal('15'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_filters_are_part_of_the_key(self):
+        url = reverse('finances:sales_report')
+        response = self.client.get(url, {'period': 'this_month', 'payment_method': 'card'})
+        self.assertEqual(response.context['totals']['count'], 0)
+        response = self.client.get(url, {'period': 'this_month', 'payment_method': 'cash'})
+        self.assertEqual(response.context['totals']['count'], 1)
+
+    def test_closed_period_ignores_todays_sales(self):
+        old = self.make_sale(Decimal('7'))
+        last_month = date.today().replace(day=1) - timedelta(days=1)
+        Sale.objects.filter(pk=old.pk).update(date=datetime.combine(last_month, datetime.min.time()))
+        TableVersions.bump(Sale, last_month)
+
+        url = reverse('finances:sales_report')
+        params = {'period': 'last_month'}
+        self.assertEqual(self.client.get(url, params).context['totals']['total_usd'], Decimal('7'))
+
+        self.make_sale(Decimal('3'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(sale_queries(ctx), [])
+        self.assertEqual(response.context['totals']['total_usd'], Decimal('7'))
+
+        # Borrar una venta del mes pasado sí invalida el período cerrado
+        Sale.objects.get(pk=old.pk).delete()
+        self.assertEqual(self.client.get(url, params).context['totals']['count'], 0)
+
+    def test_pdf_is_cached(self):
+        url = reverse('finances:sales_report')
+        params = {'period': 'this_month', 'format': 'pdf'}
+        first = b''.join(self.client.get(url, params).streaming_content)
+        with CaptureQueriesContext(connection) as ctx:
+            second = b''.join(self.client.get(url, params).streaming_content)
+        self.assertEqual(sale_queries(ctx), [])
+        self.assertEqual(first, second)
+
+    def test_profits_use_current_cost(self):
+        category = Category.objects.create(name='Caché')
+        product = Product.objects.create(
+            name='Café', barcode='RC-1', category=category, stock=Decimal('10'),
+            purchase_price_usd=Decimal('2'), selling_price_usd=Decimal('5'),
+        )
+        sale = self.make_sale(Decimal('15'))
+        SaleItem.objects.create(
+            sale=sale, product=product, quantity=Decimal('3'),
+            price_usd=Decimal('5'), price_bs=Decimal('200'),
+        )
+        url = reverse('finances:profits_report')
+        params = {'period': 'this_month'}
+        self.assertEqual(self.client.get(url, params).context['real_profit_usd'], Decimal('9'))
+
+        with CaptureQueriesContext(connection) as ctx:
+            Product.objects.filter(pk=product.pk).update(purchase_price_usd=Decimal('4'))
+            response = self.client.get(url, params)
+        self.assertEqual(sale_queries(ctx), [])
+        self.assertEqual(response.context['real_profit_usd'], Decimal('3'))
+
+        response = self.client.get(reverse('finances:product_profitability_report'), params)
+        row = response.context['page_obj'][0]
+        self.assertEqual(row['total_cost_usd'], Decimal('12'))
+        self.assertEqual(row['sales_count'], 1)
@@ -0,0 +1,317 @@
+# finances/tests_reports.py
+"""
+Tests para el motor de reportes declarativos (finances/reports.py):
+- Pantalla, PDF y CSV salen de las mismas columnas y totales
+- Filtros del formulario aplicados en la consulta
+- CSV y XLSX se generan en streaming y el PDF página a página; ítems vendidos, ajustes y gastos
+  se exportan con los filtros de su reporte o lista
+- Consultas fijas por página sin importar el volumen
+"""
+
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from utils.xlsx import write_xlsx
+
+from finances.pdf_generators import write_pdf
+from finances.models import Expense
+from finances.report_definitions import InventoryReport, SalesReport
+from inventory.models import Category, InventoryAdjustment, Product
+from sales.models import Sale, SaleItem
+from suppliers.models import Supplier, SupplierOrder
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def read_csv(response):
+    content = b''.join(response.streaming_content).decode('utf-8-sig')
+    return list(csv.reader(io.StringIO(content)))
+
+
+def read_sheet(content):
+    with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+        return workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+
+
+class ReportTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='rp_admin', password='pass123', is_admin=True,
+            first_name='Ana', last_name='Pérez',
+        )
+        self.seller = User.objects.create_user(username='rp_seller', password='pass123')
+        self.client = Client()
+        self.client.login(username='rp_admin', password='pass123')
+
+    def make_sale(self, total_usd, method='cash', is_credit=False, user=None):
+        return Sale.objects.create(
+            user=user or self.admin, total_usd=total_usd, total_bs=total_usd * 40,
+            exchange_rate_used=Decimal('40'), payment_method=method, is_credit=is_credit,
+        )
+
+    def make_product(self, name, stock, price, min_stock=Decimal('5')):
+        category, _ = Category.objects.get_or_create(name='Reportes')
+        return Product.objects.create(
+            name=name, barcode=f'RP-{name}', category=category, stock=stock, min_stock=min_stock,
+            purchase_price_usd=price, selling_price_usd=price * 2,
+        )
+
+
+# ─────────────────────────────────────────────
+# VENTAS
+# ─────────────────────────────────────────────
+
+class SalesReportTest(ReportTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_sale(Decimal('10'), 'cash')
+        self.make_sale(Decimal('20'), 'card', user=self.seller)
+        self.make_sale(Decimal('5'), 'cash', is_credit=True)
+
+    def test_html_and_csv_share_totals(self):
+        response = self.client.get(reverse('finances:sales_report'))
+        totals = response.context['totals']
+        self.assertEqual(totals['total_usd'], Decimal('35'))
+        self.assertEqual(totals['count'], 3)
+
+        rows = read_csv(self.client.get(reverse('finances:sales_report'), {'format': 'csv'}))
+        header, data = rows[0], rows[1:]
+        self.assertEqual(header, ['#Venta', 'Fecha', 'Cliente', 'Empleado', 'Método', 'Total USD', 'Total Bs'])
+        self.assertEqual(len(data), totals['count'])
+        self.assertEqual(sum(Decimal(r[5]) for r in data), totals['total_usd'])
+
+    def test_row_columns(self):
+        records = list(SalesReport().records())
+        by_total = {r['total_usd']: r for r in records}
+        self.assertEqual(by_total[Decimal('10')]['employee'], 'Ana Pérez')
+        self.assertEqual(by_total[Decimal('20')]['employee'], 'rp_seller')
+        self.assertEqual(by_total[Decimal('10')]['customer'], 'Cliente General')
+        self.assertEqual(by_total[Decimal('5')]['method_display'], 'Crédito')
+        self.assertEqual(by_total[Decimal('20')]['method_display'], 'Punto de Venta')
+
+    def test_filters(self):
+        report = SalesReport({'payment_method': 'credit'})
+        self.assertEqual(report.totals()['total_usd'], Decimal('5'))
+        report = SalesReport({'payment_method': 'cash'})
+        self.assertEqual(report.totals()['total_usd'], Decimal('10'))
+        report = SalesReport({'employee': self.seller})
+        self.assertEqual([r['total_usd'] for r in report.records()], [Decimal('20')])
+
+    def test_method_breakdown_adds_up(self):
+        breakdown = {m['method']: m for m in SalesReport().method_breakdown}
+        self.assertEqual(set(breakdown), {'cash', 'card', 'credit'})
+        self.assertEqual(breakdown['cash']['total_usd'], Decimal('10'))
+        self.assertEqual(sum(m['count'] for m in breakdown.values()), 3)
+
+    def test_query_count_is_flat(self):
+        counts = []
+        for extra in (0, 40):
+            for _ in range(extra):
+                self.make_sale(Decimal('1'))
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse('finances:sales_report'))
+            counts.append(len([q for q in ctx.captured_queries if 'sales_sale' in q['sql']]))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_csv_is_streamed_and_pdf_renders(self):
+        response = self.client.get(reverse('finances:sales_report'), {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertIn('reporte_ventas_', response['Content-Disposition'])
+        response = self.client.get(reverse('finances:sales_report'), {'format': 'pdf'})
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+# ─────────────────────────────────────────────
+# COMPRAS E INVENTARIO
+# ─────────────────────────────────────────────
+
+class PurchasesReportTest(ReportTestMixin, TestCase):
+
+    def test_payment_status_and_filter(self):
+        supplier = Supplier.objects.create(name='Polar')
+        SupplierOrder.objects.create(
+            supplier=supplier, created_by=self.admin, status='received',
+            total_usd=Decimal('100'), paid_amount_usd=Decimal('40'),
+        )
+        SupplierOrder.objects.create(
+            supplier=supplier, created_by=self.admin, status='received',
+            total_usd=Decimal('50'), paid_amount_usd=Decimal('50'), paid=True,
+        )
+        rows = read_csv(self.client.get(reverse('finances:purchases_report'), {'format': 'csv'}))
+        self.assertEqual(sorted(r[-1] for r in rows[1:]), ['Pagado', 'Pago Parcial'])
+
+        response = self.client.get(reverse('finances:purchases_report'), {
+            'period': 'this_year', 'payment_status': 'unpaid',
+        })
+        self.assertEqual(response.context['totals']['total_usd'], Decimal('100'))
+        self.assertEqual(response.context['page_obj'][0]['supplier'], 'Polar')
+
+
+class InventoryReportTest(ReportTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_product('Arroz', Decimal('10'), Decimal('1'))
+        self.make_product('Aceite', Decimal('2'), Decimal('20'))
+        self.make_product('Sal', Decimal('0'), Decimal('3'))
+
+    def test_sort_by_value_in_database(self):
+        report = InventoryReport({'sort_by': 'value'})
+        self.assertEqual([r['name'] for r in report.records()], ['Aceite', 'Arroz', 'Sal'])
+        self.assertEqual(next(report.records())['value_usd'], Decimal('40'))
+
+    def test_totals_and_state_filter(self):
+        totals = InventoryReport().totals()
+        self.assertEqual(totals['count'], 3)
+        self.assertEqual(totals['total_value_usd'], Decimal('50'))
+        self.assertEqual(totals['low_stock_count'], 1)
+        self.assertEqual(totals['out_of_stock_count'], 1)
+
+        totals = InventoryReport({'stock_status': 'low'}).totals()
+        self.assertEqual(totals['count'], 1)
+        self.assertEqual(totals['total_value_usd'], Decimal('40'))
+
+    def test_csv_matches_screen(self):
+        response = self.client.get(reverse('finances:inventory_report'))
+        self.assertContains(response, 'Exportar CSV')
+        rows = read_csv(self.client.get(reverse('finances:inventory_report'), {'format': 'csv'}))
+        self.assertEqual(rows[0][0], 'Producto')
+        self.assertEqual(
+            sum(Decimal(r[-1]) for r in rows[1:]),
+            Decimal(str(response.context['totals']['total_value_usd'])),
+        )
+
+
+# ─────────────────────────────────────────────
+# EXPORTACIONES
+# ─────────────────────────────────────────────
+
+class XlsxWriterTest(TestCase):
+
+    def test_typed_cells_and_escaping(self):
+        output = io.BytesIO()
+        rows = iter([
+            ['Arroz & <Sal>', Decimal('10.50'), date(2026, 1, 2), datetime(2026, 1, 2, 12, 0), None],
+        ])
+        self.assertEqual(write_xlsx(output, ['Nombre', 'Monto', 'Día', 'Hora', 'Vacío'], rows), 1)
+        sheet = read_sheet(output.getvalue())
+        self.assertIn('<t xml:space="preserve">Arroz &amp; &lt;Sal&gt;</t>', sheet)
+        self.assertIn('<v>10.50</v>', sheet)
+        self.assertIn('<c s="2"><v>46024</v></c>', sheet)
+        self.assertIn('<c s="3"><v>46024.500000</v></c>', sheet)
+
+    def test_many_rows_from_generator(self):
+        output = io.BytesIO()
+        count = write_xlsx(output, ['N'], ([i] for i in range(5000)))
+        self.assertEqual(count, 5000)
+        self.assertIn('<row r="5001"><c><v>4999</v></c></row>', read_sheet(output.getvalue()))
+
+
+class PdfWriterTest(TestCase):
+
+    def page_streams(self, content):
+        streams = re.findall(rb'/Filter \[ /FlateDecode \] /Length \d+\s*>>\s*stream\r?\n(.*?)endstream', content, re.S)
+        return [zlib.decompress(s).decode('latin-1') for s in streams]
+
+    def test_header_repeated_on_every_page(self):
+        output = io.BytesIO()
+        rows = ([str(i), f'Producto {i}'] for i in range(300))
+        write_pdf(output, 'Prueba', ['Número', 'Nombre'], rows, summary=[('Total', '300')])
+        pages = self.page_streams(output.getvalue())
+        self.assertGreater(len(pages), 5)
+        self.assertEqual([p.count('(Nombre) Tj') for p in pages], [1] * len(pages))
+        text = ''.join(pages)
+        self.assertEqual(len(re.findall(r'\(Producto \d+\) Tj', text)), 300)
+        self.assertIn('(Producto 299) Tj', pages[-1])
+
+    def test_multiline_rows_and_empty_report(self):
+        output = io.BytesIO()
+        rows = ([str(i), 'a\nb\nc' if i % 5 == 0 else 'a'] for i in range(200))
+        write_pdf(output, 'Prueba', ['N', 'Texto'], rows)
+        text = ''.join(self.page_streams(output.getvalue()))
+        self.assertIn('(199) Tj', text)
+
+        output = io.BytesIO()
+        write_pdf(output, 'Prueba', ['N'], iter([]))
+        self.assertIn('No hay datos', ''.join(self.page_streams(output.getvalue())))
+
+
+class ExportsTest(ReportTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.make_product('Harina', Decimal('20'), Decimal('1'))
+        for method, is_credit in (('cash', False), ('card', False), ('cash', True)):
+            sale = self.make_sale(Decimal('6'), method, is_credit=is_credit)
+            SaleItem.objects.create(
+                sale=sale, product=self.product, quantity=Decimal('3'),
+                price_usd=Decimal('2'), price_bs=Decimal('80'),
+            )
+
+    def test_sales_xlsx(self):
+        response = self.client.get(reverse('finances:sales_report'), {'format': 'xlsx'})
+        self.assertEqual(response['Content-Type'], 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        sheet = read_sheet(b''.join(response.streaming_content))
+        self.assertIn('Empleado', sheet)
+        self.assertIn('Crédito', sheet)
+        self.assertEqual(sheet.count('<row '), 4)
+
+    def test_sale_items_use_sales_filters(self):
+        url = reverse('finances:sale_items_export')
+        rows = read_csv(self.client.get(url))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0][5], 'Producto')
+        self.assertEqual(sum(Decimal(r[10]) for r in rows[1:]), Decimal('18'))
+
+        rows = read_csv(self.client.get(url, {'period': 'this_year', 'payment_method': 'credit'}))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][4], 'Crédito')
+
+    def test_expenses_use_list_filters(self):
+        for category, day in (('rent', 5), ('taxes', 20)):
+            Expense.objects.create(
+                category=category, description=f'Gasto {category}', amount_bs=Decimal('400'),
+                amount_usd=Decimal('10'), exchange_rate_used=Decimal('40'),
+                date=date(2026, 1, day), created_by=self.admin,
+            )
+        response = self.client.get(reverse('finances:expense_list'), {'category': 'rent', 'format': 'csv'})
+        rows = read_csv(response)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], 'Alquiler')
+        response = self.client.get(reverse('finances:expense_list'), {'start_date': '2026-01-10', 'format': 'csv'})
+        self.assertEqual([r[3] for r in read_csv(response)[1:]], ['Gasto taxes'])
+
+    def test_adjustments_use_list_filters(self):
+        other = self.make_product('Azúcar', Decimal('5'), Decimal('1'))
+        for product in (self.product, other):
+            InventoryAdjustment.objects.create(
+                product=product, adjustment_type='add', quantity=Decimal('2'),
+                previous_stock=product.stock, new_stock=product.stock + 2,
+                reason='Conteo', adjusted_by=self.admin,
+            )
+        response = self.client.get(reverse('inventory:adjustment_list'), {'product': other.pk, 'format': 'csv'})
+        rows = read_csv(response)
+        self.assertEqual([r[2] for r in rows[1:]], ['Azúcar'])
+        self.assertEqual(rows[1][4], 'Agregar')
+        self.assertEqual(rows[1][9], 'Ana Pérez')
+
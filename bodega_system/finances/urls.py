@@ -9,10 +9,12 @@ urlpatterns = [
     # Dashboard y reportes
     path('', views.finance_dashboard, name='dashboard'),
     path('reports/sales/', views.sales_report, name='sales_report'),
+    path('reports/sales/items/', views.sale_items_export, name='sale_items_export'),
     path('reports/purchases/', views.purchases_report, name='purchases_report'),
     path('reports/profits/', views.profits_report, name='profits_report'),
     path('reports/product-profitability/', views.product_profitability_report, name='product_profitability_report'),  # ⭐ NUEVO
     path('reports/inventory/', views.inventory_report, name='inventory_report'),
+    path('reports/inventory/history/', views.stock_history_report, name='stock_history_report'),
     path('reports/credits/', views.credits_report, name='credits_report'),
     path('reports/supplier-debt/', views.supplier_debt_report, name='supplier_debt_report'),
 
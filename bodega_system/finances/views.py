@@ -7,22 +7,24 @@ from django.db.models import Sum, Count, Q, F
 from django.db import transaction
 from django.core.paginator import Paginator
 from django.utils import timezone
-from datetime import datetime, timedelta, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 
 from .models import Expense, ExpenseReceipt, DailyClose
 from .forms import (
     ExpenseForm, ExpenseReceiptFormset, DailyCloseForm, ReportFilterForm,
     SalesReportFilterForm, PurchasesReportFilterForm,
-    InventoryFilterForm, CreditsReportFilterForm,
+    InventoryFilterForm, CreditsReportFilterForm, StockHistoryFilterForm,
 )
-from .pdf_generators import (
-    pdf_sales_report, pdf_purchases_report, pdf_inventory_report,
-    pdf_credits_report, pdf_supplier_debt_report,
+from .report_definitions import (
+    CreditsReport, ExpensesReport, InventoryReport, PurchasesReport, SaleItemsReport,
+    SalesReport, SupplierDebtReport,
 )
+from .reports import export_report, get_date_range, render_report
+from .services import ProfitReportService
+from inventory.services import StockHistoryService
 from sales.models import Sale, SaleItem
 from suppliers.models import SupplierOrder
-from inventory.models import Product
 from utils.decorators import admin_required
 from utils.models import ExchangeRate
 
@@ -266,130 +268,23 @@ def finance_dashboard(request):
 
 @login_required
 def sales_report(request):
-    """Vista para el reporte de ventas con filtros avanzados y exportación PDF"""
+    """Vista para el reporte de ventas con filtros avanzados y exportación PDF/CSV"""
     form = SalesReportFilterForm(request.GET or None)
-    sales = Sale.objects.select_related('user', 'customer')
+    report = SalesReport.from_form(form)
+    return render_report(request, report, 'finances/sales_report.html', {'form': form})
 
-    start_date = end_date = None
-
-    # Aplicar filtros
-    if form.is_valid():
-        start_date, end_date = _get_date_range(form.cleaned_data)
-        if start_date and end_date:
-            sales = sales.filter(date__date__gte=start_date, date__date__lte=end_date)
-
-        # Filtro por empleado
-        employee = form.cleaned_data.get('employee')
-        if employee:
-            sales = sales.filter(user=employee)
-
-        # Filtro por método de pago
-        payment_method = form.cleaned_data.get('payment_method')
-        if payment_method == 'credit':
-            sales = sales.filter(is_credit=True)
-        elif payment_method:
-            sales = sales.filter(payment_method=payment_method, is_credit=False)
-
-    # Calcular totales
-    totals = sales.aggregate(
-        total_bs=Sum('total_bs'),
-        total_usd=Sum('total_usd'),
-        count=Count('id')
-    )
-
-    # Desglose por método de pago
-    totals_by_method = list(
-        sales.values('payment_method').annotate(
-            total_usd=Sum('total_usd'),
-            count=Count('id')
-        )
-    )
-    # Agregar créditos al desglose
-    credit_totals = sales.filter(is_credit=True).aggregate(
-        total_usd=Sum('total_usd'), count=Count('id')
-    )
-    if credit_totals['count']:
-        totals_by_method.append({
-            'payment_method': 'credit',
-            'total_usd': credit_totals['total_usd'],
-            'count': credit_totals['count'],
-        })
-
-    # Exportar PDF
-    if request.GET.get('format') == 'pdf':
-        metadata = []
-        if start_date and end_date:
-            metadata.append(('Período', f'{start_date.strftime("%d/%m/%Y")} - {end_date.strftime("%d/%m/%Y")}'))
-        metadata.append(('Total Ventas', str(totals.get('count') or 0)))
-        return pdf_sales_report(sales.order_by('-date'), totals, metadata=metadata)
-
-    # Ordenar y paginar
-    sales = sales.order_by('-date')
-    paginator = Paginator(sales, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    return render(request, 'finances/sales_report.html', {
-        'form': form,
-        'page_obj': page_obj,
-        'totals': totals,
-        'totals_by_method': totals_by_method,
-        'start_date': start_date,
-        'end_date': end_date,
-    })
+@login_required
+def sale_items_export(request):
+    """Exportación de ítems vendidos (CSV por defecto, ?format=xlsx|pdf) con los filtros de ventas"""
+    form = SalesReportFilterForm(request.GET or None)
+    return export_report(request, SaleItemsReport.from_form(form), default='csv')
 
 @login_required
 def purchases_report(request):
-    """Vista para el reporte de compras con filtros avanzados y exportación PDF"""
+    """Vista para el reporte de compras con filtros avanzados y exportación PDF/CSV"""
     form = PurchasesReportFilterForm(request.GET or None)
-    purchases = SupplierOrder.objects.filter(status='received').select_related('supplier')
-
-    start_date = end_date = None
-
-    # Aplicar filtros
-    if form.is_valid():
-        start_date, end_date = _get_date_range(form.cleaned_data)
-        if start_date and end_date:
-            purchases = purchases.filter(order_date__date__gte=start_date, order_date__date__lte=end_date)
-
-        supplier = form.cleaned_data.get('supplier')
-        if supplier:
-            purchases = purchases.filter(supplier=supplier)
-
-        payment_status = form.cleaned_data.get('payment_status')
-        if payment_status == 'paid':
-            purchases = purchases.filter(paid=True)
-        elif payment_status == 'unpaid':
-            purchases = purchases.filter(paid=False)
-
-    # Calcular totales
-    totals = purchases.aggregate(
-        total_bs=Sum('total_bs'),
-        total_usd=Sum('total_usd'),
-        count=Count('id')
-    )
-
-    # Exportar PDF
-    if request.GET.get('format') == 'pdf':
-        metadata = []
-        if start_date and end_date:
-            metadata.append(('Período', f'{start_date.strftime("%d/%m/%Y")} - {end_date.strftime("%d/%m/%Y")}'))
-        metadata.append(('Total Órdenes', str(totals.get('count') or 0)))
-        return pdf_purchases_report(purchases.order_by('-order_date'), totals, metadata=metadata)
-
-    # Ordenar y paginar
-    purchases = purchases.order_by('-order_date')
-    paginator = Paginator(purchases, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    return render(request, 'finances/purchases_report.html', {
-        'form': form,
-        'page_obj': page_obj,
-        'totals': totals,
-        'start_date': start_date,
-        'end_date': end_date,
-    })
+    report = PurchasesReport.from_form(form)
+    return render_report(request, report, 'finances/purchases_report.html', {'form': form})
 
 @login_required
 def profits_report(request):
@@ -398,40 +293,18 @@ def profits_report(request):
 
     # Obtener fechas del formulario
     if form.is_valid():
-        start_date, end_date = _get_date_range(form.cleaned_data)
+        start_date, end_date = get_date_range(form.cleaned_data)
     else:
         # Por defecto, este mes
         today = date.today()
         start_date = today.replace(day=1)
         end_date = today
 
-    # Calcular métricas de ganancias
-    sales_data = Sale.objects.filter(
-        date__date__gte=start_date,
-        date__date__lte=end_date
-    ).aggregate(
-        total_sales_bs=Sum('total_bs'),
-        total_sales_usd=Sum('total_usd'),
-        sales_count=Count('id')
-    )
-
-    purchases_data = SupplierOrder.objects.filter(
-        order_date__date__gte=start_date,
-        order_date__date__lte=end_date,
-        status='received'
-    ).aggregate(
-        total_purchases_bs=Sum('total_bs'),
-        total_purchases_usd=Sum('total_usd'),
-        purchases_count=Count('id')
-    )
-
-    expenses_data = Expense.objects.filter(
-        date__gte=start_date,
-        date__lte=end_date
-    ).aggregate(
-        total_expenses_usd=Sum('amount_usd'),  # ⭐ CORREGIDO: Sumar en USD
-        expenses_count=Count('id')
-    )
+    # Agregados del período (cacheados; ver ProfitReportService)
+    period = ProfitReportService.period_data(start_date, end_date)
+    sales_data = period['sales']
+    purchases_data = period['purchases']
+    expenses_data = period['expenses']
 
     # Calcular ganancias
     total_sales_bs = sales_data['total_sales_bs'] or Decimal('0.00')
@@ -440,78 +313,42 @@ def profits_report(request):
     total_purchases_usd = purchases_data['total_purchases_usd'] or Decimal('0.00')
     total_expenses_usd = expenses_data['total_expenses_usd'] or Decimal('0.00')
 
-    # ⭐ NUEVO: Calcular ganancia REAL por producto vendido
-    # Ganancia = (precio_venta - precio_compra) × cantidad
-    sale_items = SaleItem.objects.filter(
-        sale__date__date__gte=start_date,
-        sale__date__date__lte=end_date,
-        product__isnull=False  # Solo productos, no combos
-    ).select_related('product', 'sale')
-
-    real_profit_usd = Decimal('0.00')
-    for item in sale_items:
-        # ⭐ VALIDACIÓN: Saltar si no hay producto
-        if not item.product:
-            continue
-
-        # Ganancia por ítem = (precio venta - precio compra) × cantidad
-        # ⭐ VALIDACIÓN: Manejar valores None defensivamente
-        sale_price = item.price_usd or Decimal('0.00')
-        purchase_price = item.product.purchase_price_usd or Decimal('0.00')
-        item_profit = (sale_price - purchase_price) * item.quantity
-        real_profit_usd += item_profit
+    # Ganancia REAL por producto vendido: (precio_venta - precio_compra) × cantidad,
+    # con el precio de compra actual de cada producto
+    real_profit_usd = sum(
+        (row['total_profit_usd'] for row in ProfitReportService.product_rows(period['sold'])),
+        Decimal('0.00'),
+    )
 
     # Convertir ganancia real a Bs usando tasa promedio del período
     current_rate = ExchangeRate.get_latest_rate()
-    real_profit_bs = real_profit_usd * (current_rate.bs_to_usd if current_rate else Decimal('1.00'))
+    rate = current_rate.bs_to_usd if current_rate else Decimal('1.00')
+    real_profit_bs = real_profit_usd * rate
 
-    # ⭐ CORREGIDO: Convertir gastos USD a Bs antes de restar
-    total_expenses_bs = total_expenses_usd * (current_rate.bs_to_usd if current_rate else Decimal('1.00'))
+    # Gastos en USD convertidos a Bs antes de restar
+    total_expenses_bs = total_expenses_usd * rate
 
     # Ganancia neta real = ganancia por productos - gastos (ambos en Bs)
     net_profit_real_bs = real_profit_bs - total_expenses_bs
-    net_profit_real_usd = real_profit_usd - total_expenses_usd  # ⭐ NUEVO: También en USD
+    net_profit_real_usd = real_profit_usd - total_expenses_usd
 
     # Mantener cálculo anterior para comparación
     gross_profit_bs = total_sales_bs - total_purchases_bs
     gross_profit_usd = total_sales_usd - total_purchases_usd
-    # ⭐ CORREGIDO: Convertir gastos a Bs antes de restar
     net_profit_bs = gross_profit_bs - total_expenses_bs
-    
-    # Ganancias por día (para gráfico)
-    daily_profits = []
-    current_date = start_date
-    while current_date <= end_date:
-        day_sales = Sale.objects.filter(date__date=current_date).aggregate(
-            total=Sum('total_bs')
-        )['total'] or Decimal('0.00')
-        
-        day_purchases = SupplierOrder.objects.filter(
-            order_date__date=current_date,
-            status='received'
-        ).aggregate(
-            total=Sum('total_bs')
-        )['total'] or Decimal('0.00')
-        
-        day_expenses_usd = Expense.objects.filter(date=current_date).aggregate(
-            total=Sum('amount_usd')  # ⭐ CORREGIDO: Sumar en USD
-        )['total'] or Decimal('0.00')
-
-        # ⭐ CORREGIDO: Convertir gastos USD a Bs para el gráfico
-        day_expenses_bs = day_expenses_usd * (current_rate.bs_to_usd if current_rate else Decimal('1.00'))
 
-        day_profit = day_sales - day_purchases - day_expenses_bs  # ⭐ CORREGIDO: Restar Bs
-        
-        daily_profits.append({
-            'date': current_date.strftime('%d/%m'),
+    # Ganancias por día (para gráfico); gastos USD convertidos a Bs
+    daily_profits = [
+        {
+            'date': day.strftime('%d/%m'),
             'sales': float(day_sales),
             'purchases': float(day_purchases),
-            'expenses': float(day_expenses_bs),  # ⭐ CORREGIDO: Usar Bs
-            'profit': float(day_profit),
-        })
-        
-        current_date += timedelta(days=1)
-    
+            'expenses': float(day_expenses_usd * rate),
+            'profit': float(day_sales - day_purchases - day_expenses_usd * rate),
+        }
+        for day, day_sales, day_purchases, day_expenses_usd in period['daily']
+    ]
+
     context = {
         'form': form,
         'start_date': start_date,
@@ -520,16 +357,15 @@ def profits_report(request):
         'total_sales_usd': total_sales_usd,
         'total_purchases_bs': total_purchases_bs,
         'total_purchases_usd': total_purchases_usd,
-        'total_expenses': total_expenses_bs,  # ⭐ CORREGIDO: En Bs
-        'total_expenses_usd': total_expenses_usd,  # ⭐ NUEVO: En USD
+        'total_expenses': total_expenses_bs,
+        'total_expenses_usd': total_expenses_usd,
         'gross_profit_bs': gross_profit_bs,
         'gross_profit_usd': gross_profit_usd,
         'net_profit_bs': net_profit_bs,
-        # ⭐ NUEVO: Ganancias REALES calculadas por producto
         'real_profit_usd': real_profit_usd,
         'real_profit_bs': real_profit_bs,
         'net_profit_real_bs': net_profit_real_bs,
-        'net_profit_real_usd': net_profit_real_usd,  # ⭐ NUEVO: Ganancia neta real en USD
+        'net_profit_real_usd': net_profit_real_usd,
         'daily_profits': daily_profits,
         'sales_count': sales_data['sales_count'],
         'purchases_count': purchases_data['purchases_count'],
@@ -545,74 +381,17 @@ def product_profitability_report(request):
 
     # Obtener fechas del formulario
     if form.is_valid():
-        start_date, end_date = _get_date_range(form.cleaned_data)
+        start_date, end_date = get_date_range(form.cleaned_data)
     else:
         # Por defecto, este mes
         today = date.today()
         start_date = today.replace(day=1)
         end_date = today
 
-    # Obtener todos los ítems vendidos en el período
-    sale_items = SaleItem.objects.filter(
-        sale__date__date__gte=start_date,
-        sale__date__lte=end_date,
-        product__isnull=False
-    ).select_related('product')
-
-    # Calcular rentabilidad por producto
-    products_profitability = {}
-
-    for item in sale_items:
-        # ⭐ VALIDACIÓN: Saltar si no hay producto
-        if not item.product:
-            continue
-
-        product_id = item.product.id
-
-        if product_id not in products_profitability:
-            products_profitability[product_id] = {
-                'product': item.product,
-                'total_quantity_sold': Decimal('0.00'),
-                'total_revenue_usd': Decimal('0.00'),
-                'total_cost_usd': Decimal('0.00'),
-                'total_profit_usd': Decimal('0.00'),
-                'sales_count': 0,
-            }
-
-        # Calcular métricas
-        quantity = item.quantity
-        # ⭐ VALIDACIÓN: Manejar valores None defensivamente
-        sale_price = item.price_usd or Decimal('0.00')
-        purchase_price = item.product.purchase_price_usd or Decimal('0.00')
-
-        revenue = sale_price * quantity
-        cost = purchase_price * quantity
-        profit = revenue - cost
-
-        products_profitability[product_id]['total_quantity_sold'] += quantity
-        products_profitability[product_id]['total_revenue_usd'] += revenue
-        products_profitability[product_id]['total_cost_usd'] += cost
-        products_profitability[product_id]['total_profit_usd'] += profit
-        products_profitability[product_id]['sales_count'] += 1
-
-    # Convertir a lista y calcular métricas adicionales
-    products_list = []
-    for data in products_profitability.values():
-        # Calcular margen de ganancia porcentual
-        if data['total_revenue_usd'] > 0:
-            profit_margin = (data['total_profit_usd'] / data['total_revenue_usd']) * 100
-        else:
-            profit_margin = Decimal('0.00')
-
-        products_list.append({
-            'product': data['product'],
-            'total_quantity_sold': data['total_quantity_sold'],
-            'total_revenue_usd': data['total_revenue_usd'],
-            'total_cost_usd': data['total_cost_usd'],
-            'total_profit_usd': data['total_profit_usd'],
-            'profit_margin': profit_margin,
-            'sales_count': data['sales_count'],
-        })
+    # Cantidades e ingresos por producto del período (cacheados), con el
+    # costo y el margen calculados con el precio de compra actual
+    period = ProfitReportService.period_data(start_date, end_date)
+    products_list = ProfitReportService.product_rows(period['sold'])
 
     # Ordenar por diferentes criterios
     sort_by = request.GET.get('sort_by', 'profit')  # profit, revenue, quantity, margin
@@ -655,217 +434,70 @@ def product_profitability_report(request):
 def inventory_report(request):
     """Vista para el reporte de inventario actual"""
     form = InventoryFilterForm(request.GET or None)
-    products = Product.objects.filter(is_active=True).select_related('category')
+    report = InventoryReport.from_form(form)
+    return render_report(request, report, 'finances/inventory_report.html', {'form': form})
+
+
+@login_required
+def stock_history_report(request):
+    """Vista para el stock y valor a una fecha y los movimientos del período"""
+    form = StockHistoryFilterForm(request.GET or None)
 
     if form.is_valid():
+        start_date, end_date = get_date_range(form.cleaned_data)
         category = form.cleaned_data.get('category')
-        if category:
-            products = products.filter(category=category)
-
-        sort_by = form.cleaned_data.get('sort_by') or 'name'
-        if sort_by == 'name':
-            products = products.order_by('name')
-        elif sort_by == 'category':
-            products = products.order_by('category__name', 'name')
-        elif sort_by == 'stock':
-            products = products.order_by('stock')
-        elif sort_by == 'value':
-            # Ordenar por valor en Python después de traer los datos
-            products = products.order_by('name')
-        else:
-            products = products.order_by('name')
+        group_by = form.cleaned_data.get('group_by') or 'category'
     else:
-        sort_by = 'name'
-        products = products.order_by('name')
-
-    products_list = list(products)
+        # Por defecto, el mes pasado: cierra en el último checkpoint mensual
+        start_date, end_date = get_date_range({'period': 'last_month'})
+        category = None
+        group_by = 'category'
 
-    # Filtro de stock_status en Python (usa @property del modelo)
-    stock_status_filter = form.cleaned_data.get('stock_status') if form.is_valid() else ''
-    if stock_status_filter == 'out':
-        products_list = [p for p in products_list if p.stock_status == 'Sin stock']
-    elif stock_status_filter == 'low':
-        products_list = [p for p in products_list if p.stock_status == 'Stock bajo']
-    elif stock_status_filter == 'normal':
-        products_list = [p for p in products_list if p.stock_status == 'Stock normal']
+    # Stock desde el checkpoint más cercano + ajustes posteriores (ver StockHistoryService)
+    opening = StockHistoryService.valuation_as_of(start_date - timedelta(days=1), category, group_by)
+    closing = StockHistoryService.valuation_as_of(end_date, category, group_by)
+    movements = StockHistoryService.movements(start_date, end_date, category)
 
-    # Ordenar por valor en inventario si se eligió esa opción
-    if form.is_valid() and form.cleaned_data.get('sort_by') == 'value':
-        products_list.sort(key=lambda p: float(p.stock) * float(p.purchase_price_usd), reverse=True)
-
-    # Calcular totales
-    total_value_usd = sum(float(p.stock) * float(p.purchase_price_usd) for p in products_list)
-    low_stock_count = sum(1 for p in products_list if p.stock_status == 'Stock bajo')
-    out_of_stock_count = sum(1 for p in products_list if p.stock_status == 'Sin stock')
-
-    totals = {
-        'count': len(products_list),
-        'total_value_usd': total_value_usd,
-        'low_stock_count': low_stock_count,
-        'out_of_stock_count': out_of_stock_count,
-    }
-
-    # Exportar PDF
-    if request.GET.get('format') == 'pdf':
-        metadata = [
-            ('Total Productos', str(len(products_list))),
-            ('Valor Total USD', f'${total_value_usd:.2f}'),
-        ]
-        return pdf_inventory_report(products_list, totals, metadata=metadata)
-
-    paginator = Paginator(products_list, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = Paginator(movements['products'], 50)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
 
-    return render(request, 'finances/inventory_report.html', {
+    context = {
         'form': form,
+        'query': query.urlencode(),
+        'start_date': start_date,
+        'end_date': end_date,
+        'group_by': group_by,
+        'opening_totals': opening['totals'],
+        'closing_totals': closing['totals'],
+        'closing_rows': closing['rows'],
+        'summary': movements['summary'],
         'page_obj': page_obj,
-        'totals': totals,
-    })
+    }
+
+    return render(request, 'finances/stock_history_report.html', context)
 
 
 @login_required
 def credits_report(request):
     """Vista para el reporte de cuentas por cobrar"""
-    from customers.models import CustomerCredit
-
     form = CreditsReportFilterForm(request.GET or None)
-    today = date.today()
-
-    credits = CustomerCredit.objects.select_related('customer', 'sale').annotate(
-        paid_amount=Sum('payments__amount_usd')
-    )
-
-    start_date = end_date = None
-    credit_status = 'pending'  # valor por defecto
-
-    if form.is_valid():
-        start_date, end_date = _get_date_range(form.cleaned_data)
-        if start_date and end_date:
-            credits = credits.filter(
-                date_created__date__gte=start_date,
-                date_created__date__lte=end_date
-            )
-
-        credit_status = form.cleaned_data.get('credit_status') or 'pending'
-
-    # Filtrar por estado
-    if credit_status == 'pending':
-        credits = credits.filter(is_paid=False)
-    elif credit_status == 'overdue':
-        credits = credits.filter(is_paid=False, date_due__lt=today)
-    elif credit_status == 'paid':
-        credits = credits.filter(is_paid=True)
-    # 'all' → sin filtro adicional
-
-    # Calcular saldo y aging en Python
-    credits_data = []
-    aging = {'current': 0.0, 'days_1_30': 0.0, 'days_31_60': 0.0, 'over_60': 0.0}
-
-    for c in credits:
-        amount = float(c.amount_usd)
-        paid = float(c.paid_amount or 0)
-        balance = max(amount - paid, 0.0)
-
-        days_overdue = 0
-        if c.date_due and not c.is_paid:
-            days_overdue = max((today - c.date_due).days, 0)
-
-        credits_data.append({
-            'id': c.id,
-            'customer': c.customer.name if c.customer else '-',
-            'sale_id': c.sale.id if c.sale else '-',
-            'amount': amount,
-            'paid': paid,
-            'balance': balance,
-            'date_due': c.date_due,
-            'days_overdue': days_overdue,
-            'is_paid': c.is_paid,
-        })
-
-        # Aging solo para créditos no pagados
-        if not c.is_paid:
-            if days_overdue == 0:
-                aging['current'] += balance
-            elif days_overdue <= 30:
-                aging['days_1_30'] += balance
-            elif days_overdue <= 60:
-                aging['days_31_60'] += balance
-            else:
-                aging['over_60'] += balance
-
-    # Exportar PDF
-    if request.GET.get('format') == 'pdf':
-        metadata = []
-        if start_date and end_date:
-            metadata.append(('Período', f'{start_date.strftime("%d/%m/%Y")} - {end_date.strftime("%d/%m/%Y")}'))
-        metadata.append(('Estado', credit_status.capitalize()))
-        return pdf_credits_report(credits_data, aging, metadata=metadata)
-
-    paginator = Paginator(credits_data, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    return render(request, 'finances/credits_report.html', {
+    report = CreditsReport.from_form(form)
+    return render_report(request, report, 'finances/credits_report.html', lambda: {
         'form': form,
-        'page_obj': page_obj,
-        'aging': aging,
-        'credit_status': credit_status,
-        'start_date': start_date,
-        'end_date': end_date,
+        'aging': report.aging(),
+        'credit_status': report.credit_status,
     })
 
 
 @login_required
 def supplier_debt_report(request):
     """Vista para el reporte de deuda a proveedores"""
-    orders = SupplierOrder.objects.filter(
-        status='received'
-    ).select_related('supplier').exclude(total_usd=0)
-
-    suppliers_data = {}
-    for order in orders:
-        owed = float(order.outstanding_balance_usd)
-        if owed <= 0:
-            continue
-        sid = order.supplier.id
-        if sid not in suppliers_data:
-            suppliers_data[sid] = {
-                'name': order.supplier.name,
-                'phone': order.supplier.phone or '',
-                'order_count': 0,
-                'total_usd': 0.0,
-                'paid_usd': 0.0,
-                'debt_usd': 0.0,
-                'orders': [],
-            }
-        suppliers_data[sid]['order_count'] += 1
-        suppliers_data[sid]['total_usd'] += float(order.total_usd)
-        suppliers_data[sid]['paid_usd'] += float(order.paid_amount_usd)
-        suppliers_data[sid]['debt_usd'] += owed
-        suppliers_data[sid]['orders'].append(order)
-
-    # Ordenar por deuda descendente
-    suppliers_list = sorted(suppliers_data.values(), key=lambda x: x['debt_usd'], reverse=True)
-    suppliers_ordered = {}
-    for s in suppliers_list:
-        # Reconstruir dict preservando orden
-        key = s['name']
-        suppliers_ordered[key] = s
-
-    total_debt = sum(s['debt_usd'] for s in suppliers_data.values())
-
-    # Exportar PDF
-    if request.GET.get('format') == 'pdf':
-        return pdf_supplier_debt_report(
-            {k: v for k, v in suppliers_ordered.items()},
-            total_debt,
-            metadata=[('Total Deuda USD', f'${total_debt:.2f}')]
-        )
-
-    return render(request, 'finances/supplier_debt_report.html', {
-        'suppliers_data': suppliers_list,
-        'total_debt': total_debt,
+    report = SupplierDebtReport()
+    return render_report(request, report, 'finances/supplier_debt_report.html', lambda: {
+        'total_debt': report.totals()['debt_usd'],
+        'aging': report.aging(),
     })
 
 
@@ -876,6 +508,11 @@ def supplier_debt_report(request):
 @login_required
 def expense_list(request):
     """Vista para listar gastos"""
+    # Exportación con los mismos filtros (?format=csv|xlsx|pdf)
+    export = export_report(request, ExpensesReport(request.GET.dict()))
+    if export is not None:
+        return export
+
     # Filtros
     category = request.GET.get('category')
     start_date = request.GET.get('start_date')
@@ -1098,40 +735,3 @@ def daily_close_create(request):
         'today_profit': today_profit,
         'title': 'Realizar Cierre Diario'
     })
-
-# ============================================================================
-# FUNCIONES AUXILIARES
-# ============================================================================
-
-def _get_date_range(form_data):
-    """Helper para obtener rango de fechas desde el formulario"""
-    period = form_data.get('period')
-    today = date.today()
-    
-    if period == 'today':
-        return today, today
-    elif period == 'yesterday':
-        yesterday = today - timedelta(days=1)
-        return yesterday, yesterday
-    elif period == 'this_week':
-        start = today - timedelta(days=today.weekday())
-        return start, today
-    elif period == 'last_week':
-        start = today - timedelta(days=today.weekday() + 7)
-        end = start + timedelta(days=6)
-        return start, end
-    elif period == 'this_month':
-        start = today.replace(day=1)
-        return start, today
-    elif period == 'last_month':
-        first_this_month = today.replace(day=1)
-        last_month_end = first_this_month - timedelta(days=1)
-        last_month_start = last_month_end.replace(day=1)
-        return last_month_start, last_month_end
-    elif period == 'this_year':
-        start = today.replace(month=1, day=1)
-        return start, today
-    elif period == 'custom':
-        return form_data.get('start_date'), form_data.get('end_date')
-    
-    return None, None
\ No newline at end of file
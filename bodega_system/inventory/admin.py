@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 from simple_history.admin import SimpleHistoryAdmin
-from .models import Category, Product, InventoryAdjustment, ProductCombo, ComboItem
+from .models import Category, Product, InventoryAdjustment, InventoryValuation, ProductCombo, ComboItem
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -22,7 +22,8 @@ class ProductAdmin(SimpleHistoryAdmin):
     )
     list_filter = ('category', 'unit_type', 'is_active', 'is_bulk_pricing')
     search_fields = ('name', 'barcode', 'description')
-    readonly_fields = ('created_at', 'updated_at', 'get_current_price_bs', 'get_current_purchase_price_bs')
+    # El stock se mueve con ajustes de inventario (libro de stock), no a mano
+    readonly_fields = ('stock', 'created_at', 'updated_at', 'get_current_price_bs', 'get_current_purchase_price_bs')
     
     fieldsets = (
         ('Información Básica', {
@@ -73,6 +74,16 @@ class InventoryAdjustmentAdmin(admin.ModelAdmin):
     readonly_fields = ('adjusted_at',)
 
 
+@admin.register(InventoryValuation)
+class InventoryValuationAdmin(admin.ModelAdmin):
+    list_display = ('category', 'purchase_value_usd', 'selling_value_usd', 'updated_at')
+    readonly_fields = ('category', 'purchase_value_usd', 'selling_value_usd', 'updated_at')
+
+    def has_add_permission(self, request):
+        # Lo mantiene ValuationService; se corrige con verify_inventory_valuation
+        return False
+
+
 # ADMIN PARA COMBOS (Pendiente de actualizar a USD)
 
 class ComboItemInline(admin.TabularInline):
@@ -1,9 +1,10 @@
 # inventory/api_views.py - VERSIÓN MEJORADA
 
 import json
+from decimal import Decimal
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Prefetch
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
@@ -12,8 +13,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
-from .models import Product, ProductCombo, Category, InventoryAdjustment
-from django.db.models import F
+from .models import Category, Product, ProductCombo, ComboItem, InventoryAdjustment
+from .search import search_products
+from .services import CategoryService, StockHistoryService, StockStateService, ValuationService
+
+# Color de cada estado de stock en el POS
+STOCK_STATE_COLORS = {'out': 'red', 'low': 'yellow', 'normal': 'green'}
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -103,41 +108,26 @@ def product_search_api(request):
         if active_only:
             products = products.filter(is_active=True)
         
-        # Filtros de búsqueda
-        if query:
-            products = products.filter(
-                Q(name__icontains=query) |
-                Q(barcode__icontains=query) |
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query)
-            )
-        
         if category_id:
             products = products.filter(category_id=category_id)
         
         if stock_filter:
             if stock_filter == 'low':
-                products = products.filter(stock__lte=F('min_stock'))
-            elif stock_filter == 'out':
-                products = products.filter(stock=0)
-            elif stock_filter == 'normal':
-                products = products.filter(stock__gt=F('min_stock'))
+                products = products.filter(stock_state__in=Product.RESTOCK_STATES)
+            elif stock_filter in ('out', 'normal'):
+                products = products.filter(stock_state=stock_filter)
         
-        # Ordenar por relevancia (nombre primero, luego por stock)
-        products = products.order_by('name', '-stock')[:limit]
+        # Búsqueda indexada: ya viene ordenada por relevancia
+        if query:
+            products = search_products(products, query)
+        else:
+            products = products.order_by('name', '-stock')
+        products = products[:limit]
         
         results = []
         for product in products:
-            # Determinar el estado del stock
-            if product.stock <= 0:
-                stock_status = 'out'
-                stock_color = 'red'
-            elif product.stock <= product.min_stock:
-                stock_status = 'low'
-                stock_color = 'yellow'
-            else:
-                stock_status = 'normal'
-                stock_color = 'green'
+            stock_status = product.stock_state
+            stock_color = STOCK_STATE_COLORS[stock_status]
             
             results.append({
                 'id': product.id,
@@ -219,9 +209,7 @@ def product_by_barcode_api(request, barcode):
             } if product.is_bulk_pricing else None,
             
             # Estado del stock
-            'stock_status': 'out' if product.stock <= 0 
-                          else 'low' if product.stock <= product.min_stock 
-                          else 'normal',
+            'stock_status': product.stock_state,
         }
         
         return JsonResponse(data)
@@ -235,18 +223,14 @@ def product_by_barcode_api(request, barcode):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def categories_list_api(request):
-    """API para obtener lista de categorías con conteo de productos"""
+    """API para obtener lista de categorías con conteos, stock bajo y valor"""
     try:
-        categories = Category.objects.all().order_by('name')
-        
         results = []
-        for category in categories:
-            product_count = Product.objects.filter(category=category, is_active=True).count()
+        for row in CategoryService.summary():
             results.append({
-                'id': category.id,
-                'name': category.name,
-                'description': category.description,
-                'product_count': product_count,
+                **row,
+                'product_count': row['active_count'],
+                'inventory_value_usd': str(row['inventory_value_usd']),
                 'created_at': None,
             })
         
@@ -293,31 +277,26 @@ def validate_barcode_api(request):
 def product_stock_summary_api(request):
     """API para obtener resumen de stock del inventario"""
     try:
-        from django.db.models import Count, Sum, F
-        
-        # Estadísticas generales
-        total_products = Product.objects.filter(is_active=True).count()
-        out_of_stock = Product.objects.filter(is_active=True, stock=0).count()
-        low_stock = Product.objects.filter(
-            is_active=True, 
-            stock__gt=0, 
-            stock__lte=F('min_stock')
-        ).count()
-        
-        # Valor total del inventario
-        total_value = Product.objects.filter(is_active=True).aggregate(
-            purchase_value=Sum(F('stock') * F('purchase_price_bs')),
-            selling_value=Sum(F('stock') * F('selling_price_bs'))
-        )
+        from utils.models import ExchangeRate
+        
+        # Estadísticas generales: conteo por estado sobre el índice
+        summary = StockStateService.summary()
+        
+        # Valor total del inventario: fila total del libro de valoración
+        valuation = ValuationService.totals()
+        latest_rate = ExchangeRate.get_latest_rate()
+        rate = latest_rate.bs_to_usd if latest_rate else 0
         
         return JsonResponse({
             'summary': {
-                'total_products': total_products,
-                'out_of_stock': out_of_stock,
-                'low_stock': low_stock,
-                'normal_stock': total_products - out_of_stock - low_stock,
-                'total_purchase_value': float(total_value['purchase_value'] or 0),
-                'total_selling_value': float(total_value['selling_value'] or 0),
+                'total_products': summary['total'],
+                'out_of_stock': summary['out'],
+                'low_stock': summary['low'],
+                'normal_stock': summary['normal'],
+                'total_purchase_value': float(valuation['purchase_value_usd'] * rate),
+                'total_selling_value': float(valuation['selling_value_usd'] * rate),
+                'total_purchase_value_usd': float(valuation['purchase_value_usd']),
+                'total_selling_value_usd': float(valuation['selling_value_usd']),
             }
         })
         
@@ -327,6 +306,69 @@ def product_stock_summary_api(request):
             status=500
         )
 
+def _parse_day(value, default=None):
+    """Fecha AAAA-MM-DD de un parámetro GET (ValueError si es inválida)"""
+    from datetime import datetime
+    if not value:
+        if default is None:
+            raise ValueError('Falta la fecha')
+        return default
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _json_row(row):
+    return {key: float(value) if isinstance(value, Decimal) else value for key, value in row.items()}
+
+
+def _category_param(request):
+    category_id = request.GET.get('category')
+    return get_object_or_404(Category, pk=category_id) if category_id else None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stock_as_of_api(request):
+    """API para el stock y valor al costo al cierre de una fecha (?date=&category=&group=)"""
+    try:
+        day = _parse_day(request.GET.get('date'))
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida; use AAAA-MM-DD'}, status=400)
+    group_by = 'category' if request.GET.get('group') == 'category' else 'product'
+
+    result = StockHistoryService.valuation_as_of(day, _category_param(request), group_by)
+    return JsonResponse({
+        'date': day.isoformat(),
+        'group': group_by,
+        'totals': {
+            'products': result['totals']['products'],
+            'stock_value_usd': float(result['totals']['stock_value_usd']),
+        },
+        'rows': [_json_row(row) for row in result['rows']],
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stock_movements_api(request):
+    """API para los movimientos de stock de un período por origen (?start=&end=&category=)"""
+    from datetime import date
+    try:
+        end = _parse_day(request.GET.get('end'), date.today())
+        start = _parse_day(request.GET.get('start'), end.replace(day=1))
+    except ValueError:
+        return JsonResponse({'error': 'Fecha inválida; use AAAA-MM-DD'}, status=400)
+    if start > end:
+        return JsonResponse({'error': 'La fecha de inicio no puede ser mayor a la de fin'}, status=400)
+
+    result = StockHistoryService.movements(start, end, _category_param(request))
+    return JsonResponse({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'summary': [_json_row(row) for row in result['summary']],
+        'products': [_json_row(row) for row in result['products']],
+    })
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def combo_search_api(request):
@@ -339,8 +381,10 @@ def combo_search_api(request):
         if not query:
             return JsonResponse({'combos': []})
             
-        combos = ProductCombo.objects.select_related().filter(
+        combos = ProductCombo.objects.filter(
             name__icontains=query
+        ).prefetch_related(
+            Prefetch('items', queryset=ComboItem.objects.select_related('product'))
         )
         
         if active_only:
@@ -350,11 +394,8 @@ def combo_search_api(request):
         
         results = []
         for combo in combos:
-            # Verificar disponibilidad de stock para todos los items
-            items_available = all(
-                item.product.stock >= item.quantity 
-                for item in combo.items.all()
-            )
+            # Componentes ya precargados: sin consultas por combo
+            items = list(combo.items.all())
             
             results.append({
                 'id': combo.id,
@@ -365,8 +406,18 @@ def combo_search_api(request):
                 'savings_amount': None,
                 'savings_percentage': None,
                 'is_active': combo.is_active,
-                'stock_available': items_available,
-                'item_count': combo.items.count(),
+                'stock_available': combo.max_sellable_units > 0,
+                'max_sellable_units': combo.max_sellable_units,
+                'item_count': len(items),
+                'items': [
+                    {
+                        'product_id': item.product_id,
+                        'name': item.product.name,
+                        'quantity': float(item.quantity),
+                        'stock': float(item.product.stock),
+                    }
+                    for item in items
+                ],
             })
         
         return JsonResponse({
@@ -429,7 +480,7 @@ def product_suggestions_api(request):
             products = products.filter(name__icontains=query)
         
         if suggestion_type == 'low_stock':
-            products = products.filter(stock__lte=F('min_stock')).order_by('stock')
+            products = products.filter(stock_state__in=Product.RESTOCK_STATES).order_by('stock')
         elif suggestion_type == 'new':
             products = products.order_by('-created_at')
         else:  # popular - por ahora ordenar por stock alto
@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
-    verbose_name = 'Gestión de Inventario'
\ No newline at end of file
+    verbose_name = 'Gestión de Inventario'
+
+    def ready(self):
+        from . import signals  # noqa: F401
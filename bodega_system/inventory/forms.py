@@ -1,16 +1,37 @@
 # inventory/forms.py - FORMULARIO DE PRODUCTOS EN USD
 
 from django import forms
-from django.forms import inlineformset_factory
-from django.db import transaction
+from django.forms import inlineformset_factory, BaseInlineFormSet
+from django.urls import reverse_lazy
 from decimal import Decimal, InvalidOperation
 
 from .models import Category, Product, InventoryAdjustment, ProductCombo, ComboItem
+from utils.autocomplete import (
+    AutocompleteModelChoiceField, AutocompleteModelFormMixin, AutocompleteFormSetMixin,
+)
+
+
+def product_autocomplete_field(**kwargs):
+    """Campo de producto activo con autocompletado sobre la API de búsqueda"""
+    kwargs.setdefault('attrs', {'class': 'form-input'})
+    return AutocompleteModelChoiceField(
+        queryset=Product.objects.filter(is_active=True),
+        url=reverse_lazy('inventory:product_search_api'),
+        results_key='products',
+        detail_key='barcode',
+        placeholder='Buscar por nombre o código de barras...',
+        label='Producto',
+        **kwargs
+    )
 
 
 class ProductForm(forms.ModelForm):
     """Formulario para productos con precios en USD"""
 
+    # Versión del producto al abrir el formulario: si otro usuario lo guardó
+    # mientras tanto, save() lanza ConcurrentUpdateError en vez de pisarlo
+    row_version = forms.IntegerField(widget=forms.HiddenInput, required=False, min_value=0)
+
     class Meta:
         model = Product
         fields = [
@@ -96,8 +117,10 @@ class ProductForm(forms.ModelForm):
 
         # Hacer algunos campos requeridos
         self.fields['category'].required = True
+        self.fields['category'].queryset = Category.objects.cached()
         self.fields['purchase_price_usd'].required = True
         self.fields['selling_price_usd'].required = True
+        self.fields['row_version'].initial = self.instance.row_version
 
     def clean_purchase_price_usd(self):
         """Validar precio de compra"""
@@ -132,6 +155,9 @@ class ProductForm(forms.ModelForm):
         is_bulk_pricing = cleaned_data.get('is_bulk_pricing')
         bulk_min_quantity = cleaned_data.get('bulk_min_quantity')
 
+        if cleaned_data.get('row_version') is not None:
+            self.instance.row_version = cleaned_data['row_version']
+
         # Validar que precio de venta sea mayor que precio de compra
         if purchase_price and selling_price:
             if selling_price <= purchase_price:
@@ -172,14 +198,15 @@ class CategoryForm(forms.ModelForm):
         }
 
 
-class InventoryAdjustmentForm(forms.ModelForm):
+class InventoryAdjustmentForm(AutocompleteModelFormMixin, forms.ModelForm):
     """Formulario para ajustes de inventario"""
 
+    product = product_autocomplete_field()
+
     class Meta:
         model = InventoryAdjustment
         fields = ['product', 'adjustment_type', 'quantity', 'reason']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-select'}),
             'adjustment_type': forms.Select(attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={
                 'class': 'form-input',
@@ -193,9 +220,6 @@ class InventoryAdjustmentForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        # Filtrar solo productos activos
-        self.fields['product'].queryset = Product.objects.filter(is_active=True)
-
     def clean_quantity(self):
         """Validar cantidad"""
         quantity = self.cleaned_data.get('quantity')
@@ -216,30 +240,17 @@ class InventoryAdjustmentForm(forms.ModelForm):
         return quantity
 
     def save(self, commit=True):
+        from .services import StockLedgerService
+
         adjustment = super().save(commit=False)
         adjustment.adjusted_by = self.user
 
-        # Calcular nuevo stock
-        product = adjustment.product
-        adjustment.previous_stock = product.stock
-
-        if adjustment.adjustment_type == 'add':
-            new_stock = product.stock + adjustment.quantity
-        elif adjustment.adjustment_type == 'remove':
-            new_stock = product.stock - adjustment.quantity
-        elif adjustment.adjustment_type == 'set':
-            new_stock = adjustment.quantity
-
-        adjustment.new_stock = new_stock
-
         if commit:
-            with transaction.atomic():
-                # Actualizar stock del producto
-                product.stock = new_stock
-                product.save()
-
-                # Guardar ajuste
-                adjustment.save()
+            # Guarda el ajuste y el stock nuevo del producto juntos
+            StockLedgerService.record(adjustment)
+        else:
+            # Solo calcula previous_stock/new_stock (y el stock en memoria)
+            StockLedgerService.apply(adjustment)
 
         return adjustment
 
@@ -259,21 +270,21 @@ class ProductComboForm(forms.ModelForm):
         }
 
 
-class ComboItemForm(forms.ModelForm):
+class ComboItemForm(AutocompleteModelFormMixin, forms.ModelForm):
     """Formulario para ítems de combo - PENDIENTE"""
 
+    product = product_autocomplete_field()
+
     class Meta:
         model = ComboItem
         fields = ['product', 'quantity']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={'class': 'form-input', 'step': '0.001', 'min': '0.001'}),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        # Filtrar solo productos activos
-        self.fields['product'].queryset = Product.objects.filter(is_active=True)
+
+class BaseComboItemFormset(AutocompleteFormSetMixin, BaseInlineFormSet):
+    """Valida los productos de todas las filas con una sola consulta"""
 
 
 # Formset para manejo de ítems de combo
@@ -281,6 +292,7 @@ ComboItemFormset = forms.inlineformset_factory(
     ProductCombo,
     ComboItem,
     form=ComboItemForm,
+    formset=BaseComboItemFormset,
     extra=1,
     can_delete=True,
     min_num=1,
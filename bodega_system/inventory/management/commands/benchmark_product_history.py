@@ -0,0 +1,104 @@
+# inventory/management/commands/benchmark_product_history.py
+
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import override_settings
+
+from inventory.models import Category, Product
+from inventory.services import ProductHistoryService
+from sales.api_views import process_regular_sale
+from sales.models import Sale
+from utils.models import ExchangeRate
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide cuánto escribe cada línea de venta (filas y bytes de historial '
+        'y de toda la base) con historial completo y con el historial que '
+        'omite los cambios de solo stock. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=2000,
+                            help='Líneas de venta a registrar (default 2000)')
+        parser.add_argument('--products', type=int, default=50,
+                            help='Productos entre los que se reparten (default 50)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write(self.style.WARNING('Los bytes se miden con dbstat (solo SQLite)'))
+            return
+        user = get_user_model().objects.filter(is_superuser=True).first() \
+            or get_user_model().objects.first()
+        if user is None:
+            self.stdout.write(self.style.WARNING('Se necesita al menos un usuario'))
+            return
+
+        modes = (
+            ('completo', ()),
+            ('solo cambios', Product.HISTORY_IGNORED_FIELDS),
+        )
+        results = []
+        for name, ignored in modes:
+            with override_settings(PRODUCT_HISTORY_IGNORED_FIELDS=ignored), transaction.atomic():
+                results.append((name,) + self._measure(options['lines'], options['products'], user))
+                transaction.set_rollback(True)
+
+        lines = options['lines']
+        self.stdout.write(f'\nLíneas de venta: {lines}')
+        self.stdout.write(
+            f"{'historial':<14}{'ms/línea':>10}{'filas hist.':>13}{'bytes hist.':>13}{'bytes base':>12}"
+        )
+        for name, elapsed, rows, history_bytes, total_bytes in results:
+            self.stdout.write(
+                f'{name:<14}{elapsed / lines:>10.2f}{rows / lines:>13.2f}'
+                f'{history_bytes / lines:>13.0f}{total_bytes / lines:>12.0f}'
+            )
+
+    def _measure(self, lines, product_count, user):
+        category = Category.objects.create(name='Bench historial')
+        products = [
+            Product.objects.create(
+                name=f'Bench historial {i}',
+                barcode=f'BHIST{i:06d}',
+                category=category,
+                purchase_price_usd=Decimal('1.00'),
+                selling_price_usd=Decimal('1.50'),
+                stock=Decimal(lines),
+            )
+            for i in range(product_count)
+        ]
+        rate = ExchangeRate(bs_to_usd=Decimal('40'))
+
+        history_before = ProductHistoryService.table_stats()
+        total_before = self._database_bytes()
+        start = time.perf_counter()
+        for i in range(lines):
+            sale = Sale.objects.create(
+                user=user, total_usd=Decimal('1.50'), total_bs=Decimal('60'),
+                exchange_rate_used=rate.bs_to_usd, payment_method='cash',
+            )
+            item = {'product_id': products[i % product_count].pk, 'quantity': '1'}
+            result = process_regular_sale(sale, item, user, rate)
+            if not result['success']:
+                raise RuntimeError(result['error'])
+        elapsed = (time.perf_counter() - start) * 1000
+        history_after = ProductHistoryService.table_stats()
+        return (
+            elapsed,
+            history_after['rows'] - history_before['rows'],
+            history_after['bytes'] - history_before['bytes'],
+            self._database_bytes() - total_before,
+        )
+
+    def _database_bytes(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT SUM(payload) FROM dbstat')
+                return cursor.fetchone()[0] or 0
+        except DatabaseError:
+            return 0
@@ -0,0 +1,109 @@
+# inventory/management/commands/benchmark_product_search.py
+
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from inventory.models import Category, Product
+from inventory.search import search_backend, search_products
+
+WORDS = [
+    'harina', 'arroz', 'pasta', 'aceite', 'azucar', 'cafe', 'leche', 'queso',
+    'jabon', 'detergente', 'galleta', 'refresco', 'atun', 'sardina', 'mayonesa',
+    'salsa', 'caraota', 'lenteja', 'avena', 'mantequilla', 'pan', 'huevo',
+    'papel', 'cloro', 'champu', 'crema', 'chocolate', 'jugo', 'agua', 'sal',
+]
+BRANDS = ['PAN', 'Polar', 'Mary', 'Primor', 'Diana', 'Vatel', 'Nestle', 'Kraft']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la latencia de la búsqueda de productos (índice vs icontains) '
+        'sobre un catálogo sintético. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000,
+                            help='Productos sintéticos a crear (default 100000)')
+        parser.add_argument('--queries', type=int, default=200,
+                            help='Búsquedas por backend (default 200)')
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Resultados por búsqueda, como en el POS (default 10)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        backend = search_backend()
+
+        with transaction.atomic():
+            self._populate(options['products'], rng)
+            queries = self._queries(options['queries'], rng)
+
+            results = {}
+            backends = [backend, 'basic'] if backend != 'basic' else ['basic']
+            for name in backends:
+                results[name] = self._measure(name, queries, options['limit'])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"\nProductos: {options['products']}  Búsquedas: {len(queries)}")
+        self.stdout.write(f"{'backend':<10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, timings in results.items():
+            timings = sorted(timings)
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f"{name:<10}{statistics.median(timings):>10.2f}{p95:>10.2f}{timings[-1]:>10.2f}"
+            )
+        if backend == 'basic':
+            self.stdout.write(self.style.WARNING(
+                'No hay índice de búsqueda instalado: solo se midió icontains'
+            ))
+
+    def _populate(self, count, rng):
+        self.stdout.write(f'Creando {count} productos sintéticos...')
+        categories = [
+            Category.objects.create(name=f'Bench {word.title()}') for word in WORDS[:10]
+        ]
+        batch = []
+        for i in range(count):
+            word = rng.choice(WORDS)
+            batch.append(Product(
+                name=f'{word.title()} {rng.choice(BRANDS)} {rng.randint(1, 999)}g',
+                barcode=f'BENCH{i:09d}',
+                category=rng.choice(categories),
+                description=f'{rng.choice(WORDS)} {rng.choice(WORDS)}',
+                purchase_price_usd=Decimal('1.00'),
+                selling_price_usd=Decimal('1.50'),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+
+    def _queries(self, count, rng):
+        """Mezcla de lo que se escribe en el POS: prefijos, dos palabras y códigos"""
+        queries = []
+        for _ in range(count):
+            kind = rng.random()
+            word = rng.choice(WORDS)
+            if kind < 0.4:
+                queries.append(word[:rng.randint(3, len(word))])
+            elif kind < 0.7:
+                queries.append(f'{word} {rng.choice(BRANDS).lower()[:3]}')
+            else:
+                queries.append(f'BENCH{rng.randrange(10 ** 5):09d}')
+        return queries
+
+    def _measure(self, backend, queries, limit):
+        base = Product.objects.select_related('category').filter(is_active=True)
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            list(search_products(base, query, backend=backend)[:limit])
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
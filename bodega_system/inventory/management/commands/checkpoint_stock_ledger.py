@@ -0,0 +1,41 @@
+# inventory/management/commands/checkpoint_stock_ledger.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.services import StockLedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda un checkpoint del libro de stock para cada producto con '
+        'ajustes desde el último, para que el stock a una fecha y la '
+        'verificación solo reproduzcan lo posterior. Pensado para cron diario; '
+        'con --monthly completa el cierre de cada mes pasado'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Corte AAAA-MM-DD (fin del día); default: ahora')
+        parser.add_argument(
+            '--monthly', action='store_true',
+            help='Checkpoint al cierre de cada mes cerrado que no lo tenga',
+        )
+
+    def handle(self, *args, **options):
+        if options['monthly']:
+            created = StockLedgerService.monthly_checkpoints()
+            self.stdout.write(self.style.SUCCESS(f'Checkpoints mensuales creados: {created}'))
+            return
+
+        at = None
+        if options['date']:
+            try:
+                at = datetime.strptime(options['date'], '%Y-%m-%d').replace(
+                    hour=23, minute=59, second=59, microsecond=999999,
+                )
+            except ValueError:
+                raise CommandError('Fecha inválida; use AAAA-MM-DD')
+
+        created = StockLedgerService.checkpoint(at)
+        self.stdout.write(self.style.SUCCESS(f'Checkpoints creados: {created}'))
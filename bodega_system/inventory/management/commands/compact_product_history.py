@@ -0,0 +1,52 @@
+# inventory/management/commands/compact_product_history.py
+
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inventory.services import ProductHistoryService
+
+
+class Command(BaseCommand):
+    help = (
+        'Compacta el historial de productos: borra las filas que solo '
+        'cambian campos sin historial (stock, precios en Bs) y, con --days, '
+        'deja una sola fila por producto antes del corte'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            help='Conservar completo solo el historial de los últimos N días')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo contar las filas que se borrarían')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Ejecutar VACUUM al terminar (SQLite) para devolver el espacio')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['days'] is not None:
+            before = datetime.now() - timedelta(days=options['days'])
+
+        stats = ProductHistoryService.table_stats()
+        self.stdout.write(f"Historial: {stats['rows']} filas{self._size(stats)}")
+
+        if options['dry_run']:
+            redundant = len(ProductHistoryService.redundant_rows(before))
+            self.stdout.write(self.style.WARNING(f'Se borrarían {redundant} filas'))
+            return
+
+        deleted = ProductHistoryService.compact(before)
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+
+        after = ProductHistoryService.table_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Borradas {deleted} filas; quedan {after['rows']}{self._size(after)}"
+        ))
+
+    def _size(self, stats):
+        if stats['bytes'] is None:
+            return ''
+        return f" ({stats['bytes'] / 1024:.1f} KB)"
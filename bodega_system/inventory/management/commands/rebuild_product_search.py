@@ -0,0 +1,32 @@
+# inventory/management/commands/rebuild_product_search.py
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from inventory.search import rebuild_search_index, search_backend
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de productos (FTS5 / pg_trgm)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Alias de la base de datos (por defecto "default")',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        indexed = rebuild_search_index(using)
+        backend = search_backend(using)
+
+        if backend == 'basic':
+            self.stdout.write(self.style.WARNING(
+                'El motor no soporta índice de búsqueda: se usará icontains'
+            ))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice de búsqueda reconstruido ({backend}): {indexed} productos'
+        ))
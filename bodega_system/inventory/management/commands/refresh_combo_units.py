@@ -0,0 +1,18 @@
+# inventory/management/commands/refresh_combo_units.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.services import ComboService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las unidades vendibles de todos los combos '
+        '(después de cargas masivas de stock que no pasan por save())'
+    )
+
+    def handle(self, *args, **options):
+        updated = ComboService.refresh_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Unidades vendibles recalculadas: {updated} combos'
+        ))
@@ -0,0 +1,18 @@
+# inventory/management/commands/refresh_stock_states.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.services import StockStateService
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula el estado de stock (sin stock / bajo / normal) de todos '
+        'los productos y publica las transiciones encontradas'
+    )
+
+    def handle(self, *args, **options):
+        changed = StockStateService.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Estados de stock recalculados: {changed} productos cambiaron'
+        ))
@@ -0,0 +1,42 @@
+# inventory/management/commands/verify_inventory_valuation.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.models import Category
+from inventory.services import ValuationService
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el libro de valoración del inventario con el cálculo '
+        'completo (stock × precio) y opcionalmente lo reconstruye'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Reconstruye el libro si hay diferencias',
+        )
+
+    def handle(self, *args, **options):
+        differences = ValuationService.verify()
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('El libro de valoración cuadra'))
+            return
+
+        names = dict(Category.objects.values_list('pk', 'name'))
+        for diff in differences:
+            scope = names.get(diff['category_id'], 'Total') if diff['category_id'] else 'Total'
+            ledger = f"${diff['ledger']:.2f}" if diff['ledger'] is not None else 'sin fila'
+            self.stdout.write(self.style.WARNING(
+                f"{scope}: libro {ledger}, real ${diff['actual']:.2f}"
+            ))
+
+        if options['rebuild']:
+            rows = ValuationService.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Libro reconstruido: {rows} filas'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(differences)} diferencias; use --rebuild para corregirlas'
+            ))
@@ -0,0 +1,43 @@
+# inventory/management/commands/verify_stock_ledger.py
+
+from django.core.management.base import BaseCommand
+
+from inventory.models import Product
+from inventory.services import StockLedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el stock de cada producto con el que da el libro de ajustes '
+        '(desde el último checkpoint) y opcionalmente lo reconstruye'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Proyecta de nuevo el stock desde el libro donde no cuadra',
+        )
+
+    def handle(self, *args, **options):
+        differences = StockLedgerService.verify()
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('El stock cuadra con el libro de ajustes'))
+            return
+
+        names = dict(
+            Product.objects.filter(pk__in=[diff['product_id'] for diff in differences])
+            .values_list('pk', 'name')
+        )
+        for diff in differences:
+            self.stdout.write(self.style.WARNING(
+                f"{names[diff['product_id']]}: stock {diff['stored']}, libro {diff['ledger']}"
+            ))
+
+        if options['rebuild']:
+            fixed = StockLedgerService.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Stock reconstruido: {fixed} productos'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(differences)} diferencias; use --rebuild para corregirlas'
+            ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_product_product_cat_active_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['-adjusted_at', '-id'], name='adjustment_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryadjustment',
+            index=models.Index(fields=['product', '-adjusted_at'], name='adjustment_product_date_idx'),
+        ),
+    ]
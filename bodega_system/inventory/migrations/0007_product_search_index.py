@@ -0,0 +1,24 @@
+# Índice de búsqueda de productos (FTS5 en SQLite, pg_trgm en PostgreSQL)
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from inventory.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from inventory.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_inventoryadjustment_adjustment_date_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
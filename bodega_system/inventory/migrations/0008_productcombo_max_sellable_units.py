@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:56
+
+from django.db import migrations, models
+
+
+def fill_max_sellable_units(apps, schema_editor):
+    from inventory.services import ComboService
+
+    ProductCombo = apps.get_model('inventory', 'ProductCombo')
+    ComboItem = apps.get_model('inventory', 'ComboItem')
+
+    components = {}
+    for combo_id, stock, quantity in ComboItem.objects.values_list(
+        'combo_id', 'product__stock', 'quantity'
+    ):
+        components.setdefault(combo_id, []).append((stock, quantity))
+
+    combos = [
+        ProductCombo(pk=combo_id, max_sellable_units=ComboService.compute_max_units(items))
+        for combo_id, items in components.items()
+    ]
+    ProductCombo.objects.bulk_update(combos, ['max_sellable_units'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcombo',
+            name='max_sellable_units',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Unidades vendibles'),
+        ),
+        migrations.RunPython(fill_max_sellable_units, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+def suspend_search(apps, schema_editor):
+    from inventory.search import suspend_search_triggers
+    suspend_search_triggers(schema_editor.connection)
+
+
+def resume_search(apps, schema_editor):
+    from inventory.search import resume_search_triggers
+    resume_search_triggers(schema_editor.connection)
+
+
+def fill_stock_state(apps, schema_editor):
+    state = models.Case(
+        models.When(stock__lte=0, then=models.Value('out')),
+        models.When(stock__lt=models.F('min_stock'), then=models.Value('low')),
+        default=models.Value('normal'),
+        output_field=models.CharField(),
+    )
+    for model_name in ('Product', 'HistoricalProduct'):
+        apps.get_model('inventory', model_name).objects.update(stock_state=state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_productcombo_max_sellable_units'),
+    ]
+
+    operations = [
+        # La tabla se rehace en SQLite: sin triggers de búsqueda mientras tanto
+        migrations.RunPython(suspend_search, resume_search),
+        migrations.AddField(
+            model_name='historicalproduct',
+            name='stock_state',
+            field=models.CharField(choices=[('out', 'Sin stock'), ('low', 'Stock bajo'), ('normal', 'Stock normal')], default='out', editable=False, max_length=6, verbose_name='Estado de Stock'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='stock_state',
+            field=models.CharField(choices=[('out', 'Sin stock'), ('low', 'Stock bajo'), ('normal', 'Stock normal')], default='out', editable=False, max_length=6, verbose_name='Estado de Stock'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active', 'stock_state'], name='product_active_state_idx'),
+        ),
+        migrations.RunPython(fill_stock_state, migrations.RunPython.noop),
+        migrations.RunPython(resume_search, suspend_search),
+    ]
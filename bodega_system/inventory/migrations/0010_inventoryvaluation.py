@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:04
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def build_valuation(apps, schema_editor):
+    Category = apps.get_model('inventory', 'Category')
+    Product = apps.get_model('inventory', 'Product')
+    InventoryValuation = apps.get_model('inventory', 'InventoryValuation')
+
+    rows = Product.objects.filter(is_active=True).order_by().values('category_id').annotate(
+        purchase=models.Sum(models.F('stock') * models.F('purchase_price_usd')),
+        selling=models.Sum(models.F('stock') * models.F('selling_price_usd')),
+    )
+    values = {
+        row['category_id']: (Decimal(str(row['purchase'] or 0)), Decimal(str(row['selling'] or 0)))
+        for row in rows
+    }
+    ledger = [
+        InventoryValuation(
+            category_id=category_id,
+            purchase_value_usd=values.get(category_id, (0, 0))[0],
+            selling_value_usd=values.get(category_id, (0, 0))[1],
+        )
+        for category_id in Category.objects.values_list('pk', flat=True)
+    ]
+    ledger.append(InventoryValuation(
+        category_id=None,
+        purchase_value_usd=sum((v[0] for v in values.values()), Decimal('0')),
+        selling_value_usd=sum((v[1] for v in values.values()), Decimal('0')),
+    ))
+    InventoryValuation.objects.bulk_create(ledger)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_product_stock_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purchase_value_usd', models.DecimalField(decimal_places=8, default=0, max_digits=20, verbose_name='Valor a Costo (USD)')),
+                ('selling_value_usd', models.DecimalField(decimal_places=8, default=0, max_digits=20, verbose_name='Valor a Precio de Venta (USD)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado el')),
+                ('category', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='inventory.category', verbose_name='Categoría')),
+            ],
+            options={
+                'verbose_name': 'Valoración de Inventario',
+                'verbose_name_plural': 'Valoraciones de Inventario',
+            },
+        ),
+        migrations.RunPython(build_valuation, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:13
+
+from django.db import migrations, models
+
+
+def suspend_search(apps, schema_editor):
+    from inventory.search import suspend_search_triggers
+    suspend_search_triggers(schema_editor.connection)
+
+
+def resume_search(apps, schema_editor):
+    from inventory.search import resume_search_triggers
+    resume_search_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_inventoryvaluation'),
+    ]
+
+    operations = [
+        # La tabla se rehace en SQLite: sin triggers de búsqueda mientras tanto
+        migrations.RunPython(suspend_search, resume_search),
+        migrations.AddField(
+            model_name='historicalproduct',
+            name='row_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='row_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+        migrations.RunPython(resume_search, suspend_search),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def open_stock_ledger(apps, schema_editor):
+    """Checkpoint de apertura: el stock actual, después del último ajuste de cada producto"""
+    Product = apps.get_model('inventory', 'Product')
+    InventoryAdjustment = apps.get_model('inventory', 'InventoryAdjustment')
+    StockCheckpoint = apps.get_model('inventory', 'StockCheckpoint')
+
+    now = timezone.now()
+    last = dict(
+        InventoryAdjustment.objects.order_by().values('product_id')
+        .annotate(last_id=models.Max('id')).values_list('product_id', 'last_id')
+    )
+    StockCheckpoint.objects.bulk_create(
+        (
+            StockCheckpoint(product_id=pk, last_adjustment_id=last.get(pk, 0), stock=stock, taken_at=now)
+            for pk, stock in Product.objects.values_list('pk', 'stock').iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_historicalproduct_row_version_product_row_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryadjustment',
+            name='previous_stock',
+            field=models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Stock Previo'),
+        ),
+        migrations.AlterField(
+            model_name='inventoryadjustment',
+            name='quantity',
+            field=models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Cantidad'),
+        ),
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_adjustment_id', models.PositiveBigIntegerField(default=0, verbose_name='Último Ajuste Incluido')),
+                ('stock', models.DecimalField(decimal_places=3, max_digits=10, verbose_name='Stock')),
+                ('taken_at', models.DateTimeField(verbose_name='Válido Desde')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='inventory.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Stock',
+                'verbose_name_plural': 'Checkpoints de Stock',
+                'indexes': [models.Index(fields=['product', '-taken_at'], name='stock_checkpoint_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'last_adjustment_id'), name='stock_checkpoint_unique')],
+            },
+        ),
+        migrations.RunPython(open_stock_ledger, migrations.RunPython.noop),
+    ]
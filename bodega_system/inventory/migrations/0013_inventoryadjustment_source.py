@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+def classify_adjustments(apps, schema_editor):
+    # Los ajustes anteriores solo dicen su origen en el texto de `reason`
+    InventoryAdjustment = apps.get_model('inventory', 'InventoryAdjustment')
+    InventoryAdjustment.objects.filter(reason__startswith='Venta').update(source='sale')
+    InventoryAdjustment.objects.filter(reason__startswith='Recepción').update(source='reception')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_stockcheckpoint_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryadjustment',
+            name='source',
+            field=models.CharField(choices=[('sale', 'Venta'), ('reception', 'Recepción'), ('manual', 'Manual')], default='manual', max_length=10, verbose_name='Origen'),
+        ),
+        migrations.RunPython(classify_adjustments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0013_inventoryadjustment_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdjustmentDaySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('source', models.CharField(choices=[('sale', 'Venta'), ('reception', 'Recepción'), ('manual', 'Manual')], max_length=10, verbose_name='Origen')),
+                ('movements', models.PositiveIntegerField(default=0, verbose_name='Movimientos')),
+                ('entries', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Entradas')),
+                ('exits', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Salidas')),
+                ('net', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Neto')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='adjustment_day_summaries', to='inventory.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Ajustes',
+                'verbose_name_plural': 'Resúmenes Diarios de Ajustes',
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'source'), name='adjustment_day_summary_unique')],
+            },
+        ),
+    ]
@@ -1,16 +1,23 @@
 # inventory/models.py - PRODUCTOS CON PRECIOS EN USD
 
+from django.conf import settings
 from django.db import models
 from django.urls import reverse
 from simple_history.models import HistoricalRecords
 from decimal import Decimal
 
+from utils.concurrency import OptimisticLockModel
+from utils.dirty import DirtyFieldsMixin
+from utils.versions import VersionedManager
+
 
 class Category(models.Model):
     """Modelo para categorías de productos"""
     name = models.CharField(max_length=100, verbose_name="Nombre")
     description = models.TextField(blank=True, verbose_name="Descripción")
 
+    objects = VersionedManager()
+
     class Meta:
         verbose_name = "Categoría"
         verbose_name_plural = "Categorías"
@@ -20,7 +27,7 @@ class Category(models.Model):
         return self.name
 
 
-class Product(models.Model):
+class Product(DirtyFieldsMixin, OptimisticLockModel):
     """Modelo para productos con precios en USD"""
 
     UNIT_TYPES = (
@@ -31,6 +38,14 @@ class Product(models.Model):
         ('ml', 'Mililitro'),
     )
 
+    STOCK_STATES = (
+        ('out', 'Sin stock'),
+        ('low', 'Stock bajo'),
+        ('normal', 'Stock normal'),
+    )
+    # Estados que requieren reposición (alertas, sugerencias, dashboard)
+    RESTOCK_STATES = ('out', 'low')
+
     name = models.CharField(max_length=200, verbose_name="Nombre")
     barcode = models.CharField(
         max_length=50,
@@ -96,6 +111,16 @@ class Product(models.Model):
         default=5,
         verbose_name="Stock Mínimo"
     )
+    # Derivado de stock/min_stock en save(); indexado para contar y filtrar
+    # sin recorrer la tabla. Los cambios por update() pasan por
+    # StockStateService.refresh()
+    stock_state = models.CharField(
+        max_length=6,
+        choices=STOCK_STATES,
+        default='out',
+        editable=False,
+        verbose_name="Estado de Stock"
+    )
 
     # Metadatos
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado el")
@@ -122,6 +147,8 @@ class Product(models.Model):
         verbose_name="Precio al Mayor (USD)"
     )
 
+    objects = VersionedManager()
+
     # Historial para auditoría
     history = HistoricalRecords()
 
@@ -133,6 +160,7 @@ class Product(models.Model):
             models.Index(fields=['category', 'is_active'], name='product_cat_active_idx'),
             models.Index(fields=['is_active', '-created_at'], name='product_active_recent_idx'),
             models.Index(fields=['barcode'], name='product_barcode_idx'),  # Ya hay unique=True pero index mejora búsquedas
+            models.Index(fields=['is_active', 'stock_state'], name='product_active_state_idx'),
         ]
 
     def __str__(self):
@@ -141,15 +169,156 @@ class Product(models.Model):
     def get_absolute_url(self):
         return reverse('inventory:product_detail', args=[str(self.id)])
 
+    # Campos que determinan el aporte del producto al valor del inventario
+    VALUATION_FIELDS = ('category_id', 'stock', 'purchase_price_usd', 'selling_price_usd', 'is_active')
+
+    # Campos cuyo cambio, por sí solo, no escribe una fila de historial: el
+    # movimiento de stock ya queda en InventoryAdjustment y los precios en Bs
+    # se derivan de la tasa. settings.PRODUCT_HISTORY_IGNORED_FIELDS, si
+    # existe, reemplaza esta lista (una tupla vacía vuelve al historial completo)
+    HISTORY_IGNORED_FIELDS = (
+        'stock', 'stock_state', 'purchase_price_bs', 'selling_price_bs', 'updated_at',
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Aporte al valor del inventario tal como está en la base de datos;
+        # save() ajusta el libro de valoración con la diferencia
+        if all(name in instance.__dict__ for name in cls.VALUATION_FIELDS):
+            instance._valuation_snapshot = instance.valuation_contribution()
+        return instance
+
+    @classmethod
+    def history_ignored_fields(cls):
+        # row_version cambia en cada guardado: nunca justifica una fila por sí solo
+        ignored = getattr(settings, 'PRODUCT_HISTORY_IGNORED_FIELDS', cls.HISTORY_IGNORED_FIELDS)
+        return frozenset(ignored) | {'row_version'}
+
+    @classmethod
+    def history_tracked(cls, fields):
+        """Si escribir `fields` (nombres o attnames) lleva fila de historial"""
+        ignored = cls.history_ignored_fields()
+        return any(cls._meta.get_field(name).name not in ignored for name in fields)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        tracks_stock = update_fields is None or bool({'stock', 'min_stock'} & set(update_fields))
+        tracks_value = update_fields is None or bool(
+            {'category', 'category_id', 'stock', 'purchase_price_usd', 'selling_price_usd', 'is_active'}
+            & set(update_fields)
+        )
+        # Transición y aporte previo al valor del inventario; la señal
+        # post_save (inventory/signals.py) publica la transición y ajusta
+        # el libro de valoración
+        self._stock_state_change = None
+        self._valuation_pending = None
+        if tracks_stock and not hasattr(self.stock, 'resolve_expression'):
+            change = self.refresh_stock_state()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'stock_state'}
+            if not self._state.adding:
+                self._stock_state_change = change
+        if tracks_value:
+            self._valuation_pending = (None if self._state.adding else self.loaded_valuation(),)
+        # Campos que se van a escribir (DirtyFieldsMixin reduce un save()
+        # sin update_fields a los modificados); simple_history omite la fila
+        # si el atributo existe
+        written = kwargs.get('update_fields')
+        if written is None:
+            written = self.get_dirty_fields()
+        skip_history = written is not None and not self.history_tracked(written)
+        if skip_history:
+            self.skip_history_when_saving = True
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            if skip_history:
+                del self.skip_history_when_saving
+
+    def valuation_contribution(self):
+        """
+        Aporte del producto al valor del inventario
+
+        Returns:
+            (category_id, valor a costo USD, valor a precio de venta USD);
+            los productos inactivos aportan 0
+        """
+        if not self.is_active:
+            return self.category_id, Decimal('0'), Decimal('0')
+        stock = Decimal(str(self.stock))
+        return (
+            self.category_id,
+            stock * Decimal(str(self.purchase_price_usd)),
+            stock * Decimal(str(self.selling_price_usd)),
+        )
+
+    def loaded_valuation(self):
+        """Aporte al valor del inventario según la fila guardada"""
+        snapshot = getattr(self, '_valuation_snapshot', None)
+        if snapshot is not None:
+            return snapshot
+        # Instancia sin snapshot (p. ej. cargada con only()): se lee la fila
+        row = Product.objects.filter(pk=self.pk).values(*self.VALUATION_FIELDS).first()
+        if row is None:
+            return None
+        return Product(**row).valuation_contribution()
+
+    def take_valuation_change(self, previous):
+        """
+        Diferencia entre `previous` y el aporte actual; actualiza el snapshot
+
+        Se usa tras save() y en los caminos con bulk_update() que luego
+        pasan el resultado a ValuationService.apply_changes().
+
+        Returns:
+            (anterior, actual) o None si el aporte no cambió
+        """
+        if hasattr(self.stock, 'resolve_expression'):
+            # Guardado con F('stock') ± n: se lee el valor resultante
+            self.refresh_from_db(fields=['stock'])
+        current = self.valuation_contribution()
+        self._valuation_snapshot = current
+        if previous == current:
+            return None
+        return previous, current
+
+    @staticmethod
+    def compute_stock_state(stock, min_stock):
+        """Estado ('out', 'low', 'normal') para un stock y stock mínimo"""
+        if stock <= 0:
+            return 'out'
+        if stock < min_stock:
+            return 'low'
+        return 'normal'
+
+    @staticmethod
+    def stock_state_expression():
+        """El mismo cálculo que compute_stock_state, en SQL"""
+        return models.Case(
+            models.When(stock__lte=0, then=models.Value('out')),
+            models.When(stock__lt=models.F('min_stock'), then=models.Value('low')),
+            default=models.Value('normal'),
+            output_field=models.CharField(),
+        )
+
+    def refresh_stock_state(self):
+        """
+        Recalcula stock_state en memoria (no guarda)
+
+        Returns:
+            (anterior, nuevo) si el estado cambió, si no None
+        """
+        previous = self.stock_state
+        self.stock_state = self.compute_stock_state(self.stock, self.min_stock)
+        if previous != self.stock_state:
+            return previous, self.stock_state
+        return None
+
     @property
     def stock_status(self):
         """Devuelve el estado del stock"""
-        if self.stock <= 0:
-            return "Sin stock"
-        elif self.stock < self.min_stock:
-            return "Stock bajo"
-        else:
-            return "Stock normal"
+        return dict(self.STOCK_STATES)[self.compute_stock_state(self.stock, self.min_stock)]
 
     @property
     def profit_margin_usd(self):
@@ -205,6 +374,46 @@ class Product(models.Model):
         return Decimal('0.00')
 
 
+class InventoryValuation(models.Model):
+    """
+    Valor del inventario activo (stock × precio en USD)
+
+    Una fila por categoría y una fila total (category vacía). Se ajusta
+    con la diferencia de cada movimiento de stock o cambio de precio
+    (ValuationService); `verify_inventory_valuation` la compara contra el
+    cálculo completo y la reconstruye.
+    """
+    category = models.OneToOneField(
+        Category,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='valuation',
+        verbose_name="Categoría"
+    )
+    purchase_value_usd = models.DecimalField(
+        max_digits=20,
+        decimal_places=8,
+        default=0,
+        verbose_name="Valor a Costo (USD)"
+    )
+    selling_value_usd = models.DecimalField(
+        max_digits=20,
+        decimal_places=8,
+        default=0,
+        verbose_name="Valor a Precio de Venta (USD)"
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizado el")
+
+    class Meta:
+        verbose_name = "Valoración de Inventario"
+        verbose_name_plural = "Valoraciones de Inventario"
+
+    def __str__(self):
+        scope = self.category.name if self.category_id else 'Total'
+        return f"{scope}: ${self.purchase_value_usd:.2f}"
+
+
 class InventoryAdjustment(models.Model):
     """Ajuste de inventario"""
     ADJUSTMENT_TYPES = (
@@ -212,6 +421,11 @@ class InventoryAdjustment(models.Model):
         ('remove', 'Eliminar'),
         ('set', 'Establecer')
     )
+    SOURCES = (
+        ('sale', 'Venta'),
+        ('reception', 'Recepción'),
+        ('manual', 'Manual'),
+    )
 
     product = models.ForeignKey(
         Product,
@@ -224,14 +438,22 @@ class InventoryAdjustment(models.Model):
         choices=ADJUSTMENT_TYPES,
         verbose_name="Tipo de Ajuste"
     )
+    # Origen del movimiento, para resumir el libro por período sin leer `reason`
+    source = models.CharField(
+        max_length=10,
+        choices=SOURCES,
+        default='manual',
+        verbose_name="Origen"
+    )
+    # Misma precisión que Product.stock: el libro se reproduce sin redondeos
     quantity = models.DecimalField(
         max_digits=10,
-        decimal_places=2,
+        decimal_places=3,
         verbose_name="Cantidad"
     )
     previous_stock = models.DecimalField(
         max_digits=10,
-        decimal_places=2,
+        decimal_places=3,
         verbose_name="Stock Previo"
     )
     new_stock = models.DecimalField(
@@ -252,11 +474,98 @@ class InventoryAdjustment(models.Model):
         verbose_name = "Ajuste de Inventario"
         verbose_name_plural = "Ajustes de Inventario"
         ordering = ['-adjusted_at']
+        indexes = [
+            # Paginación por cursor (-adjusted_at, -id) en adjustment_list
+            models.Index(fields=['-adjusted_at', '-id'], name='adjustment_date_id_idx'),
+            models.Index(fields=['product', '-adjusted_at'], name='adjustment_product_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_adjustment_type_display()} - {self.product.name} - {self.quantity}"
 
 
+class StockCheckpoint(models.Model):
+    """
+    Stock de un producto según el libro de ajustes, hasta un ajuste dado
+
+    InventoryAdjustment es el libro de movimientos y Product.stock su
+    proyección (StockLedgerService). El stock a una fecha, o el que dice el
+    libro hoy, se calcula desde el checkpoint más cercano reproduciendo
+    solo los ajustes posteriores. last_adjustment_id = 0 es la apertura:
+    el stock con el que se creó el producto, antes de cualquier ajuste.
+    Guarda el id y no una FK para sobrevivir a ajustes archivados.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_checkpoints',
+        verbose_name="Producto"
+    )
+    last_adjustment_id = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Último Ajuste Incluido"
+    )
+    stock = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        verbose_name="Stock"
+    )
+    taken_at = models.DateTimeField(verbose_name="Válido Desde")
+
+    class Meta:
+        verbose_name = "Checkpoint de Stock"
+        verbose_name_plural = "Checkpoints de Stock"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'last_adjustment_id'], name='stock_checkpoint_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['product', '-taken_at'], name='stock_checkpoint_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.taken_at:%Y-%m-%d %H:%M}: {self.stock}"
+
+
+class AdjustmentDaySummary(models.Model):
+    """
+    Movimientos por día, producto y origen de los ajustes archivados
+
+    Deja en la base principal lo que StockHistoryService.movements() lee
+    de un período ya archivado (utils/archive.py); el stock a una fecha sale
+    de los checkpoints de fin de día que se guardan antes de archivar.
+    """
+    day = models.DateField(verbose_name="Día")
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='adjustment_day_summaries',
+        verbose_name="Producto"
+    )
+    source = models.CharField(
+        max_length=10,
+        choices=InventoryAdjustment.SOURCES,
+        verbose_name="Origen"
+    )
+    movements = models.PositiveIntegerField(default=0, verbose_name="Movimientos")
+    entries = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Entradas")
+    exits = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Salidas")
+    net = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Neto")
+
+    class Meta:
+        verbose_name = "Resumen Diario de Ajustes"
+        verbose_name_plural = "Resúmenes Diarios de Ajustes"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'product', 'source'], name='adjustment_day_summary_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.product_id} ({self.source}): {self.net}"
+
+
 class ProductCombo(models.Model):
     """Modelo para combos de productos - PENDIENTE PARA DESPUÉS"""
     name = models.CharField(
@@ -277,6 +586,13 @@ class ProductCombo(models.Model):
         default=True,
         verbose_name="Activo"
     )
+    # Mínimo de floor(stock / cantidad) entre los componentes; lo recalcula
+    # ComboService cuando cambia el stock de un componente o la receta
+    max_sellable_units = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Unidades vendibles"
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado el")
 
     class Meta:
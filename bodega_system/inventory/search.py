@@ -0,0 +1,339 @@
+# inventory/search.py - BÚSQUEDA INDEXADA DE PRODUCTOS
+
+"""
+Búsqueda de productos con índice de texto completo
+
+Backends, en orden de preferencia:
+- 'fts5': SQLite con la tabla virtual FTS5 `inventory_product_fts`,
+  mantenida por triggers (cubre save(), update(), bulk_create() y borrados
+  en cascada sin depender de señales de Django)
+- 'trigram': PostgreSQL con pg_trgm; los índices GIN sobre UPPER(campo)
+  aceleran los icontains y TrigramSimilarity ordena por parecido
+- 'basic': icontains sobre name/barcode/description/categoría, con un
+  orden de relevancia simple. Es el respaldo cuando no hay índice
+
+Todos los backends aplican coincidencia por prefijo de cada palabra
+("har pan" encuentra "Harina PAN") y ponen primero el código de barras
+exacto, que es lo que llega desde el lector en el POS.
+"""
+
+import logging
+
+from django.db import connections, DEFAULT_DB_ALIAS, DatabaseError
+from django.db.models import Case, When, Value, IntegerField, Q
+
+from utils.search import (
+    build_match_expression, fts_table_exists, reset_fts_cache, search_terms,
+)
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'inventory_product_fts'
+
+# Peso de cada columna en bm25: name, barcode, description, category
+FTS_WEIGHTS = (10.0, 6.0, 1.0, 2.0)
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, barcode, description, category,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_product_fts_ai
+    AFTER INSERT ON inventory_product BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, barcode, description, category)
+        VALUES (
+            new.id, new.name, new.barcode, new.description,
+            (SELECT name FROM inventory_category WHERE id = new.category_id)
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_product_fts_ad
+    AFTER DELETE ON inventory_product BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    # Solo los campos indexados: los cambios de stock/precio no tocan el índice
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_product_fts_au
+    AFTER UPDATE OF name, barcode, description, category_id ON inventory_product BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, name, barcode, description, category)
+        VALUES (
+            new.id, new.name, new.barcode, new.description,
+            (SELECT name FROM inventory_category WHERE id = new.category_id)
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inventory_category_fts_au
+    AFTER UPDATE OF name ON inventory_category BEGIN
+        UPDATE {FTS_TABLE} SET category = new.name
+        WHERE rowid IN (SELECT id FROM inventory_product WHERE category_id = new.id);
+    END
+    """,
+]
+
+SQLITE_DROP_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS inventory_category_fts_au",
+    "DROP TRIGGER IF EXISTS inventory_product_fts_au",
+    "DROP TRIGGER IF EXISTS inventory_product_fts_ad",
+    "DROP TRIGGER IF EXISTS inventory_product_fts_ai",
+]
+
+SQLITE_UNINSTALL = SQLITE_DROP_TRIGGERS + [
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+SQLITE_POPULATE = f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, barcode, description, category)
+    SELECT p.id, p.name, p.barcode, p.description, c.name
+    FROM inventory_product p
+    LEFT JOIN inventory_category c ON c.id = p.category_id
+"""
+
+POSTGRES_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS product_name_trgm_idx "
+    "ON inventory_product USING gin (UPPER(name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_barcode_trgm_idx "
+    "ON inventory_product USING gin (UPPER(barcode) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS product_description_trgm_idx "
+    "ON inventory_product USING gin (UPPER(description) gin_trgm_ops)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS product_description_trgm_idx",
+    "DROP INDEX IF EXISTS product_barcode_trgm_idx",
+    "DROP INDEX IF EXISTS product_name_trgm_idx",
+]
+
+# Backend detectado por alias de base de datos
+_backend_cache = {}
+
+
+def reset_backend_cache():
+    """Olvida el backend detectado (después de instalar o quitar el índice)"""
+    _backend_cache.clear()
+    reset_fts_cache()
+
+
+def install_search_index(connection):
+    """
+    Crea el índice de búsqueda para el motor de `connection` y lo llena
+
+    Se usa desde la migración y desde `rebuild_product_search`. Si el motor
+    no soporta el índice (SQLite compilado sin FTS5, usuario de PostgreSQL
+    sin permiso para pg_trgm) se registra un aviso y la búsqueda queda en
+    el backend 'basic'.
+
+    Returns:
+        True si el índice quedó instalado
+    """
+    reset_backend_cache()
+    try:
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                for statement in SQLITE_INSTALL:
+                    cursor.execute(statement)
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+                cursor.execute(SQLITE_POPULATE)
+            return True
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                for statement in POSTGRES_INSTALL:
+                    cursor.execute(statement)
+            return True
+    except DatabaseError as e:
+        logger.warning(
+            "No se pudo crear el índice de búsqueda de productos",
+            extra={'vendor': connection.vendor, 'error': str(e)}
+        )
+        return False
+    return False
+
+
+def uninstall_search_index(connection):
+    """Elimina el índice de búsqueda (reverso de la migración)"""
+    reset_backend_cache()
+    statements = {
+        'sqlite': SQLITE_UNINSTALL,
+        'postgresql': POSTGRES_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def suspend_search_triggers(connection):
+    """
+    Quita los triggers del índice antes de alterar inventory_product
+
+    En SQLite, agregar o modificar columnas rehace la tabla (CREATE nueva,
+    copia, DROP, RENAME): el DROP se lleva los triggers del producto y el
+    de categorías impide el RENAME. Las migraciones que tocan Product
+    llaman a esta función antes y a resume_search_triggers() después.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in SQLITE_DROP_TRIGGERS:
+            cursor.execute(statement)
+
+
+def resume_search_triggers(connection):
+    """Vuelve a crear los triggers y repuebla el índice, si estaba instalado"""
+    if connection.vendor != 'sqlite':
+        return
+    reset_fts_cache()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        installed = cursor.fetchone() is not None
+    if installed:
+        install_search_index(connection)
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """
+    Reconstruye el índice desde cero
+
+    Returns:
+        Número de productos indexados (0 si el backend no tiene índice)
+    """
+    connection = connections[using]
+    if not install_search_index(connection):
+        return 0
+    if connection.vendor != 'sqlite':
+        # Los índices GIN se mantienen solos; no hay nada que copiar
+        from .models import Product
+        return Product.objects.using(using).count()
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search_backend(using=DEFAULT_DB_ALIAS):
+    """
+    Backend de búsqueda disponible para la base de datos `using`
+
+    Returns:
+        'fts5', 'trigram' o 'basic'
+    """
+    if using in _backend_cache:
+        return _backend_cache[using]
+
+    connection = connections[using]
+    backend = 'basic'
+    if connection.vendor == 'sqlite':
+        if fts_table_exists(FTS_TABLE, using):
+            backend = 'fts5'
+    elif connection.vendor == 'postgresql':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                if cursor.fetchone():
+                    backend = 'trigram'
+        except DatabaseError as e:
+            logger.warning(
+                "No se pudo detectar el índice de búsqueda; se usa icontains",
+                extra={'vendor': connection.vendor, 'error': str(e)}
+            )
+
+    _backend_cache[using] = backend
+    return backend
+
+
+def search_products(queryset, query, backend=None):
+    """
+    Filtra `queryset` por `query` y lo ordena por relevancia
+
+    Args:
+        queryset: QuerySet de Product (puede traer filtros y select_related)
+        query: Texto escrito por el usuario o leído por el escáner
+        backend: Fuerza un backend ('fts5', 'trigram', 'basic'); por defecto
+            se detecta según la base de datos del queryset
+
+    Returns:
+        QuerySet filtrado y ordenado: código de barras exacto primero, luego
+        por relevancia y por nombre
+    """
+    query = (query or '').strip()
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    backend = backend or search_backend(queryset.db)
+    if backend == 'fts5':
+        return _search_fts5(queryset, query)
+    if backend == 'trigram':
+        return _search_trigram(queryset, query, terms)
+    return _search_basic(queryset, query, terms)
+
+
+def _search_fts5(queryset, query):
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    # extra() es la forma de hacer JOIN con una tabla que no es un modelo;
+    # SQLite resuelve primero el MATCH y luego busca cada fila por rowid
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = inventory_product.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[build_match_expression(query)],
+        select={
+            'search_exact': 'inventory_product.barcode = %s',
+            'search_rank': f'bm25({FTS_TABLE}, {weights})',
+        },
+        select_params=[query],
+    ).order_by('-search_exact', 'search_rank', 'name')
+
+
+def _terms_filter(terms):
+    """Cada término debe aparecer en algún campo (AND de ORs)"""
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) |
+            Q(barcode__icontains=term) |
+            Q(description__icontains=term) |
+            Q(category__name__icontains=term)
+        )
+    return condition
+
+
+def _search_trigram(queryset, query, terms):
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models.functions import Greatest
+
+    return queryset.filter(_terms_filter(terms)).annotate(
+        search_exact=Case(
+            When(barcode=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        search_similarity=Greatest(
+            TrigramSimilarity('name', query),
+            TrigramSimilarity('barcode', query),
+        ),
+    ).order_by('-search_exact', '-search_similarity', 'name')
+
+
+def _search_basic(queryset, query, terms):
+    first = terms[0]
+    return queryset.filter(_terms_filter(terms)).annotate(
+        search_rank=Case(
+            When(barcode=query, then=Value(0)),
+            When(name__istartswith=first, then=Value(1)),
+            When(name__icontains=first, then=Value(2)),
+            When(barcode__istartswith=first, then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        ),
+    ).order_by('search_rank', 'name')
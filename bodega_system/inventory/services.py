@@ -1,10 +1,13 @@
 # inventory/services.py - Service Layer para Productos
 
 import logging
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from django.db import transaction
 
+from utils.concurrency import retry_on_conflict
+
 logger = logging.getLogger(__name__)
 
 
@@ -313,6 +316,7 @@ class ProductService:
         return product
 
     @staticmethod
+    @retry_on_conflict
     def bulk_update_prices(queryset=None, exchange_rate=None):
         """
         Actualiza los precios en Bs de múltiples productos
@@ -340,7 +344,8 @@ class ProductService:
 
         count = 0
         with transaction.atomic():
-            for product in queryset:
+            # all(): cada intento de retry_on_conflict vuelve a leer los productos
+            for product in queryset.all():
                 product.purchase_price_bs = product.purchase_price_usd * exchange_rate.bs_to_usd
                 product.selling_price_bs = product.selling_price_usd * exchange_rate.bs_to_usd
                 product.save()
@@ -352,3 +357,1151 @@ class ProductService:
         })
 
         return count
+
+    @staticmethod
+    def bulk_save(products, fields, user=None, change_reason=None) -> int:
+        """
+        Guarda en lote productos modificados en memoria
+
+        Reemplaza un product.save() por producto con un bulk_update de solo
+        `fields` y un bulk_create del historial (si algún campo lo lleva, ver
+        Product.HISTORY_IGNORED_FIELDS), y aplica lo que save() y
+        las señales harían uno a uno: stock_state, transiciones, libro de
+        valoración y unidades vendibles de combos. Los productos deben
+        venir de la base de datos (para conocer su aporte previo al valor
+        y su row_version) y guardarse dentro de una transacción.
+
+        Args:
+            products: Lista de Product ya modificados
+            fields: Campos cambiados (stock, precios...)
+            user: Usuario para el historial
+            change_reason: Motivo para el historial
+
+        Returns:
+            int: Filas actualizadas
+
+        Raises:
+            ConcurrentUpdateError: Si algún producto cambió desde que se leyó
+        """
+        from django.utils import timezone
+        from simple_history.utils import bulk_update_with_history
+        from inventory.models import Product
+
+        if not products:
+            return 0
+
+        fields = set(fields) | {'updated_at'}
+        if {'stock', 'min_stock'} & fields:
+            fields.add('stock_state')
+
+        # Compare-and-swap en lote: falla si otra transacción guardó alguno
+        # de los productos desde que se leyó (ver utils/concurrency.py)
+        Product.claim_versions(products)
+        fields.add('row_version')
+
+        now = timezone.now()
+        transitions = []
+        valuation_changes = []
+        for product in products:
+            previous_value = product.loaded_valuation()
+            product.updated_at = now
+            if 'stock_state' in fields:
+                change = product.refresh_stock_state()
+                if change:
+                    transitions.append((product.pk, *change))
+            change = product.take_valuation_change(previous_value)
+            if change:
+                valuation_changes.append(change)
+
+        if Product.history_tracked(fields):
+            updated = bulk_update_with_history(
+                products, Product, sorted(fields), batch_size=500,
+                default_user=user, default_change_reason=change_reason,
+            )
+        else:
+            # Solo stock (ventas de combos): el movimiento queda en InventoryAdjustment
+            updated = Product.objects.bulk_update(products, sorted(fields), batch_size=500)
+
+        # bulk_update() no dispara señales: efectos de save() en lote
+        if 'stock' in fields:
+            ComboService.refresh_for_products(product.pk for product in products)
+        StockStateService.notify(transitions)
+        ValuationService.apply_changes(valuation_changes)
+        return updated
+
+
+class ProductHistoryService:
+    """
+    Service para el tamaño y la compactación del historial de productos
+
+    Una fila '~' es redundante si los campos con historial (todos menos
+    Product.HISTORY_IGNORED_FIELDS) son iguales a los de la fila anterior
+    que se conserva: es la que los guardados de solo stock escribían antes
+    de omitirse. Las filas '+' y '-' siempre se conservan.
+    """
+
+    @staticmethod
+    def table_stats() -> Dict[str, Optional[int]]:
+        """
+        Tamaño de la tabla de historial
+
+        Returns:
+            dict: {'rows': n, 'bytes': contenido de la tabla y sus índices
+                según dbstat (None fuera de SQLite o sin dbstat)}
+        """
+        from django.db import DatabaseError, connection
+        from inventory.models import Product
+
+        model = Product.history.model
+        stats = {'rows': model.objects.count(), 'bytes': None}
+        if connection.vendor != 'sqlite':
+            return stats
+        table = model._meta.db_table
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT SUM(payload) FROM dbstat WHERE name IN '
+                    '(SELECT name FROM sqlite_master WHERE tbl_name = %s)',
+                    [table],
+                )
+                stats['bytes'] = cursor.fetchone()[0] or 0
+        except DatabaseError:
+            pass
+        return stats
+
+    @staticmethod
+    def redundant_rows(before=None) -> List[int]:
+        """
+        history_id de las filas que compact() borraría
+
+        Args:
+            before: datetime opcional; de las filas anteriores se conserva
+                solo la última de cada producto (el estado a esa fecha)
+
+        Returns:
+            list: history_id en orden
+        """
+        from inventory.models import Product
+
+        model = Product.history.model
+        ignored = Product.history_ignored_fields()
+        tracked = [f.attname for f in Product._meta.concrete_fields if f.name not in ignored]
+        rows = model.objects.order_by('id', 'history_date', 'history_id').values_list(
+            'history_id', 'id', 'history_type', 'history_date', *tracked,
+        )
+
+        redundant = []
+        product_id = kept = previous_old = None
+        for history_id, pk, history_type, history_date, *values in rows.iterator(chunk_size=2000):
+            if pk != product_id:
+                product_id, kept, previous_old = pk, None, None
+            if before is not None and history_date < before:
+                # Fila vieja: queda solo si es la última antes del corte
+                if previous_old is not None:
+                    redundant.append(previous_old)
+                previous_old = history_id
+                kept = values
+                continue
+            if history_type == '~' and values == kept:
+                redundant.append(history_id)
+                continue
+            kept = values
+        return sorted(redundant)
+
+    @staticmethod
+    def compact(before=None, batch_size=500) -> int:
+        """
+        Borra las filas redundantes del historial (ver redundant_rows)
+
+        Returns:
+            int: Filas borradas
+        """
+        from inventory.models import Product
+
+        model = Product.history.model
+        redundant = ProductHistoryService.redundant_rows(before)
+        for start in range(0, len(redundant), batch_size):
+            with transaction.atomic():
+                model.objects.filter(history_id__in=redundant[start:start + batch_size]).delete()
+        return len(redundant)
+
+
+class StockStateService:
+    """
+    Service para el estado de stock persistido (Product.stock_state)
+
+    save() mantiene el estado; este servicio cubre los cambios hechos con
+    update()/bulk_update(), las consultas de conteo sobre el índice
+    (is_active, stock_state) y la publicación de transiciones como la
+    señal `stock_state_changed`.
+    """
+
+    @staticmethod
+    def summary(queryset=None) -> Dict[str, int]:
+        """
+        Productos por estado, en una sola consulta sobre el índice
+
+        Args:
+            queryset: QuerySet de Product (default: productos activos)
+
+        Returns:
+            dict: {'out': n, 'low': n, 'normal': n, 'total': n}
+        """
+        from django.db.models import Count
+        from inventory.models import Product
+
+        if queryset is None:
+            queryset = Product.objects.filter(is_active=True)
+
+        counts = {state: 0 for state, _ in Product.STOCK_STATES}
+        rows = queryset.order_by().values_list('stock_state').annotate(n=Count('pk'))
+        for state, n in rows:
+            counts[state] = n
+        counts['total'] = sum(counts.values())
+        return counts
+
+    @staticmethod
+    def refresh(product_ids=None) -> int:
+        """
+        Recalcula en SQL el estado de los productos indicados
+
+        Solo escribe las filas cuyo estado cambió (una UPDATE por estado
+        destino) y publica una transición por cada una.
+
+        Args:
+            product_ids: Iterable de ids (default: todos los productos)
+
+        Returns:
+            int: Cantidad de productos que cambiaron de estado
+        """
+        from django.db.models import F
+        from inventory.models import Product
+
+        queryset = Product.objects.all()
+        if product_ids is not None:
+            product_ids = set(product_ids)
+            if not product_ids:
+                return 0
+            queryset = queryset.filter(pk__in=product_ids)
+
+        changed = list(
+            queryset.annotate(new_state=Product.stock_state_expression())
+            .exclude(stock_state=F('new_state'))
+            .values_list('pk', 'stock_state', 'new_state')
+        )
+        by_state = {}
+        for pk, _previous, current in changed:
+            by_state.setdefault(current, []).append(pk)
+        for state, pks in by_state.items():
+            Product.objects.filter(pk__in=pks).update(stock_state=state)
+
+        StockStateService.notify([
+            (pk, previous, current) for pk, previous, current in changed
+        ])
+        return len(changed)
+
+    @staticmethod
+    def notify(transitions):
+        """
+        Publica transiciones de estado (señal stock_state_changed)
+
+        Args:
+            transitions: Iterable de (product_id, anterior, nuevo)
+        """
+        from inventory.models import Product
+        from inventory.signals import stock_state_changed
+
+        for product_id, previous, current in transitions:
+            stock_state_changed.send(
+                sender=Product,
+                product_id=product_id,
+                previous=previous,
+                current=current,
+            )
+
+
+class ValuationService:
+    """
+    Service para el libro de valoración del inventario (InventoryValuation)
+
+    Cada movimiento se aplica como diferencia (anterior → actual) sobre la
+    fila total y la de la categoría; leer el valor del inventario es leer
+    una fila. rebuild() y verify() recalculan desde Product para corregir
+    lo que haya cambiado por update() sin pasar por aquí.
+    """
+
+    # Diferencia aceptada por verify() (SQLite guarda los decimales como REAL)
+    TOLERANCE = Decimal('0.01')
+
+    @staticmethod
+    def apply_changes(changes) -> int:
+        """
+        Ajusta el libro con los cambios de aporte de uno o más productos
+
+        Las filas que reciben la misma diferencia se actualizan juntas: una
+        venta de productos de una sola categoría es una sola UPDATE.
+
+        Args:
+            changes: Iterable de (anterior, actual), cada uno None o
+                (category_id, valor a costo, valor a venta) como los
+                devuelve Product.valuation_contribution()
+
+        Returns:
+            int: Filas del libro actualizadas
+        """
+        from django.db.models import F, Q
+        from inventory.models import InventoryValuation
+
+        deltas = {}
+        for previous, current in changes:
+            for sign, contribution in ((-1, previous), (1, current)):
+                if contribution is None:
+                    continue
+                category_id, purchase, selling = contribution
+                for key in (None, category_id):
+                    delta = deltas.setdefault(key, [Decimal('0'), Decimal('0')])
+                    delta[0] += sign * purchase
+                    delta[1] += sign * selling
+
+        groups = {}
+        for key, (purchase, selling) in deltas.items():
+            if purchase or selling:
+                groups.setdefault((purchase, selling), []).append(key)
+
+        updated = 0
+        missing = []
+        for (purchase, selling), keys in groups.items():
+            category_ids = [key for key in keys if key is not None]
+            condition = Q(category_id__in=category_ids)
+            if None in keys:
+                condition |= Q(category__isnull=True)
+            count = InventoryValuation.objects.filter(condition).update(
+                purchase_value_usd=F('purchase_value_usd') + purchase,
+                selling_value_usd=F('selling_value_usd') + selling,
+            )
+            updated += count
+            if count < len(keys):
+                missing.extend(keys)
+
+        if missing:
+            # Filas que aún no existen (categoría nueva, libro sin construir):
+            # se calculan completas, ya con este cambio incluido
+            existing = set(
+                InventoryValuation.objects.filter(
+                    Q(category_id__in=[key for key in missing if key is not None])
+                    | Q(category__isnull=True)
+                ).values_list('category_id', flat=True)
+            )
+            to_build = set(missing) - existing
+            if to_build:
+                ValuationService.rebuild(
+                    [key for key in to_build if key is not None],
+                    include_total=None in to_build,
+                )
+        return updated
+
+    @staticmethod
+    def _compute(category_ids=None) -> Dict[Any, tuple]:
+        """Valor por categoría calculado desde Product (una consulta)"""
+        from django.db.models import F, Sum
+        from inventory.models import Product
+
+        queryset = Product.objects.filter(is_active=True)
+        if category_ids is not None:
+            queryset = queryset.filter(category_id__in=category_ids)
+        rows = queryset.order_by().values('category_id').annotate(
+            purchase=Sum(F('stock') * F('purchase_price_usd')),
+            selling=Sum(F('stock') * F('selling_price_usd')),
+        )
+        values = {}
+        for row in rows:
+            values[row['category_id']] = (
+                Decimal(str(row['purchase'] or 0)),
+                Decimal(str(row['selling'] or 0)),
+            )
+        return values
+
+    @staticmethod
+    def _sum(values) -> tuple:
+        return (
+            sum((v[0] for v in values.values()), Decimal('0')),
+            sum((v[1] for v in values.values()), Decimal('0')),
+        )
+
+    @staticmethod
+    def rebuild(category_ids=None, include_total=True) -> int:
+        """
+        Recalcula filas del libro desde Product
+
+        Args:
+            category_ids: Categorías a recalcular (default: todas)
+            include_total: Recalcular también la fila total
+
+        Returns:
+            int: Filas escritas
+        """
+        from inventory.models import Category, InventoryValuation
+
+        full = category_ids is None
+        if full:
+            category_ids = list(Category.objects.values_list('pk', flat=True))
+            values = ValuationService._compute()
+        else:
+            category_ids = list(category_ids)
+            values = ValuationService._compute(category_ids) if category_ids else {}
+
+        zero = (Decimal('0'), Decimal('0'))
+        targets = {category_id: values.get(category_id, zero) for category_id in category_ids}
+        if include_total:
+            targets[None] = ValuationService._sum(values if full else ValuationService._compute())
+
+        with transaction.atomic():
+            for category_id, (purchase, selling) in targets.items():
+                InventoryValuation.objects.update_or_create(
+                    category_id=category_id,
+                    defaults={'purchase_value_usd': purchase, 'selling_value_usd': selling},
+                )
+        return len(targets)
+
+    @staticmethod
+    def verify() -> list:
+        """
+        Compara el libro con el cálculo completo
+
+        Returns:
+            list: Diferencias como dicts con category_id, ledger y actual
+                (valor a costo); vacía si el libro cuadra
+        """
+        from inventory.models import Category, InventoryValuation
+
+        actual = ValuationService._compute()
+        expected = {category_id: actual.get(category_id, (Decimal('0'), Decimal('0')))
+                    for category_id in Category.objects.values_list('pk', flat=True)}
+        expected[None] = ValuationService._sum(actual)
+        ledger = {
+            row.category_id: (row.purchase_value_usd, row.selling_value_usd)
+            for row in InventoryValuation.objects.all()
+        }
+
+        differences = []
+        for category_id, (purchase, selling) in expected.items():
+            stored = ledger.get(category_id)
+            if (
+                stored is None
+                or abs(stored[0] - purchase) > ValuationService.TOLERANCE
+                or abs(stored[1] - selling) > ValuationService.TOLERANCE
+            ):
+                differences.append({
+                    'category_id': category_id,
+                    'ledger': stored[0] if stored else None,
+                    'actual': purchase,
+                })
+        return differences
+
+    @staticmethod
+    def totals(category=None) -> Dict[str, Decimal]:
+        """
+        Valor del inventario leído del libro (una fila)
+
+        Args:
+            category: Category o id (default: total general)
+
+        Returns:
+            dict: {'purchase_value_usd': ..., 'selling_value_usd': ...}
+        """
+        from inventory.models import InventoryValuation
+
+        category_id = getattr(category, 'pk', category)
+        if category_id is None:
+            row = InventoryValuation.objects.filter(category__isnull=True).first()
+        else:
+            row = InventoryValuation.objects.filter(category_id=category_id).first()
+        if row is None:
+            ValuationService.rebuild(
+                [category_id] if category_id is not None else [],
+                include_total=category_id is None,
+            )
+            return ValuationService.totals(category_id)
+        return {
+            'purchase_value_usd': row.purchase_value_usd,
+            'selling_value_usd': row.selling_value_usd,
+        }
+
+
+class StockLedgerService:
+    """
+    Service para el libro de stock
+
+    InventoryAdjustment es el libro de movimientos (solo se agregan filas)
+    y Product.stock su proyección: todo cambio de stock pasa por apply() o
+    record(), que calculan previous_stock, new_stock y el stock nuevo del
+    producto en el mismo paso, y el save() con compare-and-swap impide que
+    dos movimientos partan del mismo stock. StockCheckpoint guarda el stock
+    cada tanto (comando checkpoint_stock_ledger) para que stock_as_of(),
+    verify() y rebuild() reproduzcan solo los ajustes posteriores.
+    """
+
+    # Productos por consulta al reproducir la cola del libro
+    TAIL_BATCH = 300
+
+    @staticmethod
+    def replay(stock, adjustment_type, quantity) -> Decimal:
+        """Stock que queda después de un ajuste"""
+        if adjustment_type == 'add':
+            return stock + quantity
+        if adjustment_type == 'remove':
+            return stock - quantity
+        if adjustment_type == 'set':
+            return quantity
+        raise ValueError(f"Tipo de ajuste desconocido: {adjustment_type}")
+
+    @staticmethod
+    def apply(adjustment):
+        """
+        Aplica un ajuste sin guardar al stock en memoria de su producto
+
+        Completa previous_stock y new_stock. Los caminos en lote guardan
+        después con ProductService.bulk_save() y un bulk_create().
+
+        Returns:
+            InventoryAdjustment: El mismo ajuste
+        """
+        product = adjustment.product
+        adjustment.previous_stock = product.stock
+        adjustment.new_stock = StockLedgerService.replay(
+            product.stock, adjustment.adjustment_type, adjustment.quantity
+        )
+        product.stock = adjustment.new_stock
+        return adjustment
+
+    @staticmethod
+    def record(adjustment):
+        """
+        Aplica y guarda un ajuste junto con el stock de su producto
+
+        Raises:
+            ConcurrentUpdateError: Si el producto cambió desde que se leyó
+        """
+        with transaction.atomic():
+            StockLedgerService.apply(adjustment)
+            adjustment.product.save()
+            adjustment.save()
+        return adjustment
+
+    @staticmethod
+    def stock_as_of(at=None, product_ids=None) -> Dict[int, Decimal]:
+        """
+        Stock de cada producto según el libro, a una fecha
+
+        Parte del último checkpoint hasta `at` y reproduce los ajustes
+        posteriores (hasta `at`): una consulta para los checkpoints y una
+        por cada TAIL_BATCH productos para la cola, sin leer lo anterior.
+        Antes del primer checkpoint de un producto (datos de antes del
+        libro) se toma el new_stock del último ajuste, o 0.
+
+        Args:
+            at: datetime (default: todo el libro)
+            product_ids: Limitar a estos productos (default: todos)
+
+        Returns:
+            dict: {product_id: Decimal}; sin los productos creados después de `at`
+        """
+        from django.db.models import OuterRef, Q, Subquery
+        from inventory.models import InventoryAdjustment, Product, StockCheckpoint
+
+        checkpoints = StockCheckpoint.objects.filter(product=OuterRef('pk'))
+        adjustments = InventoryAdjustment.objects.order_by()
+        products = Product.objects.order_by()
+        if at is not None:
+            checkpoints = checkpoints.filter(taken_at__lte=at)
+            adjustments = adjustments.filter(adjusted_at__lte=at)
+            products = products.filter(created_at__lte=at)
+        if product_ids is not None:
+            products = products.filter(pk__in=list(product_ids))
+        checkpoints = checkpoints.order_by('-taken_at', '-last_adjustment_id')
+
+        rows = products.annotate(
+            base=Subquery(checkpoints.values('stock')[:1]),
+            floor=Subquery(checkpoints.values('last_adjustment_id')[:1]),
+            legacy=Subquery(
+                adjustments.filter(product=OuterRef('pk')).order_by('-id').values('new_stock')[:1]
+            ),
+        ).values_list('pk', 'base', 'floor', 'legacy')
+
+        stock = {}
+        floors = []
+        for pk, base, floor, legacy in rows:
+            if floor is None:
+                stock[pk] = legacy if legacy is not None else Decimal('0')
+            else:
+                stock[pk] = base
+                floors.append((pk, floor))
+
+        batch = StockLedgerService.TAIL_BATCH
+        for start in range(0, len(floors), batch):
+            condition = Q()
+            for pk, floor in floors[start:start + batch]:
+                condition |= Q(product_id=pk, id__gt=floor)
+            tail = adjustments.filter(condition).order_by('product_id', 'id').values_list(
+                'product_id', 'adjustment_type', 'quantity'
+            )
+            for pk, adjustment_type, quantity in tail:
+                stock[pk] = StockLedgerService.replay(stock[pk], adjustment_type, quantity)
+        return stock
+
+    @staticmethod
+    def checkpoint(at=None) -> int:
+        """
+        Guarda un checkpoint de cada producto con ajustes desde el último
+
+        Compara con los checkpoints hasta `at`, así que también sirve para
+        completar fechas pasadas (ver monthly_checkpoints()).
+
+        Args:
+            at: datetime de corte (default: ahora)
+
+        Returns:
+            int: Checkpoints creados
+        """
+        from django.db.models import Max
+        from django.utils import timezone
+        from inventory.models import InventoryAdjustment, StockCheckpoint
+
+        at = at or timezone.now()
+        latest = dict(
+            InventoryAdjustment.objects.filter(adjusted_at__lte=at).order_by()
+            .values('product_id').annotate(last_id=Max('id')).values_list('product_id', 'last_id')
+        )
+        floors = dict(
+            StockCheckpoint.objects.filter(taken_at__lte=at).order_by().values('product_id')
+            .annotate(floor=Max('last_adjustment_id')).values_list('product_id', 'floor')
+        )
+        pending = {pk: last_id for pk, last_id in latest.items() if last_id > floors.get(pk, 0)}
+        if not pending:
+            return 0
+
+        stock = StockLedgerService.stock_as_of(at, pending)
+        taken_at = dict(
+            InventoryAdjustment.objects.filter(pk__in=pending.values()).values_list('pk', 'adjusted_at')
+        )
+        created = StockCheckpoint.objects.bulk_create([
+            StockCheckpoint(
+                product_id=pk, last_adjustment_id=last_id,
+                stock=stock[pk], taken_at=taken_at[last_id],
+            )
+            for pk, last_id in pending.items() if pk in stock
+        ], batch_size=500, ignore_conflicts=True)
+
+        logger.info("Stock ledger checkpoint", extra={
+            'products': len(created),
+            'at': at.isoformat(),
+        })
+        return len(created)
+
+    @staticmethod
+    def month_ends(until=None) -> List[datetime]:
+        """
+        Último instante de cada mes cerrado desde el primer ajuste
+
+        Args:
+            until: Fecha; se excluye el mes que la contiene (default: hoy)
+        """
+        from django.conf import settings
+        from django.utils import timezone
+        from inventory.models import InventoryAdjustment
+
+        first = InventoryAdjustment.objects.order_by('adjusted_at').values_list(
+            'adjusted_at', flat=True
+        ).first()
+        if first is None:
+            return []
+
+        until = until or date.today()
+        stop = until.replace(day=1)
+        month = first.date().replace(day=1)
+        ends = []
+        while month < stop:
+            following = (month + timedelta(days=32)).replace(day=1)
+            end = datetime.combine(following, time.min) - timedelta(microseconds=1)
+            ends.append(timezone.make_aware(end) if settings.USE_TZ else end)
+            month = following
+        return ends
+
+    @staticmethod
+    def monthly_checkpoints(until=None) -> int:
+        """
+        Checkpoint al cierre de cada mes cerrado que aún no lo tenga
+
+        Con uno por mes, stock_as_of() de cualquier fecha reproduce a lo
+        sumo un mes de ajustes por producto, sin importar los años de
+        historia. Los meses ya cubiertos no crean filas.
+
+        Returns:
+            int: Checkpoints creados
+        """
+        return sum(
+            StockLedgerService.checkpoint(month_end)
+            for month_end in StockLedgerService.month_ends(until)
+        )
+
+    @staticmethod
+    def verify(product_ids=None) -> list:
+        """
+        Compara Product.stock con el stock que da el libro
+
+        Args:
+            product_ids: Limitar a estos productos (default: todos)
+
+        Returns:
+            list: Diferencias como dicts con product_id, stored y ledger;
+                vacía si todo cuadra
+        """
+        from inventory.models import Product
+
+        ledger = StockLedgerService.stock_as_of(product_ids=product_ids)
+        stored = Product.objects.order_by('pk')
+        if product_ids is not None:
+            stored = stored.filter(pk__in=list(product_ids))
+
+        # Los creados después de leer el libro no están en él: se omiten
+        return [
+            {'product_id': pk, 'stored': stock, 'ledger': ledger[pk]}
+            for pk, stock in stored.values_list('pk', 'stock')
+            if pk in ledger and stock != ledger[pk]
+        ]
+
+    @staticmethod
+    def rebuild(product_ids=None) -> int:
+        """
+        Vuelve a proyectar Product.stock desde el libro donde no cuadra
+
+        Returns:
+            int: Productos corregidos
+        """
+        from inventory.models import Product
+
+        differences = StockLedgerService.verify(product_ids)
+        if not differences:
+            return 0
+
+        with transaction.atomic():
+            products = Product.objects.select_for_update().in_bulk(
+                [diff['product_id'] for diff in differences]
+            )
+            for diff in differences:
+                products[diff['product_id']].stock = diff['ledger']
+            ProductService.bulk_save(
+                list(products.values()), ['stock'], change_reason='Stock reconstruido desde el libro',
+            )
+
+        logger.warning("Product stock rebuilt from ledger", extra={
+            'products': len(differences),
+        })
+        return len(differences)
+
+
+class StockHistoryService:
+    """
+    Service para el stock y el valor del inventario a una fecha y los
+    movimientos de un período, leídos del libro de stock
+
+    El stock sale de StockLedgerService.stock_as_of() (checkpoint más
+    cercano + ajustes posteriores) y el costo de cada producto de su
+    historial (último precio de compra registrado hasta la fecha). Los
+    movimientos se resumen con consultas agrupadas por origen (ventas,
+    recepciones, manuales) sobre el índice por fecha de los ajustes, más
+    los resúmenes por día de los meses archivados (utils/archive.py).
+    """
+
+    @staticmethod
+    def day_end(day):
+        """Último instante de `day` (naive o aware según USE_TZ)"""
+        from django.conf import settings
+        from django.utils import timezone
+
+        end = datetime.combine(day, time.max)
+        return timezone.make_aware(end) if settings.USE_TZ else end
+
+    @staticmethod
+    def movement_aggregates():
+        """
+        Agregados de un grupo de ajustes por su efecto real
+
+        Cada ajuste cuenta como new_stock - previous_stock, así que los 'set'
+        entran como entrada o salida según corresponda.
+
+        Returns:
+            dict: movements, entries, exits y net para annotate()/aggregate()
+        """
+        from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, Sum, Value, When
+        from django.db.models.functions import Coalesce
+
+        quantity_field = DecimalField(max_digits=14, decimal_places=3)
+        zero = Value(Decimal('0'), output_field=quantity_field)
+        delta = ExpressionWrapper(F('new_stock') - F('previous_stock'), output_field=quantity_field)
+        return {
+            'movements': Count('id'),
+            'entries': Coalesce(Sum(Case(
+                When(new_stock__gt=F('previous_stock'), then=delta), default=zero,
+            )), zero),
+            'exits': Coalesce(Sum(Case(
+                When(new_stock__lt=F('previous_stock'), then=-delta), default=zero,
+            )), zero),
+            'net': Coalesce(Sum(delta), zero),
+        }
+
+    @staticmethod
+    def valuation_as_of(day, category=None, group_by='product') -> Dict[str, Any]:
+        """
+        Stock y valor al costo del inventario al cierre de `day`
+
+        Args:
+            day: date
+            category: Limitar a una categoría (la actual de cada producto)
+            group_by: 'product' o 'category'
+
+        Returns:
+            dict: rows (productos con stock distinto de 0, o una fila por
+                  categoría) y totals {products, stock_value_usd}
+        """
+        from django.db.models import OuterRef, Subquery
+        from inventory.models import Product
+        from utils.archive import ARCHIVE_DB, ArchiveService
+
+        at = StockHistoryService.day_end(day)
+        products = Product.objects.filter(created_at__lte=at).order_by('name')
+        product_ids = None
+        if category is not None:
+            products = products.filter(category=category)
+            product_ids = products.values_list('pk', flat=True)
+        stock = StockLedgerService.stock_as_of(at, product_ids)
+
+        History = Product.history.model
+        cost = History.objects.filter(
+            id=OuterRef('pk'), history_date__lte=at,
+        ).order_by('-history_date', '-history_id').values('purchase_price_usd')[:1]
+        rows = [
+            row for row in products.annotate(cost_usd=Subquery(cost)).values_list(
+                'pk', 'name', 'barcode', 'category_id', 'category__name', 'cost_usd', 'purchase_price_usd',
+            )
+            if stock.get(row[0])
+        ]
+
+        # Sin historial hasta la fecha en la base principal: el costo está
+        # en el archivo (si la fecha es de un mes archivado) o es el actual
+        archived_costs = {}
+        missing = [row[0] for row in rows if row[5] is None]
+        if missing and ARCHIVE_DB in ArchiveService.databases(day):
+            for pk, archived_cost in History.objects.using(ARCHIVE_DB).filter(
+                    id__in=missing, history_date__lte=at,
+            ).order_by('id', '-history_date', '-history_id').values_list('id', 'purchase_price_usd'):
+                archived_costs.setdefault(pk, archived_cost)
+
+        product_rows = []
+        for pk, name, barcode, category_id, category_name, cost_usd, current_cost in rows:
+            quantity = stock[pk]
+            if cost_usd is None:
+                cost_usd = archived_costs.get(pk, current_cost)
+            product_rows.append({
+                'product_id': pk,
+                'name': name,
+                'barcode': barcode,
+                'category_id': category_id,
+                'category': category_name,
+                'stock': quantity,
+                'cost_usd': cost_usd,
+                'value_usd': (quantity * cost_usd).quantize(Decimal('0.01')),
+            })
+
+        totals = {
+            'products': len(product_rows),
+            'stock_value_usd': sum((row['value_usd'] for row in product_rows), Decimal('0.00')),
+        }
+        if group_by != 'category':
+            return {'at': at, 'rows': product_rows, 'totals': totals}
+
+        categories = {}
+        for row in product_rows:
+            group = categories.setdefault(row['category_id'], {
+                'category_id': row['category_id'],
+                'category': row['category'],
+                'products': 0,
+                'value_usd': Decimal('0.00'),
+            })
+            group['products'] += 1
+            group['value_usd'] += row['value_usd']
+        category_rows = sorted(categories.values(), key=lambda group: group['category'] or '')
+        return {'at': at, 'rows': category_rows, 'totals': totals}
+
+    @staticmethod
+    def movements(start_date, end_date, category=None) -> Dict[str, Any]:
+        """
+        Movimientos de stock del período, por origen y por producto
+
+        Cada ajuste cuenta por su efecto real (ver movement_aggregates()),
+        así que stock inicial + neto = stock final. Los días archivados
+        salen de AdjustmentDaySummary.
+
+        Returns:
+            dict: summary [{source, label, movements, entries, exits, net}]
+                  y products [{product_id, name, opening, sale, reception,
+                  manual, closing}] ordenados por nombre
+        """
+        from django.db.models import Sum
+        from inventory.models import AdjustmentDaySummary, InventoryAdjustment, Product
+
+        aggregates = StockHistoryService.movement_aggregates()
+        opening_at = StockHistoryService.day_end(start_date - timedelta(days=1))
+        closing_at = StockHistoryService.day_end(end_date)
+        adjustments = InventoryAdjustment.objects.filter(
+            adjusted_at__gt=opening_at, adjusted_at__lte=closing_at,
+        ).order_by()
+        archived = AdjustmentDaySummary.objects.filter(
+            day__gte=start_date, day__lte=end_date,
+        ).order_by()
+        if category is not None:
+            adjustments = adjustments.filter(product__category=category)
+            archived = archived.filter(product__category=category)
+
+        labels = dict(InventoryAdjustment.SOURCES)
+        fields = ('movements', 'entries', 'exits', 'net')
+        grouped = {
+            source: dict.fromkeys(fields, 0) for source in labels
+        }
+        live = adjustments.values('source').annotate(**aggregates)
+        summarized = archived.values('source').annotate(**{field: Sum(field) for field in fields})
+        for row in [*live, *summarized]:
+            for field in fields:
+                grouped[row['source']][field] += row[field]
+        summary = [
+            {'source': source, 'label': label, **grouped[source]}
+            for source, label in labels.items()
+        ]
+
+        nets = {}
+        for queryset in (
+            adjustments.values('product_id', 'source').annotate(net=aggregates['net']),
+            archived.values('product_id', 'source').annotate(net=Sum('net')),
+        ):
+            for product_id, source, net in queryset.values_list('product_id', 'source', 'net'):
+                by_source = nets.setdefault(product_id, {})
+                by_source[source] = by_source.get(source, Decimal('0')) + net
+
+        opening = StockLedgerService.stock_as_of(opening_at, nets)
+        closing = StockLedgerService.stock_as_of(closing_at, nets)
+        names = dict(Product.objects.filter(pk__in=list(nets)).values_list('pk', 'name'))
+
+        products = []
+        for product_id, by_source in nets.items():
+            row = {
+                'product_id': product_id,
+                'name': names.get(product_id, ''),
+                'opening': opening.get(product_id, Decimal('0')),
+                'closing': closing.get(product_id, Decimal('0')),
+            }
+            for source in labels:
+                row[source] = by_source.get(source, Decimal('0'))
+            products.append(row)
+        products.sort(key=lambda row: row['name'])
+        return {'summary': summary, 'products': products}
+
+
+class CategoryService:
+    """
+    Service para el resumen de categorías (lista, API y filtro del POS)
+
+    Conteos y valor de todas las categorías en una consulta agrupada,
+    cacheada con la versión de las tablas de categorías y productos.
+    """
+
+    @staticmethod
+    def summary() -> List[Dict[str, Any]]:
+        """
+        Categorías ordenadas por nombre con sus conteos y valor
+
+        Returns:
+            list: Un dict por categoría con id, name, description,
+                total_count, active_count, low_stock_count,
+                out_of_stock_count e inventory_value_usd (activos, a costo)
+        """
+        from django.db.models import Count, F, Q, Sum
+        from inventory.models import Category
+
+        active = Q(products__is_active=True)
+        rows = Category.objects.order_by('name').values('id', 'name', 'description').annotate(
+            total_count=Count('products'),
+            active_count=Count('products', filter=active),
+            low_stock_count=Count('products', filter=active & Q(products__stock_state='low')),
+            out_of_stock_count=Count('products', filter=active & Q(products__stock_state='out')),
+            inventory_value_usd=Sum(
+                F('products__stock') * F('products__purchase_price_usd'), filter=active,
+            ),
+        ).cached()
+
+        summary = []
+        for row in rows:
+            row = dict(row)
+            # SQLite guarda los decimales como REAL
+            value = Decimal(str(row['inventory_value_usd'] or 0))
+            row['inventory_value_usd'] = value.quantize(Decimal('0.01'))
+            summary.append(row)
+        return summary
+
+
+class ComboService:
+    """
+    Service para combos: disponibilidad precalculada y venta en lote
+
+    `ProductCombo.max_sellable_units` guarda cuántos combos completos se
+    pueden armar con el stock actual. Las señales de inventory/signals.py
+    lo recalculan al guardar un Product o un ComboItem; quien cambie stock
+    con update()/bulk_update() debe llamar a refresh_for_products().
+    """
+
+    @staticmethod
+    def compute_max_units(components) -> int:
+        """
+        Combos completos que alcanzan con el stock de los componentes
+
+        Args:
+            components: Iterable de pares (stock, cantidad por combo)
+
+        Returns:
+            int: min(floor(stock / cantidad)); 0 si no hay componentes
+        """
+        units = None
+        for stock, quantity in components:
+            if not quantity or quantity <= 0:
+                continue
+            available = max(int((stock or Decimal('0')) // quantity), 0)
+            units = available if units is None else min(units, available)
+        return units or 0
+
+    @staticmethod
+    def refresh_combos(combo_ids) -> int:
+        """
+        Recalcula max_sellable_units de los combos indicados
+
+        Una consulta para los componentes y un bulk_update para los combos.
+
+        Args:
+            combo_ids: Iterable de ids de ProductCombo
+
+        Returns:
+            int: Cantidad de combos actualizados
+        """
+        from inventory.models import ComboItem, ProductCombo
+
+        combo_ids = set(combo_ids)
+        if not combo_ids:
+            return 0
+
+        components = {combo_id: [] for combo_id in combo_ids}
+        rows = ComboItem.objects.filter(combo_id__in=combo_ids).values_list(
+            'combo_id', 'product__stock', 'quantity'
+        )
+        for combo_id, stock, quantity in rows:
+            components[combo_id].append((stock, quantity))
+
+        combos = [
+            ProductCombo(pk=combo_id, max_sellable_units=ComboService.compute_max_units(items))
+            for combo_id, items in components.items()
+        ]
+        return ProductCombo.objects.bulk_update(combos, ['max_sellable_units'])
+
+    @staticmethod
+    def refresh_for_products(product_ids) -> int:
+        """
+        Recalcula los combos que usan alguno de los productos indicados
+
+        Returns:
+            int: Cantidad de combos actualizados
+        """
+        from inventory.models import ComboItem
+
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0
+        combo_ids = ComboItem.objects.filter(
+            product_id__in=product_ids
+        ).values_list('combo_id', flat=True).distinct()
+        return ComboService.refresh_combos(list(combo_ids))
+
+    @staticmethod
+    def refresh_all() -> int:
+        """Recalcula todos los combos (comando refresh_combo_units)"""
+        from inventory.models import ProductCombo
+
+        return ComboService.refresh_combos(
+            ProductCombo.objects.values_list('pk', flat=True)
+        )
+
+    @staticmethod
+    def sell_combo(combo, combo_quantity, sale, user):
+        """
+        Descuenta del inventario los componentes de `combo_quantity` combos
+
+        Bloquea las filas de los productos (en orden de pk, para no cruzarse
+        con otra venta), valida todo el combo antes de tocar nada y luego
+        descuenta con ProductService.bulk_save() y un solo bulk_create de
+        ajustes. Debe llamarse dentro de una transacción.
+
+        Args:
+            combo: ProductCombo a vender
+            combo_quantity: Cantidad de combos (entero > 0)
+            sale: Sale a la que pertenece la venta
+            user: Usuario que registra la venta
+
+        Returns:
+            list: InventoryAdjustment creados, uno por componente
+
+        Raises:
+            ValueError: Si el combo no tiene componentes o falta stock
+        """
+        from inventory.models import ComboItem, InventoryAdjustment, Product
+
+        required = dict(
+            ComboItem.objects.filter(combo=combo).values_list('product_id', 'quantity')
+        )
+        if not required:
+            raise ValueError(f'El combo {combo.name} no tiene productos')
+
+        products = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=required.keys())
+            .order_by('pk')
+        )
+
+        for product in products:
+            required_quantity = required[product.pk] * combo_quantity
+            if product.stock < required_quantity:
+                raise ValueError(
+                    f'Stock insuficiente para {product.name} '
+                    f'(necesario para combo {combo.name}). '
+                    f'Disponible: {product.stock}, '
+                    f'Requerido: {required_quantity}'
+                )
+
+        reason = f'Venta combo #{sale.id} - {combo.name} - {user.get_full_name() or user.username}'
+        adjustments = [
+            StockLedgerService.apply(InventoryAdjustment(
+                product=product,
+                adjustment_type='remove',
+                source='sale',
+                quantity=required[product.pk] * combo_quantity,
+                reason=reason,
+                adjusted_by=user,
+            ))
+            for product in products
+        ]
+
+        ProductService.bulk_save(products, ['stock'], user=user)
+        InventoryAdjustment.objects.bulk_create(adjustments)
+
+        logger.info("Combo sold", extra={
+            'combo_id': combo.pk,
+            'sale_id': sale.pk,
+            'combo_quantity': combo_quantity,
+            'components': len(products),
+        })
+        return adjustments
@@ -0,0 +1,104 @@
+# inventory/signals.py - SEÑALES DE INVENTARIO
+
+"""
+- Mantiene al día ProductCombo.max_sellable_units al guardar un Product
+  (si cambió o pudo cambiar el stock) y al agregar, modificar o quitar un
+  ComboItem
+- Publica `stock_state_changed` cuando un producto pasa entre 'normal',
+  'low' y 'out'; es el punto de enganche para alertas de reposición
+- Ajusta el libro de valoración (InventoryValuation) al guardar o borrar
+  un Product
+- Abre el libro de stock de cada producto nuevo con un StockCheckpoint del
+  stock con el que se creó
+- Versiona las tablas de categorías y productos (TableVersions) para las
+  lecturas con cached(), como el resumen de CategoryService
+
+Los cambios por update()/bulk_update() no disparan señales de modelo: esos
+caminos llaman directamente a ComboService.refresh_for_products() y a
+StockStateService.refresh() / notify() y ValuationService.apply_changes().
+"""
+
+import logging
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver, Signal
+
+from utils.versions import TableVersions
+
+from .models import Category, Product, ComboItem, StockCheckpoint
+from .services import ComboService, StockStateService, ValuationService
+
+logger = logging.getLogger(__name__)
+
+# Transición de estado de stock: sender=Product, product_id, previous, current
+stock_state_changed = Signal()
+
+TableVersions.register(Category)
+# Solo los campos que leen los conteos y el valor por categoría
+TableVersions.register(Product, fields=(
+    'category', 'is_active', 'stock', 'stock_state', 'purchase_price_usd',
+))
+
+
+@receiver(post_save, sender=Product, dispatch_uid='inventory_product_combo_units')
+def refresh_combos_on_product_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created:
+        # Un producto nuevo todavía no está en ningún combo
+        return
+    if update_fields is not None and 'stock' not in update_fields:
+        return
+    ComboService.refresh_for_products([instance.pk])
+
+
+@receiver(post_save, sender=ComboItem, dispatch_uid='inventory_comboitem_saved_units')
+@receiver(post_delete, sender=ComboItem, dispatch_uid='inventory_comboitem_deleted_units')
+def refresh_combo_on_item_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ComboService.refresh_combos([instance.combo_id])
+
+
+@receiver(post_save, sender=Product, dispatch_uid='inventory_product_stock_state')
+def publish_stock_state_change(sender, instance, raw=False, **kwargs):
+    change = getattr(instance, '_stock_state_change', None)
+    if raw or not change:
+        return
+    instance._stock_state_change = None
+    StockStateService.notify([(instance.pk, *change)])
+
+
+@receiver(post_save, sender=Product, dispatch_uid='inventory_product_stock_opening')
+def open_stock_ledger(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    StockCheckpoint.objects.create(
+        product=instance, last_adjustment_id=0,
+        stock=instance.stock, taken_at=instance.created_at,
+    )
+
+
+@receiver(post_save, sender=Product, dispatch_uid='inventory_product_valuation_saved')
+def apply_valuation_on_save(sender, instance, raw=False, **kwargs):
+    pending = getattr(instance, '_valuation_pending', None)
+    if raw or pending is None:
+        return
+    instance._valuation_pending = None
+    change = instance.take_valuation_change(pending[0])
+    if change:
+        ValuationService.apply_changes([change])
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='inventory_product_valuation_deleted')
+def apply_valuation_on_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_valuation_snapshot', None) or instance.valuation_contribution()
+    ValuationService.apply_changes([(previous, None)])
+
+
+@receiver(stock_state_changed, dispatch_uid='inventory_log_restock_alert')
+def log_restock_alert(sender, product_id, previous, current, **kwargs):
+    if current in sender.RESTOCK_STATES:
+        logger.warning("Product needs restock", extra={
+            'product_id': product_id,
+            'previous_state': previous,
+            'stock_state': current,
+        })
@@ -0,0 +1,116 @@
+# inventory/tests_categories.py
+"""
+Tests para el resumen de categorías (CategoryService.summary):
+- Conteos (total, activos, stock bajo, sin stock) y valor en una consulta
+- Cacheado hasta que cambia un producto o una categoría
+- Lista de categorías, API y filtro por categoría del POS
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Category, Product
+from inventory.services import CategoryService, ProductService
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+class CategorySummaryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.bebidas = Category.objects.create(name='Bebidas')
+        self.vacia = Category.objects.create(name='Abarrotes')
+        self.agua = make_product('CS-1', self.bebidas, stock='10', cost='1.50')
+        make_product('CS-2', self.bebidas, stock='1', cost='2.00')
+        make_product('CS-3', self.bebidas, stock='0')
+        make_product('CS-4', self.bebidas, stock='50', is_active=False)
+
+    def by_name(self):
+        return {row['name']: row for row in CategoryService.summary()}
+
+    def test_counts_and_value_in_one_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            summary = self.by_name()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        self.assertEqual(list(summary), ['Abarrotes', 'Bebidas'])
+        bebidas = summary['Bebidas']
+        self.assertEqual(bebidas['total_count'], 4)
+        self.assertEqual(bebidas['active_count'], 3)
+        self.assertEqual(bebidas['low_stock_count'], 1)
+        self.assertEqual(bebidas['out_of_stock_count'], 1)
+        # 10 × 1.50 + 1 × 2.00 (el inactivo no suma)
+        self.assertEqual(bebidas['inventory_value_usd'], Decimal('17.00'))
+        self.assertEqual(summary['Abarrotes']['total_count'], 0)
+        self.assertEqual(summary['Abarrotes']['inventory_value_usd'], Decimal('0.00'))
+
+    def test_cached_until_products_change(self):
+        self.by_name()
+        with CaptureQueriesContext(connection) as ctx:
+            self.by_name()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        self.agua.stock = Decimal('0')
+        self.agua.save()
+        self.assertEqual(self.by_name()['Bebidas']['out_of_stock_count'], 2)
+
+        Product.objects.filter(pk=self.agua.pk).update(is_active=False)
+        self.assertEqual(self.by_name()['Bebidas']['active_count'], 2)
+
+        agua = Product.objects.get(pk=self.agua.pk)
+        agua.is_active = True
+        agua.stock = Decimal('4')
+        ProductService.bulk_save([agua], ['stock', 'is_active'])
+        self.assertEqual(self.by_name()['Bebidas']['inventory_value_usd'], Decimal('8.00'))
+
+        self.vacia.name = 'Víveres'
+        self.vacia.save()
+        self.assertIn('Víveres', self.by_name())
+
+    def test_unrelated_fields_keep_cache(self):
+        self.by_name()
+        self.agua.name = 'Agua mineral'
+        self.agua.save(update_fields=['name'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.by_name()
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class CategorySummaryViewsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='cs_admin', password='pass123', is_admin=True)
+        self.client = Client()
+        self.client.login(username='cs_admin', password='pass123')
+        self.bebidas = Category.objects.create(name='Bebidas')
+        Category.objects.create(name='Abarrotes')
+        make_product('CSV-1', self.bebidas, stock='1', cost='2.00')
+
+    def test_category_list(self):
+        response = self.client.get(reverse('inventory:category_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1 bajo')
+        bebidas = response.context['categories'][1]
+        self.assertEqual(bebidas['inventory_value_usd'], Decimal('2.00'))
+
+    def test_categories_api(self):
+        response = self.client.get(reverse('inventory:categories_list_api'))
+        bebidas = response.json()['categories'][1]
+        self.assertEqual(bebidas['name'], 'Bebidas')
+        self.assertEqual(bebidas['product_count'], 1)
+        self.assertEqual(bebidas['low_stock_count'], 1)
+        self.assertEqual(bebidas['inventory_value_usd'], '2.00')
+
+    def test_pos_category_filter(self):
+        response = self.client.get(reverse('sales:sale_create'))
+        self.assertContains(response, f'<option value="{self.bebidas.pk}">Bebidas (1)</option>', html=True)
+        self.assertNotContains(response, 'Abarrotes (0)')
@@ -0,0 +1,187 @@
+# inventory/tests_combos.py
+"""
+Tests para la disponibilidad y venta de combos (ComboService):
+- max_sellable_units: cálculo y recálculo al cambiar stock o receta
+- Venta de combo: validación completa, descuento en lote, ajustes e historial
+- API de búsqueda de combos con componentes precargados
+"""
+
+import json
+from io import StringIO
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Product, ProductCombo, InventoryAdjustment
+from inventory.services import ComboService
+from utils.models import ExchangeRate
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def make_combo(name, components, price='20.00'):
+    combo = ProductCombo.objects.create(name=name, combo_price_bs=Decimal(price))
+    for product, quantity in components:
+        combo.items.create(product=product, quantity=Decimal(quantity))
+    combo.refresh_from_db()
+    return combo
+
+
+# ─────────────────────────────────────────────
+# UNIDADES VENDIBLES
+# ─────────────────────────────────────────────
+
+class MaxSellableUnitsTest(TestCase):
+
+    def setUp(self):
+        self.harina = make_product('CMB001', 'Combos', name='Harina', stock='10')
+        self.queso = make_product('CMB002', 'Combos', name='Queso', stock='2.5')
+        self.combo = make_combo('Arepa', [(self.harina, '2'), (self.queso, '0.5')])
+
+    def test_compute_max_units(self):
+        self.assertEqual(ComboService.compute_max_units([]), 0)
+        self.assertEqual(ComboService.compute_max_units([(Decimal('3'), Decimal('0.1'))]), 30)
+        self.assertEqual(ComboService.compute_max_units([(Decimal('-2'), Decimal('1'))]), 0)
+
+    def test_value_follows_limiting_component(self):
+        # Harina: 10 / 2 = 5; queso: 2.5 / 0.5 = 5
+        self.assertEqual(self.combo.max_sellable_units, 5)
+
+    def test_product_save_refreshes_combo(self):
+        self.queso.stock = Decimal('1.2')
+        self.queso.save()
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.max_sellable_units, 2)
+
+    def test_save_without_stock_change_is_skipped(self):
+        self.queso.name = 'Queso llanero'
+        with CaptureQueriesContext(connection) as ctx:
+            self.queso.save(update_fields=['name'])
+        self.assertFalse(any('inventory_comboitem' in q['sql'] for q in ctx.captured_queries))
+
+    def test_recipe_changes_refresh_combo(self):
+        item = self.combo.items.get(product=self.harina)
+        item.quantity = Decimal('5')
+        item.save()
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.max_sellable_units, 2)
+
+        item.delete()
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.max_sellable_units, 5)
+
+    def test_refresh_command_fixes_bulk_changes(self):
+        Product.objects.filter(pk=self.harina.pk).update(stock=Decimal('0'))
+        call_command('refresh_combo_units', stdout=StringIO())
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.max_sellable_units, 0)
+
+
+# ─────────────────────────────────────────────
+# VENTA
+# ─────────────────────────────────────────────
+
+class ComboSaleTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.admin = User.objects.create_user(username='combo_admin', password='pass123', is_admin=True)
+        self.client.login(username='combo_admin', password='pass123')
+        ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+        self.products = [make_product(f'CMBS{i:03d}', 'Combos', name=f'Componente {i}', stock='10') for i in range(6)]
+        self.combo = make_combo('Combo Fiesta', [(p, '2') for p in self.products])
+
+    def _sell(self, quantity):
+        return self.client.post(
+            reverse('sales:create_sale_api'),
+            json.dumps({
+                'items': [{'is_combo': True, 'combo_id': self.combo.pk, 'combo_quantity': quantity}],
+                'payment_method': 'cash',
+            }),
+            content_type='application/json',
+        )
+
+    def test_sale_decrements_all_components(self):
+        response = self._sell(3)
+        self.assertIn(response.status_code, [200, 201], response.content)
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.stock, Decimal('4'))
+            # Solo la creación: el descuento de stock queda en InventoryAdjustment
+            self.assertEqual(product.history.count(), 1)
+
+        adjustments = InventoryAdjustment.objects.filter(product__in=self.products)
+        self.assertEqual(adjustments.count(), 6)
+        adjustment = adjustments.first()
+        self.assertEqual((adjustment.previous_stock, adjustment.new_stock), (Decimal('10'), Decimal('4')))
+        self.assertTrue(adjustment.reason.startswith('Venta combo #'))
+
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.max_sellable_units, 2)
+
+    def test_query_count_does_not_grow_with_components(self):
+        sale_queries = []
+        for combo in (self.combo, make_combo('Combo Chico', [(self.products[0], '1')])):
+            self.combo = combo
+            cache.clear()  # la tasa de cambio queda en caché tras la primera venta
+            with CaptureQueriesContext(connection) as ctx:
+                self._sell(1)
+            sale_queries.append(len(ctx.captured_queries))
+        self.assertEqual(sale_queries[0], sale_queries[1])
+
+    def test_insufficient_stock_rolls_back_everything(self):
+        response = self._sell(6)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Stock insuficiente', json.loads(response.content)['error'])
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.stock, Decimal('10'))
+        self.assertFalse(InventoryAdjustment.objects.exists())
+
+
+# ─────────────────────────────────────────────
+# API DE BÚSQUEDA
+# ─────────────────────────────────────────────
+
+class ComboSearchAPITest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='combo_api', password='pass123', is_admin=True)
+        self.client.login(username='combo_api', password='pass123')
+        pan = make_product('CMBA001', 'Combos', name='Pan', stock='4')
+        jamon = make_product('CMBA002', 'Combos', name='Jamón', stock='0')
+        for i in range(5):
+            make_combo(f'Sandwich {i}', [(pan, '1')])
+        make_combo('Sandwich Jamón', [(pan, '1'), (jamon, '1')])
+
+    def test_search_uses_prefetch_and_stored_units(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('inventory:combo_search_api'), {'q': 'sandwich'})
+        self.assertEqual(response.status_code, 200)
+        combo_queries = [q for q in ctx.captured_queries if 'inventory_' in q['sql']]
+        self.assertEqual(len(combo_queries), 2)
+
+        combos = {c['name']: c for c in response.json()['combos']}
+        self.assertEqual(combos['Sandwich 0']['max_sellable_units'], 4)
+        self.assertTrue(combos['Sandwich 0']['stock_available'])
+        self.assertFalse(combos['Sandwich Jamón']['stock_available'])
+        self.assertEqual(combos['Sandwich Jamón']['item_count'], 2)
+        self.assertEqual(
+            [i['name'] for i in combos['Sandwich Jamón']['items']].count('Pan'), 1
+        )
@@ -0,0 +1,103 @@
+# inventory/tests_history.py
+"""
+Tests para el historial de productos (simple_history):
+- Los guardados que solo cambian stock o precios en Bs no escriben historial
+- PRODUCT_HISTORY_IGNORED_FIELDS = () vuelve al historial completo
+- ProductService.bulk_save respeta la misma regla
+- compact_product_history borra las filas redundantes y las viejas
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.utils import timezone
+
+from inventory.models import Category, Product
+from inventory.services import ProductHistoryService, ProductService
+from utils.testing import make_product
+
+
+class HistoryWritesTest(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Historial')
+        self.product = Product.objects.get(pk=make_product('HIST-1', self.category, name='Harina').pk)
+
+    def test_stock_only_save_skips_history(self):
+        self.product.stock -= 1
+        self.product.selling_price_bs = Decimal('60')
+        self.product.save()
+        self.product.save()
+        self.assertEqual(self.product.history.count(), 1)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, Decimal('9'))
+
+    def test_tracked_change_writes_history(self):
+        self.product.stock -= 1
+        self.product.save()
+        self.product.selling_price_usd = Decimal('2.00')
+        self.product.save()
+        self.assertEqual(self.product.history.count(), 2)
+        self.assertEqual(self.product.history.first().selling_price_usd, Decimal('2.00'))
+
+        self.product.save(update_fields=['stock'])
+        self.product.save(update_fields=['name'])
+        self.assertEqual(self.product.history.count(), 3)
+
+    @override_settings(PRODUCT_HISTORY_IGNORED_FIELDS=())
+    def test_full_history_setting(self):
+        self.product.stock -= 1
+        self.product.save()
+        self.product.stock -= 1
+        self.product.save()
+        self.assertEqual(self.product.history.count(), 3)
+
+    def test_bulk_save(self):
+        self.product.stock -= 1
+        ProductService.bulk_save([self.product], ['stock'])
+        self.assertEqual(self.product.history.count(), 1)
+
+        self.product.purchase_price_usd = Decimal('1.20')
+        ProductService.bulk_save([self.product], ['stock', 'purchase_price_usd'])
+        self.assertEqual(self.product.history.count(), 2)
+
+
+class CompactHistoryTest(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Historial')
+        with override_settings(PRODUCT_HISTORY_IGNORED_FIELDS=()):
+            self.product = make_product('HIST-1', self.category, name='Harina')
+            for _ in range(3):
+                self.product.stock -= 1
+                self.product.save()
+            self.product.name = 'Harina PAN'
+            self.product.save()
+            self.product.stock -= 1
+            self.product.save()
+
+    def test_compact_removes_stock_only_rows(self):
+        self.assertEqual(self.product.history.count(), 6)
+        self.assertEqual(ProductHistoryService.compact(), 4)
+        names = list(self.product.history.order_by('history_date', 'history_id')
+                     .values_list('history_type', 'name'))
+        self.assertEqual(names, [('+', 'Harina'), ('~', 'Harina PAN')])
+
+    def test_days_keeps_last_row_before_cutoff(self):
+        old = timezone.now() - timedelta(days=60)
+        self.product.history.update(history_date=old)
+        self.product.name = 'Harina Juana'
+        self.product.save()
+
+        call_command('compact_product_history', '--days', '30', stdout=StringIO())
+        names = list(self.product.history.order_by('history_date', 'history_id')
+                     .values_list('name', flat=True))
+        self.assertEqual(names, ['Harina PAN', 'Harina Juana'])
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command('compact_product_history', '--dry-run', stdout=out)
+        self.assertIn('Se borrarían 4 filas', out.getvalue())
+        self.assertEqual(self.product.history.count(), 6)
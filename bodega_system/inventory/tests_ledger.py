@@ -0,0 +1,150 @@
+# inventory/tests_ledger.py
+"""
+Tests para el libro de stock (StockLedgerService):
+- Ventas, recepciones, combos y ajustes manuales dejan el stock igual al libro
+- Cada producto nuevo abre el libro con un checkpoint
+- stock_as_of reproduce solo lo posterior al checkpoint más cercano
+- verify/rebuild y los comandos detectan y corrigen diferencias
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.forms import InventoryAdjustmentForm
+from inventory.models import Category, InventoryAdjustment, Product, StockCheckpoint
+from inventory.services import StockLedgerService
+from sales.api_views import process_regular_sale
+from sales.models import Sale
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+class StockLedgerTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='ledger', password='pass123')
+        self.category = Category.objects.create(name='Libro')
+        self.product = Product.objects.create(
+            name='Caraotas', barcode='LED-1', category=self.category, stock=Decimal('10'),
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'),
+        )
+
+    def adjust(self, adjustment_type, quantity, when=None):
+        product = Product.objects.get(pk=self.product.pk)
+        adjustment = StockLedgerService.record(InventoryAdjustment(
+            product=product, adjustment_type=adjustment_type, quantity=Decimal(quantity),
+            reason='Test', adjusted_by=self.user,
+        ))
+        if when is not None:
+            InventoryAdjustment.objects.filter(pk=adjustment.pk).update(adjusted_at=when)
+        return adjustment
+
+    def test_opening_checkpoint(self):
+        [checkpoint] = StockCheckpoint.objects.filter(product=self.product)
+        self.assertEqual((checkpoint.last_adjustment_id, checkpoint.stock), (0, Decimal('10')))
+
+    def test_writers_keep_projection(self):
+        sale = Sale.objects.create(
+            user=self.user, total_usd=Decimal('3'), total_bs=Decimal('120'),
+            exchange_rate_used=Decimal('40'), payment_method='cash',
+        )
+        rate = ExchangeRate(bs_to_usd=Decimal('40'))
+        result = process_regular_sale(sale, {'product_id': self.product.pk, 'quantity': '2.125'}, self.user, rate)
+        self.assertTrue(result['success'])
+
+        form = InventoryAdjustmentForm(data={
+            'product': self.product.pk, 'adjustment_type': 'add',
+            'quantity': '5', 'reason': 'Conteo',
+        }, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+        adjustment = form.save()
+        self.assertEqual((adjustment.previous_stock, adjustment.new_stock), (Decimal('7.875'), Decimal('12.875')))
+
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, Decimal('12.875'))
+        self.assertEqual(StockLedgerService.verify(), [])
+
+    def test_stock_as_of_replays_tail(self):
+        now = timezone.now()
+        StockCheckpoint.objects.filter(product=self.product).update(taken_at=now - timedelta(days=30))
+        Product.objects.filter(pk=self.product.pk).update(created_at=now - timedelta(days=30))
+        self.adjust('remove', '3', now - timedelta(days=20))
+        self.adjust('add', '10', now - timedelta(days=10))
+        StockLedgerService.checkpoint(now - timedelta(days=5))
+        self.adjust('set', '4', now - timedelta(days=2))
+
+        as_of = lambda days: StockLedgerService.stock_as_of(now - timedelta(days=days))[self.product.pk]
+        self.assertEqual(as_of(25), Decimal('10'))
+        self.assertEqual(as_of(15), Decimal('7'))
+        self.assertEqual(as_of(5), Decimal('17'))
+        self.assertEqual(as_of(1), Decimal('4'))
+
+        # Lo anterior al checkpoint ya no hace falta para hoy
+        checkpoint = StockCheckpoint.objects.filter(product=self.product).latest('taken_at')
+        self.assertEqual(checkpoint.stock, Decimal('17'))
+        InventoryAdjustment.objects.filter(pk__lte=checkpoint.last_adjustment_id).delete()
+        self.assertEqual(StockLedgerService.stock_as_of()[self.product.pk], Decimal('4'))
+        self.assertEqual(StockLedgerService.checkpoint(), 1)
+        self.assertEqual(StockLedgerService.checkpoint(), 0)
+
+    def test_products_created_later_are_excluded(self):
+        before = timezone.now() - timedelta(days=1)
+        self.assertNotIn(self.product.pk, StockLedgerService.stock_as_of(before))
+
+    def test_before_first_checkpoint_uses_recorded_stock(self):
+        StockCheckpoint.objects.all().delete()
+        self.adjust('remove', '4')
+        self.assertEqual(StockLedgerService.stock_as_of()[self.product.pk], Decimal('6'))
+
+    def test_verify_and_rebuild(self):
+        self.adjust('remove', '1')
+        Product.objects.filter(pk=self.product.pk).update(stock=Decimal('50'))
+        self.assertEqual(StockLedgerService.verify(), [
+            {'product_id': self.product.pk, 'stored': Decimal('50'), 'ledger': Decimal('9')},
+        ])
+
+        out = StringIO()
+        call_command('verify_stock_ledger', stdout=out)
+        self.assertIn('stock 50', out.getvalue())
+
+        call_command('verify_stock_ledger', '--rebuild', stdout=out)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, Decimal('9'))
+        self.assertEqual(StockLedgerService.verify(), [])
+
+    def test_verify_skips_products_created_after_snapshot(self):
+        with mock.patch.object(StockLedgerService, 'stock_as_of', return_value={}):
+            self.assertEqual(StockLedgerService.verify(), [])
+
+    def test_check_order_adjustments_keep_projection(self):
+        User.objects.create_user(username='ledger_admin', password='pass123', is_superuser=True)
+        ExchangeRate.objects.create(date=timezone.now().date(), bs_to_usd=Decimal('40'), updated_by=self.user)
+        order = SupplierOrder.objects.create(
+            supplier=Supplier.objects.create(name='Libro'), created_by=self.user, status='received',
+            total_usd=Decimal('5'), total_bs=Decimal('200'), exchange_rate_used=Decimal('40'),
+        )
+        SupplierOrderItem.objects.create(
+            order=order, product=self.product, quantity=Decimal('5'),
+            price_usd=Decimal('1.00'), price_bs=Decimal('40.00'),
+        )
+        call_command('check_order', '--fix', stdout=StringIO())
+
+        self.assertTrue(InventoryAdjustment.objects.filter(reason__contains=f'orden #{order.id}').exists())
+        self.assertEqual(StockLedgerService.verify(), [])
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, Decimal('10'))
+
+    def test_checkpoint_command(self):
+        self.adjust('add', '2')
+        out = StringIO()
+        call_command('checkpoint_stock_ledger', stdout=out)
+        self.assertIn('Checkpoints creados: 1', out.getvalue())
+        self.assertEqual(
+            StockCheckpoint.objects.filter(product=self.product).latest('taken_at').stock, Decimal('12')
+        )
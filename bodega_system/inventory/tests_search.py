@@ -0,0 +1,191 @@
+# inventory/tests_search.py
+"""
+Tests para la búsqueda indexada de productos (inventory/search.py):
+- Índice FTS5 mantenido por triggers (alta, edición, borrado, categoría)
+- Prefijos, varias palabras, acentos y código de barras exacto primero
+- Respaldo icontains con el mismo contrato
+- product_search_api y product_list usando el índice
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+
+from inventory.models import Category, Product
+from inventory.search import (
+    FTS_TABLE, build_match_expression, search_backend, search_products,
+    rebuild_search_index,
+)
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def fts_rows():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid, name, category FROM {FTS_TABLE} ORDER BY rowid")
+        return cursor.fetchall()
+
+
+def names(queryset):
+    return [p.name for p in queryset]
+
+
+# ─────────────────────────────────────────────
+# EXPRESIÓN DE BÚSQUEDA
+# ─────────────────────────────────────────────
+
+class MatchExpressionTest(TestCase):
+
+    def test_each_term_is_quoted_prefix(self):
+        self.assertEqual(build_match_expression('harina pan'), '"harina"* "pan"*')
+
+    def test_fts_operators_are_neutralized(self):
+        self.assertEqual(build_match_expression('name: "arroz" OR -x'), '"name"* "arroz"* "OR"* "x"*')
+
+    def test_empty_query(self):
+        self.assertIsNone(build_match_expression('  ¿? '))
+
+
+# ─────────────────────────────────────────────
+# ÍNDICE FTS5 (TRIGGERS)
+# ─────────────────────────────────────────────
+
+class SearchIndexSyncTest(TestCase):
+
+    def setUp(self):
+        if search_backend() != 'fts5':
+            self.skipTest('SQLite sin FTS5')
+        self.category = Category.objects.create(name='Granos')
+
+    def test_insert_update_delete_keep_index_in_sync(self):
+        product = make_product('750100', self.category, 'Arroz Mary')
+        self.assertEqual(fts_rows(), [(product.pk, 'Arroz Mary', 'Granos')])
+
+        product.name = 'Arroz Primor'
+        product.save()
+        self.assertEqual(fts_rows(), [(product.pk, 'Arroz Primor', 'Granos')])
+
+        # update() no pasa por save(): el trigger igual lo ve
+        Product.objects.filter(pk=product.pk).update(name='Arroz Diana')
+        self.assertEqual(fts_rows(), [(product.pk, 'Arroz Diana', 'Granos')])
+
+        product.delete()
+        self.assertEqual(fts_rows(), [])
+
+    def test_category_rename_reaches_index(self):
+        product = make_product('750101', self.category, 'Caraotas')
+        self.category.name = 'Legumbres'
+        self.category.save()
+        self.assertEqual(fts_rows(), [(product.pk, 'Caraotas', 'Legumbres')])
+
+    def test_bulk_create_is_indexed(self):
+        Product.objects.bulk_create([
+            Product(name=f'Pasta {i}', barcode=f'BULK{i}', category=self.category,
+                    purchase_price_usd=Decimal('1'), selling_price_usd=Decimal('2'))
+            for i in range(3)
+        ])
+        self.assertEqual(len(fts_rows()), 3)
+
+    def test_rebuild_command_repopulates(self):
+        make_product('750102', self.category, 'Avena')
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        call_command('rebuild_product_search', stdout=StringIO())
+        self.assertEqual(len(fts_rows()), 1)
+        self.assertEqual(rebuild_search_index(), 1)
+
+
+# ─────────────────────────────────────────────
+# RESULTADOS (FTS5 Y RESPALDO)
+# ─────────────────────────────────────────────
+
+class SearchResultsMixin:
+    backend = None
+
+    def setUp(self):
+        if self.backend == 'fts5' and search_backend() != 'fts5':
+            self.skipTest('SQLite sin FTS5')
+        granos = Category.objects.create(name='Granos')
+        limpieza = Category.objects.create(name='Limpieza')
+        self.harina = make_product('7591002000011', granos, 'Harina PAN', description='Harina de maíz precocida')
+        self.arroz = make_product('7591002000028', granos, 'Arroz Mary', description='Arroz blanco tipo 1')
+        self.cafe = make_product('7591002000035', granos, 'Café Fama de América')
+        self.jabon = make_product('7591002000042', limpieza, 'Jabón Las Llaves', description='Jabón de harina... no')
+
+    def search(self, query):
+        return names(search_products(Product.objects.all(), query, backend=self.backend))
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('arr'), ['Arroz Mary'])
+
+    def test_all_terms_required(self):
+        self.assertEqual(self.search('har pan'), ['Harina PAN'])
+
+    def test_name_ranks_above_description(self):
+        self.assertEqual(self.search('harina'), ['Harina PAN', 'Jabón Las Llaves'])
+
+    def test_exact_barcode_first(self):
+        self.assertEqual(self.search('7591002000042')[0], 'Jabón Las Llaves')
+
+    def test_category_name_matches(self):
+        self.assertEqual(self.search('limpieza'), ['Jabón Las Llaves'])
+
+    def test_empty_query_returns_nothing(self):
+        self.assertEqual(self.search('!!'), [])
+
+    def test_combines_with_other_filters(self):
+        self.arroz.is_active = False
+        self.arroz.save()
+        qs = search_products(Product.objects.filter(is_active=True), 'arroz', backend=self.backend)
+        self.assertEqual(list(qs), [])
+
+
+class FTSSearchResultsTest(SearchResultsMixin, TestCase):
+    backend = 'fts5'
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.search('cafe'), ['Café Fama de América'])
+        self.assertEqual(self.search('jabon'), ['Jabón Las Llaves'])
+
+
+class BasicSearchResultsTest(SearchResultsMixin, TestCase):
+    backend = 'basic'
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class SearchViewsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        User.objects.create_user(username='search_admin', password='pass123', is_admin=True)
+        self.client.login(username='search_admin', password='pass123')
+        category = Category.objects.create(name='Bebidas')
+        make_product('SRCH01', category, 'Refresco Cola 2L')
+        make_product('SRCH02', category, 'Agua Mineral 1L', description='Sin gas, ideal con refresco')
+        make_product('SRCH03', category, 'Jugo de Naranja')
+
+    def test_api_returns_ranked_results(self):
+        response = self.client.get(reverse('inventory:product_search_api'), {'q': 'refr', 'limit': 8})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([p['name'] for p in data['products']], ['Refresco Cola 2L', 'Agua Mineral 1L'])
+
+    def test_product_list_uses_search(self):
+        response = self.client.get(reverse('inventory:product_list'), {'q': 'jugo nar'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(names(response.context['page_obj']), ['Jugo de Naranja'])
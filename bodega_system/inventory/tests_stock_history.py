@@ -0,0 +1,111 @@
+# inventory/tests_stock_history.py
+"""
+Tests para el stock y valor a una fecha y los movimientos por período:
+- Checkpoints mensuales para meses cerrados, sin duplicar
+- Valor al costo vigente en cada fecha (historial de precios)
+- Movimientos resumidos por origen: inicial + neto = final
+- API y reporte
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from inventory.models import Category, InventoryAdjustment, Product, StockCheckpoint
+from inventory.services import StockHistoryService, StockLedgerService
+
+User = get_user_model()
+
+
+class StockHistoryTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='history', password='pass123', is_admin=True)
+        cls.category = Category.objects.create(name='Granos')
+        product = Product.objects.create(
+            name='Lentejas', barcode='HIS-1', category=cls.category, stock=Decimal('10'),
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'),
+        )
+        created = datetime(2025, 1, 5, 9, 0)
+        Product.objects.filter(pk=product.pk).update(created_at=created)
+        StockCheckpoint.objects.filter(product=product).update(taken_at=created)
+        product.history.update(history_date=created)
+
+        cls.adjust(product, 'remove', '3', 'sale', datetime(2025, 1, 20, 10, 0))
+        cls.adjust(product, 'add', '20', 'reception', datetime(2025, 2, 10, 10, 0))
+
+        product = Product.objects.get(pk=product.pk)
+        product.purchase_price_usd = Decimal('2.00')
+        product.save()
+        product.history.filter(history_date__gt=created).update(history_date=datetime(2025, 3, 1, 8, 0))
+
+        cls.adjust(product, 'set', '25', 'manual', datetime(2025, 3, 5, 10, 0))
+        cls.adjust(product, 'remove', '5', 'sale', datetime(2025, 3, 20, 10, 0))
+        cls.product = product
+
+    @classmethod
+    def adjust(cls, product, adjustment_type, quantity, source, when):
+        adjustment = StockLedgerService.record(InventoryAdjustment(
+            product=Product.objects.get(pk=product.pk), adjustment_type=adjustment_type,
+            source=source, quantity=Decimal(quantity), reason='Test', adjusted_by=cls.user,
+        ))
+        InventoryAdjustment.objects.filter(pk=adjustment.pk).update(adjusted_at=when)
+
+    def test_monthly_checkpoints(self):
+        until = date(2025, 4, 10)
+        self.assertEqual(len(StockLedgerService.month_ends(until)), 3)
+        self.assertEqual(StockLedgerService.monthly_checkpoints(until), 3)
+        self.assertEqual(StockLedgerService.monthly_checkpoints(until), 0)
+        stocks = list(StockCheckpoint.objects.filter(
+            product=self.product, last_adjustment_id__gt=0,
+        ).order_by('taken_at').values_list('stock', flat=True))
+        self.assertEqual(stocks, [Decimal('7'), Decimal('27'), Decimal('20')])
+
+        out = StringIO()
+        call_command('checkpoint_stock_ledger', '--monthly', stdout=out)
+        self.assertIn('Checkpoints mensuales creados: 0', out.getvalue())
+
+    def test_valuation_uses_cost_of_the_date(self):
+        StockLedgerService.monthly_checkpoints(date(2025, 4, 10))
+        february = StockHistoryService.valuation_as_of(date(2025, 2, 28))
+        [row] = february['rows']
+        self.assertEqual((row['stock'], row['cost_usd'], row['value_usd']),
+                         (Decimal('27'), Decimal('1.00'), Decimal('27.00')))
+
+        march = StockHistoryService.valuation_as_of(date(2025, 3, 31), self.category, 'category')
+        self.assertEqual(march['rows'], [{
+            'category_id': self.category.pk, 'category': 'Granos',
+            'products': 1, 'value_usd': Decimal('40.00'),
+        }])
+        self.assertEqual(StockHistoryService.valuation_as_of(date(2025, 1, 1))['rows'], [])
+
+    def test_movements_by_source(self):
+        result = StockHistoryService.movements(date(2025, 3, 1), date(2025, 3, 31))
+        summary = {row['source']: row for row in result['summary']}
+        self.assertEqual((summary['sale']['movements'], summary['sale']['exits']), (1, Decimal('5')))
+        self.assertEqual(summary['manual']['net'], Decimal('-2'))
+        self.assertEqual(summary['reception']['movements'], 0)
+
+        [row] = result['products']
+        self.assertEqual((row['opening'], row['sale'], row['manual'], row['closing']),
+                         (Decimal('27'), Decimal('-5'), Decimal('-2'), Decimal('20')))
+
+    def test_api_and_report(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('inventory:stock_as_of_api'), {'date': '2025-02-28'})
+        self.assertEqual(response.json()['totals']['stock_value_usd'], 27.0)
+        response = self.client.get(reverse('inventory:stock_movements_api'), {'start': '2025-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse('finances:stock_history_report'), {
+            'period': 'custom', 'start_date': '2025-03-01', 'end_date': '2025-03-31',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['opening_totals']['stock_value_usd'], Decimal('27.00'))
+        self.assertEqual(response.context['closing_totals']['stock_value_usd'], Decimal('40.00'))
@@ -0,0 +1,151 @@
+# inventory/tests_stock_state.py
+"""
+Tests para el estado de stock persistido (Product.stock_state):
+- save() mantiene el estado, también con update_fields
+- Transiciones publicadas con la señal stock_state_changed
+- StockStateService.refresh() para cambios hechos con update()
+- Dashboard, APIs y reporte de inventario leen la columna indexada
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Product
+from inventory.services import StockStateService
+from inventory.signals import stock_state_changed
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+class TransitionRecorder:
+    """Captura las transiciones publicadas mientras está conectado"""
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, sender, product_id, previous, current, **kwargs):
+        self.events.append((product_id, previous, current))
+
+    def __enter__(self):
+        stock_state_changed.connect(self, dispatch_uid='test_stock_state_recorder')
+        return self
+
+    def __exit__(self, *exc):
+        stock_state_changed.disconnect(dispatch_uid='test_stock_state_recorder')
+
+
+# ─────────────────────────────────────────────
+# MODELO Y SERVICIO
+# ─────────────────────────────────────────────
+
+class StockStateModelTest(TestCase):
+
+    def test_state_on_create(self):
+        self.assertEqual(make_product('SS001', 'Estados', stock='0').stock_state, 'out')
+        self.assertEqual(make_product('SS002', 'Estados', stock='3').stock_state, 'low')
+        self.assertEqual(make_product('SS003', 'Estados', stock='5').stock_state, 'normal')
+
+    def test_update_fields_also_saves_state(self):
+        product = make_product('SS010', 'Estados', stock='10')
+        product.stock = Decimal('2')
+        product.save(update_fields=['stock'])
+        product.refresh_from_db()
+        self.assertEqual(product.stock_state, 'low')
+
+        product.min_stock = Decimal('1')
+        product.save(update_fields=['min_stock'])
+        product.refresh_from_db()
+        self.assertEqual(product.stock_state, 'normal')
+
+    def test_transitions_are_published_once(self):
+        product = make_product('SS020', 'Estados', stock='10')
+        with TransitionRecorder() as recorder:
+            product.stock = Decimal('8')
+            product.save()
+            product.stock = Decimal('0')
+            product.save()
+            product.save()
+        self.assertEqual(recorder.events, [(product.pk, 'normal', 'out')])
+
+    def test_refresh_after_queryset_update(self):
+        product = make_product('SS030', 'Estados', stock='10')
+        Product.objects.filter(pk=product.pk).update(stock=Decimal('1'))
+        with TransitionRecorder() as recorder:
+            self.assertEqual(StockStateService.refresh([product.pk]), 1)
+            self.assertEqual(StockStateService.refresh([product.pk]), 0)
+        product.refresh_from_db()
+        self.assertEqual(product.stock_state, 'low')
+        self.assertEqual(recorder.events, [(product.pk, 'normal', 'low')])
+
+    def test_refresh_command(self):
+        product = make_product('SS040', 'Estados', stock='0')
+        Product.objects.filter(pk=product.pk).update(stock=Decimal('9'))
+        out = StringIO()
+        call_command('refresh_stock_states', stdout=out)
+        self.assertIn('1 productos', out.getvalue())
+        product.refresh_from_db()
+        self.assertEqual(product.stock_state, 'normal')
+
+    def test_summary_counts_active_products_in_one_query(self):
+        make_product('SS050', 'Estados', stock='0')
+        make_product('SS051', 'Estados', stock='2')
+        make_product('SS052', 'Estados', stock='3')
+        make_product('SS053', 'Estados', stock='50')
+        make_product('SS054', 'Estados', stock='0', is_active=False)
+        with CaptureQueriesContext(connection) as ctx:
+            summary = StockStateService.summary()
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(summary, {'out': 1, 'low': 2, 'normal': 1, 'total': 4})
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class StockStateViewsTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='ss_admin', password='pass123', is_admin=True)
+        self.client.login(username='ss_admin', password='pass123')
+        self.out = make_product('SSV001', 'Estados', stock='0')
+        self.low = make_product('SSV002', 'Estados', stock='2')
+        self.normal = make_product('SSV003', 'Estados', stock='40')
+
+    def test_stock_summary_api(self):
+        response = self.client.get(reverse('inventory:product_stock_summary_api'))
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()['summary']
+        self.assertEqual(
+            (summary['total_products'], summary['out_of_stock'], summary['low_stock'], summary['normal_stock']),
+            (3, 1, 1, 1),
+        )
+
+    def test_low_stock_suggestions(self):
+        response = self.client.get(reverse('inventory:product_suggestions_api'), {'type': 'low_stock'})
+        self.assertEqual(
+            [s['id'] for s in response.json()['suggestions']],
+            [self.out.pk, self.low.pk],
+        )
+
+    def test_dashboard_low_stock_count(self):
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_products'], 3)
+        self.assertEqual(response.context['low_stock_products'], 2)
+
+    def test_inventory_report_filters_in_database(self):
+        response = self.client.get(reverse('finances:inventory_report'), {'stock_status': 'low'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.context['page_obj']], [self.low.pk])
@@ -0,0 +1,154 @@
+# inventory/tests_valuation.py
+"""
+Tests para el libro de valoración del inventario (InventoryValuation):
+- Ajuste incremental al crear, mover stock, cambiar precio/categoría y borrar
+- Ventas (normales y combos) mantienen el libro cuadrado
+- verify/rebuild y el comando verify_inventory_valuation
+- Lecturas del valor en una consulta
+"""
+
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import Category, Product, ProductCombo
+from inventory.services import ValuationService
+from utils.models import ExchangeRate
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def purchase_value(category=None):
+    return ValuationService.totals(category)['purchase_value_usd'].quantize(Decimal('0.01'))
+
+
+# ─────────────────────────────────────────────
+# LIBRO
+# ─────────────────────────────────────────────
+
+class ValuationLedgerTest(TestCase):
+
+    def setUp(self):
+        self.bebidas = Category.objects.create(name='Bebidas')
+        self.granos = Category.objects.create(name='Granos')
+        self.refresco = make_product('VAL001', self.bebidas, stock='10', cost='2.00', price='3.00')
+        self.arroz = make_product('VAL002', self.granos, stock='4', cost='1.50', price='2.00')
+
+    def test_created_products_are_counted(self):
+        self.assertEqual(purchase_value(), Decimal('26.00'))
+        self.assertEqual(purchase_value(self.bebidas), Decimal('20.00'))
+        self.assertEqual(
+            ValuationService.totals(self.granos)['selling_value_usd'].quantize(Decimal('0.01')),
+            Decimal('8.00'),
+        )
+
+    def test_stock_price_and_category_changes(self):
+        self.refresco.stock = Decimal('5')
+        self.refresco.save(update_fields=['stock'])
+        self.assertEqual(purchase_value(self.bebidas), Decimal('10.00'))
+
+        refresco = Product.objects.get(pk=self.refresco.pk)
+        refresco.purchase_price_usd = Decimal('4.00')
+        refresco.save()
+        self.assertEqual(purchase_value(), Decimal('26.00'))
+
+        refresco.category = self.granos
+        refresco.save()
+        self.assertEqual(purchase_value(self.bebidas), Decimal('0.00'))
+        self.assertEqual(purchase_value(self.granos), Decimal('26.00'))
+        self.assertEqual(ValuationService.verify(), [])
+
+    def test_inactive_and_deleted_products_leave_the_ledger(self):
+        self.arroz.is_active = False
+        self.arroz.save()
+        self.assertEqual(purchase_value(), Decimal('20.00'))
+        self.refresco.delete()
+        self.assertEqual(purchase_value(), Decimal('0.00'))
+        self.assertEqual(ValuationService.verify(), [])
+
+    def test_totals_is_a_single_row_read(self):
+        with CaptureQueriesContext(connection) as ctx:
+            ValuationService.totals()
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_verify_and_rebuild_command(self):
+        Product.objects.filter(pk=self.arroz.pk).update(stock=Decimal('100'))
+        differences = ValuationService.verify()
+        self.assertEqual(
+            sorted(d['category_id'] or 0 for d in differences),
+            [0, self.granos.pk],
+        )
+
+        out = StringIO()
+        call_command('verify_inventory_valuation', stdout=out)
+        self.assertIn('--rebuild', out.getvalue())
+        self.assertNotEqual(ValuationService.verify(), [])
+
+        call_command('verify_inventory_valuation', '--rebuild', stdout=StringIO())
+        self.assertEqual(ValuationService.verify(), [])
+        self.assertEqual(purchase_value(), Decimal('170.00'))
+
+
+# ─────────────────────────────────────────────
+# VENTAS Y VISTAS
+# ─────────────────────────────────────────────
+
+class ValuationSalesTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.admin = User.objects.create_user(username='val_admin', password='pass123', is_admin=True)
+        self.client.login(username='val_admin', password='pass123')
+        ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+        category = Category.objects.create(name='Víveres')
+        self.harina = make_product('VALS001', category, stock='20', cost='1.00', price='3.00')
+        self.aceite = make_product('VALS002', category, stock='10', cost='3.00', price='3.00')
+        self.combo = ProductCombo.objects.create(name='Combo Cocina', combo_price_bs=Decimal('100'))
+        self.combo.items.create(product=self.harina, quantity=Decimal('2'))
+        self.combo.items.create(product=self.aceite, quantity=Decimal('1'))
+
+    def _sell(self, items):
+        return self.client.post(
+            reverse('sales:create_sale_api'),
+            json.dumps({'items': items, 'payment_method': 'cash'}),
+            content_type='application/json',
+        )
+
+    def test_regular_and_combo_sales(self):
+        self.assertEqual(purchase_value(), Decimal('50.00'))
+        response = self._sell([{'product_id': self.harina.pk, 'quantity': 5}])
+        self.assertIn(response.status_code, [200, 201], response.content)
+        self.assertEqual(purchase_value(), Decimal('45.00'))
+
+        response = self._sell([{'is_combo': True, 'combo_id': self.combo.pk, 'combo_quantity': 2}])
+        self.assertIn(response.status_code, [200, 201], response.content)
+        # 2 combos: 4 harina ($4) + 2 aceite ($6)
+        self.assertEqual(purchase_value(), Decimal('35.00'))
+        self.assertEqual(ValuationService.verify(), [])
+
+    def test_stock_summary_api_reads_ledger(self):
+        response = self.client.get(reverse('inventory:product_stock_summary_api'))
+        summary = response.json()['summary']
+        self.assertAlmostEqual(summary['total_purchase_value_usd'], 50.0, places=2)
+        self.assertAlmostEqual(summary['total_purchase_value'], 2000.0, places=2)
+
+    def test_inventory_report_total(self):
+        response = self.client.get(reverse('finances:inventory_report'))
+        self.assertAlmostEqual(response.context['totals']['total_value_usd'], 50.0, places=2)
@@ -42,6 +42,8 @@ urlpatterns = [
     path('api/products/barcode/<str:barcode>/', api_views.product_by_barcode_api, name='product_by_barcode_api'),
     path('api/products/suggestions/', api_views.product_suggestions_api, name='product_suggestions_api'),
     path('api/products/stock-summary/', api_views.product_stock_summary_api, name='product_stock_summary_api'),
+    path('api/stock/as-of/', api_views.stock_as_of_api, name='stock_as_of_api'),
+    path('api/stock/movements/', api_views.stock_movements_api, name='stock_movements_api'),
     path('api/categories/', api_views.categories_list_api, name='categories_list_api'),
     path('api/validate-barcode/', api_views.validate_barcode_api, name='validate_barcode_api'),
     path('api/generate-barcode/', api_views.generate_barcode_api, name='generate_barcode_api'),
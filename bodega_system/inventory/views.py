@@ -4,15 +4,19 @@ from django import forms
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import F, Sum, Count
+from django.db.models import Sum, Count
 from django.core.paginator import Paginator
 from django.db import transaction
 from decimal import Decimal, InvalidOperation
 
 from .models import Category, Product, InventoryAdjustment, ProductCombo, ComboItem
+from .search import search_products
+from .services import CategoryService, StockLedgerService
 from .forms import (CategoryForm, ProductForm, InventoryAdjustmentForm,
                    ProductComboForm, ComboItemFormset)
+from utils.concurrency import ConcurrentUpdateError
 from utils.decorators import admin_required, inventory_access_required
+from utils.pagination import paginate_keyset, htmx_fragment
 
 # Vistas de Productos - Empleados y Administradores (Solo Lectura para Empleados)
 @inventory_access_required
@@ -30,22 +34,16 @@ def product_list(request):
     if category_id:
         products = products.filter(category_id=category_id)
 
-    if search_query:
-        products = products.filter(
-            name__icontains=search_query
-        ) | products.filter(
-            barcode__icontains=search_query
-        ) | products.filter(
-            description__icontains=search_query
-        )
-
     if stock_filter == 'low':
-        products = products.filter(stock__lte=F('min_stock'))
+        products = products.filter(stock_state__in=Product.RESTOCK_STATES)
     elif stock_filter == 'out':
-        products = products.filter(stock=0)
+        products = products.filter(stock_state='out')
 
-    # Ordenar
-    products = products.order_by('category__name', 'name')
+    # Ordenar: por relevancia si hay búsqueda, si no por categoría
+    if search_query:
+        products = search_products(products, search_query)
+    else:
+        products = products.order_by('category__name', 'name')
 
     # Paginación
     paginator = Paginator(products, 20)
@@ -53,7 +51,7 @@ def product_list(request):
     page_obj = paginator.get_page(page_number)
 
     # Obtener categorías para filtro
-    categories = Category.objects.all().order_by('name')
+    categories = Category.objects.order_by('name').cached()
 
     # ⭐ NUEVO: Pasar información de permisos
     is_admin = request.user.is_admin or request.user.is_superuser
@@ -104,19 +102,13 @@ def product_create(request):
                     initial_stock_decimal = Decimal(str(initial_stock))
 
                     if initial_stock_decimal > 0:
-                        with transaction.atomic():
-                            product.stock = initial_stock_decimal
-                            product.save()
-
-                            InventoryAdjustment.objects.create(
-                                product=product,
-                                adjustment_type='set',
-                                quantity=initial_stock_decimal,
-                                previous_stock=Decimal('0'),
-                                new_stock=initial_stock_decimal,
-                                reason='Stock inicial',
-                                adjusted_by=request.user
-                            )
+                        StockLedgerService.record(InventoryAdjustment(
+                            product=product,
+                            adjustment_type='set',
+                            quantity=initial_stock_decimal,
+                            reason='Stock inicial',
+                            adjusted_by=request.user
+                        ))
                 except (InvalidOperation, ValueError) as e:
                     messages.warning(request, f'El stock inicial "{initial_stock}" no es válido. Se estableció en 0.')
 
@@ -143,9 +135,22 @@ def product_update(request, pk):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product)
         if form.is_valid():
-            form.save()
-            messages.success(request, f'Producto "{product.name}" actualizado exitosamente.')
-            return redirect('inventory:product_detail', pk=product.pk)
+            try:
+                with transaction.atomic():
+                    form.save()
+            except ConcurrentUpdateError:
+                # Otro usuario guardó el producto después de abrir este
+                # formulario: se muestra lo enviado sobre la versión actual
+                product = get_object_or_404(Product, pk=pk)
+                data = request.POST.copy()
+                data['row_version'] = product.row_version
+                form = ProductForm(data, request.FILES, instance=product)
+                form.is_valid()
+                form.add_error(None, 'Otro usuario modificó este producto mientras lo editabas. '
+                                     'Revisa los datos actuales y vuelve a guardar.')
+            else:
+                messages.success(request, f'Producto "{product.name}" actualizado exitosamente.')
+                return redirect('inventory:product_detail', pk=product.pk)
     else:
         form = ProductForm(instance=product)
 
@@ -182,21 +187,14 @@ def product_delete(request, pk):
 @inventory_access_required
 def category_list(request):
     """Vista para listar categorías - Empleados y Administradores (Solo Lectura para Empleados)"""
-    categories = Category.objects.all().order_by('name')
-
-    categories_with_count = []
-    for category in categories:
-        product_count = Product.objects.filter(category=category).count()
-        categories_with_count.append({
-            'category': category,
-            'product_count': product_count
-        })
+    # Conteos y valor por categoría en una consulta (cacheada)
+    categories = CategoryService.summary()
 
     # ⭐ NUEVO: Pasar información de permisos
     is_admin = request.user.is_admin or request.user.is_superuser
 
     return render(request, 'inventory/category_list.html', {
-        'categories': categories_with_count,
+        'categories': categories,
         'is_admin': is_admin,  # ⭐ NUEVO: Para controlar botones de edición
     })
 
@@ -275,7 +273,15 @@ def category_delete(request, pk):
 @admin_required
 def adjustment_list(request):
     """Vista para listar ajustes de inventario - Solo Administradores"""
-    adjustments = InventoryAdjustment.objects.all().order_by('-adjusted_at')
+    from finances.report_definitions import AdjustmentsReport
+    from finances.reports import export_report
+
+    # Exportación con los mismos filtros (?format=csv|xlsx|pdf)
+    export = export_report(request, AdjustmentsReport(request.GET.dict()))
+    if export is not None:
+        return export
+
+    adjustments = InventoryAdjustment.objects.select_related('product', 'adjusted_by')
     
     product_id = request.GET.get('product')
     adjustment_type = request.GET.get('type')
@@ -286,9 +292,13 @@ def adjustment_list(request):
     if adjustment_type:
         adjustments = adjustments.filter(adjustment_type=adjustment_type)
     
-    paginator = Paginator(adjustments, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor: la tabla crece con cada venta, OFFSET no escala
+    page_obj = paginate_keyset(request, adjustments, per_page=20,
+                               date_field='adjusted_at', with_total=True)
+
+    fragment = htmx_fragment(request)
+    if fragment:
+        return render(request, f'inventory/adjustment_list_{fragment}.html', {'page_obj': page_obj})
     
     return render(request, 'inventory/adjustment_list.html', {
         'page_obj': page_obj,
@@ -11,7 +11,9 @@ from django.core.exceptions import PermissionDenied
 
 from .models import Sale, SaleItem
 from inventory.models import Product, InventoryAdjustment, ProductCombo
+from inventory.services import ComboService, StockLedgerService
 from customers.models import Customer, CustomerCredit
+from utils.concurrency import is_conflict, retry_on_conflict
 from utils.models import ExchangeRate
 from utils.decorators import sales_access_required
 
@@ -37,93 +39,115 @@ def create_sale_api(request):
         if data.get('customer_id'):
             customer = get_object_or_404(Customer, pk=data['customer_id'])
         
-        with transaction.atomic():
-            # ⭐ CALCULAR TOTALES EN USD Y BS
-            total_usd = Decimal('0.00')
-            total_bs = Decimal('0.00')
-            
-            # Pre-calcular total para validar
-            for item_data in data['items']:
-                if item_data.get('is_combo', False):
-                    # TODO: Implementar combos en USD después
-                    combo = get_object_or_404(ProductCombo, pk=item_data['combo_id'])
-                    quantity = Decimal(str(item_data.get('combo_quantity', 1)))
-                    # Por ahora usar precio en Bs (se actualizará después)
-                    item_total_bs = combo.combo_price_bs * quantity
-                    total_bs += item_total_bs
-                else:
-                    product = get_object_or_404(Product, pk=item_data['product_id'])
-                    quantity = Decimal(str(item_data['quantity']))
-                    
-                    # ⭐ CALCULAR PRECIO USD Y BS
-                    price_usd = product.get_price_usd_for_quantity(quantity)
-                    price_bs = price_usd * current_exchange_rate.bs_to_usd
-                    
-                    item_total_usd = price_usd * quantity
-                    item_total_bs = price_bs * quantity
-                    
-                    total_usd += item_total_usd
-                    total_bs += item_total_bs
-            
-            # ⭐ CREAR VENTA CON AMBOS TOTALES, TASA UTILIZADA Y MÉTODO DE PAGO
-            sale = Sale.objects.create(
-                customer=customer,
-                user=request.user,
-                total_usd=total_usd,
-                total_bs=total_bs,
-                exchange_rate_used=current_exchange_rate.bs_to_usd,
-                is_credit=data.get('is_credit', False),
-                notes=data.get('notes', ''),
-                payment_method=data.get('payment_method', 'cash'),
-                mobile_reference=data.get('mobile_reference') if data.get('payment_method') == 'mobile' else None
-            )
-            
-            # Procesar ítems de venta
-            for item_data in data['items']:
-                if item_data.get('is_combo', False):
-                    # Procesar venta de combo (mantener lógica actual)
-                    result = process_combo_sale(sale, item_data, request.user, current_exchange_rate)
-                    if not result['success']:
-                        transaction.set_rollback(True)
-                        return JsonResponse({'error': result['error']}, status=400)
-                else:
-                    # ⭐ PROCESAR VENTA REGULAR CON USD
-                    result = process_regular_sale(sale, item_data, request.user, current_exchange_rate)
-                    if not result['success']:
-                        transaction.set_rollback(True)
-                        return JsonResponse({'error': result['error']}, status=400)
-            
-            # Si es venta a crédito, crear el registro de crédito
-            if sale.is_credit and customer:
-                from datetime import datetime, timedelta
-                due_date = datetime.now().date() + timedelta(days=30)
+        sale, error = _save_sale(data, customer, request.user, current_exchange_rate)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+
+        return JsonResponse({
+            'id': sale.id,
+            'message': 'Venta creada exitosamente',
+            'total_usd': float(sale.total_usd),
+            'total_bs': float(sale.total_bs),
+            'exchange_rate': float(sale.exchange_rate_used),
+            'user': request.user.get_full_name() or request.user.username
+        })
 
-                # ⭐ CORREGIDO: Guardar USD y tasa de cambio del crédito
-                CustomerCredit.objects.create(
-                    customer=customer,
-                    sale=sale,
-                    amount_bs=sale.total_bs,              # Bs
-                    amount_usd=sale.total_usd,            # ✅ USD
-                    exchange_rate_used=sale.exchange_rate_used,  # ✅ Tasa utilizada
-                    date_due=due_date,
-                    notes=f'Crédito por venta #{sale.id}'
-                )
-            
-            return JsonResponse({
-                'id': sale.id,
-                'message': 'Venta creada exitosamente',
-                'total_usd': float(sale.total_usd),
-                'total_bs': float(sale.total_bs),
-                'exchange_rate': float(sale.exchange_rate_used),
-                'user': request.user.get_full_name() or request.user.username
-            })
-            
     except PermissionDenied:
         return JsonResponse({'error': 'No tienes permisos para crear ventas'}, status=403)
     except Exception as e:
+        if is_conflict(e):
+            return JsonResponse({
+                'error': 'Otra caja estaba vendiendo los mismos productos. Vuelve a intentarlo.'
+            }, status=409)
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@retry_on_conflict
+def _save_sale(data, customer, user, current_exchange_rate):
+    """
+    Registra la venta, sus ítems y el crédito en una sola transacción
+
+    Se repite completa si otra caja modificó los mismos productos entre la
+    lectura y la escritura (ver utils/concurrency.py).
+
+    Returns:
+        tuple: (Sale, None), o (None, mensaje) sin nada guardado
+    """
+    with transaction.atomic():
+        # ⭐ CALCULAR TOTALES EN USD Y BS
+        total_usd = Decimal('0.00')
+        total_bs = Decimal('0.00')
+        
+        # Pre-calcular total para validar
+        for item_data in data['items']:
+            if item_data.get('is_combo', False):
+                # TODO: Implementar combos en USD después
+                combo = get_object_or_404(ProductCombo, pk=item_data['combo_id'])
+                quantity = Decimal(str(item_data.get('combo_quantity', 1)))
+                # Por ahora usar precio en Bs (se actualizará después)
+                item_total_bs = combo.combo_price_bs * quantity
+                total_bs += item_total_bs
+            else:
+                product = get_object_or_404(Product, pk=item_data['product_id'])
+                quantity = Decimal(str(item_data['quantity']))
+                
+                # ⭐ CALCULAR PRECIO USD Y BS
+                price_usd = product.get_price_usd_for_quantity(quantity)
+                price_bs = price_usd * current_exchange_rate.bs_to_usd
+                
+                item_total_usd = price_usd * quantity
+                item_total_bs = price_bs * quantity
+                
+                total_usd += item_total_usd
+                total_bs += item_total_bs
+        
+        # ⭐ CREAR VENTA CON AMBOS TOTALES, TASA UTILIZADA Y MÉTODO DE PAGO
+        sale = Sale.objects.create(
+            customer=customer,
+            user=user,
+            total_usd=total_usd,
+            total_bs=total_bs,
+            exchange_rate_used=current_exchange_rate.bs_to_usd,
+            is_credit=data.get('is_credit', False),
+            notes=data.get('notes', ''),
+            payment_method=data.get('payment_method', 'cash'),
+            mobile_reference=data.get('mobile_reference') if data.get('payment_method') == 'mobile' else None
+        )
+        
+        # Procesar ítems de venta
+        for item_data in data['items']:
+            if item_data.get('is_combo', False):
+                # Procesar venta de combo (mantener lógica actual)
+                result = process_combo_sale(sale, item_data, user, current_exchange_rate)
+                if not result['success']:
+                    transaction.set_rollback(True)
+                    return None, result['error']
+            else:
+                # ⭐ PROCESAR VENTA REGULAR CON USD
+                result = process_regular_sale(sale, item_data, user, current_exchange_rate)
+                if not result['success']:
+                    transaction.set_rollback(True)
+                    return None, result['error']
+        
+        # Si es venta a crédito, crear el registro de crédito
+        if sale.is_credit and customer:
+            from datetime import datetime, timedelta
+            due_date = datetime.now().date() + timedelta(days=30)
+
+            # ⭐ CORREGIDO: Guardar USD y tasa de cambio del crédito
+            CustomerCredit.objects.create(
+                customer=customer,
+                sale=sale,
+                amount_bs=sale.total_bs,              # Bs
+                amount_usd=sale.total_usd,            # ✅ USD
+                exchange_rate_used=sale.exchange_rate_used,  # ✅ Tasa utilizada
+                date_due=due_date,
+                notes=f'Crédito por venta #{sale.id}'
+            )
+        
+        return sale, None
+
+
 def process_regular_sale(sale, item_data, user, exchange_rate):
     """Procesa venta regular con cálculo USD → Bs"""
     try:
@@ -173,30 +197,27 @@ def process_regular_sale(sale, item_data, user, exchange_rate):
             price_bs=price_bs
         )
         
-        # Actualizar inventario
-        previous_stock = product.stock
-        product.stock -= quantity
-        product.save()
-        
-        # Registrar ajuste de inventario
-        InventoryAdjustment.objects.create(
+        # Registrar el movimiento y actualizar el inventario (libro de stock)
+        StockLedgerService.record(InventoryAdjustment(
             product=product,
             adjustment_type='remove',
+            source='sale',
             quantity=quantity,
-            previous_stock=previous_stock,
-            new_stock=product.stock,
             reason=f'Venta #{sale.id} - {user.get_full_name() or user.username}',
             adjusted_by=user
-        )
+        ))
         
         return {'success': True}
         
     except Exception as e:
+        if is_conflict(e):
+            # Otra caja guardó el mismo producto: _save_sale repite la venta
+            raise
         return {'success': False, 'error': str(e)}
 
 
 def process_combo_sale(sale, item_data, user, exchange_rate):
-    """Procesa venta de combo - MANTENER LÓGICA ACTUAL (pendiente actualizar)"""
+    """Procesa venta de combo: componentes bloqueados y descontados en lote"""
     try:
         combo = get_object_or_404(ProductCombo, pk=item_data['combo_id'])
         
@@ -215,17 +236,11 @@ def process_combo_sale(sale, item_data, user, exchange_rate):
                 'error': 'La cantidad de combo debe ser mayor que 0'
             }
         
-        # Validar stock para todos los productos del combo
-        for combo_item in combo.items.all():
-            required_quantity = combo_item.quantity * combo_quantity
-            if combo_item.product.stock < required_quantity:
-                return {
-                    'success': False,
-                    'error': f'Stock insuficiente para {combo_item.product.name} '
-                            f'(necesario para combo {combo.name}). '
-                            f'Disponible: {combo_item.product.stock}, '
-                            f'Requerido: {required_quantity}'
-                }
+        # Valida y descuenta todos los componentes (lanza ValueError sin tocar nada)
+        try:
+            ComboService.sell_combo(combo, combo_quantity, sale, user)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
         
         # ⭐ CREAR ÍTEM DE COMBO (mantener precio en Bs por ahora)
         SaleItem.objects.create(
@@ -236,27 +251,10 @@ def process_combo_sale(sale, item_data, user, exchange_rate):
             price_bs=combo.combo_price_bs
         )
         
-        # Actualizar inventario para cada producto del combo
-        for combo_item in combo.items.all():
-            product = combo_item.product
-            quantity_to_remove = combo_item.quantity * combo_quantity
-            
-            previous_stock = product.stock
-            product.stock -= quantity_to_remove
-            product.save()
-            
-            # Registrar ajuste de inventario
-            InventoryAdjustment.objects.create(
-                product=product,
-                adjustment_type='remove',
-                quantity=quantity_to_remove,
-                previous_stock=previous_stock,
-                new_stock=product.stock,
-                reason=f'Venta combo #{sale.id} - {combo.name} - {user.get_full_name() or user.username}',
-                adjusted_by=user
-            )
-        
         return {'success': True}
         
     except Exception as e:
+        if is_conflict(e):
+            # Otra caja guardó el mismo producto: _save_sale repite la venta
+            raise
         return {'success': False, 'error': str(e)}
\ No newline at end of file
@@ -0,0 +1,154 @@
+# sales/management/commands/benchmark_sale_throughput.py
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from finances.report_definitions import SalesReport
+from inventory.models import Category, Product
+from sales.api_views import _save_sale
+from utils.models import ExchangeRate
+
+# Valores por defecto de SQLite (y transacciones DEFERRED): lo que usaba
+# cada conexión antes del perfil
+SQLITE_DEFAULTS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+    'mmap_size': 0,
+    'cache_size': -2000,
+    'temp_store': 'DEFAULT',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide ventas por segundo con varias cajas en hilos (y un reporte '
+        'leyendo a la vez) sobre copias de la base: PRAGMA por defecto de '
+        'SQLite contra settings.SQLITE_PRAGMAS y transaction_mode de '
+        'settings.DATABASES. La base real no se toca.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Cajas simultáneas (default 4)')
+        parser.add_argument('--sales', type=int, default=25, help='Ventas por caja (default 25)')
+        parser.add_argument('--items', type=int, default=3, help='Productos por venta (default 3)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('El benchmark es para SQLite')
+
+        profiles = (
+            ('por defecto', SQLITE_DEFAULTS, None),
+            ('producción', settings.SQLITE_PRAGMAS,
+             connection.settings_dict['OPTIONS'].get('transaction_mode')),
+        )
+        self.stdout.write(
+            f"{'perfil':<14}{'ventas':>8}{'fallidas':>10}{'seg':>8}{'ventas/s':>10}{'lecturas':>10}"
+        )
+        for name, pragmas, transaction_mode in profiles:
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                sold, failed, elapsed, reads = self._run(options, transaction_mode)
+            self.stdout.write(
+                f'{name:<14}{sold:>8}{failed:>10}{elapsed:>8.2f}{sold / elapsed:>10.1f}{reads:>10}'
+            )
+
+    def _run(self, options, transaction_mode):
+        """Ventas en hilos contra una copia en archivo de la base"""
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+
+        # Las conexiones nuevas (una por hilo) abren la copia
+        original = connection.settings_dict['NAME']
+        original_options = connection.settings_dict['OPTIONS']
+        connection.settings_dict['NAME'] = path
+        connection.settings_dict['OPTIONS'] = {**original_options, 'transaction_mode': transaction_mode}
+        try:
+            fixtures = self._threads(lambda index: self._fixtures(options['items']), 1)[0]
+            return self._sell(fixtures, options)
+        finally:
+            connection.settings_dict['NAME'] = original
+            connection.settings_dict['OPTIONS'] = original_options
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+
+    def _sell(self, fixtures, options):
+        failed, reads, done = [], [], []
+        items = [{'product_id': pk, 'quantity': '1'} for pk in fixtures['products']]
+
+        def sell(index):
+            if index == options['threads']:
+                # Un reporte leyendo (sin caché) mientras las cajas venden
+                while len(done) < options['threads']:
+                    SalesReport({'start_date': timezone.now().date()})._compute_totals()
+                    reads.append(1)
+                return
+            try:
+                for _ in range(options['sales']):
+                    try:
+                        sale, error = _save_sale({'items': items}, None, fixtures['user'], fixtures['rate'])
+                    except Exception:
+                        error = True
+                    if error:
+                        failed.append(1)
+            finally:
+                done.append(index)
+
+        start = time.perf_counter()
+        self._threads(sell, options['threads'] + 1)
+        elapsed = time.perf_counter() - start
+        sold = options['threads'] * options['sales'] - len(failed)
+        return sold, len(failed), elapsed, len(reads)
+
+    def _fixtures(self, count):
+        user = get_user_model().objects.create_user(username=f'bench_sales_{time.time_ns()}', password='!')
+        rate = ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40'), updated_by=user,
+        )
+        category = Category.objects.create(name=f'Bench ventas {time.time_ns()}')
+        products = [
+            Product.objects.create(
+                name=f'Bench venta {i}', barcode=f'BSAL{time.time_ns()}{i}', category=category,
+                stock=Decimal('100000'), purchase_price_usd=Decimal('1.00'),
+                selling_price_usd=Decimal('1.50'),
+            ).pk
+            for i in range(count)
+        ]
+        return {'user': user, 'rate': rate, 'products': products}
+
+    def _threads(self, target, count):
+        results = [None] * count
+        errors = []
+        barrier = threading.Barrier(count)
+
+        def worker(index):
+            try:
+                barrier.wait()
+                results[index] = target(index)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0014_adjustmentdaysummary'),
+        ('sales', '0004_sale_sale_customer_date_idx_sale_sale_user_date_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleDaySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Día')),
+                ('sales_count', models.PositiveIntegerField(default=0, verbose_name='Ventas')),
+                ('total_bs', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total (Bs)')),
+                ('total_usd', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Total (USD)')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Ventas',
+                'verbose_name_plural': 'Resúmenes Diarios de Ventas',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaleItemDaySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('quantity', models.DecimalField(decimal_places=3, max_digits=14, verbose_name='Cantidad')),
+                ('revenue_usd', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Ingreso (USD)')),
+                ('lines', models.PositiveIntegerField(default=0, verbose_name='Líneas')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sale_day_summaries', to='inventory.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario por Producto',
+                'verbose_name_plural': 'Resúmenes Diarios por Producto',
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='sale_item_day_summary_unique')],
+            },
+        ),
+    ]
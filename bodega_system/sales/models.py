@@ -184,4 +184,50 @@ class SaleItem(models.Model):
     @property
     def subtotal(self):
         """Alias para subtotal_bs (compatibilidad)"""
-        return self.subtotal_bs
\ No newline at end of file
+        return self.subtotal_bs
+
+
+class SaleDaySummary(models.Model):
+    """
+    Totales por día de las ventas de contado archivadas (utils/archive.py)
+
+    Las ventas viejas pasan a la base de archivo; esta fila queda en su
+    lugar para que los reportes agregados (ganancias, totales por día)
+    sigan cuadrando sin leer el archivo.
+    """
+    day = models.DateField(unique=True, verbose_name="Día")
+    sales_count = models.PositiveIntegerField(default=0, verbose_name="Ventas")
+    total_bs = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Total (Bs)")
+    total_usd = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Total (USD)")
+
+    class Meta:
+        verbose_name = "Resumen Diario de Ventas"
+        verbose_name_plural = "Resúmenes Diarios de Ventas"
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.day}: {self.sales_count} ventas"
+
+
+class SaleItemDaySummary(models.Model):
+    """Cantidad e ingreso por producto y día de los ítems archivados"""
+    day = models.DateField(verbose_name="Día")
+    product = models.ForeignKey(
+        'inventory.Product',
+        on_delete=models.PROTECT,
+        related_name='sale_day_summaries',
+        verbose_name="Producto"
+    )
+    quantity = models.DecimalField(max_digits=14, decimal_places=3, verbose_name="Cantidad")
+    revenue_usd = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Ingreso (USD)")
+    lines = models.PositiveIntegerField(default=0, verbose_name="Líneas")
+
+    class Meta:
+        verbose_name = "Resumen Diario por Producto"
+        verbose_name_plural = "Resúmenes Diarios por Producto"
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='sale_item_day_summary_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.product_id}: {self.quantity}"
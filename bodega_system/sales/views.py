@@ -4,13 +4,13 @@ import io
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
-from django.core.paginator import Paginator
-from django.db.models import Sum, Avg, Q
+from django.db.models import Sum, Avg, Q, Count
 from django.utils.dateparse import parse_date
 
 from .models import Sale, SaleItem
 from utils.models import ExchangeRate
 from utils.decorators import admin_required, employee_or_admin_required, sales_access_required
+from utils.pagination import paginate_keyset, htmx_fragment
 
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -21,7 +21,6 @@ from reportlab.lib.units import inch
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.core.paginator import Paginator
 from django.db.models import Q, Sum
 from django.http import HttpResponse, JsonResponse
 from django.utils import timezone
@@ -39,6 +38,7 @@ from reportlab.lib.styles import getSampleStyleSheet
 # Modelos locales
 from .models import Sale, SaleItem
 from inventory.models import Product
+from inventory.services import CategoryService
 from customers.models import Customer
 from utils.models import ExchangeRate  # ← IMPORTACIÓN CRÍTICA
 from utils.decorators import sales_access_required
@@ -88,15 +88,19 @@ def sale_list(request):
     elif credit_filter == 'credit':
         sales_qs = sales_qs.filter(is_credit=True)
 
-    # --- Calcular totales ANTES de la paginación ---
-    sales_count = sales_qs.count()
-    total_sales = sales_qs.aggregate(total=Sum('total_bs'))['total'] or 0
-    average_sale = total_sales / sales_count if sales_count > 0 else 0
+    # --- Paginación por cursor (sin OFFSET ni recuento por página) ---
+    page_obj = paginate_keyset(request, sales_qs, per_page=15, date_field='date')
+
+    # "Cargar más" de HTMX: solo las filas/tarjetas siguientes, sin resumen
+    fragment = htmx_fragment(request)
+    if fragment:
+        return render(request, f'sales/sale_list_{fragment}.html', {'page_obj': page_obj})
 
-    # --- Aplicar Paginación ---
-    paginator = Paginator(sales_qs, 15)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # --- Resumen del filtro completo en una sola consulta ---
+    summary = sales_qs.aggregate(count=Count('id'), total=Sum('total_bs'))
+    sales_count = summary['count']
+    total_sales = summary['total'] or 0
+    average_sale = total_sales / sales_count if sales_count > 0 else 0
 
     context = {
         'page_obj': page_obj,
@@ -137,6 +141,8 @@ def sale_create(request):
     context = {
         'title': 'Nueva Venta',
         'data_for_js': data_for_js,
+        # Filtro por categoría de la búsqueda por nombre (resumen cacheado)
+        'categories': [c for c in CategoryService.summary() if c['active_count']],
         'latest_exchange_rate': latest_rate,  # Mantener para compatibilidad
     }
     
@@ -0,0 +1,153 @@
+// static/js/autocomplete.js
+// Cuadro de búsqueda para AutocompleteSelect (utils/autocomplete.py)
+// Se inicializa al enfocar el input, así funciona también en filas agregadas con JS
+
+(function () {
+    'use strict';
+
+    if (window.BodegaAutocomplete) {
+        return;
+    }
+
+    const DEBOUNCE_MS = 200;
+    const MIN_CHARS = 2;
+    const LIMIT = 10;
+
+    function setup(root) {
+        if (root.dataset.autocompleteReady) {
+            return;
+        }
+        root.dataset.autocompleteReady = '1';
+
+        const hidden = root.querySelector('input[type="hidden"]');
+        const input = root.querySelector('input[type="text"]');
+        const list = root.querySelector('[role="listbox"]');
+        const url = root.dataset.autocompleteUrl;
+        const resultsKey = root.dataset.autocompleteResults;
+        const detailKey = root.dataset.autocompleteDetail;
+
+        let timer = null;
+        let controller = null;
+        let items = [];
+        let active = -1;
+
+        function close() {
+            list.hidden = true;
+            input.setAttribute('aria-expanded', 'false');
+            active = -1;
+        }
+
+        function choose(item) {
+            hidden.value = item ? item.id : '';
+            input.value = item ? item.name : input.value;
+            hidden.dispatchEvent(new Event('change', { bubbles: true }));
+            close();
+        }
+
+        function highlight(index) {
+            active = index;
+            Array.from(list.children).forEach((li, i) => {
+                li.classList.toggle('bg-blue-50', i === index);
+                li.setAttribute('aria-selected', i === index ? 'true' : 'false');
+            });
+        }
+
+        function render() {
+            list.innerHTML = '';
+            if (!items.length) {
+                const li = document.createElement('li');
+                li.className = 'px-3 py-2 text-gray-500';
+                li.textContent = 'Sin resultados';
+                list.appendChild(li);
+            }
+            items.forEach((item, index) => {
+                const li = document.createElement('li');
+                li.setAttribute('role', 'option');
+                li.className = 'px-3 py-2 cursor-pointer hover:bg-blue-50';
+                li.textContent = item.name;
+                if (detailKey && item[detailKey]) {
+                    const detail = document.createElement('span');
+                    detail.className = 'ml-2 text-xs text-gray-500';
+                    detail.textContent = item[detailKey];
+                    li.appendChild(detail);
+                }
+                li.addEventListener('mousedown', (e) => {
+                    e.preventDefault();
+                    choose(items[index]);
+                });
+                list.appendChild(li);
+            });
+            list.hidden = false;
+            input.setAttribute('aria-expanded', 'true');
+            highlight(items.length ? 0 : -1);
+        }
+
+        async function search(query) {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            const params = new URLSearchParams({ q: query, limit: LIMIT });
+            try {
+                const response = await fetch(`${url}?${params}`, {
+                    signal: controller.signal,
+                    headers: { 'Accept': 'application/json' },
+                });
+                if (!response.ok) {
+                    return;
+                }
+                const data = await response.json();
+                items = data[resultsKey] || [];
+                render();
+            } catch (error) {
+                if (error.name !== 'AbortError') {
+                    console.error('Error en autocompletado:', error);
+                }
+            }
+        }
+
+        input.addEventListener('input', () => {
+            // El texto cambió: el pk anterior ya no corresponde
+            if (hidden.value) {
+                hidden.value = '';
+                hidden.dispatchEvent(new Event('change', { bubbles: true }));
+            }
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (query.length < MIN_CHARS) {
+                close();
+                return;
+            }
+            timer = setTimeout(() => search(query), DEBOUNCE_MS);
+        });
+
+        input.addEventListener('keydown', (e) => {
+            if (list.hidden) {
+                return;
+            }
+            if (e.key === 'ArrowDown') {
+                e.preventDefault();
+                highlight(Math.min(active + 1, items.length - 1));
+            } else if (e.key === 'ArrowUp') {
+                e.preventDefault();
+                highlight(Math.max(active - 1, 0));
+            } else if (e.key === 'Enter' && active >= 0) {
+                e.preventDefault();
+                choose(items[active]);
+            } else if (e.key === 'Escape') {
+                close();
+            }
+        });
+
+        input.addEventListener('blur', close);
+    }
+
+    document.addEventListener('focusin', (e) => {
+        const root = e.target.closest && e.target.closest('[data-autocomplete-url]');
+        if (root) {
+            setup(root);
+        }
+    });
+
+    window.BodegaAutocomplete = { setup };
+})();
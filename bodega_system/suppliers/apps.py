@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class SuppliersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'suppliers'
-    verbose_name = 'Gestión de Proveedores'
\ No newline at end of file
+    verbose_name = 'Gestión de Proveedores'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -3,9 +3,13 @@
 import logging
 from decimal import Decimal, InvalidOperation
 from django import forms
-from django.forms import inlineformset_factory
+from django.forms import inlineformset_factory, BaseInlineFormSet
+from django.urls import reverse_lazy
 from .models import Supplier, SupplierOrder, SupplierOrderItem, SupplierPayment
 from inventory.models import Product
+from utils.autocomplete import (
+    AutocompleteModelChoiceField, AutocompleteModelFormMixin, AutocompleteFormSetMixin,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +31,23 @@ class SupplierForm(forms.ModelForm):
             'notes': forms.Textarea(attrs={'class': 'form-input', 'rows': 3}),
         }
 
-class SupplierOrderForm(forms.ModelForm):
+class SupplierOrderForm(AutocompleteModelFormMixin, forms.ModelForm):
     """Formulario para órdenes de compra a proveedores"""
+
+    supplier = AutocompleteModelChoiceField(
+        queryset=Supplier.objects.filter(is_active=True),
+        url=reverse_lazy('suppliers:supplier_search_api'),
+        results_key='suppliers',
+        detail_key='contact_person',
+        placeholder='Buscar proveedor...',
+        attrs={'class': 'po-input'},
+        label='Proveedor',
+    )
     
     class Meta:
         model = SupplierOrder
         fields = ['supplier', 'status', 'notes', 'paid']
         widgets = {
-            'supplier': forms.Select(attrs={'class': 'po-input'}),
             'status': forms.Select(attrs={'class': 'po-input'}),
             'notes': forms.Textarea(attrs={'class': 'po-input', 'rows': 3}),
         }
@@ -43,9 +56,6 @@ class SupplierOrderForm(forms.ModelForm):
         self.user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        # Filtrar solo proveedores activos
-        self.fields['supplier'].queryset = Supplier.objects.filter(is_active=True)
-
         # Al crear una orden nueva no se puede marcar como "recibida" directamente
         if not self.instance.pk:
             self.fields['status'].choices = [
@@ -63,9 +73,22 @@ class SupplierOrderForm(forms.ModelForm):
         
         return order
 
-class SupplierOrderItemForm(forms.ModelForm):
+class SupplierOrderItemForm(AutocompleteModelFormMixin, forms.ModelForm):
     """Formulario para ítems de órdenes de compra"""
     
+    # Producto existente: autocompletado en vez de <select> con todo el catálogo.
+    # No es requerido: clean() exige producto existente o datos de uno nuevo
+    product = AutocompleteModelChoiceField(
+        queryset=Product.objects.filter(is_active=True),
+        url=reverse_lazy('inventory:product_search_api'),
+        results_key='products',
+        detail_key='barcode',
+        placeholder='Buscar producto...',
+        attrs={'class': 'form-input'},
+        required=False,
+        label='Producto',
+    )
+
     # Campos adicionales para crear productos nuevos
     is_new_product = forms.BooleanField(
         required=False,
@@ -116,7 +139,6 @@ class SupplierOrderItemForm(forms.ModelForm):
         model = SupplierOrderItem
         fields = ['product', 'quantity', 'price_usd', 'selling_price_usd']
         widgets = {
-            'product': forms.Select(attrs={'class': 'form-select'}),
             'quantity': forms.NumberInput(attrs={
                 'class': 'form-input',
                 'min': '0.01',
@@ -135,16 +157,9 @@ class SupplierOrderItemForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Filtrar solo productos activos
-        self.fields['product'].queryset = Product.objects.filter(is_active=True)
-        
-        # ✅ SOLUCIÓN: Hacer el campo product no requerido
-        # La validación real se hace en clean() que maneja productos nuevos
-        self.fields['product'].required = False
-        
         # Cargar categorías para productos nuevos
         from inventory.models import Category
-        self.fields['new_product_category'].queryset = Category.objects.all().order_by('name')
+        self.fields['new_product_category'].queryset = Category.objects.order_by('name').cached()
     
     def clean_quantity(self):
         """Validar cantidad como decimal"""
@@ -250,11 +265,16 @@ class SupplierOrderItemForm(forms.ModelForm):
 
         return cleaned_data
 
+class BaseSupplierOrderItemFormset(AutocompleteFormSetMixin, BaseInlineFormSet):
+    """Valida los productos de todas las filas con una sola consulta"""
+
+
 # Formset para ítems de órdenes de compra
 SupplierOrderItemFormset = inlineformset_factory(
     SupplierOrder, 
     SupplierOrderItem,
     form=SupplierOrderItemForm,
+    formset=BaseSupplierOrderItemFormset,
     extra=1,
     can_delete=True
 )
@@ -0,0 +1,100 @@
+# suppliers/management/commands/benchmark_order_reception.py
+
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventory.models import Category, InventoryAdjustment, Product
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem
+from suppliers.services import ReceptionService
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la recepción de una orden grande: motor en lote contra el '
+        'recorrido línea por línea anterior. Todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=300,
+                            help='Líneas de la orden (default 300)')
+
+    def handle(self, *args, **options):
+        lines = options['lines']
+        user = get_user_model().objects.filter(is_superuser=True).first() \
+            or get_user_model().objects.first()
+        if user is None:
+            self.stdout.write(self.style.WARNING('Se necesita al menos un usuario'))
+            return
+
+        results = {}
+        with transaction.atomic():
+            for name, receive in (('lote', self._receive_batched), ('por línea', self._receive_per_line)):
+                order = self._make_order(lines, user, prefix=name[:3].upper())
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    receive(order, user)
+                    elapsed = (time.perf_counter() - start) * 1000
+                results[name] = (elapsed, len(ctx.captured_queries))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'\nLíneas por orden: {lines}')
+        self.stdout.write(f"{'motor':<12}{'ms':>10}{'consultas':>12}")
+        for name, (elapsed, queries) in results.items():
+            self.stdout.write(f'{name:<12}{elapsed:>10.1f}{queries:>12}')
+
+    def _make_order(self, lines, user, prefix):
+        category = Category.objects.create(name=f'Bench recepción {prefix}')
+        supplier = Supplier.objects.create(name=f'Proveedor bench {prefix}')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Bench {prefix} {i}',
+                barcode=f'BREC{prefix}{i:06d}',
+                category=category,
+                purchase_price_usd=Decimal('1.00'),
+                selling_price_usd=Decimal('1.50'),
+                stock=Decimal('10'),
+            )
+            for i in range(lines)
+        ])
+        order = SupplierOrder.objects.create(supplier=supplier, created_by=user)
+        SupplierOrderItem.objects.bulk_create([
+            SupplierOrderItem(
+                order=order,
+                product=product,
+                quantity=Decimal('12'),
+                price_usd=Decimal('1.10'),
+                price_bs=Decimal('44.00'),
+            )
+            for product in products
+        ])
+        return order
+
+    def _receive_batched(self, order, user):
+        ReceptionService.receive_order(order, user, update_prices=True)
+
+    def _receive_per_line(self, order, user):
+        """Recepción anterior: un save() y un create() por línea"""
+        order.status = 'received'
+        order.save()
+        for item in order.items.all():
+            product = item.product
+            previous_stock = product.stock
+            product.stock = previous_stock + item.quantity
+            product.purchase_price_usd = item.price_usd
+            product.purchase_price_bs = item.price_bs
+            product.save()
+            InventoryAdjustment.objects.create(
+                product=product,
+                adjustment_type='add',
+                source='reception',
+                quantity=item.quantity,
+                previous_stock=previous_stock,
+                new_stock=product.stock,
+                reason=f'Recepción orden #{order.id}',
+                adjusted_by=user,
+            )
@@ -0,0 +1,40 @@
+# suppliers/management/commands/verify_supplier_payments.py
+
+from django.core.management.base import BaseCommand
+
+from suppliers.services import PaymentTotalsService
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara los totales pagados de cada orden de compra con la suma '
+        'de sus pagos y opcionalmente los corrige'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corrige las órdenes que no cuadran',
+        )
+
+    def handle(self, *args, **options):
+        differences = PaymentTotalsService.verify()
+        if not differences:
+            self.stdout.write(self.style.SUCCESS('Los pagos de todas las órdenes cuadran'))
+            return
+
+        for diff in differences:
+            self.stdout.write(self.style.WARNING(
+                f"Orden #{diff['order_id']}: acumulado ${diff['stored_usd']:.2f} / "
+                f"Bs {diff['stored_bs']:.2f}, pagos ${diff['actual_usd']:.2f} / "
+                f"Bs {diff['actual_bs']:.2f}"
+            ))
+
+        if options['fix']:
+            fixed = PaymentTotalsService.reconcile([diff['order_id'] for diff in differences])
+            self.stdout.write(self.style.SUCCESS(f'Órdenes corregidas: {fixed}'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(differences)} órdenes con diferencias; use --fix para corregirlas'
+            ))
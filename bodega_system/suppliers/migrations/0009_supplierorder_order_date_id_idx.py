@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('suppliers', '0008_supplierorderitem_selling_price_usd'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplierorder',
+            index=models.Index(fields=['-order_date', '-id'], name='order_date_id_idx'),
+        ),
+    ]
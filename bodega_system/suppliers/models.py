@@ -1,8 +1,11 @@
 # suppliers/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.urls import reverse
 from inventory.models import Product
+from utils.concurrency import OptimisticLockModel
+from utils.dirty import DirtyFieldsMixin
+from utils.versions import VersionedManager
 
 class Supplier(models.Model):
     """Modelo para los proveedores"""
@@ -44,6 +47,8 @@ class Supplier(models.Model):
         auto_now=True,
         verbose_name="Actualizado el"
     )
+
+    objects = VersionedManager()
     
     class Meta:
         verbose_name = "Proveedor"
@@ -56,7 +61,7 @@ class Supplier(models.Model):
     def get_absolute_url(self):
         return reverse('suppliers:supplier_detail', args=[str(self.id)])
 
-class SupplierOrder(models.Model):
+class SupplierOrder(DirtyFieldsMixin, OptimisticLockModel):
     """Modelo para órdenes de compra a proveedores"""
     ORDER_STATUS = (
         ('pending', 'Pendiente'),
@@ -142,6 +147,8 @@ class SupplierOrder(models.Model):
             models.Index(fields=['supplier', 'status'], name='order_supplier_status_idx'),
             models.Index(fields=['status', '-order_date'], name='order_status_date_idx'),
             models.Index(fields=['paid', '-order_date'], name='order_paid_date_idx'),
+            # Paginación por cursor (-order_date, -id) en order_list
+            models.Index(fields=['-order_date', '-id'], name='order_date_id_idx'),
         ]
     
     def __str__(self):
@@ -151,13 +158,34 @@ class SupplierOrder(models.Model):
     def get_absolute_url(self):
         return reverse('suppliers:order_detail', args=[str(self.id)])
 
+    def _items_total(self, price_field):
+        """
+        Suma quantity × precio de los ítems
+
+        Con los ítems ya precargados (prefetch_related) se suman en memoria;
+        si no, un solo SUM en la base de datos en vez de cargar cada fila.
+        """
+        from decimal import Decimal
+        from django.db.models import DecimalField, F, Sum
+
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return sum(
+                (item.quantity * getattr(item, price_field) for item in self.items.all()),
+                Decimal('0')
+            )
+        total = self.items.aggregate(total=Sum(
+            F('quantity') * F(price_field),
+            output_field=DecimalField(max_digits=24, decimal_places=4),
+        ))['total']
+        return total or Decimal('0')
+
     def calculate_total_usd(self):
         """Calcula el total en USD sumando todos los items"""
-        return sum(item.subtotal_usd for item in self.items.all())
+        return self._items_total('price_usd')
 
     def calculate_total_bs(self):
         """Calcula el total en Bs sumando todos los items (con precio histórico)"""
-        return sum(item.subtotal_bs for item in self.items.all())
+        return self._items_total('price_bs')
 
     def get_current_total_bs(self):
         """Calcula el total actual en Bs con la tasa de cambio actual"""
@@ -250,17 +278,24 @@ class SupplierOrder(models.Model):
         return statuses.get(self.payment_status, 'Desconocido')
 
     def update_payment_totals(self):
-        """Actualiza los totales pagados basándose en los pagos registrados"""
+        """
+        Recalcula los totales pagados desde cero con un SUM de los pagos
+
+        Los pagos aplican su monto de forma incremental
+        (PaymentTotalsService.apply_delta); este método queda para
+        reconciliar una orden puntual.
+        """
         from decimal import Decimal
+        from django.db.models import Sum
 
-        payments = self.payments.all()
-        self.paid_amount_usd = sum(p.amount_usd for p in payments) or Decimal('0')
-        self.paid_amount_bs = sum(p.amount_bs for p in payments) or Decimal('0')
+        totals = self.payments.aggregate(usd=Sum('amount_usd'), bs=Sum('amount_bs'))
+        self.paid_amount_usd = totals['usd'] or Decimal('0')
+        self.paid_amount_bs = totals['bs'] or Decimal('0')
 
         # Actualizar flag 'paid' si está completamente pagado
         self.paid = (self.paid_amount_usd >= self.total_usd)
 
-        self.save()
+        self.save(update_fields=['paid_amount_usd', 'paid_amount_bs', 'paid'])
         return self
 
 class SupplierOrderItem(models.Model):
@@ -426,6 +461,14 @@ class SupplierPayment(models.Model):
     def __str__(self):
         return f"Pago ${self.amount_usd} USD - Orden #{self.order.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Montos con los que se cargó: permiten aplicar solo la diferencia al editar
+        if all(name in field_names for name in ('order_id', 'amount_usd', 'amount_bs')):
+            instance._loaded_amounts = (instance.order_id, instance.amount_usd, instance.amount_bs)
+        return instance
+
     def save(self, *args, **kwargs):
         """Calcular monto en Bs automáticamente antes de guardar"""
         if self.amount_usd and not self.amount_bs:
@@ -439,16 +482,38 @@ class SupplierPayment(models.Model):
             self.exchange_rate_used = latest_rate.bs_to_usd
             self.amount_bs = self.amount_usd * latest_rate.bs_to_usd
 
-        super().save(*args, **kwargs)
-
-        # Actualizar totales de la orden
-        self.order.update_payment_totals()
+        from .services import PaymentTotalsService
+
+        adding = self._state.adding
+        previous = getattr(self, '_loaded_amounts', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Actualizar totales de la orden con la diferencia, sin releer los pagos
+            if adding:
+                PaymentTotalsService.apply_delta(self.order, self.amount_usd, self.amount_bs)
+            elif previous is None:
+                self.order.update_payment_totals()
+            else:
+                old_order_id, old_usd, old_bs = previous
+                if old_order_id != self.order_id:
+                    PaymentTotalsService.apply_delta(old_order_id, -old_usd, -old_bs)
+                    PaymentTotalsService.apply_delta(self.order, self.amount_usd, self.amount_bs)
+                elif (old_usd, old_bs) != (self.amount_usd, self.amount_bs):
+                    PaymentTotalsService.apply_delta(
+                        self.order, self.amount_usd - old_usd, self.amount_bs - old_bs
+                    )
+        self._loaded_amounts = (self.order_id, self.amount_usd, self.amount_bs)
 
     def delete(self, *args, **kwargs):
         """Actualizar totales de la orden al eliminar un pago"""
+        from .services import PaymentTotalsService
+
         order = self.order
-        super().delete(*args, **kwargs)
-        order.update_payment_totals()
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            PaymentTotalsService.apply_delta(order, -self.amount_usd, -self.amount_bs)
+        return result
 
     def get_absolute_url(self):
         return reverse('suppliers:payment_detail', args=[str(self.id)])
\ No newline at end of file
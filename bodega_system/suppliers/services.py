@@ -0,0 +1,427 @@
+# suppliers/services.py - Service Layer para Órdenes de Compra
+
+import logging
+from decimal import Decimal
+from typing import Dict, Any
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ReceptionService:
+    """
+    Service para la recepción de órdenes de compra
+
+    Una recepción de N líneas cuesta un número fijo de consultas: ítems,
+    productos (bloqueados), un bulk_update de stock/precios, un bulk_create
+    de historial y otro de ajustes, en vez de un save() y un create() por
+    línea mientras las cajas esperan el lock de escritura.
+    """
+
+    # Campos de precio que la recepción puede cambiar
+    PRICE_FIELDS = ('purchase_price_usd', 'purchase_price_bs', 'selling_price_usd')
+
+    @staticmethod
+    def receive_order(order, user, update_prices=True, notes='') -> Dict[str, Any]:
+        """
+        Marca la orden como recibida y suma su mercancía al inventario
+
+        Args:
+            order: SupplierOrder a procesar
+            user: Usuario que procesa la recepción
+            update_prices: Si True, actualiza precios de compra (y de venta
+                si la línea lo trae) de los productos
+            notes: Notas adicionales para los ajustes de inventario
+
+        Returns:
+            dict: updated_products, total_items_received y products_count
+
+        Raises:
+            ValueError: Si alguna línea tiene cantidad <= 0 (no se toca nada)
+        """
+        from inventory.models import InventoryAdjustment, Product
+        from inventory.services import ProductService, StockLedgerService
+
+        items = list(order.items.order_by('pk'))
+        quantities = []
+        for item in items:
+            quantity = Decimal(str(item.quantity))
+            if quantity <= 0:
+                name = Product.objects.filter(pk=item.product_id).values_list('name', flat=True).first()
+                raise ValueError(
+                    f"Cantidad inválida para producto {name}: {quantity}. "
+                    "Las cantidades deben ser mayores a cero."
+                )
+            quantities.append(quantity)
+
+        with transaction.atomic():
+            # Marcar como recibida si no lo está
+            if order.status != 'received':
+                order.status = 'received'
+                order.received_date = timezone.now()
+                order.save()
+
+            products = Product.objects.select_for_update().order_by('pk').in_bulk(
+                {item.product_id for item in items}
+            )
+
+            reason = f'Recepción orden #{order.id}'
+            if notes:
+                reason += f' - {notes}'
+
+            changed_fields = {'stock'}
+            updated_products = []
+            adjustments = []
+            total_items_received = Decimal('0')
+
+            # Un producto puede repetirse en la orden: se acumula sobre la misma instancia
+            for item, quantity in zip(items, quantities):
+                product = products[item.product_id]
+                adjustment = StockLedgerService.apply(InventoryAdjustment(
+                    product=product,
+                    adjustment_type='add',
+                    source='reception',
+                    quantity=quantity,
+                    reason=reason,
+                    adjusted_by=user,
+                ))
+                adjustments.append(adjustment)
+                total_items_received += quantity
+
+                if update_prices:
+                    prices = {
+                        'purchase_price_usd': item.price_usd,
+                        'purchase_price_bs': item.price_bs,
+                    }
+                    if item.selling_price_usd is not None and item.selling_price_usd > 0:
+                        prices['selling_price_usd'] = item.selling_price_usd
+                    for field, value in prices.items():
+                        if getattr(product, field) != value:
+                            setattr(product, field, value)
+                            changed_fields.add(field)
+
+                updated_products.append({
+                    'name': product.name,
+                    'quantity': quantity,
+                    'previous_stock': adjustment.previous_stock,
+                    'new_stock': adjustment.new_stock,
+                })
+
+            ProductService.bulk_save(
+                list(products.values()), changed_fields, user=user, change_reason=reason,
+            )
+            InventoryAdjustment.objects.bulk_create(adjustments, batch_size=500)
+
+        logger.info("Order received into inventory", extra={
+            'order_id': order.id,
+            'lines': len(items),
+            'products': len(products),
+            'total_items_received': float(total_items_received),
+            'fields_updated': sorted(changed_fields),
+            'prices_updated': update_prices,
+        })
+
+        return {
+            'updated_products': updated_products,
+            'total_items_received': total_items_received,
+            'products_count': len(updated_products),
+        }
+
+
+class OrderBuilderService:
+    """
+    Service para guardar una orden de compra con sus ítems
+
+    La tasa se resuelve una vez; precios en Bs y totales se calculan en
+    memoria; los ítems se escriben con bulk_create/bulk_update y la orden
+    con un solo INSERT/UPDATE que ya lleva los totales.
+    """
+
+    ITEM_FIELDS = ['product', 'quantity', 'price_usd', 'price_bs', 'selling_price_usd']
+
+    @staticmethod
+    def save_order(form, formset, exchange_rate):
+        """
+        Guarda la orden (SupplierOrderForm) y sus ítems (SupplierOrderItemFormset)
+
+        Ambos deben estar validados y las filas con producto nuevo deben
+        tener ya asignado form.instance.product. Debe llamarse dentro de
+        una transacción.
+
+        Args:
+            form: SupplierOrderForm válido (alta o edición)
+            formset: SupplierOrderItemFormset válido
+            exchange_rate: ExchangeRate vigente (la del decorador de la vista)
+
+        Returns:
+            SupplierOrder: La orden guardada con sus totales
+
+        Raises:
+            ValueError: Si no hay tasa de cambio
+        """
+        from .models import SupplierOrderItem
+
+        if exchange_rate is None:
+            raise ValueError("No hay tasa de cambio configurada")
+        rate = exchange_rate.bs_to_usd
+
+        order = form.save(commit=False)
+        formset.instance = order
+        changed_items = formset.save(commit=False)
+        deleted_forms = set(formset.deleted_forms)
+
+        # Ítems que quedan en la orden: existentes no borrados + filas nuevas
+        kept_items = [
+            item_form.instance for item_form in formset.forms
+            if item_form not in deleted_forms
+            and (item_form.instance.pk or item_form.has_changed())
+        ]
+        for item in changed_items:
+            # Lo que haría SupplierOrderItem.save(), sin buscar la tasa por ítem
+            item.price_bs = item.price_usd * rate
+
+        order.total_usd = sum(
+            (item.quantity * item.price_usd for item in kept_items), Decimal('0')
+        )
+        order.total_bs = order.total_usd * rate
+        order.exchange_rate_used = rate
+        order.save()
+
+        if formset.deleted_objects:
+            SupplierOrderItem.objects.filter(
+                pk__in=[item.pk for item in formset.deleted_objects]
+            ).delete()
+
+        new_items = [item for item in changed_items if item.pk is None]
+        updated_items = [item for item in changed_items if item.pk is not None]
+        if new_items:
+            SupplierOrderItem.objects.bulk_create(new_items, batch_size=500)
+        if updated_items:
+            SupplierOrderItem.objects.bulk_update(
+                updated_items, OrderBuilderService.ITEM_FIELDS, batch_size=500
+            )
+
+        logger.info("Order saved", extra={
+            'order_id': order.id,
+            'items': len(kept_items),
+            'created': len(new_items),
+            'updated': len(updated_items),
+            'deleted': len(formset.deleted_objects),
+            'total_usd': float(order.total_usd),
+        })
+        return order
+
+
+class PaymentTotalsService:
+    """
+    Service para los totales pagados de las órdenes de compra
+
+    SupplierOrder.paid_amount_usd/paid_amount_bs se mantienen aplicando el
+    monto de cada pago al crearlo, editarlo o borrarlo, con la fila de la
+    orden bloqueada. Registrar un pago cuesta lo mismo tenga la orden una
+    cuota o cincuenta. verify()/reconcile() comparan contra el SUM real.
+    """
+
+    # Diferencia máxima aceptada entre el acumulado y el SUM de los pagos
+    TOLERANCE = Decimal('0.01')
+
+    @staticmethod
+    def apply_delta(order, amount_usd, amount_bs):
+        """
+        Suma (o resta, con montos negativos) un pago a los totales de la orden
+
+        Args:
+            order: SupplierOrder o id; si es instancia se actualiza en memoria
+            amount_usd: Diferencia en USD
+            amount_bs: Diferencia en Bs
+
+        Returns:
+            dict: paid_amount_usd, paid_amount_bs y paid resultantes
+        """
+        from utils.versions import TableVersions
+        from .models import SupplierOrder
+
+        order_id = getattr(order, 'pk', order)
+        with transaction.atomic():
+            locked = (
+                SupplierOrder.objects.select_for_update()
+                .only('total_usd', 'paid_amount_usd', 'paid_amount_bs', 'row_version')
+                .get(pk=order_id)
+            )
+            values = {
+                'paid_amount_usd': locked.paid_amount_usd + amount_usd,
+                'paid_amount_bs': locked.paid_amount_bs + amount_bs,
+            }
+            values['paid'] = values['paid_amount_usd'] >= locked.total_usd
+            # update() no pasa por el compare-and-swap de save(): sube la
+            # versión para que un save() con la orden leída antes falle
+            SupplierOrder.objects.filter(pk=order_id).update(
+                row_version=locked.row_version + 1, **values
+            )
+            # update() no dispara señales: invalida los reportes cacheados
+            TableVersions.bump(SupplierOrder)
+
+        if isinstance(order, SupplierOrder):
+            for field, value in values.items():
+                setattr(order, field, value)
+            order._set_row_version(locked.row_version + 1)
+        return values
+
+    @staticmethod
+    def _with_actual_totals(queryset):
+        """Anota paid_usd_actual/paid_bs_actual con el SUM de los pagos"""
+        from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+        from django.db.models.functions import Coalesce
+        from .models import SupplierPayment
+
+        def payments_sum(field):
+            return Coalesce(
+                Subquery(
+                    SupplierPayment.objects.filter(order=OuterRef('pk'))
+                    .order_by().values('order').annotate(total=Sum(field)).values('total')
+                ),
+                Value(Decimal('0')),
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            )
+
+        return queryset.annotate(
+            paid_usd_actual=payments_sum('amount_usd'),
+            paid_bs_actual=payments_sum('amount_bs'),
+        )
+
+    @staticmethod
+    def verify(order_ids=None) -> list:
+        """
+        Compara los totales acumulados con el SUM de los pagos (una consulta)
+
+        Args:
+            order_ids: Limitar a estas órdenes (default: todas)
+
+        Returns:
+            list: Diferencias como dicts con order_id, stored_usd, actual_usd,
+                stored_bs y actual_bs; vacía si todo cuadra
+        """
+        from .models import SupplierOrder
+
+        queryset = SupplierOrder.objects.order_by('pk')
+        if order_ids is not None:
+            queryset = queryset.filter(pk__in=order_ids)
+        rows = PaymentTotalsService._with_actual_totals(queryset).values_list(
+            'pk', 'paid_amount_usd', 'paid_usd_actual', 'paid_amount_bs', 'paid_bs_actual'
+        )
+
+        differences = []
+        for order_id, stored_usd, actual_usd, stored_bs, actual_bs in rows:
+            if (
+                abs(stored_usd - Decimal(actual_usd)) > PaymentTotalsService.TOLERANCE
+                or abs(stored_bs - Decimal(actual_bs)) > PaymentTotalsService.TOLERANCE
+            ):
+                differences.append({
+                    'order_id': order_id,
+                    'stored_usd': stored_usd,
+                    'actual_usd': Decimal(actual_usd),
+                    'stored_bs': stored_bs,
+                    'actual_bs': Decimal(actual_bs),
+                })
+        return differences
+
+    @staticmethod
+    def reconcile(order_ids=None) -> int:
+        """
+        Corrige las órdenes cuyos totales no cuadran con sus pagos
+
+        Args:
+            order_ids: Limitar a estas órdenes (default: todas)
+
+        Returns:
+            int: Número de órdenes corregidas
+        """
+        from utils.versions import TableVersions
+        from .models import SupplierOrder
+
+        differences = PaymentTotalsService.verify(order_ids)
+        if not differences:
+            return 0
+
+        with transaction.atomic():
+            orders = SupplierOrder.objects.select_for_update().only('total_usd', 'row_version').in_bulk(
+                [diff['order_id'] for diff in differences]
+            )
+            for diff in differences:
+                order = orders[diff['order_id']]
+                order.paid_amount_usd = diff['actual_usd']
+                order.paid_amount_bs = diff['actual_bs']
+                order.paid = order.paid_amount_usd >= order.total_usd
+            SupplierOrder.claim_versions(list(orders.values()))
+            SupplierOrder.objects.bulk_update(
+                list(orders.values()), ['paid_amount_usd', 'paid_amount_bs', 'paid', 'row_version'],
+                batch_size=500,
+            )
+            TableVersions.bump(SupplierOrder)
+
+        logger.warning("Supplier payment totals reconciled", extra={
+            'orders': len(differences),
+        })
+        return len(differences)
+
+
+class SupplierHistoryService:
+    """
+    Service para el historial de productos comprados a un proveedor
+
+    Una sola consulta sobre Product con subconsultas correlacionadas por
+    producto: cantidad total, último precio, fecha del último pedido y
+    número de órdenes. La usan supplier_detail (top 10) y el catálogo del
+    proveedor (paginado).
+    """
+
+    # Ordenamientos disponibles para el catálogo
+    ORDERINGS = {
+        'quantity': ('-supplier_total_quantity', 'name'),
+        'recent': ('-supplier_last_order_date', 'name'),
+        'orders': ('-supplier_order_count', 'name'),
+        'name': ('name',),
+    }
+
+    @staticmethod
+    def product_history(supplier, ordering='quantity'):
+        """
+        Productos pedidos alguna vez al proveedor, anotados con su historial
+
+        Args:
+            supplier: Supplier o id
+            ordering: Clave de ORDERINGS (default: mayor cantidad pedida)
+
+        Returns:
+            QuerySet de Product (con categoría) anotado con:
+            supplier_total_quantity, supplier_last_price_usd,
+            supplier_last_order_date y supplier_order_count
+        """
+        from django.db.models import Count, OuterRef, Subquery, Sum
+        from inventory.models import Product
+        from .models import SupplierOrderItem
+
+        supplier_id = getattr(supplier, 'pk', supplier)
+        items = SupplierOrderItem.objects.filter(order__supplier_id=supplier_id)
+        product_items = items.filter(product=OuterRef('pk'))
+        last_item = product_items.order_by('-order__order_date', '-pk')
+
+        def per_product(aggregate):
+            return Subquery(
+                product_items.order_by().values('product')
+                .annotate(value=aggregate).values('value')
+            )
+
+        ordering = SupplierHistoryService.ORDERINGS.get(
+            ordering, SupplierHistoryService.ORDERINGS['quantity']
+        )
+        return Product.objects.filter(
+            pk__in=items.values('product')
+        ).select_related('category').annotate(
+            supplier_total_quantity=per_product(Sum('quantity')),
+            supplier_order_count=per_product(Count('order', distinct=True)),
+            supplier_last_price_usd=Subquery(last_item.values('price_usd')[:1]),
+            supplier_last_order_date=Subquery(last_item.values('order__order_date')[:1]),
+        ).order_by(*ordering)
@@ -0,0 +1,13 @@
+# suppliers/signals.py - VERSIONES DE LA TABLA DE PROVEEDORES
+
+"""
+Registra Supplier en TableVersions: las listas de proveedores activos
+(order_list, filtros de reportes) se leen con cached() y cada
+save()/delete() las invalida.
+"""
+
+from utils.versions import TableVersions
+
+from .models import Supplier
+
+TableVersions.register(Supplier)
@@ -0,0 +1,183 @@
+# suppliers/tests_order_builder.py
+"""
+Tests para el guardado de órdenes en lote (OrderBuilderService):
+- Totales de la orden y precios en Bs con una sola tasa
+- Número de consultas fijo, sin importar los ítems de la orden
+- Edición: ítems modificados, borrados y agregados
+- Vistas order_create y order_update
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from suppliers.forms import SupplierOrderForm, SupplierOrderItemFormset
+from suppliers.models import Supplier, SupplierOrder
+from suppliers.services import OrderBuilderService
+from utils.models import ExchangeRate
+from utils.testing import make_products
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def order_data(supplier, rows, initial=0):
+    """rows: lista de dicts con product, quantity, price_usd y opcionalmente id/DELETE"""
+    data = {
+        'supplier': str(supplier.pk),
+        'status': 'pending',
+        'notes': '',
+        'items-TOTAL_FORMS': str(len(rows)),
+        'items-INITIAL_FORMS': str(initial),
+        'items-MIN_NUM_FORMS': '0',
+        'items-MAX_NUM_FORMS': '1000',
+    }
+    for i, row in enumerate(rows):
+        for key, value in row.items():
+            data[f'items-{i}-{key}'] = str(value.pk if hasattr(value, 'pk') else value)
+    return data
+
+
+def row(product, quantity='2', price_usd='1.25', **extra):
+    return dict(product=product, quantity=quantity, price_usd=price_usd, **extra)
+
+
+class OrderBuilderTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='ob_admin', password='pass123', is_admin=True)
+        self.rate = ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+        self.supplier = Supplier.objects.create(name='Proveedor Órdenes')
+
+    def build(self, data, instance=None):
+        form = SupplierOrderForm(data, instance=instance, user=self.admin)
+        formset = SupplierOrderItemFormset(data, instance=instance or SupplierOrder(), prefix='items')
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertTrue(formset.is_valid(), formset.errors)
+        return form, formset
+
+
+# ─────────────────────────────────────────────
+# SERVICIO
+# ─────────────────────────────────────────────
+
+class OrderBuilderServiceTest(OrderBuilderTestMixin, TestCase):
+
+    def test_totals_and_bs_prices(self):
+        products = make_products(3, 'OB')
+        form, formset = self.build(order_data(self.supplier, [
+            row(products[0], '2', '1.25'),
+            row(products[1], '3', '2.00'),
+            row(products[2], '1.5', '4.00'),
+        ]))
+        order = OrderBuilderService.save_order(form, formset, self.rate)
+
+        order.refresh_from_db()
+        self.assertEqual(order.created_by, self.admin)
+        self.assertEqual(order.total_usd, Decimal('14.50'))
+        self.assertEqual(order.total_bs, Decimal('580.00'))
+        self.assertEqual(order.exchange_rate_used, Decimal('40.00'))
+        items = list(order.items.order_by('pk'))
+        self.assertEqual([i.product_id for i in items], [p.pk for p in products])
+        self.assertEqual([i.price_bs for i in items], [Decimal('50.00'), Decimal('80.00'), Decimal('160.00')])
+
+        # Mismo resultado que el cálculo del modelo
+        order.update_totals()
+        self.assertEqual(order.total_usd, Decimal('14.50'))
+        self.assertEqual(order.total_bs, Decimal('580.00'))
+
+    def test_query_count_is_flat(self):
+        counts = []
+        for size, prefix in ((3, 'QA'), (30, 'QB')):
+            products = make_products(size, prefix)
+            form, formset = self.build(order_data(self.supplier, [row(p) for p in products]))
+            with CaptureQueriesContext(connection) as ctx:
+                order = OrderBuilderService.save_order(form, formset, self.rate)
+            counts.append(len(ctx.captured_queries))
+            self.assertEqual(order.items.count(), size)
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(any(
+            'utils_exchangerate' in q['sql'] for q in ctx.captured_queries
+        ))
+
+    def test_update_changes_deletes_and_adds_items(self):
+        products = make_products(4, 'OB')
+        form, formset = self.build(order_data(self.supplier, [
+            row(products[0], '1', '1.00'),
+            row(products[1], '1', '1.00'),
+            row(products[2], '1', '1.00'),
+        ]))
+        order = OrderBuilderService.save_order(form, formset, self.rate)
+        items = list(order.items.order_by('pk'))
+
+        data = order_data(self.supplier, [
+            row(products[0], '5', '2.00', id=items[0].pk),
+            row(products[1], '1', '1.00', id=items[1].pk),
+            row(products[2], '1', '1.00', id=items[2].pk, DELETE='on'),
+            row(products[3], '2', '3.00'),
+        ], initial=3)
+        order = SupplierOrder.objects.get(pk=order.pk)
+        form, formset = self.build(data, instance=order)
+        OrderBuilderService.save_order(form, formset, self.rate)
+
+        order.refresh_from_db()
+        remaining = {i.product_id: i for i in order.items.all()}
+        self.assertEqual(set(remaining), {products[0].pk, products[1].pk, products[3].pk})
+        self.assertEqual(remaining[products[0].pk].quantity, Decimal('5'))
+        self.assertEqual(remaining[products[0].pk].price_bs, Decimal('80.00'))
+        self.assertEqual(remaining[products[3].pk].price_bs, Decimal('120.00'))
+        # 5*2 + 1*1 + 2*3
+        self.assertEqual(order.total_usd, Decimal('17.00'))
+        self.assertEqual(order.total_bs, Decimal('680.00'))
+
+    def test_requires_exchange_rate(self):
+        products = make_products(1, 'OB')
+        form, formset = self.build(order_data(self.supplier, [row(products[0])]))
+        with self.assertRaises(ValueError):
+            OrderBuilderService.save_order(form, formset, None)
+        self.assertFalse(SupplierOrder.objects.exists())
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class OrderBuilderViewsTest(OrderBuilderTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.login(username='ob_admin', password='pass123')
+
+    def test_order_create_and_update(self):
+        products = make_products(2, 'VW')
+        response = self.client.post(reverse('suppliers:order_create'), order_data(self.supplier, [
+            row(products[0], '4', '1.50'),
+        ]))
+        order = SupplierOrder.objects.get()
+        self.assertRedirects(response, reverse('suppliers:order_detail', args=[order.pk]))
+        self.assertEqual(order.total_usd, Decimal('6.00'))
+        self.assertEqual(order.total_bs, Decimal('240.00'))
+
+        item = order.items.get()
+        response = self.client.post(reverse('suppliers:order_update', args=[order.pk]), order_data(self.supplier, [
+            row(products[0], '4', '1.50', id=item.pk, DELETE='on'),
+            row(products[1], '1', '2.00'),
+        ], initial=1))
+        self.assertRedirects(response, reverse('suppliers:order_detail', args=[order.pk]))
+        order.refresh_from_db()
+        self.assertEqual(list(order.items.values_list('product_id', flat=True)), [products[1].pk])
+        self.assertEqual(order.total_usd, Decimal('2.00'))
+        self.assertEqual(order.total_bs, Decimal('80.00'))
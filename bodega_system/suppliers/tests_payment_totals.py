@@ -0,0 +1,197 @@
+# suppliers/tests_payment_totals.py
+"""
+Tests para los totales pagados incrementales (PaymentTotalsService):
+- Crear, editar y borrar pagos aplica solo la diferencia
+- Registrar un pago cuesta lo mismo con 1 o 40 cuotas previas
+- verify()/reconcile() y el comando verify_supplier_payments
+- Totales de ítems con SUM en la base de datos
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventory.models import Category, Product
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem, SupplierPayment
+from suppliers.services import PaymentTotalsService
+from utils.models import ExchangeRate
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+class PaymentTotalsTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='pt_admin', password='pass123', is_admin=True)
+        ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+        self.supplier = Supplier.objects.create(name='Proveedor Pagos')
+        self.order = self.make_order(Decimal('100.00'))
+
+    def make_order(self, total_usd):
+        return SupplierOrder.objects.create(
+            supplier=self.supplier,
+            created_by=self.admin,
+            total_usd=total_usd,
+            total_bs=total_usd * Decimal('40'),
+            exchange_rate_used=Decimal('40.00'),
+        )
+
+    def pay(self, amount_usd, order=None):
+        return SupplierPayment.objects.create(
+            order=order or self.order,
+            amount_usd=Decimal(amount_usd),
+            payment_date=timezone.now(),
+            created_by=self.admin,
+        )
+
+
+# ─────────────────────────────────────────────
+# PAGOS
+# ─────────────────────────────────────────────
+
+class IncrementalPaymentTotalsTest(PaymentTotalsTestMixin, TestCase):
+
+    def test_create_updates_order_in_memory_and_db(self):
+        payment = self.pay('30.00')
+        self.assertEqual(payment.order.paid_amount_usd, Decimal('30.00'))
+        self.assertEqual(payment.order.paid_amount_bs, Decimal('1200.00'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('30.00'))
+        self.assertFalse(self.order.paid)
+
+        self.pay('70.00')
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('100.00'))
+        self.assertTrue(self.order.paid)
+
+    def test_edit_applies_difference(self):
+        payment = self.pay('30.00')
+        self.pay('20.00')
+        payment = SupplierPayment.objects.get(pk=payment.pk)
+        payment.amount_usd = Decimal('50.00')
+        payment.amount_bs = Decimal('2000.00')
+        payment.save()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('70.00'))
+        self.assertEqual(self.order.paid_amount_bs, Decimal('2800.00'))
+
+    def test_moving_payment_to_another_order(self):
+        other = self.make_order(Decimal('10.00'))
+        payment = self.pay('10.00')
+        payment = SupplierPayment.objects.get(pk=payment.pk)
+        payment.order = other
+        payment.save()
+        self.order.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('0'))
+        self.assertEqual(other.paid_amount_usd, Decimal('10.00'))
+        self.assertTrue(other.paid)
+
+    def test_delete_subtracts(self):
+        first = self.pay('60.00')
+        self.pay('40.00')
+        first.delete()
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('40.00'))
+        self.assertEqual(self.order.paid_amount_bs, Decimal('1600.00'))
+        self.assertFalse(self.order.paid)
+        self.assertEqual(PaymentTotalsService.verify(), [])
+
+    def test_payment_cost_independent_of_installments(self):
+        big = self.make_order(Decimal('1000.00'))
+        for _ in range(40):
+            self.pay('1.00', order=big)
+
+        counts = []
+        for order in (self.order, big):
+            with CaptureQueriesContext(connection) as ctx:
+                self.pay('1.00', order=order)
+            counts.append(len(ctx.captured_queries))
+            self.assertFalse(any(
+                'FROM "suppliers_supplierpayment"' in q['sql'] for q in ctx.captured_queries
+            ))
+        self.assertEqual(counts[0], counts[1])
+
+
+# ─────────────────────────────────────────────
+# RECONCILIACIÓN
+# ─────────────────────────────────────────────
+
+class PaymentReconciliationTest(PaymentTotalsTestMixin, TestCase):
+
+    def test_verify_and_reconcile(self):
+        self.pay('25.00')
+        self.assertEqual(PaymentTotalsService.verify(), [])
+
+        # Un borrado en lote no pasa por delete() y deja el acumulado desfasado
+        SupplierPayment.objects.filter(order=self.order).delete()
+        differences = PaymentTotalsService.verify()
+        self.assertEqual(len(differences), 1)
+        self.assertEqual(differences[0]['stored_usd'], Decimal('25.00'))
+        self.assertEqual(differences[0]['actual_usd'], Decimal('0'))
+
+        self.assertEqual(PaymentTotalsService.reconcile(), 1)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('0'))
+        self.assertEqual(PaymentTotalsService.verify(), [])
+
+    def test_command(self):
+        self.pay('25.00')
+        SupplierOrder.objects.filter(pk=self.order.pk).update(paid_amount_usd=Decimal('99'))
+
+        out = StringIO()
+        call_command('verify_supplier_payments', stdout=out)
+        self.assertIn(f'Orden #{self.order.pk}', out.getvalue())
+        self.assertIn('--fix', out.getvalue())
+
+        out = StringIO()
+        call_command('verify_supplier_payments', '--fix', stdout=out)
+        self.assertIn('Órdenes corregidas: 1', out.getvalue())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.paid_amount_usd, Decimal('25.00'))
+
+
+# ─────────────────────────────────────────────
+# TOTALES DE ÍTEMS
+# ─────────────────────────────────────────────
+
+class OrderItemTotalsTest(PaymentTotalsTestMixin, TestCase):
+
+    def test_totals_use_single_aggregate(self):
+        category = Category.objects.create(name='Totales')
+        for i in range(5):
+            product = Product.objects.create(
+                name=f'Producto T {i}', barcode=f'PT{i:04d}', category=category,
+                purchase_price_usd=Decimal('1'), selling_price_usd=Decimal('2'),
+            )
+            SupplierOrderItem.objects.create(
+                order=self.order, product=product, quantity=Decimal('1.5'), price_usd=Decimal('2.00')
+            )
+
+        order = SupplierOrder.objects.get(pk=self.order.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(order.calculate_total_usd(), Decimal('15.00'))
+            self.assertEqual(order.calculate_total_bs(), Decimal('600.00'))
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        order = SupplierOrder.objects.prefetch_related('items').get(pk=self.order.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(order.calculate_total_usd(), Decimal('15.00'))
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_empty_order(self):
+        self.assertEqual(self.order.calculate_total_usd(), Decimal('0'))
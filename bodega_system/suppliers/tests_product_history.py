@@ -0,0 +1,140 @@
+# suppliers/tests_product_history.py
+"""
+Tests para el historial de productos por proveedor (SupplierHistoryService):
+- Cantidad total, último precio, última fecha y número de órdenes
+- Una sola consulta sin importar cuántos productos
+- supplier_detail y el catálogo supplier_products
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem
+from suppliers.services import SupplierHistoryService
+from utils.models import ExchangeRate
+from utils.testing import make_products
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+class SupplierHistoryTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='sh_admin', password='pass123', is_admin=True)
+        ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+        self.supplier = Supplier.objects.create(name='Proveedor Historial')
+
+    def make_order(self, lines, days_ago=0, supplier=None):
+        """lines: lista de (producto, cantidad, precio USD)"""
+        order = SupplierOrder.objects.create(supplier=supplier or self.supplier, created_by=self.admin)
+        # order_date es auto_now_add: se ajusta después de crear
+        SupplierOrder.objects.filter(pk=order.pk).update(
+            order_date=timezone.now() - timedelta(days=days_ago)
+        )
+        SupplierOrderItem.objects.bulk_create([
+            SupplierOrderItem(order=order, product=product,
+                              quantity=Decimal(quantity), price_usd=Decimal(price))
+            for product, quantity, price in lines
+        ])
+        return order
+
+
+# ─────────────────────────────────────────────
+# SERVICIO
+# ─────────────────────────────────────────────
+
+class SupplierHistoryServiceTest(SupplierHistoryTestMixin, TestCase):
+
+    def test_history_values(self):
+        a, b, c = make_products(3, 'SH')
+        self.make_order([(a, '10', '1.00'), (b, '1', '5.00')], days_ago=10)
+        recent = self.make_order([(a, '2', '1.20'), (a, '3', '1.20')], days_ago=1)
+        # Otro proveedor no cuenta
+        other = Supplier.objects.create(name='Otro')
+        self.make_order([(a, '100', '9.99'), (c, '1', '1.00')], supplier=other)
+
+        history = {p.pk: p for p in SupplierHistoryService.product_history(self.supplier)}
+        self.assertEqual(set(history), {a.pk, b.pk})
+        self.assertEqual(history[a.pk].supplier_total_quantity, Decimal('15'))
+        self.assertEqual(history[a.pk].supplier_order_count, 2)
+        self.assertEqual(history[a.pk].supplier_last_price_usd, Decimal('1.20'))
+        self.assertEqual(
+            history[a.pk].supplier_last_order_date.date(),
+            SupplierOrder.objects.get(pk=recent.pk).order_date.date(),
+        )
+        self.assertEqual(history[b.pk].supplier_total_quantity, Decimal('1'))
+        self.assertEqual(history[b.pk].supplier_order_count, 1)
+        self.assertEqual(history[b.pk].supplier_last_price_usd, Decimal('5.00'))
+
+    def test_orderings(self):
+        a, b = make_products(2, 'SH')
+        self.make_order([(a, '10', '1.00')], days_ago=5)
+        self.make_order([(b, '1', '1.00')], days_ago=1)
+        history = SupplierHistoryService.product_history
+        self.assertEqual(list(history(self.supplier)), [a, b])
+        self.assertEqual(list(history(self.supplier, ordering='recent')), [b, a])
+        self.assertEqual(list(history(self.supplier, ordering='desconocido')), [a, b])
+
+    def test_single_query(self):
+        products = make_products(30, 'SH')
+        for day in range(3):
+            self.make_order([(p, '1', '1.00') for p in products], days_ago=day)
+        with CaptureQueriesContext(connection) as ctx:
+            rows = list(SupplierHistoryService.product_history(self.supplier)[:10])
+            names = [p.category.name for p in rows]
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(len(names), 10)
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class SupplierHistoryViewsTest(SupplierHistoryTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.login(username='sh_admin', password='pass123')
+
+    def test_supplier_detail_query_count_is_flat(self):
+        counts = []
+        for size, prefix in ((2, 'DA'), (10, 'DB')):
+            products = make_products(size, prefix)
+            self.make_order([(p, '2', '1.50') for p in products])
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('suppliers:supplier_detail', args=[self.supplier.pk]))
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(len(response.context['product_data']), 10)
+        self.assertEqual(response.context['product_data'][0]['last_price'], Decimal('60.00'))
+        self.assertContains(response, reverse('suppliers:supplier_products', args=[self.supplier.pk]))
+
+    def test_supplier_products_paginates(self):
+        products = make_products(30, 'CT')
+        self.make_order([(p, '1', '1.00') for p in products])
+        url = reverse('suppliers:supplier_products', args=[self.supplier.pk])
+        response = self.client.get(url, {'sort': 'name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['product_data']), 25)
+        self.assertEqual(response.context['product_data'][0]['product'], products[0])
+        response = self.client.get(url, {'sort': 'name', 'page': 2})
+        self.assertEqual(len(response.context['product_data']), 5)
+        # Orden alfabético: 'Producto CT 9' es el último
+        self.assertContains(response, 'Producto CT 9')
@@ -0,0 +1,154 @@
+# suppliers/tests_reception.py
+"""
+Tests para la recepción de órdenes en lote (ReceptionService):
+- Stock, precios, ajustes e historial igual que la recepción línea por línea
+- Número de consultas fijo, sin importar las líneas de la orden
+- Productos repetidos en la orden y cantidades inválidas
+- Vista order_receive
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import InventoryAdjustment, Product
+from inventory.services import ValuationService
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem
+from suppliers.services import ReceptionService
+from utils.models import ExchangeRate
+from utils.testing import make_products
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def make_order(user, lines):
+    """lines: lista de (producto, cantidad, precio USD, precio de venta USD)"""
+    supplier, _ = Supplier.objects.get_or_create(name='Proveedor Recepción')
+    order = SupplierOrder.objects.create(supplier=supplier, created_by=user)
+    for product, quantity, price_usd, selling_price_usd in lines:
+        SupplierOrderItem.objects.create(
+            order=order,
+            product=product,
+            quantity=Decimal(quantity),
+            price_usd=Decimal(price_usd),
+            selling_price_usd=Decimal(selling_price_usd) if selling_price_usd else None,
+        )
+    return order
+
+
+class ReceptionTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='rec_admin', password='pass123', is_admin=True)
+        ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40.00'), updated_by=self.admin
+        )
+
+
+# ─────────────────────────────────────────────
+# SERVICIO
+# ─────────────────────────────────────────────
+
+class ReceptionServiceTest(ReceptionTestMixin, TestCase):
+
+    def test_stock_prices_adjustments_and_history(self):
+        first, second = make_products(2, 'REC', stock='2', min_stock='5')
+        order = make_order(self.admin, [(first, '10', '1.20', '2.00'), (second, '4', '1.00', None)])
+
+        result = ReceptionService.receive_order(order, self.admin, notes='Factura 123')
+
+        self.assertEqual(result['products_count'], 2)
+        self.assertEqual(result['total_items_received'], Decimal('14'))
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'received')
+
+        first.refresh_from_db()
+        self.assertEqual(first.stock, Decimal('12'))
+        self.assertEqual(first.purchase_price_usd, Decimal('1.20'))
+        self.assertEqual(first.purchase_price_bs, Decimal('48.00'))
+        self.assertEqual(first.selling_price_usd, Decimal('2.00'))
+        self.assertEqual(first.stock_state, 'normal')
+        self.assertEqual(first.history.count(), 2)
+
+        second.refresh_from_db()
+        self.assertEqual(second.selling_price_usd, Decimal('1.50'))
+
+        adjustment = InventoryAdjustment.objects.get(product=first)
+        self.assertEqual(adjustment.reason, f'Recepción orden #{order.id} - Factura 123')
+        self.assertEqual((adjustment.previous_stock, adjustment.new_stock), (Decimal('2'), Decimal('12')))
+        self.assertEqual(ValuationService.verify(), [])
+
+    def test_without_price_update(self):
+        product, = make_products(1, 'REC', stock='2', min_stock='5')
+        order = make_order(self.admin, [(product, '3', '9.00', '9.50')])
+        ReceptionService.receive_order(order, self.admin, update_prices=False)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, Decimal('5'))
+        self.assertEqual(product.purchase_price_usd, Decimal('1.00'))
+        self.assertEqual(product.selling_price_usd, Decimal('1.50'))
+
+    def test_repeated_product_accumulates(self):
+        product, = make_products(1, 'REC', stock='2', min_stock='5')
+        order = make_order(self.admin, [(product, '3', '1.00', None), (product, '5', '1.00', None)])
+        ReceptionService.receive_order(order, self.admin)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, Decimal('10'))
+        self.assertEqual(
+            list(InventoryAdjustment.objects.order_by('pk').values_list('previous_stock', 'new_stock')),
+            [(Decimal('2'), Decimal('5')), (Decimal('5'), Decimal('10'))],
+        )
+
+    def test_invalid_quantity_changes_nothing(self):
+        first, second = make_products(2, 'REC', stock='2', min_stock='5')
+        order = make_order(self.admin, [(first, '3', '1.00', None), (second, '1', '1.00', None)])
+        SupplierOrderItem.objects.filter(order=order, product=second).update(quantity=Decimal('0'))
+        with self.assertRaises(ValueError):
+            ReceptionService.receive_order(order, self.admin)
+        first.refresh_from_db()
+        self.assertEqual(first.stock, Decimal('2'))
+        self.assertFalse(InventoryAdjustment.objects.exists())
+
+    def test_query_count_is_flat(self):
+        counts = []
+        for lines, prefix in ((3, 'QA'), (30, 'QB')):
+            products = make_products(lines, prefix, stock='2', min_stock='5')
+            order = make_order(self.admin, [(p, '5', '1.10', None) for p in products])
+            with CaptureQueriesContext(connection) as ctx:
+                ReceptionService.receive_order(order, self.admin)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+# ─────────────────────────────────────────────
+# VISTA
+# ─────────────────────────────────────────────
+
+class OrderReceiveViewTest(ReceptionTestMixin, TestCase):
+
+    def test_receive_post_updates_inventory(self):
+        client = Client()
+        client.login(username='rec_admin', password='pass123')
+        products = make_products(3, 'RV', stock='2', min_stock='5')
+        order = make_order(self.admin, [(p, '7', '1.00', None) for p in products])
+
+        response = client.post(
+            reverse('suppliers:order_receive', args=[order.pk]),
+            {'update_prices': 'on', 'notes': ''},
+        )
+        self.assertRedirects(response, reverse('suppliers:order_detail', args=[order.pk]))
+        self.assertEqual(
+            sorted(Product.objects.filter(pk__in=[p.pk for p in products]).values_list('stock', flat=True)),
+            [Decimal('9')] * 3,
+        )
+        self.assertEqual(InventoryAdjustment.objects.filter(reason=f'Recepción orden #{order.id}').count(), 3)
@@ -9,6 +9,7 @@ urlpatterns = [
     path('', views.supplier_list, name='supplier_list'),
     path('add/', views.supplier_create, name='supplier_create'),
     path('<int:pk>/', views.supplier_detail, name='supplier_detail'),
+    path('<int:pk>/products/', views.supplier_products, name='supplier_products'),
     path('<int:pk>/edit/', views.supplier_update, name='supplier_update'),
     path('<int:pk>/delete/', views.supplier_delete, name='supplier_delete'),
     
@@ -26,4 +27,5 @@ urlpatterns = [
 
     # API endpoints
     path('api/product-lookup/<str:barcode>/', views.product_lookup_api, name='product_lookup_api'),
+    path('api/search/', views.supplier_search_api, name='supplier_search_api'),
 ]
\ No newline at end of file
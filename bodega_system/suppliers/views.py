@@ -8,24 +8,26 @@ from decimal import Decimal
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
 from django.http import JsonResponse
 # Django DB
 from django.db import transaction, IntegrityError
-from django.db.models import Sum, Q
+from django.db.models import Q
 from django.core.paginator import Paginator
 
 # Local imports
-from .models import Supplier, SupplierOrder, SupplierOrderItem
+from .models import Supplier, SupplierOrder
+from .services import OrderBuilderService, SupplierHistoryService
 from .forms import (
     SupplierForm,
     SupplierOrderForm,
     SupplierOrderItemFormset,
     ReceiveOrderForm
 )
-from inventory.models import Product, InventoryAdjustment, Category
+from inventory.models import Product, Category
+from utils.concurrency import retry_on_conflict
 from utils.decorators import admin_required, require_exchange_rate
 from utils.models import ExchangeRate
+from utils.pagination import paginate_keyset, htmx_fragment
 
 # Logger
 logger = logging.getLogger(__name__)
@@ -74,39 +76,10 @@ def supplier_detail(request, pk):
     for o in orders:
         o.total_bs_current = round(o.total_usd * rate_value, 2)
     
-    # Obtener productos suministrados por este proveedor
-    product_data = []
-    if orders:
-        # Obtener los productos más recientes que se han pedido a este proveedor
-        products_ordered = SupplierOrderItem.objects.filter(
-            order__supplier=supplier
-        ).values('product').annotate(
-            total_ordered=Sum('quantity')
-        ).order_by('-total_ordered')[:10]
-        
-        for item in products_ordered:
-            try:
-                product = Product.objects.get(pk=item['product'])
-                # Obtener el último precio de compra de este producto a este proveedor
-                last_order_item = SupplierOrderItem.objects.filter(
-                    order__supplier=supplier,
-                    product=product
-                ).order_by('-order__order_date').first()
-                
-                if last_order_item:
-                    rate = ExchangeRate.get_latest_rate()
-                    rate_value = rate.bs_to_usd if rate else Decimal('36.00')
-                    last_price = round(last_order_item.price_usd * rate_value, 2)
-                else:
-                    last_price = 0
-
-                product_data.append({
-                    'product': product,
-                    'total_ordered': item['total_ordered'],
-                    'last_price': last_price
-                })
-            except Product.DoesNotExist:
-                pass
+    # Productos más pedidos a este proveedor: una sola consulta con su historial
+    product_data = _supplier_product_rows(
+        SupplierHistoryService.product_history(supplier)[:10], rate_value
+    )
     
     return render(request, 'suppliers/supplier_detail.html', {
         'supplier': supplier,
@@ -114,6 +87,42 @@ def supplier_detail(request, pk):
         'product_data': product_data,
     })
 
+def _supplier_product_rows(products, rate_value):
+    """Filas para las tablas de productos del proveedor (precio en Bs a tasa actual)"""
+    return [
+        {
+            'product': product,
+            'total_ordered': product.supplier_total_quantity,
+            'last_price_usd': product.supplier_last_price_usd,
+            'last_price': round(product.supplier_last_price_usd * rate_value, 2),
+            'last_order_date': product.supplier_last_order_date,
+            'order_count': product.supplier_order_count,
+        }
+        for product in products
+    ]
+
+@login_required
+def supplier_products(request, pk):
+    """Catálogo del proveedor: todos los productos que se le han pedido"""
+    supplier = get_object_or_404(Supplier, pk=pk)
+
+    rate = ExchangeRate.get_latest_rate()
+    rate_value = rate.bs_to_usd if rate else Decimal('36.00')
+
+    sort = request.GET.get('sort', 'quantity')
+    if sort not in SupplierHistoryService.ORDERINGS:
+        sort = 'quantity'
+
+    paginator = Paginator(SupplierHistoryService.product_history(supplier, ordering=sort), 25)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    return render(request, 'suppliers/supplier_products.html', {
+        'supplier': supplier,
+        'page_obj': page_obj,
+        'product_data': _supplier_product_rows(page_obj, rate_value),
+        'sort': sort,
+    })
+
 @login_required
 def supplier_create(request):
     """Vista para crear un nuevo proveedor"""
@@ -191,24 +200,22 @@ def order_list(request):
     if status:
         orders = orders.filter(status=status)
 
-    # Ordenar
-    orders = orders.order_by('-order_date')
-    
-    # Paginación
-    paginator = Paginator(orders, 20)  # 20 órdenes por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    # Obtener proveedores para el filtro
-    suppliers = Supplier.objects.filter(
-        is_active=True
-    ).order_by('name')
+    # Paginación por cursor sobre (-order_date, -id)
+    page_obj = paginate_keyset(request, orders, per_page=20,
+                               date_field='order_date', with_total=True)
     
     current_rate = ExchangeRate.get_latest_rate()
     rate_value = current_rate.bs_to_usd if current_rate else Decimal('36.00')
     for order in page_obj:
         order.total_bs_current = round(order.total_usd * rate_value, 2)
 
+    fragment = htmx_fragment(request)
+    if fragment:
+        return render(request, f'suppliers/order_list_{fragment}.html', {'page_obj': page_obj})
+    
+    # Obtener proveedores para el filtro
+    suppliers = Supplier.objects.filter(is_active=True).order_by('name').cached()
+
     return render(request, 'suppliers/order_list.html', {
         'page_obj': page_obj,
         'suppliers': suppliers,
@@ -287,18 +294,6 @@ def order_create(request, exchange_rate=None):
                 # exchange_rate ya está disponible por el decorator
                 try:
                     with transaction.atomic():
-                        # Guardar orden
-                        order = form.save()
-
-                        logger.info("Order created", extra={
-                            'order_id': order.id,
-                            'supplier_id': order.supplier_id,
-                            'user_id': request.user.id,
-                        })
-
-                        # Procesar y guardar ítems de la orden
-                        formset.instance = order
-
                         # Crear productos nuevos antes de guardar el formset
                         for form_item in formset.forms:
                             if form_item.cleaned_data and not form_item.cleaned_data.get('DELETE', False):
@@ -317,7 +312,7 @@ def order_create(request, exchange_rate=None):
                                             'formset': formset,
                                             'title': 'Nueva Orden de Compra',
                                             'current_exchange_rate': exchange_rate,
-                                            'categories': Category.objects.all().order_by('name'),
+                                            'categories': Category.objects.order_by('name').cached(),
                                             'unit_choices': Product.UNIT_TYPES,
                                         })
                                     form_item.instance.product = new_product
@@ -325,18 +320,15 @@ def order_create(request, exchange_rate=None):
                                     logger.info("New product created from order", extra={
                                         'product_id': new_product.id,
                                         'product_name': new_product.name,
-                                        'order_id': order.id,
                                     })
 
-                        formset.save()
+                        # Orden con totales + ítems en lote, con una sola tasa
+                        order = OrderBuilderService.save_order(form, formset, exchange_rate)
 
-                        # Calcular totales usando el método del modelo
-                        order.update_totals()
-
-                        logger.info("Order totals updated", extra={
+                        logger.info("Order created", extra={
                             'order_id': order.id,
-                            'total_usd': float(order.total_usd),
-                            'total_bs': float(order.total_bs),
+                            'supplier_id': order.supplier_id,
+                            'user_id': request.user.id,
                         })
 
                         # Si la orden se marca como "received", actualizar inventario automáticamente
@@ -388,7 +380,7 @@ def order_create(request, exchange_rate=None):
     
     # Obtener categorías y opciones de unidad
     from inventory.models import Category, Product
-    categories = Category.objects.all().order_by('name')
+    categories = Category.objects.order_by('name').cached()
     unit_choices = Product.UNIT_TYPES
 
     return render(request, 'suppliers/order_form.html', {
@@ -419,10 +411,6 @@ def order_update(request, pk, exchange_rate=None):
             # exchange_rate ya está disponible por el decorator
 
             with transaction.atomic():
-                # Guardar orden
-                order = form.save()
-
-                # Procesar y guardar ítems de la orden
                 # Crear productos nuevos antes de guardar el formset
                 for form_item in formset.forms:
                     if form_item.cleaned_data and not form_item.cleaned_data.get('DELETE', False):
@@ -431,11 +419,8 @@ def order_update(request, pk, exchange_rate=None):
                             new_product = _create_product_from_form(form_item, exchange_rate, request.user)
                             form_item.instance.product = new_product
 
-                # Guardar ítems de la orden
-                formset.save()
-
-                # Actualizar totales usando el método del modelo
-                order.update_totals()
+                # Orden con totales + ítems en lote, con una sola tasa
+                order = OrderBuilderService.save_order(form, formset, exchange_rate)
 
                 messages.success(request, 'Orden de compra actualizada exitosamente.')
                 return redirect('suppliers:order_detail', pk=order.pk)
@@ -446,7 +431,7 @@ def order_update(request, pk, exchange_rate=None):
     # Obtener categorías y opciones de unidad
     from inventory.models import Category, Product
     import json
-    categories = Category.objects.all().order_by('name')
+    categories = Category.objects.order_by('name').cached()
     unit_choices = Product.UNIT_TYPES
 
     # Serializar ítems existentes para pre-cargar en Alpine.js
@@ -492,40 +477,30 @@ def order_receive(request, pk):
 
         if form.is_valid():
             try:
-                with transaction.atomic():
-                    # Re-leer con lock para evitar doble recepción por race condition
-                    order = SupplierOrder.objects.select_for_update().get(pk=pk)
-                    if order.status == 'received':
-                        messages.error(request, 'Esta orden ya fue recibida por otra transacción.')
-                        return redirect('suppliers:order_detail', pk=order.pk)
+                # Obtener datos del formulario
+                update_prices = form.cleaned_data.get('update_prices', True)
+                notes = form.cleaned_data.get('notes', '').strip()
 
-                    # Obtener datos del formulario
-                    update_prices = form.cleaned_data.get('update_prices', True)
-                    notes = form.cleaned_data.get('notes', '').strip()
-
-                    # Procesar la recepción (función unificada)
-                    result = _process_received_order(
-                        order=order,
-                        user=request.user,
-                        update_prices=update_prices,
-                        notes=notes
-                    )
+                order, result = _receive_order_locked(pk, request.user, update_prices, notes)
+                if result is None:
+                    messages.error(request, 'Esta orden ya fue recibida por otra transacción.')
+                    return redirect('suppliers:order_detail', pk=order.pk)
 
-                    # Mensaje de éxito detallado
-                    product_names = [p['name'] for p in result['updated_products'][:3]]
-                    products_summary = ', '.join(product_names)
-                    if result['products_count'] > 3:
-                        products_summary += f' y {result["products_count"] - 3} más'
+                # Mensaje de éxito detallado
+                product_names = [p['name'] for p in result['updated_products'][:3]]
+                products_summary = ', '.join(product_names)
+                if result['products_count'] > 3:
+                    products_summary += f' y {result["products_count"] - 3} más'
 
-                    messages.success(
-                        request,
-                        f'Orden #{order.id} recibida exitosamente. '
-                        f'Productos actualizados: {products_summary}. '
-                        f'Total ítems: {result["total_items_received"]}. '
-                        f'Valor: ${order.total_usd} (Bs {order.total_bs})'
-                    )
+                messages.success(
+                    request,
+                    f'Orden #{order.id} recibida exitosamente. '
+                    f'Productos actualizados: {products_summary}. '
+                    f'Total ítems: {result["total_items_received"]}. '
+                    f'Valor: ${order.total_usd} (Bs {order.total_bs})'
+                )
 
-                    return redirect('suppliers:order_detail', pk=order.pk)
+                return redirect('suppliers:order_detail', pk=order.pk)
 
             except Exception as e:
                 logger.error("Error receiving order", exc_info=True, extra={
@@ -575,10 +550,40 @@ def order_cancel(request, pk):
         'order': order
     })
 
+@retry_on_conflict
+def _receive_order_locked(pk, user, update_prices, notes):
+    """
+    Recibe la orden releyéndola dentro de la transacción
+
+    Si otra recepción la guardó primero, el compare-and-swap de
+    SupplierOrder falla, la operación se repite y la orden ya aparece
+    recibida.
+
+    Returns:
+        tuple: (orden, resumen de la recepción), o (orden, None) si ya
+            estaba recibida
+    """
+    with transaction.atomic():
+        # Re-leer con lock para evitar doble recepción por race condition
+        order = SupplierOrder.objects.select_for_update().get(pk=pk)
+        if order.status == 'received':
+            return order, None
+
+        # Procesar la recepción (función unificada)
+        return order, _process_received_order(
+            order=order,
+            user=user,
+            update_prices=update_prices,
+            notes=notes
+        )
+
 def _process_received_order(order, user, update_prices=True, notes=''):
     """
     Procesa una orden recibida y actualiza el inventario
 
+    Delega a ReceptionService.receive_order(), que aplica toda la orden
+    en lote (ver suppliers/services.py).
+
     Args:
         order (SupplierOrder): La orden a procesar
         user (User): Usuario que procesa la recepción
@@ -588,91 +593,14 @@ def _process_received_order(order, user, update_prices=True, notes=''):
     Returns:
         dict: Resumen de la recepción con productos actualizados y totales
     """
-    from decimal import Decimal
-    from django.utils import timezone
-
-    # Marcar como recibida si no lo está
-    if order.status != 'received':
-        order.status = 'received'
-        order.received_date = timezone.now()
-        order.save()
-
-    # Contadores para el resumen
-    updated_products = []
-    total_items_received = Decimal('0')
-
-    # Procesar cada ítem de la orden
-    for item in order.items.all():
-        product = item.product
-        previous_stock = product.stock
+    from .services import ReceptionService
 
-        # Asegurar que quantity sea Decimal
-        quantity_to_add = Decimal(str(item.quantity))
-
-        # Validación defensiva: cantidad debe ser positiva
-        if quantity_to_add <= 0:
-            raise ValueError(
-                f"Cantidad inválida para producto {product.name}: {quantity_to_add}. "
-                "Las cantidades deben ser mayores a cero."
-            )
-
-        total_items_received += quantity_to_add
-
-        # Actualizar stock (ambos son Decimal)
-        product.stock = previous_stock + quantity_to_add
-
-        # Actualizar precios solo si se solicitó
-        if update_prices:
-            # Verificar si el producto tiene campos USD
-            if hasattr(product, 'purchase_price_usd'):
-                product.purchase_price_usd = item.price_usd
-
-            # Actualizar precio en Bs
-            product.purchase_price_bs = item.price_bs
-
-            # Actualizar precio de venta si fue especificado en la orden
-            if item.selling_price_usd is not None and item.selling_price_usd > 0:
-                product.selling_price_usd = item.selling_price_usd
-
-        product.save()
-
-        # Registrar producto actualizado
-        updated_products.append({
-            'name': product.name,
-            'quantity': quantity_to_add,
-            'previous_stock': previous_stock,
-            'new_stock': product.stock
-        })
-
-        # Registrar ajuste de inventario
-        reason = f'Recepción orden #{order.id}'
-        if notes:
-            reason += f' - {notes}'
-
-        InventoryAdjustment.objects.create(
-            product=product,
-            adjustment_type='add',
-            quantity=quantity_to_add,
-            previous_stock=previous_stock,
-            new_stock=product.stock,
-            reason=reason,
-            adjusted_by=user
-        )
-
-        logger.info("Product updated from order reception", extra={
-            'order_id': order.id,
-            'product_id': product.id,
-            'quantity_added': float(quantity_to_add),
-            'previous_stock': float(previous_stock),
-            'new_stock': float(product.stock),
-            'prices_updated': update_prices,
-        })
-
-    return {
-        'updated_products': updated_products,
-        'total_items_received': total_items_received,
-        'products_count': len(updated_products)
-    }
+    return ReceptionService.receive_order(
+        order=order,
+        user=user,
+        update_prices=update_prices,
+        notes=notes,
+    )
 
 def _create_product_from_form(form, exchange_rate, created_by=None):
     """
@@ -714,6 +642,35 @@ def product_lookup_api(request, barcode):
         return JsonResponse({'exists': False, 'product': None}, status=404)
 
 
+@login_required
+def supplier_search_api(request):
+    """API de autocompletado de proveedores activos (nombre o contacto)"""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 20)
+    except ValueError:
+        limit = 10
+
+    if len(query) < 2:
+        return JsonResponse({'suppliers': []})
+
+    suppliers = Supplier.objects.filter(is_active=True).filter(
+        Q(name__icontains=query) | Q(contact_person__icontains=query)
+    ).order_by('name')[:limit]
+
+    return JsonResponse({
+        'suppliers': [
+            {
+                'id': supplier.id,
+                'name': supplier.name,
+                'contact_person': supplier.contact_person or '',
+                'phone': supplier.phone or '',
+            }
+            for supplier in suppliers
+        ]
+    })
+
+
 # ============================================================================
 # VISTAS DE PAGOS A PROVEEDORES
 # ============================================================================
@@ -68,7 +68,7 @@ def product_by_barcode(request, barcode):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def customer_search(request):
-    """API para buscar clientes por nombre o teléfono"""
+    """API para buscar clientes por nombre, email o teléfono (POS)"""
     query = request.GET.get('q', '')
     
     if not query:
@@ -80,9 +80,9 @@ def customer_search(request):
         # Importación aquí para evitar importación circular
         from customers.models import Customer
         
-        customers = Customer.objects.filter(
-            name__icontains=query
-        )[:10]  # Limitar a 10 resultados
+        from customers.search import search_customers
+
+        customers = search_customers(Customer.objects.all(), query, limit=10)
         
         result = []
         for customer in customers:
@@ -5,4 +5,7 @@ from django.apps import AppConfig
 class UtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utils'
-    verbose_name = 'Utilidades'
\ No newline at end of file
+    verbose_name = 'Utilidades'
+
+    def ready(self):
+        from . import archive, sqlite  # noqa: F401
\ No newline at end of file
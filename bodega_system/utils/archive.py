@@ -0,0 +1,400 @@
+# utils/archive.py - ARCHIVO DE VENTAS, AJUSTES E HISTORIAL VIEJOS
+
+"""
+Sale, SaleItem, InventoryAdjustment y el historial de productos crecen
+sin límite en el mismo archivo SQLite, y cada índice, backup y VACUUM
+paga por todo lo acumulado. ArchiveService mueve los meses cerrados más
+viejos que ARCHIVE_HORIZON_MONTHS a una segunda base SQLite ('archive'
+en settings.DATABASES) con el mismo esquema:
+
+- Las filas pasan tal cual (mismos ids) junto con las de usuarios,
+  clientes, categorías, productos y combos a las que apuntan, para que
+  los reportes de esa base muestren nombres. Las contraseñas no se copian.
+- En la base principal quedan resúmenes por día (SaleDaySummary,
+  SaleItemDaySummary, AdjustmentDaySummary) y un checkpoint de stock al
+  cierre de cada día con ajustes, así que los reportes agregados y el
+  stock a una fecha siguen cuadrando aunque el archivo no esté.
+- Las ventas a crédito se quedan: CustomerCredit las referencia.
+- Del historial de productos se queda la última fila de cada producto
+  antes del corte (el costo vigente al cierre del período archivado).
+
+Los reportes de detalle (motor de finances/reports.py) leen también la
+base de archivo cuando el período empieza antes de archived_until() y el
+archivo está disponible.
+
+Los meses se archivan en orden y cada uno es idempotente: se copia
+primero al archivo (insertar lo que falte) y después, en una transacción
+de la base principal, se escriben los resúmenes y se borran las filas.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.constants import OnConflict
+from django.dispatch import receiver
+
+from utils.sqlite import database_file_exists
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DB = 'archive'
+DEFAULT_DB = 'default'
+
+# Filas por lote al copiar a la base de archivo
+COPY_BATCH = 1000
+
+
+class ArchiveRouter:
+    """
+    En la base de archivo solo se crea el esquema
+
+    Las operaciones sin modelo (RunPython, RunSQL: datos iniciales,
+    triggers de búsqueda) son de la base principal y no corren ahí.
+    """
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != ARCHIVE_DB:
+            return None
+        return model_name is not None
+
+
+@receiver(connection_created, dispatch_uid='utils_archive_foreign_keys')
+def _relax_archive_constraints(sender, connection, **kwargs):
+    # Las filas archivadas sobreviven a productos o clientes que luego se
+    # borren de la base principal: el archivo no exige claves foráneas
+    if connection.alias == ARCHIVE_DB:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA foreign_keys = OFF')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (month_start(day) + timedelta(days=32)).replace(day=1)
+
+
+class ArchiveService:
+    """Service para archivar meses cerrados y saber desde dónde leer"""
+
+    @staticmethod
+    def available() -> bool:
+        """Si la base de archivo está configurada, existe y tiene el esquema"""
+        from sales.models import Sale
+
+        if ARCHIVE_DB not in connections.databases:
+            return False
+        if not database_file_exists(ARCHIVE_DB):
+            return False
+        return Sale._meta.db_table in connections[ARCHIVE_DB].introspection.table_names()
+
+    @staticmethod
+    def archived_until():
+        """Primer día que sigue completo en la base principal (None si no hay nada archivado)"""
+        from utils.models import ArchivedMonth
+
+        last = ArchivedMonth.objects.order_by('-month').values_list('month', flat=True).first()
+        return next_month(last) if last else None
+
+    @staticmethod
+    def databases(start=None) -> list:
+        """
+        Bases a leer para un período que empieza en `start`
+
+        Args:
+            start: date de inicio; None es sin límite (incluye lo archivado)
+        """
+        until = ArchiveService.archived_until()
+        if until is None or (start is not None and start >= until):
+            return [DEFAULT_DB]
+        if not ArchiveService.available():
+            return [DEFAULT_DB]
+        return [DEFAULT_DB, ARCHIVE_DB]
+
+    @staticmethod
+    def horizon(today=None):
+        """Primer día del mes más viejo que se conserva en la base principal"""
+        months = getattr(settings, 'ARCHIVE_HORIZON_MONTHS', 24)
+        start = month_start(today or date.today())
+        for _ in range(months):
+            start = month_start(start - timedelta(days=1))
+        return start
+
+    @staticmethod
+    def pending_months(before=None) -> list:
+        """Meses sin archivar, con ventas o ajustes, que empiezan antes de `before` (default: horizon())"""
+        from inventory.models import InventoryAdjustment
+        from sales.models import Sale
+
+        before = before or ArchiveService.horizon()
+        until = ArchiveService.archived_until()
+        firsts = [
+            value for value in (
+                Sale.objects.order_by('date').values_list('date', flat=True).first(),
+                InventoryAdjustment.objects.order_by('adjusted_at').values_list('adjusted_at', flat=True).first(),
+            ) if value is not None
+        ]
+        if not firsts:
+            return []
+
+        month = month_start(min(firsts).date())
+        if until is not None:
+            # Los ya archivados conservan solo sus ventas a crédito
+            month = max(month, until)
+        months = []
+        while month < before:
+            months.append(month)
+            month = next_month(month)
+        return months
+
+    @staticmethod
+    def prepare():
+        """Crea o actualiza el esquema de la base de archivo"""
+        from django.core.management import call_command
+
+        call_command('migrate', database=ARCHIVE_DB, verbosity=0, interactive=False)
+
+    @staticmethod
+    def querysets(month):
+        """
+        Filas de la base principal que archiva `month`
+
+        Returns:
+            dict: sales, sale_items, adjustments, history (querysets)
+        """
+        from django.db.models import OuterRef, Subquery
+        from inventory.models import InventoryAdjustment, Product
+        from sales.models import Sale, SaleItem
+
+        start, end = month_start(month), next_month(month)
+        sales = Sale.objects.filter(
+            date__date__gte=start, date__date__lt=end, is_credit=False, credit__isnull=True,
+        )
+        History = Product.history.model
+        # La última fila de cada producto antes del corte se queda
+        latest = History.objects.filter(
+            id=OuterRef('id'), history_date__date__lt=end,
+        ).order_by('-history_date', '-history_id').values('history_id')[:1]
+        return {
+            'sales': sales,
+            'sale_items': SaleItem.objects.filter(sale__in=sales),
+            'adjustments': InventoryAdjustment.objects.filter(
+                adjusted_at__date__gte=start, adjusted_at__date__lt=end,
+            ),
+            'history': History.objects.filter(history_date__date__lt=end).exclude(
+                history_id=Subquery(latest)
+            ),
+        }
+
+    @staticmethod
+    def archive_month(month) -> dict:
+        """
+        Mueve un mes a la base de archivo y deja sus resúmenes
+
+        Returns:
+            dict: Filas archivadas por tipo (sales, sale_items, adjustments, history)
+        """
+        from inventory.services import StockHistoryService, StockLedgerService
+        from sales.models import Sale, SaleItem
+        from utils.models import ArchivedMonth
+        from utils.versions import TableVersions
+
+        month = month_start(month)
+        querysets = ArchiveService.querysets(month)
+
+        # Stock exacto al cierre de cada día sin leer los ajustes archivados
+        for day in ArchiveService._days(querysets['adjustments'], 'adjusted_at'):
+            StockLedgerService.checkpoint(StockHistoryService.day_end(day))
+
+        counts = {name: queryset.count() for name, queryset in querysets.items()}
+        ArchiveService._copy(querysets)
+
+        with transaction.atomic(using=DEFAULT_DB):
+            ArchiveService._summarize(querysets)
+            # Un DELETE por tabla: con delete() el collector cargaría cada
+            # venta e ítem para sus post_delete (TableVersions). Los ítems
+            # primero, su queryset se filtra por las ventas
+            for name in ('sale_items', 'sales', 'adjustments', 'history'):
+                querysets[name]._raw_delete(using=DEFAULT_DB)
+            ArchivedMonth.objects.update_or_create(month=month, defaults={
+                'sales': counts['sales'],
+                'sale_items': counts['sale_items'],
+                'adjustments': counts['adjustments'],
+                'history_rows': counts['history'],
+            })
+
+        # En lugar de las señales de cada fila: todo el mes es de antes de hoy
+        for model in (Sale, SaleItem):
+            TableVersions.bump(model, month)
+
+        logger.info("Month archived", extra={'month': month.isoformat(), **counts})
+        return counts
+
+    @staticmethod
+    def archive(before=None) -> list:
+        """
+        Archiva en orden todos los meses anteriores a `before` (default: horizon())
+
+        Returns:
+            list: (mes, conteos) de cada mes archivado
+        """
+        ArchiveService.prepare()
+        return [
+            (month, ArchiveService.archive_month(month))
+            for month in ArchiveService.pending_months(before)
+        ]
+
+    # --- Copia ---
+
+    @staticmethod
+    def _days(queryset, field):
+        from django.db.models.functions import TruncDate
+
+        return list(
+            queryset.annotate(day=TruncDate(field)).order_by('day')
+            .values_list('day', flat=True).distinct()
+        )
+
+    @staticmethod
+    def _copy(querysets):
+        """Copia las filas (y las que referencian) a la base de archivo"""
+        from accounts.models import User
+        from customers.models import Customer
+        from inventory.models import Category, Product, ProductCombo
+
+        sales, items = querysets['sales'], querysets['sale_items']
+        adjustments, history = querysets['adjustments'], querysets['history']
+
+        product_ids = set(items.exclude(product=None).values_list('product_id', flat=True))
+        product_ids |= set(adjustments.values_list('product_id', flat=True))
+        user_ids = set(sales.values_list('user_id', flat=True))
+        user_ids |= set(adjustments.values_list('adjusted_by_id', flat=True))
+        user_ids |= set(history.exclude(history_user=None).values_list('history_user_id', flat=True))
+
+        dimensions = (
+            (User, User.objects.filter(pk__in=user_ids)),
+            (Customer, Customer.objects.filter(pk__in=sales.exclude(customer=None).values('customer_id'))),
+            (Category, Category.objects.filter(pk__in=Product.objects.filter(
+                pk__in=product_ids).exclude(category=None).values('category_id'))),
+            (Product, Product.objects.filter(pk__in=product_ids)),
+            (ProductCombo, ProductCombo.objects.filter(pk__in=items.exclude(combo=None).values('combo_id'))),
+        )
+        with transaction.atomic(using=ARCHIVE_DB):
+            for model, queryset in dimensions:
+                ArchiveService._upsert(model, queryset)
+            for queryset in (sales, items, adjustments, history):
+                ArchiveService._insert(queryset)
+
+    @staticmethod
+    def _batches(queryset):
+        batch = []
+        for obj in queryset.order_by('pk').iterator(chunk_size=COPY_BATCH):
+            batch.append(obj)
+            if len(batch) == COPY_BATCH:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _upsert(model, queryset):
+        """Inserta o refresca (nombres, precios) filas de referencia"""
+        from accounts.models import User
+
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        for batch in ArchiveService._batches(queryset):
+            if model is User:
+                for user in batch:
+                    user.password = '!'
+            ArchiveService._write(
+                model, batch, on_conflict=OnConflict.UPDATE,
+                update_fields=fields, unique_fields=[model._meta.pk],
+            )
+
+    @staticmethod
+    def _insert(queryset):
+        """Inserta las filas que falten (un reintento no duplica nada)"""
+        for batch in ArchiveService._batches(queryset):
+            ArchiveService._write(queryset.model, batch, on_conflict=OnConflict.IGNORE)
+
+    @staticmethod
+    def _write(model, batch, **conflict):
+        # El INSERT de bulk_create sin pre_save (raw, como loaddata): los
+        # auto_now_add (Sale.date, adjusted_at...) no toman la hora actual
+        fields = model._meta.concrete_fields
+        size = connections[ARCHIVE_DB].ops.bulk_batch_size(fields, batch)
+        for start in range(0, len(batch), size):
+            model._base_manager.using(ARCHIVE_DB)._insert(
+                batch[start:start + size], fields=fields, raw=True, using=ARCHIVE_DB, **conflict,
+            )
+
+    # --- Resúmenes ---
+
+    @staticmethod
+    def _summarize(querysets):
+        """Resúmenes por día de lo que se archiva (se suman a los que ya haya)"""
+        from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+        from django.db.models.functions import TruncDate
+        from inventory.models import AdjustmentDaySummary
+        from inventory.services import StockHistoryService
+        from sales.models import SaleDaySummary, SaleItemDaySummary
+
+        sales = querysets['sales'].annotate(day=TruncDate('date')).order_by().values('day').annotate(
+            sales_count=Count('id'), total_bs=Sum('total_bs'), total_usd=Sum('total_usd'),
+        )
+        ArchiveService._accumulate(SaleDaySummary, ['day'], [
+            SaleDaySummary(**row) for row in sales
+        ], ['sales_count', 'total_bs', 'total_usd'])
+
+        revenue = ExpressionWrapper(
+            F('quantity') * F('price_usd'), output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        items = querysets['sale_items'].exclude(product=None).annotate(
+            day=TruncDate('sale__date'),
+        ).order_by().values('day', 'product_id').annotate(
+            quantity_sum=Sum('quantity'), revenue_usd=Sum(revenue), lines=Count('id'),
+        )
+        ArchiveService._accumulate(SaleItemDaySummary, ['day', 'product_id'], [
+            SaleItemDaySummary(
+                day=row['day'], product_id=row['product_id'], quantity=row['quantity_sum'],
+                revenue_usd=row['revenue_usd'], lines=row['lines'],
+            )
+            for row in items
+        ], ['quantity', 'revenue_usd', 'lines'])
+
+        adjustments = querysets['adjustments'].annotate(
+            day=TruncDate('adjusted_at'),
+        ).order_by().values('day', 'product_id', 'source').annotate(
+            **StockHistoryService.movement_aggregates()
+        )
+        ArchiveService._accumulate(AdjustmentDaySummary, ['day', 'product_id', 'source'], [
+            AdjustmentDaySummary(**row) for row in adjustments
+        ], ['movements', 'entries', 'exits', 'net'])
+
+    @staticmethod
+    def _accumulate(model, keys, rows, fields):
+        """bulk_create de `rows` sumando a la fila existente con las mismas `keys`"""
+        if not rows:
+            return
+        existing = {}
+        lookup = {f'{keys[0]}__in': {getattr(row, keys[0]) for row in rows}}
+        for current in model.objects.filter(**lookup):
+            existing[tuple(getattr(current, key) for key in keys)] = current
+
+        new, changed = [], []
+        for row in rows:
+            current = existing.get(tuple(getattr(row, key) for key in keys))
+            if current is None:
+                new.append(row)
+                continue
+            for field in fields:
+                setattr(current, field, getattr(current, field) + (getattr(row, field) or Decimal('0')))
+            changed.append(current)
+        model.objects.bulk_create(new, batch_size=500)
+        if changed:
+            model.objects.bulk_update(changed, fields, batch_size=500)
@@ -0,0 +1,195 @@
+# utils/autocomplete.py - CAMPOS DE AUTOCOMPLETADO PARA CLAVES FORÁNEAS
+
+"""
+Reemplazo de <select> para catálogos grandes (productos, proveedores, clientes)
+
+Un Select de Django renderiza todo el queryset como <option>; en un formset
+eso se repite por fila. AutocompleteSelect renderiza solo un <input hidden>
+con el pk y un cuadro de texto que consulta la API de búsqueda correspondiente.
+
+Al validar, AutocompleteModelChoiceField busca solo el pk recibido. Dentro de
+un formset con AutocompleteFormSetMixin todas las filas se validan con un
+único in_bulk() en vez de una consulta por fila.
+"""
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.template.loader import render_to_string
+
+
+class AutocompleteSelect(forms.Widget):
+    """
+    Widget: input oculto con el pk + cuadro de búsqueda (static/js/autocomplete.js)
+
+    Args:
+        url: Endpoint de búsqueda; recibe ?q=...&limit=...
+        results_key: Clave de la lista en el JSON ('products', 'customers', ...)
+        detail_key: Campo secundario a mostrar en cada sugerencia (opcional)
+        placeholder: Texto del cuadro de búsqueda
+    """
+
+    template_name = 'widgets/autocomplete.html'
+
+    def __init__(self, url, results_key, detail_key='', placeholder='Buscar...', attrs=None):
+        super().__init__(attrs)
+        self.url = url
+        self.results_key = results_key
+        self.detail_key = detail_key
+        self.placeholder = placeholder
+        # ModelChoiceField asigna aquí su iterador; da acceso al campo
+        self.choices = ()
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        field = getattr(self.choices, 'field', None)
+        label = ''
+        if field is not None and value not in field.empty_values:
+            label = field.label_for_value(value)
+        context['widget'].update({
+            'url': self.url,
+            'results_key': self.results_key,
+            'detail_key': self.detail_key,
+            'placeholder': self.placeholder,
+            'label': label,
+        })
+        return context
+
+    def render(self, name, value, attrs=None, renderer=None):
+        # Se usa el motor del proyecto (templates/) en vez del form renderer
+        context = self.get_context(name, value, attrs)
+        return render_to_string(self.template_name, context)
+
+    def format_value(self, value):
+        if value in (None, ''):
+            return ''
+        return str(value)
+
+
+class AutocompleteModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField que nunca itera el queryset completo
+
+    - Validación: una consulta por pk, o ninguna si el formset ya precargó
+      las filas en `cache`
+    - Render: solo se busca la etiqueta del valor seleccionado
+    """
+
+    def __init__(self, queryset, *, url, results_key, detail_key='', placeholder='Buscar...',
+                 attrs=None, **kwargs):
+        kwargs.setdefault('widget', AutocompleteSelect(
+            url=url, results_key=results_key, detail_key=detail_key,
+            placeholder=placeholder, attrs=attrs,
+        ))
+        super().__init__(queryset, **kwargs)
+        self.cache = None
+
+    def __deepcopy__(self, memo):
+        result = super().__deepcopy__(memo)
+        # Cada formulario empieza sin precarga; el formset comparte la suya
+        result.cache = None
+        return result
+
+    def _cache_key(self, value):
+        """Valor recibido convertido al tipo del campo clave (None si no es válido)"""
+        opts = self.queryset.model._meta
+        key_field = opts.get_field(self.to_field_name) if self.to_field_name else opts.pk
+        try:
+            return key_field.to_python(value)
+        except ValidationError:
+            return None
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            return value
+        if self.cache is not None:
+            obj = self.cache.get(self._cache_key(value))
+            if obj is None:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': value},
+                )
+            return obj
+        return super().to_python(value)
+
+    def label_for_value(self, value):
+        """Texto a mostrar en el cuadro de búsqueda para el valor actual"""
+        if isinstance(value, self.queryset.model):
+            return self.label_from_instance(value)
+        key = self._cache_key(value)
+        if key is None:
+            return ''
+        if self.cache is not None:
+            obj = self.cache.get(key)
+        else:
+            obj = self.queryset.filter(**{self.to_field_name or 'pk': key}).first()
+        return self.label_from_instance(obj) if obj is not None else ''
+
+
+class AutocompleteModelFormMixin:
+    """
+    ModelForm: el modelo no vuelve a validar las FK con autocompletado
+
+    Model.full_clean() comprueba cada ForeignKey con un exists(); el campo
+    ya resolvió el objeto contra su queryset (más restrictivo), así que esa
+    consulta por fila sobra.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        for name, field in self.fields.items():
+            if isinstance(field, AutocompleteModelChoiceField):
+                exclude.add(name)
+        return exclude
+
+
+class AutocompleteFormSetMixin:
+    """
+    Mixin para formsets: precarga en un solo in_bulk() los objetos de todos
+    los campos AutocompleteModelChoiceField de todas las filas
+
+    Con datos (POST) se toman los pks enviados; sin datos, los de las filas
+    existentes. La precarga se comparte entre los formularios del formset.
+    """
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        for name, field in form.fields.items():
+            if isinstance(field, AutocompleteModelChoiceField):
+                field.cache = self._autocomplete_cache(name, field)
+        return form
+
+    def _autocomplete_cache(self, name, field):
+        caches = self.__dict__.setdefault('_autocomplete_caches', {})
+        if name not in caches:
+            caches[name] = self._load_autocomplete_cache(name, field)
+        return caches[name]
+
+    def _load_autocomplete_cache(self, name, field):
+        if self.is_bound:
+            values = [
+                self.data.get(f'{self.add_prefix(i)}-{name}')
+                for i in range(self.total_form_count())
+            ]
+        elif hasattr(self, 'get_queryset'):
+            # get_queryset() ya se evalúa para construir las filas: se reutiliza
+            attname = self.model._meta.get_field(name).attname
+            values = [getattr(obj, attname) for obj in self.get_queryset()]
+        else:
+            values = [initial.get(name) for initial in (self.initial or [])]
+
+        keys = set()
+        for value in values:
+            if isinstance(value, field.queryset.model):
+                value = value.pk
+            if value in field.empty_values:
+                continue
+            key = field._cache_key(value)
+            if key is not None:
+                keys.add(key)
+
+        if not keys:
+            return {}
+        return field.queryset.in_bulk(list(keys), field_name=field.to_field_name or 'pk')
@@ -0,0 +1,145 @@
+# utils/concurrency.py - CONTROL DE CONCURRENCIA OPTIMISTA
+
+"""
+En SQLite select_for_update() no bloquea nada: dos transacciones que leen
+la misma fila y la guardan se pisan sin error. OptimisticLockModel agrega
+una columna row_version y convierte cada save() de una fila existente en
+un compare-and-swap:
+
+    UPDATE ... SET ..., row_version = v + 1 WHERE id = X AND row_version = v
+
+Si otra transacción guardó la fila desde que se leyó, el UPDATE no toca
+ninguna fila y se lanza ConcurrentUpdateError en vez de sobrescribir.
+
+retry_on_conflict repite la operación completa (leer, validar y escribir)
+en una transacción nueva cuando hay conflicto. En SQLite el conflicto
+también llega como "database is locked" (la transacción que quiere
+escribir con una lectura vieja), y se reintenta igual.
+
+Los UPDATE en lote (update(), bulk_update()) no pasan por save(): quien
+los use debe comprobar y subir row_version por su cuenta (ver
+OptimisticLockModel.claim_versions y ProductService.bulk_save).
+"""
+
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, models, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentUpdateError(DatabaseError):
+    """Otra transacción modificó (o borró) la fila desde que se leyó"""
+
+    def __init__(self, model, pks):
+        self.model = model
+        self.pks = sorted(pks)
+        label = model._meta.verbose_name
+        ids = ', '.join(f'#{pk}' for pk in self.pks)
+        super().__init__(
+            f'{label} {ids} fue modificado por otro usuario mientras se guardaba. '
+            'Vuelve a intentarlo.'
+        )
+
+
+class OptimisticLockModel(models.Model):
+    """Modelo abstracto: save() solo escribe si row_version no cambió"""
+
+    row_version = models.PositiveIntegerField(default=0, editable=False, verbose_name="Versión")
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        version_field = self._meta.get_field('row_version')
+        expected = self.row_version
+        # row_version siempre se escribe, aunque update_fields no lo incluya
+        values = [value for value in values if value[0] is not version_field]
+        values.append((version_field, None, expected + 1))
+        if base_qs.filter(pk=pk_val, row_version=expected)._update(values) > 0:
+            self._set_row_version(expected + 1)
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConcurrentUpdateError(type(self), [pk_val])
+        # La fila no existe: save() sigue con el INSERT como siempre
+        return False
+
+    def _set_row_version(self, value):
+        self.row_version = value
+        # DirtyFieldsMixin: la versión nueva es la que está en la base
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None:
+            loaded['row_version'] = value
+
+    @classmethod
+    def claim_versions(cls, objs):
+        """
+        Compare-and-swap para UPDATE en lote, dentro de una transacción
+
+        Comprueba con las filas bloqueadas que `objs` siguen en la versión
+        leída y les sube row_version en memoria; el bulk_update() posterior
+        debe incluir 'row_version' en sus campos.
+
+        Raises:
+            ConcurrentUpdateError: Con las filas modificadas o borradas
+        """
+        expected = {obj.pk: obj.row_version for obj in objs}
+        current = dict(
+            cls._base_manager.select_for_update()
+            .filter(pk__in=expected).values_list('pk', 'row_version')
+        )
+        changed = [pk for pk, version in expected.items() if current.get(pk) != version]
+        if changed:
+            raise ConcurrentUpdateError(cls, changed)
+        for obj in objs:
+            obj._set_row_version(obj.row_version + 1)
+
+
+def is_conflict(exc):
+    """Si `exc` es un conflicto de escritura que vale la pena reintentar"""
+    if isinstance(exc, ConcurrentUpdateError):
+        return True
+    return isinstance(exc, OperationalError) and 'database is locked' in str(exc)
+
+
+def retry_on_conflict(func=None, *, attempts=None, backoff=0.02):
+    """
+    Decorador: repite `func` si falla por un conflicto de escritura
+
+    `func` debe abrir su propia transacción y volver a leer lo que modifica
+    (cada intento empieza de cero). Si se llama dentro de una transacción
+    no reintenta: los datos leídos antes siguen en ella, así que el
+    conflicto sube hasta quien la abrió.
+
+    Args:
+        attempts: Intentos en total (default CONFLICT_RETRY_ATTEMPTS)
+        backoff: Espera base en segundos; se duplica en cada intento, con
+            variación aleatoria para que las cajas no choquen otra vez
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if transaction.get_connection().in_atomic_block:
+                return func(*args, **kwargs)
+            limit = attempts or getattr(settings, 'CONFLICT_RETRY_ATTEMPTS', 3)
+            for attempt in range(1, limit + 1):
+                try:
+                    return func(*args, **kwargs)
+                except DatabaseError as exc:
+                    if attempt == limit or not is_conflict(exc):
+                        raise
+                    logger.info("Write conflict, retrying", extra={
+                        'operation': func.__qualname__,
+                        'attempt': attempt,
+                        'error': str(exc),
+                    })
+                    time.sleep(random.uniform(0, backoff * 2 ** (attempt - 1)))
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,87 @@
+# utils/dirty.py - GUARDADOS DE SOLO LOS CAMPOS MODIFICADOS
+
+"""
+DirtyFieldsMixin recuerda los valores con los que se cargó (o guardó por
+última vez) cada instancia. Un save() sin update_fields de una fila ya
+existente escribe solo los campos que cambiaron desde entonces (más los
+auto_now) y no escribe nada si no cambió ninguno: ni UPDATE, ni historial,
+ni señales.
+
+Los modelos que sobrescriben save() deben tener el mixin antes de
+models.Model: la comparación se hace en su super().save(), después de los
+campos que el propio save() calcula.
+
+Los valores se comparan con ==: un valor mutable modificado en el lugar
+(p. ej. un dict de un JSONField) no se detecta; en ese caso se pasa
+update_fields explícito.
+"""
+
+
+class DirtyFieldsMixin:
+    """Mixin de modelo: save() con update_fields = campos modificados"""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_dirty_fields(self):
+        """
+        Campos modificados desde la carga o el último guardado
+
+        Returns:
+            set de nombres de campo; None si la instancia no se cargó de la
+            base de datos (no hay con qué comparar)
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or self._state.adding or self.pk is None:
+            return None
+        dirty = set()
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if field.attname not in loaded or self.__dict__[field.attname] != loaded[field.attname]:
+                dirty.add(field.name)
+        return dirty
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not kwargs.get('force_update')
+        ):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if not dirty:
+                    return
+                auto_now = {
+                    field.name for field in self._meta.concrete_fields
+                    if getattr(field, 'auto_now', False)
+                }
+                kwargs['update_fields'] = dirty | auto_now
+        super().save(*args, **kwargs)
+        self._remember_saved(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_saved(fields)
+
+    def _remember_saved(self, field_names=None):
+        """Toma los valores actuales como los guardados en la base"""
+        if field_names is None:
+            fields = self._meta.concrete_fields
+            self._loaded_values = {}
+        else:
+            fields = [self._meta.get_field(name) for name in field_names]
+            if getattr(self, '_loaded_values', None) is None:
+                # Sin valores de carga no se sabe el resto de la fila
+                return
+        for field in fields:
+            value = self.__dict__.get(field.attname, field)
+            if value is field or hasattr(value, 'resolve_expression'):
+                # Diferido, o F() cuyo resultado solo conoce la base
+                self._loaded_values.pop(field.attname, None)
+            else:
+                self._loaded_values[field.attname] = value
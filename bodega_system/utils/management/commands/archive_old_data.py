@@ -0,0 +1,47 @@
+# utils/management/commands/archive_old_data.py
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.archive import ArchiveService
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a la base de archivo las ventas, ajustes e historial de '
+        'productos de los meses más viejos que ARCHIVE_HORIZON_MONTHS y deja '
+        'sus resúmenes por día en la base principal. Pensado para cron mensual'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Archivar los meses anteriores a AAAA-MM; default: el horizonte')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se archivaría')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            try:
+                before = datetime.strptime(options['before'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('Mes inválido; use AAAA-MM')
+
+        if options['dry_run']:
+            for month in ArchiveService.pending_months(before):
+                counts = {
+                    name: queryset.count()
+                    for name, queryset in ArchiveService.querysets(month).items()
+                }
+                self.stdout.write(self._line(month, counts))
+            return
+
+        archived = ArchiveService.archive(before)
+        for month, counts in archived:
+            self.stdout.write(self._line(month, counts))
+        self.stdout.write(self.style.SUCCESS(f'Meses archivados: {len(archived)}'))
+
+    def _line(self, month, counts):
+        return (
+            f"{month:%Y-%m}: {counts['sales']} ventas, {counts['sale_items']} ítems, "
+            f"{counts['adjustments']} ajustes, {counts['history']} filas de historial"
+        )
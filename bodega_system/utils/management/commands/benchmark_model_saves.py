@@ -0,0 +1,102 @@
+# utils/management/commands/benchmark_model_saves.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from customers.models import Customer, CustomerCredit
+from inventory.models import Category, Product
+from sales.models import Sale
+from suppliers.models import Supplier, SupplierOrder
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide lo que escribe un save() en los caminos frecuentes (línea de '
+        'venta, recepción de orden, crédito pagado): fila completa contra '
+        'solo los campos modificados. Todo se revierte al terminar.'
+    )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_superuser=True).first() \
+            or get_user_model().objects.first()
+        if user is None:
+            self.stdout.write(self.style.WARNING('Se necesita al menos un usuario'))
+            return
+
+        cases = (
+            ('Product (venta)', self._product, self._sell),
+            ('SupplierOrder (recepción)', self._order, self._receive),
+            ('CustomerCredit (pago FIFO)', self._credit, self._pay),
+        )
+        self.stdout.write(f"{'save()':<28}{'modo':<12}{'columnas':>9}{'filas':>7}{'bytes SQL':>11}")
+        with transaction.atomic():
+            for name, make, change in cases:
+                for mode in ('completo', 'modificados'):
+                    instance = self._reload(make(user))
+                    change(instance)
+                    columns, rows, size = self._measure(instance, full=mode == 'completo')
+                    self.stdout.write(f'{name:<28}{mode:<12}{columns:>9}{rows:>7}{size:>11}')
+            transaction.set_rollback(True)
+
+    def _reload(self, instance):
+        # Cargada de la base, como en las vistas y servicios
+        return type(instance).objects.get(pk=instance.pk)
+
+    def _measure(self, instance, full):
+        kwargs = {}
+        if full:
+            # Lo que escribía un save() sin update_fields: toda la fila
+            kwargs['update_fields'] = [
+                field.name for field in instance._meta.concrete_fields if not field.primary_key
+            ]
+        with CaptureQueriesContext(connection) as ctx:
+            instance.save(**kwargs)
+        writes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(WRITES)]
+        table = instance._meta.db_table
+        update = next(sql for sql in writes if sql.startswith(f'UPDATE "{table}"'))
+        columns = update.split(' WHERE ')[0].count(' = ')
+        return columns, len(writes), sum(len(sql.encode()) for sql in writes)
+
+    def _product(self, user):
+        category = Category.objects.get_or_create(name='Bench saves')[0]
+        return Product.objects.create(
+            name='Bench saves', barcode=f'BSAVE{Product.objects.count():06d}', category=category,
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'), stock=Decimal('100'),
+        )
+
+    def _sell(self, product):
+        product.stock -= 1
+
+    def _order(self, user):
+        supplier = Supplier.objects.get_or_create(name='Bench saves')[0]
+        return SupplierOrder.objects.create(
+            supplier=supplier, created_by=user, total_usd=Decimal('50'),
+            total_bs=Decimal('2000'), exchange_rate_used=Decimal('40'),
+        )
+
+    def _receive(self, order):
+        order.status = 'received'
+        order.received_date = timezone.now()
+
+    def _credit(self, user):
+        customer = Customer.objects.get_or_create(name='Bench saves')[0]
+        sale = Sale.objects.create(
+            user=user, customer=customer, total_usd=Decimal('10'), total_bs=Decimal('400'),
+            exchange_rate_used=Decimal('40'), payment_method='cash', is_credit=True,
+        )
+        return CustomerCredit.objects.create(
+            customer=customer, sale=sale, amount_usd=Decimal('10'), amount_bs=Decimal('400'),
+            exchange_rate_used=Decimal('40'), date_due=date.today() + timedelta(days=30),
+        )
+
+    def _pay(self, credit):
+        credit.is_paid = True
+        credit.date_paid = timezone.now()
@@ -0,0 +1,25 @@
+# utils/management/commands/sqlite_analyze.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.sqlite import SqliteMaintenanceService
+
+
+class Command(BaseCommand):
+    help = (
+        'Actualiza las estadísticas de SQLite (ANALYZE) para que el '
+        'planificador elija bien los índices. Pensado para cron semanal y '
+        'después de cargas grandes o de archive_old_data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de settings.DATABASES')
+
+    def handle(self, *args, **options):
+        try:
+            SqliteMaintenanceService.check_database(options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        SqliteMaintenanceService.analyze(options['database'])
+        self.stdout.write(self.style.SUCCESS('Estadísticas actualizadas'))
@@ -0,0 +1,33 @@
+# utils/management/commands/sqlite_checkpoint.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.sqlite import SqliteMaintenanceService
+
+
+class Command(BaseCommand):
+    help = (
+        'Pasa el WAL de SQLite a la base (wal_checkpoint) para que no crezca '
+        'sin límite cuando siempre hay algún lector. Pensado para cron cada '
+        'pocas horas, fuera del horario de ventas con TRUNCATE'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de settings.DATABASES')
+        parser.add_argument(
+            '--mode', default='TRUNCATE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+            help='PASSIVE no espera a lectores ni escritores; TRUNCATE deja el WAL en cero (default)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            SqliteMaintenanceService.check_database(options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        result = SqliteMaintenanceService.checkpoint(options['database'], options['mode'])
+        message = f"Páginas en el WAL: {result['wal_pages']}, pasadas a la base: {result['checkpointed']}"
+        if result['busy']:
+            self.stdout.write(self.style.WARNING(f'{message} (incompleto: había transacciones abiertas)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,29 @@
+# utils/management/commands/sqlite_integrity_check.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.sqlite import SqliteMaintenanceService
+
+
+class Command(BaseCommand):
+    help = (
+        'Verifica la base SQLite (integrity_check y claves foráneas). Sale '
+        'con error si encuentra problemas, para alertar desde cron'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de settings.DATABASES')
+        parser.add_argument('--quick', action='store_true', help='quick_check: sin revisar índices, más rápido')
+
+    def handle(self, *args, **options):
+        try:
+            SqliteMaintenanceService.check_database(options['database'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        problems = SqliteMaintenanceService.integrity_check(options['database'], options['quick'])
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(problem))
+        if problems:
+            raise CommandError(f'Problemas encontrados: {len(problems)}')
+        self.stdout.write(self.style.SUCCESS('Base íntegra'))
@@ -0,0 +1,36 @@
+# utils/management/commands/sqlite_vacuum.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.sqlite import SqliteMaintenanceService
+
+
+class Command(BaseCommand):
+    help = (
+        'Devuelve al disco las páginas libres de SQLite (incremental_vacuum), '
+        'por ejemplo después de archive_old_data. La primera vez necesita '
+        '--enable: activa auto_vacuum=INCREMENTAL con un VACUUM completo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de settings.DATABASES')
+        parser.add_argument('--pages', type=int, help='Máximo de páginas a liberar; default: todas')
+        parser.add_argument(
+            '--enable', action='store_true',
+            help='Activar auto_vacuum=INCREMENTAL si falta (VACUUM completo: bloquea la base)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            SqliteMaintenanceService.check_database(options['database'])
+            result = SqliteMaintenanceService.incremental_vacuum(
+                options['database'], options['pages'], options['enable'],
+            )
+        except ValueError as exc:
+            raise CommandError(f'{exc}; use --enable')
+
+        if result['enabled']:
+            self.stdout.write('auto_vacuum=INCREMENTAL activado (VACUUM completo)')
+        self.stdout.write(self.style.SUCCESS(
+            f"Páginas libres: {result['free_before']} -> {result['free_after']}"
+        ))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('utils', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True, verbose_name='Mes')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archivado el')),
+                ('sales', models.PositiveIntegerField(default=0, verbose_name='Ventas')),
+                ('sale_items', models.PositiveIntegerField(default=0, verbose_name='Ítems de Venta')),
+                ('adjustments', models.PositiveIntegerField(default=0, verbose_name='Ajustes')),
+                ('history_rows', models.PositiveIntegerField(default=0, verbose_name='Filas de Historial')),
+            ],
+            options={
+                'verbose_name': 'Mes Archivado',
+                'verbose_name_plural': 'Meses Archivados',
+                'ordering': ['-month'],
+            },
+        ),
+    ]
@@ -90,4 +90,26 @@ class Backup(models.Model):
         ordering = ['-date']
     
     def __str__(self):
-        return f"Respaldo del {self.date}"
\ No newline at end of file
+        return f"Respaldo del {self.date}"
+
+class ArchivedMonth(models.Model):
+    """
+    Mes cuyas ventas, ajustes e historial viejos ya están en la base de archivo
+
+    Los meses se archivan en orden, así que el siguiente al último es desde
+    donde todo sigue en la base principal (ver utils/archive.py).
+    """
+    month = models.DateField(unique=True, verbose_name="Mes")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archivado el")
+    sales = models.PositiveIntegerField(default=0, verbose_name="Ventas")
+    sale_items = models.PositiveIntegerField(default=0, verbose_name="Ítems de Venta")
+    adjustments = models.PositiveIntegerField(default=0, verbose_name="Ajustes")
+    history_rows = models.PositiveIntegerField(default=0, verbose_name="Filas de Historial")
+
+    class Meta:
+        verbose_name = "Mes Archivado"
+        verbose_name_plural = "Meses Archivados"
+        ordering = ['-month']
+
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.sales} ventas, {self.adjustments} ajustes"
@@ -0,0 +1,195 @@
+# utils/pagination.py - PAGINACIÓN POR CURSOR (KEYSET)
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """El cursor recibido en la URL no se puede decodificar"""
+
+
+def encode_cursor(date_value, pk, total=None):
+    """
+    Codifica la posición (fecha, id) del último registro en un token opaco
+
+    El token es JSON en base64 url-safe sin relleno, para que viaje limpio
+    en la query string. Si se conoce el total estimado, viaja en el mismo
+    token para no volver a contarlo en las páginas siguientes.
+    """
+    payload = {'d': date_value.isoformat(), 'i': pk}
+    if total is not None:
+        payload['t'] = total
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decodifica un token generado por encode_cursor()
+
+    Returns:
+        Tupla (fecha, id, total) — total es None si no viajaba en el token
+
+    Raises:
+        InvalidCursor: Si el token está corrupto o fue manipulado
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date_value = datetime.fromisoformat(payload['d'])
+        pk = int(payload['i'])
+        total = payload.get('t')
+        if total is not None:
+            total = int(total)
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError) as exc:
+        raise InvalidCursor(f"Cursor inválido: {token!r}") from exc
+    return date_value, pk, total
+
+
+class KeysetPage:
+    """
+    Página de resultados de KeysetPaginator
+
+    Es iterable igual que el Page de Django, así que los templates que hacen
+    `{% for obj in page_obj %}` no cambian. Solo avanza hacia adelante: en vez
+    de números de página expone `next_cursor` y `is_first`.
+    """
+
+    def __init__(self, object_list, next_cursor, is_first, total=None, querydict=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+        self.total = total
+        self._querydict = querydict
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or not self.is_first
+
+    def _querystring(self, cursor):
+        params = self._querydict.copy() if self._querydict is not None else {}
+        for key in ('cursor', 'page', 'fragment'):
+            params.pop(key, None)
+        if cursor:
+            params['cursor'] = cursor
+        if hasattr(params, 'urlencode'):
+            return params.urlencode()
+        return urlencode(params)
+
+    @property
+    def next_query(self):
+        """Query string (con los filtros actuales) de la página siguiente"""
+        return self._querystring(self.next_cursor) if self.has_next else ''
+
+    @property
+    def first_query(self):
+        """Query string (con los filtros actuales) de la primera página"""
+        return self._querystring(None)
+
+
+class KeysetPaginator:
+    """
+    Paginador por cursor sobre el orden (-fecha, -id)
+
+    A diferencia de django.core.paginator.Paginator no usa OFFSET ni cuenta
+    la tabla en cada página: filtra por "estrictamente anterior al último
+    registro visto", así que la página N cuesta lo mismo que la primera
+    (un rango sobre el índice de fecha).
+
+    Args:
+        queryset: QuerySet ya filtrado (el orden se reemplaza)
+        per_page: Registros por página
+        date_field: Campo de fecha que define el orden descendente
+        with_total: Si es True se cuenta el total en la primera página y
+            se propaga dentro del cursor (valor estimado: no incluye
+            registros creados después de abrir el listado)
+    """
+
+    def __init__(self, queryset, per_page=20, date_field='date', with_total=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.date_field = date_field
+        self.with_total = with_total
+
+    def get_page(self, cursor=None, querydict=None):
+        """
+        Devuelve la página que sigue a `cursor` (o la primera si es None)
+
+        Un cursor inválido se trata como primera página, igual que
+        Paginator.get_page() tolera números de página inválidos.
+        """
+        position = None
+        total = None
+        if cursor:
+            try:
+                date_value, pk, total = decode_cursor(cursor)
+                position = (date_value, pk)
+            except InvalidCursor:
+                position = None
+                total = None
+
+        queryset = self.queryset.order_by(f'-{self.date_field}', '-pk')
+
+        if position is None and self.with_total:
+            total = queryset.count()
+
+        if position is not None:
+            date_value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__lt': date_value}) |
+                Q(**{self.date_field: date_value, 'pk__lt': pk})
+            )
+
+        # Un registro extra indica si hay página siguiente sin contar
+        rows = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            last = rows[-1]
+            next_cursor = encode_cursor(getattr(last, self.date_field), last.pk, total)
+
+        return KeysetPage(
+            rows,
+            next_cursor=next_cursor,
+            is_first=position is None,
+            total=total,
+            querydict=querydict,
+        )
+
+
+def paginate_keyset(request, queryset, per_page=20, date_field='date', with_total=False):
+    """Atajo para vistas: lee `cursor` de request.GET y conserva los filtros"""
+    paginator = KeysetPaginator(queryset, per_page, date_field=date_field, with_total=with_total)
+    return paginator.get_page(request.GET.get('cursor'), querydict=request.GET)
+
+
+def htmx_fragment(request):
+    """
+    Fragmento solicitado por un botón "Cargar más" de HTMX
+
+    Returns:
+        'rows' (filas de tabla), 'cards' (tarjetas móviles) o None si la
+        petición no es un "Cargar más" y debe renderizarse la página completa
+    """
+    fragment = request.GET.get('fragment')
+    if getattr(request, 'htmx', False) and fragment in ('rows', 'cards'):
+        return fragment
+    return None
@@ -0,0 +1,81 @@
+# utils/search.py - PIEZAS COMUNES DE LA BÚSQUEDA INDEXADA
+
+"""
+Utilidades compartidas por los buscadores de productos y clientes
+
+Cada app define su tabla FTS5 y sus triggers; aquí solo vive lo que no
+depende del modelo: partir la consulta en términos, armar la expresión
+MATCH y detectar si la tabla del índice existe.
+"""
+
+import logging
+import re
+
+from django.db import connections, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+# Máximo de palabras que se toman de la consulta
+MAX_TERMS = 8
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Tablas FTS5 detectadas: {(alias, tabla): bool}
+_fts_cache = {}
+
+
+def reset_fts_cache():
+    """Olvida qué tablas FTS5 existen (después de instalar o quitar un índice)"""
+    _fts_cache.clear()
+
+
+def search_terms(query):
+    """Palabras de la consulta, sin signos de puntuación ni operadores"""
+    return _TOKEN_RE.findall(query or '')[:MAX_TERMS]
+
+
+def build_match_expression(query):
+    """
+    Expresión MATCH de FTS5 con prefijo en cada palabra
+
+    Cada término va entre comillas para que la entrada del usuario nunca se
+    interprete como sintaxis de FTS5 (AND, OR, NEAR, columnas, ...).
+
+    Returns:
+        Cadena como '"harina"* "pan"*' o None si no hay términos
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def fts_table_exists(table, using):
+    """
+    Indica si la tabla FTS5 `table` existe en la base de datos `using`
+
+    El resultado se recuerda por proceso; install/uninstall de cada índice
+    llaman a reset_fts_cache().
+    """
+    key = (using, table)
+    if key in _fts_cache:
+        return _fts_cache[key]
+
+    connection = connections[using]
+    exists = False
+    if connection.vendor == 'sqlite':
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                    [table]
+                )
+                exists = cursor.fetchone() is not None
+        except DatabaseError as e:
+            logger.warning(
+                "No se pudo detectar el índice de búsqueda; se usa icontains",
+                extra={'table': table, 'error': str(e)}
+            )
+
+    _fts_cache[key] = exists
+    return exists
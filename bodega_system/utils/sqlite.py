@@ -0,0 +1,173 @@
+# utils/sqlite.py - PERFIL DE PRODUCCIÓN Y MANTENIMIENTO DE SQLITE
+
+"""
+Con el journal por defecto (DELETE) una escritura bloquea a todos los
+lectores y dos cajas que venden a la vez chocan con "database is locked".
+Cada conexión SQLite nueva recibe aquí los PRAGMA de settings.SQLITE_PRAGMAS:
+
+- journal_mode=WAL: los lectores (reportes) no esperan a los escritores
+- synchronous=NORMAL: en WAL no pierde consistencia, solo las últimas
+  transacciones ante un corte de luz, y evita un fsync por commit
+- busy_timeout: esperar el bloqueo de escritura en vez de fallar
+- mmap_size, cache_size, temp_store: lecturas y ordenamientos en memoria
+
+busy_timeout no cubre a una transacción que leyó y después quiere
+escribir cuando otra escribió entre medio: SQLite la rechaza de inmediato
+con "database is locked" y con varias cajas los reintentos de
+retry_on_conflict (utils/concurrency.py) se agotan. Por eso la base
+principal usa 'transaction_mode': 'IMMEDIATE' (settings.DATABASES): cada
+transacción toma el bloqueo de escritura al empezar y las demás esperan
+su turno (busy_timeout). Los lectores en autocommit no se bloquean.
+
+SqliteMaintenanceService agrupa lo que se corre por cron (ver los
+comandos sqlite_*): checkpoint del WAL, ANALYZE, VACUUM incremental y
+verificación de integridad.
+"""
+
+import logging
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Perfil si settings no define SQLITE_PRAGMAS
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,  # negativo: KiB (20 MB)
+    'temp_store': 'MEMORY',
+}
+
+
+def database_file_exists(using) -> bool:
+    """
+    Si la base del alias ya existe; conectar a un archivo que no existe lo
+    crearía vacío (las bases en memoria de los tests siempre existen)
+    """
+    name = str(connections[using].settings_dict['NAME'])
+    return name.startswith(('file:', ':memory:')) or os.path.exists(name)
+
+
+def apply_pragmas(connection, pragmas):
+    """Ejecuta cada PRAGMA en una conexión SQLite abierta"""
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created, dispatch_uid='utils_sqlite_profile')
+def _apply_profile(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    apply_pragmas(connection, getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS))
+
+
+class SqliteMaintenanceService:
+    """Service para el mantenimiento de una base SQLite (alias de settings.DATABASES)"""
+
+    @staticmethod
+    def check_database(using):
+        """
+        Valida el alias antes de conectar (ver database_file_exists)
+
+        Raises:
+            ValueError: Si el alias no existe, no es SQLite o su archivo no existe
+        """
+        if using not in connections.databases:
+            raise ValueError(f'La base {using} no está en settings.DATABASES')
+        settings_dict = connections[using].settings_dict
+        if settings_dict['ENGINE'] != 'django.db.backends.sqlite3':
+            raise ValueError(f'La base {using} no es SQLite')
+        if not database_file_exists(using):
+            raise ValueError(f"No existe el archivo {settings_dict['NAME']}")
+
+    @staticmethod
+    def _pragma(using, statement):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'PRAGMA {statement}')
+            return cursor.fetchall()
+
+    @staticmethod
+    def checkpoint(using='default', mode='TRUNCATE') -> dict:
+        """
+        Pasa el WAL a la base y (con TRUNCATE) lo deja en cero bytes
+
+        Returns:
+            dict: busy (1 si un lector impidió terminar), wal_pages, checkpointed
+        """
+        [(busy, wal_pages, checkpointed)] = SqliteMaintenanceService._pragma(
+            using, f'wal_checkpoint({mode})'
+        )
+        return {'busy': busy, 'wal_pages': wal_pages, 'checkpointed': checkpointed}
+
+    @staticmethod
+    def analyze(using='default'):
+        """ANALYZE: estadísticas de los índices para el planificador"""
+        with connections[using].cursor() as cursor:
+            cursor.execute('ANALYZE')
+        logger.info("SQLite analyzed", extra={'database': using})
+
+    @staticmethod
+    def free_pages(using='default') -> int:
+        return SqliteMaintenanceService._pragma(using, 'freelist_count')[0][0]
+
+    @staticmethod
+    def incremental_vacuum(using='default', pages=None, enable=False) -> dict:
+        """
+        Devuelve al disco páginas libres sin reescribir toda la base
+
+        Requiere auto_vacuum=INCREMENTAL; si la base no lo tiene, `enable`
+        lo activa con un VACUUM completo (una vez, bloquea la base mientras
+        dura). Sin `pages` se liberan todas.
+
+        Returns:
+            dict: free_before, free_after, enabled (si se hizo el VACUUM completo)
+        """
+        free_before = SqliteMaintenanceService.free_pages(using)
+        # 0 NONE, 1 FULL, 2 INCREMENTAL
+        [(auto_vacuum,)] = SqliteMaintenanceService._pragma(using, 'auto_vacuum')
+        enabled = False
+        if auto_vacuum != 2:
+            if not enable:
+                raise ValueError('La base no tiene auto_vacuum=INCREMENTAL')
+            SqliteMaintenanceService._pragma(using, 'auto_vacuum = INCREMENTAL')
+            with connections[using].cursor() as cursor:
+                cursor.execute('VACUUM')
+            enabled = True
+        # execute() del módulo sqlite3 corre un solo paso (una página);
+        # executescript() lo lleva hasta el final
+        statement = 'incremental_vacuum' if pages is None else f'incremental_vacuum({int(pages)})'
+        connection = connections[using]
+        connection.ensure_connection()
+        connection.connection.executescript(f'PRAGMA {statement};')
+        return {
+            'free_before': free_before,
+            'free_after': SqliteMaintenanceService.free_pages(using),
+            'enabled': enabled,
+        }
+
+    @staticmethod
+    def integrity_check(using='default', quick=False) -> list:
+        """
+        integrity_check (o quick_check) y foreign_key_check
+
+        Returns:
+            list: Problemas encontrados (vacía si la base está bien)
+        """
+        check = 'quick_check' if quick else 'integrity_check'
+        problems = [
+            message for (message,) in SqliteMaintenanceService._pragma(using, check)
+            if message != 'ok'
+        ]
+        # Sin claves foráneas activas (base de archivo) no se exigen
+        [(foreign_keys,)] = SqliteMaintenanceService._pragma(using, 'foreign_keys')
+        if foreign_keys:
+            for table, rowid, parent, _ in SqliteMaintenanceService._pragma(using, 'foreign_key_check'):
+                problems.append(f'{table} fila {rowid}: referencia inexistente en {parent}')
+        return problems
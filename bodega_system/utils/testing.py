@@ -0,0 +1,43 @@
+# utils/testing.py
+"""
+Fábricas de datos compartidas por los tests de las apps
+"""
+
+from decimal import Decimal
+
+
+def make_product(barcode, category='Pruebas', name=None, stock='10', cost='1.00', price='1.50', **fields):
+    """
+    Crea un producto con los campos mínimos
+
+    Args:
+        category: Category o nombre de la categoría (se crea si no existe)
+        fields: Otros campos del producto (min_stock, is_active, description...)
+    """
+    from inventory.models import Category, Product
+
+    if isinstance(category, str):
+        category, _ = Category.objects.get_or_create(name=category)
+    if 'min_stock' in fields:
+        fields['min_stock'] = Decimal(fields['min_stock'])
+    return Product.objects.create(
+        name=name or f'Producto {barcode}',
+        barcode=barcode,
+        category=category,
+        purchase_price_usd=Decimal(cost),
+        selling_price_usd=Decimal(price),
+        stock=Decimal(stock),
+        **fields,
+    )
+
+
+def make_products(count, prefix, category='Pruebas', **fields):
+    """`count` productos 'Producto <prefix> <i>' con código <prefix><i:05d>"""
+    from inventory.models import Category
+
+    if isinstance(category, str):
+        category, _ = Category.objects.get_or_create(name=category)
+    return [
+        make_product(f'{prefix}{i:05d}', category, name=f'Producto {prefix} {i}', **fields)
+        for i in range(count)
+    ]
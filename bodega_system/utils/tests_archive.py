@@ -0,0 +1,173 @@
+# utils/tests_archive.py
+"""
+Tests para el archivo de meses cerrados (utils/archive.py):
+- Ventas, ítems, ajustes e historial viejo pasan a la base de archivo
+- Las ventas a crédito y la última fila de historial se quedan
+- Ganancias, movimientos, stock y valor a una fecha no cambian
+- Los reportes de detalle leen también lo archivado
+- Un DELETE por tabla y mes, sin señales por fila
+- Repetir no duplica nada; el comando muestra lo que archivaría
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer, CustomerCredit
+from finances.report_definitions import SaleItemsReport, SalesReport
+from finances.services import ProfitReportService
+from inventory.models import AdjustmentDaySummary, Category, InventoryAdjustment, Product, StockCheckpoint
+from inventory.services import StockHistoryService, StockLedgerService
+from sales.models import Sale, SaleDaySummary, SaleItem
+from utils.archive import ARCHIVE_DB, ArchiveService
+from utils.models import ArchivedMonth
+from utils.versions import TableVersions
+
+User = get_user_model()
+
+START, END = date(2023, 1, 1), date(2023, 2, 28)
+
+
+class ArchiveTest(TestCase):
+    databases = {'default', ARCHIVE_DB}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='archive', password='pass123', is_admin=True)
+        product = Product.objects.create(
+            name='Harina', barcode='ARC-1', category=Category.objects.create(name='Archivo'),
+            stock=Decimal('100'), purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('2.00'),
+        )
+        created = datetime(2022, 12, 1, 9, 0)
+        Product.objects.filter(pk=product.pk).update(created_at=created)
+        StockCheckpoint.objects.filter(product=product).update(taken_at=created)
+        product.history.update(history_date=created)
+
+        product = Product.objects.get(pk=product.pk)
+        product.purchase_price_usd = Decimal('1.50')
+        product.save()
+        product.history.filter(history_date__gt=created).update(history_date=datetime(2023, 1, 15, 8, 0))
+        cls.product = product
+
+        cls.sell(datetime(2023, 1, 10, 10, 0), '3')
+        cls.sell(datetime(2023, 1, 20, 11, 0), '2')
+        cls.sell(datetime(2023, 2, 5, 12, 0), '4', credit=True)
+        cls.adjust('add', '10', 'reception', datetime(2023, 2, 12, 9, 0))
+        cls.sell(datetime(2023, 3, 3, 10, 0), '1')
+
+    @classmethod
+    def sell(cls, when, quantity, credit=False):
+        quantity = Decimal(quantity)
+        customer = Customer.objects.create(name=f'Cliente {when:%m%d}') if credit else None
+        sale = Sale.objects.create(
+            user=cls.user, customer=customer, total_usd=quantity * 2, total_bs=quantity * 80,
+            exchange_rate_used=Decimal('40'), payment_method='cash', is_credit=credit,
+        )
+        SaleItem.objects.create(
+            sale=sale, product=cls.product, quantity=quantity,
+            price_usd=Decimal('2.00'), price_bs=Decimal('80.00'),
+        )
+        Sale.objects.filter(pk=sale.pk).update(date=when)
+        if credit:
+            CustomerCredit.objects.create(
+                customer=customer, sale=sale, amount_usd=quantity * 2, amount_bs=quantity * 80,
+                exchange_rate_used=Decimal('40'), date_due=when.date() + timedelta(days=30),
+            )
+        cls.adjust('remove', quantity, 'sale', when)
+
+    @classmethod
+    def adjust(cls, adjustment_type, quantity, source, when):
+        adjustment = StockLedgerService.record(InventoryAdjustment(
+            product=Product.objects.get(pk=cls.product.pk), adjustment_type=adjustment_type,
+            source=source, quantity=Decimal(quantity), reason='Test', adjusted_by=cls.user,
+        ))
+        InventoryAdjustment.objects.filter(pk=adjustment.pk).update(adjusted_at=when)
+
+    def snapshot(self):
+        """Lo que deben seguir mostrando los reportes después de archivar"""
+        period = ProfitReportService._compute_period(START, END)
+        movements = StockHistoryService.movements(START, END)
+        report = SalesReport({'start_date': START, 'end_date': END})
+        items = SaleItemsReport({'start_date': START, 'end_date': END})
+        return {
+            'sales': period['sales'],
+            'sold': period['sold'],
+            'daily': [row for row in period['daily'] if any(row[1:])],
+            'summary': movements['summary'],
+            'products': movements['products'],
+            'stock': [
+                StockLedgerService.stock_as_of(StockHistoryService.day_end(day))[self.product.pk]
+                for day in (date(2023, 1, 15), date(2023, 1, 31), END)
+            ],
+            'valuation': StockHistoryService.valuation_as_of(date(2023, 1, 31))['totals'],
+            'report_totals': report.totals(),
+            'report_rows': [row[0] for row in report.rows()],
+            'breakdown': report.breakdown('method'),
+            'items_totals': items.totals(),
+        }
+
+    def test_archive_keeps_reports(self):
+        before = self.snapshot()
+        self.assertEqual(before['stock'], [Decimal('97'), Decimal('95'), Decimal('101')])
+
+        version = TableVersions.get([Sale, SaleItem], closed=True)
+        deleted = []
+
+        def record(sender, **kwargs):
+            deleted.append(sender)
+
+        post_delete.connect(record)
+        self.addCleanup(post_delete.disconnect, record)
+        with CaptureQueriesContext(connection) as ctx:
+            archived = ArchiveService.archive(before=date(2023, 3, 1))
+        self.assertEqual([month for month, counts in archived], [date(2023, 1, 1), date(2023, 2, 1)])
+        # Ítems, ventas, ajustes e historial: un DELETE por mes, sin cargar filas;
+        # las versiones de los reportes suben igual
+        deletes = [q for q in ctx.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(len(deletes), 8)
+        self.assertEqual(deleted, [])
+        self.assertNotEqual(TableVersions.get([Sale, SaleItem], closed=True), version)
+        self.assertEqual(archived[0][1], {'sales': 2, 'sale_items': 2, 'adjustments': 2, 'history': 1})
+        self.assertEqual(archived[1][1]['sales'], 0)  # solo la venta a crédito
+
+        # Quedan la venta a crédito, la de marzo y la última fila de historial
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertTrue(Sale.objects.filter(is_credit=True).exists())
+        self.assertEqual(Sale.objects.using(ARCHIVE_DB).count(), 2)
+        self.assertEqual(InventoryAdjustment.objects.using(ARCHIVE_DB).count(), 4)
+        self.assertEqual(self.product.history.count(), 1)
+        self.assertEqual(SaleDaySummary.objects.count(), 2)
+        self.assertEqual(AdjustmentDaySummary.objects.count(), 4)
+        self.assertEqual(ArchiveService.archived_until(), date(2023, 3, 1))
+
+        after = self.snapshot()
+        for key, value in before.items():
+            self.assertEqual(after[key], value, key)
+
+        # Sin datos nuevos no hay nada que archivar
+        self.assertEqual(ArchiveService.archive(before=date(2023, 3, 1)), [])
+        self.assertEqual(ArchivedMonth.objects.count(), 2)
+
+    def test_recent_periods_read_only_default(self):
+        ArchiveService.archive(before=date(2023, 3, 1))
+        self.assertEqual(SalesReport({'start_date': date(2023, 3, 1)}).databases(), ['default'])
+        self.assertEqual(SalesReport({'start_date': START}).databases(), ['default', ARCHIVE_DB])
+        self.assertEqual(ProfitReportService._compute_period(date(2023, 3, 1), date(2023, 3, 31))
+                         ['sales']['sales_count'], 1)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_old_data', '--before', '2023-02', '--dry-run', stdout=out)
+        self.assertIn('2023-01: 2 ventas, 2 ítems, 2 ajustes', out.getvalue())
+        self.assertEqual(Sale.objects.count(), 4)
+
+        call_command('archive_old_data', '--before', '2023-02', stdout=out)
+        self.assertIn('Meses archivados: 1', out.getvalue())
+        self.assertEqual(Sale.objects.count(), 2)
@@ -0,0 +1,196 @@
+# utils/tests_autocomplete.py
+"""
+Tests para los campos de autocompletado (utils/autocomplete.py):
+- El render no lista el catálogo (sin <option>) y cuesta lo mismo con 5 o 500 productos
+- Validación del pk elegido: inexistente/inactivo se rechaza
+- Formsets: todas las filas se validan con un solo in_bulk()
+- API de búsqueda de proveedores y alta de combo con el formset
+"""
+
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from customers.forms import CreditForm
+from customers.models import Customer
+from inventory.forms import InventoryAdjustmentForm, ComboItemFormset
+from inventory.models import ProductCombo
+from suppliers.forms import SupplierOrderForm, SupplierOrderItemFormset
+from suppliers.models import Supplier
+from utils.testing import make_products
+
+User = get_user_model()
+
+
+# ─────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────
+
+def product_queries(ctx):
+    return [q for q in ctx.captured_queries if 'inventory_product' in q['sql']]
+
+
+def formset_data(prefix, products, total=None):
+    data = {
+        f'{prefix}-TOTAL_FORMS': str(total if total is not None else len(products)),
+        f'{prefix}-INITIAL_FORMS': '0',
+        f'{prefix}-MIN_NUM_FORMS': '0',
+        f'{prefix}-MAX_NUM_FORMS': '1000',
+    }
+    for i, product in enumerate(products):
+        data[f'{prefix}-{i}-product'] = str(product.pk) if product else ''
+        data[f'{prefix}-{i}-quantity'] = '2'
+        data[f'{prefix}-{i}-price_usd'] = '1.00'
+    return data
+
+
+# ─────────────────────────────────────────────
+# RENDER
+# ─────────────────────────────────────────────
+
+class AutocompleteRenderTest(TestCase):
+
+    def test_new_form_renders_without_queries_or_options(self):
+        make_products(30, 'AC')
+        form = InventoryAdjustmentForm()
+        with CaptureQueriesContext(connection) as ctx:
+            html = str(form['product'])
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertNotIn('<option', html)
+        self.assertIn('data-autocomplete-url="/inventory/api/products/search/"', html)
+        self.assertIn('id="id_product"', html)
+
+    def test_initial_value_renders_only_its_label(self):
+        products = make_products(30, 'AC')
+        form = InventoryAdjustmentForm(initial={'product': products[7].pk})
+        with CaptureQueriesContext(connection) as ctx:
+            html = str(form['product'])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn(f'value="{products[7].pk}"', html)
+        self.assertIn('value="Producto AC 7"', html)
+
+    def test_supplier_and_customer_widgets(self):
+        supplier = Supplier.objects.create(name='Distribuidora Centro')
+        form = SupplierOrderForm(initial={'supplier': supplier.pk})
+        self.assertIn('value="Distribuidora Centro"', str(form['supplier']))
+        self.assertIn('data-autocomplete-url="/api/customers/search/"', str(CreditForm()['customer']))
+
+
+# ─────────────────────────────────────────────
+# VALIDACIÓN
+# ─────────────────────────────────────────────
+
+class AutocompleteValidationTest(TestCase):
+
+    def setUp(self):
+        self.products = make_products(3, 'AC')
+
+    def _adjustment(self, product_value):
+        return InventoryAdjustmentForm({
+            'product': product_value,
+            'adjustment_type': 'add',
+            'quantity': '1',
+            'reason': 'Reposición',
+        })
+
+    def test_valid_pk(self):
+        form = self._adjustment(str(self.products[0].pk))
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['product'], self.products[0])
+
+    def test_inactive_or_unknown_pk_rejected(self):
+        self.products[1].is_active = False
+        self.products[1].save()
+        for value in (str(self.products[1].pk), '999999', 'abc'):
+            form = self._adjustment(value)
+            self.assertFalse(form.is_valid())
+            self.assertIn('product', form.errors)
+
+    def test_credit_customer_must_have_credit_limit(self):
+        customer = Customer.objects.create(name='Sin Crédito', credit_limit_usd=Decimal('0'))
+        form = CreditForm({'customer': str(customer.pk), 'amount_bs': '10', 'date_due': '2030-01-01'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('customer', form.errors)
+
+
+class AutocompleteFormsetTest(TestCase):
+
+    def setUp(self):
+        self.products = make_products(20, 'AC')
+
+    def test_order_items_validated_with_single_query(self):
+        data = formset_data('items', self.products)
+        with CaptureQueriesContext(connection) as ctx:
+            formset = SupplierOrderItemFormset(data, prefix='items')
+            self.assertTrue(formset.is_valid(), formset.errors)
+        self.assertEqual(len(product_queries(ctx)), 1)
+        self.assertEqual(
+            [f.cleaned_data['product'] for f in formset.forms],
+            self.products,
+        )
+
+    def test_unknown_pk_in_one_row_is_reported_on_that_row(self):
+        data = formset_data('items', self.products[:3])
+        data['items-1-product'] = '999999'
+        formset = SupplierOrderItemFormset(data, prefix='items')
+        self.assertFalse(formset.is_valid())
+        self.assertIn('product', formset.forms[1].errors)
+        self.assertEqual(formset.forms[0].errors, {})
+
+    def test_cache_not_shared_between_formsets(self):
+        first = SupplierOrderItemFormset(formset_data('items', self.products[:1]), prefix='items')
+        self.assertTrue(first.is_valid())
+        second = SupplierOrderItemFormset(formset_data('items', self.products[1:2]), prefix='items')
+        self.assertTrue(second.is_valid(), second.errors)
+        self.assertEqual(second.forms[0].cleaned_data['product'], self.products[1])
+
+    def test_combo_formset_render_cost_is_flat(self):
+        combo = ProductCombo.objects.create(name='Combo Grande', combo_price_bs=Decimal('10'))
+        for product in self.products[:10]:
+            combo.items.create(product=product, quantity=Decimal('1'))
+        formset = ComboItemFormset(instance=combo)
+        with CaptureQueriesContext(connection) as ctx:
+            html = ''.join(str(form['product']) for form in formset.forms)
+        self.assertNotIn('<option', html)
+        # ítems existentes + una precarga de productos
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+        self.assertIn('Producto AC 9', html)
+
+
+# ─────────────────────────────────────────────
+# VISTAS
+# ─────────────────────────────────────────────
+
+class AutocompleteViewsTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        User.objects.create_user(username='ac_admin', password='pass123', is_admin=True)
+        self.client.login(username='ac_admin', password='pass123')
+
+    def test_supplier_search_api(self):
+        Supplier.objects.create(name='Alimentos Polar', contact_person='Rosa')
+        Supplier.objects.create(name='Distribuidora Inactiva', is_active=False)
+        response = self.client.get(reverse('suppliers:supplier_search_api'), {'q': 'pol'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['name'] for s in response.json()['suppliers']], ['Alimentos Polar'])
+        response = self.client.get(reverse('suppliers:supplier_search_api'), {'q': 'inact'})
+        self.assertEqual(response.json()['suppliers'], [])
+
+    def test_combo_create_posts_formset(self):
+        products = make_products(2, 'CB')
+        data = {
+            'name': 'Combo Desayuno',
+            'description': '',
+            'combo_price_bs': '50.00',
+            'is_active': 'on',
+        }
+        data.update(formset_data('items', products))
+        response = self.client.post(reverse('inventory:combo_create'), data)
+        combo = ProductCombo.objects.get(name='Combo Desayuno')
+        self.assertRedirects(response, reverse('inventory:combo_detail', args=[combo.pk]))
+        self.assertEqual(sorted(combo.items.values_list('product_id', flat=True)), sorted(p.pk for p in products))
@@ -0,0 +1,275 @@
+# utils/tests_concurrency.py
+"""
+Tests para el control de concurrencia optimista (utils/concurrency.py):
+- save() de una instancia leída antes de otro guardado lanza ConcurrentUpdateError
+- ProductService.bulk_save y PaymentTotalsService respetan row_version
+- El formulario de producto no pisa cambios hechos mientras se editaba
+- retry_on_conflict reintenta solo conflictos, fuera de transacciones
+- Varias cajas en hilos contra un SQLite en archivo no pierden ventas
+"""
+
+import os
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, OperationalError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import InventoryAdjustment, Product
+from inventory.services import ProductService
+from sales.api_views import _save_sale
+from sales.models import SaleItem
+from suppliers.models import Supplier, SupplierOrder, SupplierOrderItem
+from suppliers.services import PaymentTotalsService
+from suppliers.views import _receive_order_locked
+from utils.concurrency import ConcurrentUpdateError, retry_on_conflict
+from utils.models import ExchangeRate
+from utils.testing import make_product
+
+User = get_user_model()
+
+
+class OptimisticLockTest(TestCase):
+
+    def setUp(self):
+        self.product = make_product('CC-1', 'Concurrencia', name='Azúcar')
+
+    def test_stale_save_raises(self):
+        first = Product.objects.get(pk=self.product.pk)
+        second = Product.objects.get(pk=self.product.pk)
+        first.stock -= 1
+        first.save()
+        self.assertEqual(first.row_version, 1)
+
+        second.stock -= 3
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            second.save()
+        stored = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((stored.stock, stored.row_version), (Decimal('9'), 1))
+
+    def test_update_fields_and_noop_saves(self):
+        product = Product.objects.get(pk=self.product.pk)
+        version = product.row_version
+        product.save()
+        self.assertEqual(Product.objects.get(pk=product.pk).row_version, version)
+
+        product.save(update_fields=['name'])
+        self.assertEqual(Product.objects.get(pk=product.pk).row_version, version + 1)
+        self.assertEqual(product.get_dirty_fields(), set())
+
+    def test_bulk_save_rejects_stale_products(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        Product.objects.get(pk=self.product.pk).save(update_fields=['name'])
+
+        stale.stock += 5
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            ProductService.bulk_save([stale], ['stock'])
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, Decimal('10'))
+
+        fresh = Product.objects.get(pk=self.product.pk)
+        fresh.stock += 5
+        with transaction.atomic():
+            ProductService.bulk_save([fresh], ['stock'])
+        stored = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((stored.stock, stored.row_version), (Decimal('15'), fresh.row_version))
+
+    def test_payment_totals_bump_order_version(self):
+        user = User.objects.create_user(username='cc_user', password='pass123')
+        order = SupplierOrder.objects.create(
+            supplier=Supplier.objects.create(name='Concurrencia'), created_by=user,
+            total_usd=Decimal('50'), total_bs=Decimal('2000'), exchange_rate_used=Decimal('40'),
+        )
+        stale = SupplierOrder.objects.get(pk=order.pk)
+        PaymentTotalsService.apply_delta(order.pk, Decimal('10'), Decimal('400'))
+
+        stale.notes = 'Editada con datos viejos'
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            stale.save()
+
+
+class ProductFormConflictTest(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(username='cc_admin', password='pass123', is_admin=True)
+        self.client.login(username='cc_admin', password='pass123')
+        self.product = make_product('CC-1', 'Concurrencia', name='Azúcar')
+        self.url = reverse('inventory:product_update', args=[self.product.pk])
+
+    def post_data(self, **changes):
+        data = {
+            'name': self.product.name, 'barcode': self.product.barcode,
+            'category': self.product.category_id, 'unit_type': self.product.unit_type,
+            'purchase_price_usd': '1.00', 'selling_price_usd': '1.50',
+            'min_stock': '5', 'is_active': 'on', 'row_version': self.product.row_version,
+        }
+        data.update(changes)
+        return data
+
+    def test_stale_form_does_not_overwrite(self):
+        other = Product.objects.get(pk=self.product.pk)
+        other.selling_price_usd = Decimal('2.00')
+        other.save()
+
+        response = self.client.post(self.url, self.post_data(name='Azúcar refinada'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Otro usuario modificó', str(response.context['form'].non_field_errors()))
+        self.assertEqual(response.context['form']['row_version'].value(), other.row_version)
+        stored = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((stored.name, stored.selling_price_usd), ('Azúcar', Decimal('2.00')))
+
+    def test_current_form_saves(self):
+        response = self.client.post(self.url, self.post_data(name='Azúcar refinada'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).name, 'Azúcar refinada')
+
+
+class RetryOnConflictTest(SimpleTestCase):
+
+    def operation(self, *outcomes):
+        """Función que lanza (o devuelve) cada resultado en orden"""
+        outcomes = list(outcomes)
+        calls = []
+
+        def func():
+            calls.append(1)
+            outcome = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return func, calls
+
+    def conflict(self):
+        return ConcurrentUpdateError(Product, [1])
+
+    @mock.patch('utils.concurrency.time.sleep')
+    def test_retries_conflicts(self, sleep):
+        func, calls = self.operation(self.conflict(), OperationalError('database is locked'), 'ok')
+        self.assertEqual(retry_on_conflict(func)(), 'ok')
+        self.assertEqual(len(calls), 3)
+
+    @mock.patch('utils.concurrency.time.sleep')
+    def test_bounded_attempts(self, sleep):
+        func, calls = self.operation(self.conflict())
+        with self.assertRaises(ConcurrentUpdateError):
+            retry_on_conflict(attempts=2)(func)()
+        self.assertEqual(len(calls), 2)
+
+    def test_other_errors_not_retried(self):
+        func, calls = self.operation(DatabaseError('disk I/O error'))
+        with self.assertRaises(DatabaseError):
+            retry_on_conflict(func)()
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_transaction(self):
+        func, calls = self.operation(self.conflict())
+        with mock.patch('utils.concurrency.transaction.get_connection') as get_connection:
+            get_connection.return_value.in_atomic_block = True
+            with self.assertRaises(ConcurrentUpdateError):
+                retry_on_conflict(func)()
+        self.assertEqual(len(calls), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Prueba de SQLite en archivo')
+@override_settings(CONFLICT_RETRY_ATTEMPTS=20)
+class FileDatabaseStressTest(TestCase):
+    """Hilos con conexiones propias contra una copia en archivo de la base de tests"""
+
+    THREADS = 4
+    SALES_PER_THREAD = 5
+
+    def setUp(self):
+        handle, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connection.ensure_connection()
+        # backup() no avanza mientras la transacción del test (BEGIN
+        # IMMEDIATE) tiene el bloqueo de escritura; serialize() sí lee
+        with open(path, 'wb') as target:
+            target.write(connection.connection.serialize())
+
+        # Las conexiones nuevas (una por hilo) abren el archivo
+        original = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = path
+        self.addCleanup(connection.settings_dict.__setitem__, 'NAME', original)
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            self.addCleanup(lambda name=path + suffix: os.path.exists(name) and os.remove(name))
+
+        self.fixtures = self.run_threads(lambda i: self.create_fixtures(), 1)[0]
+
+    def run_threads(self, target, count):
+        results = [None] * count
+        errors = []
+        barrier = threading.Barrier(count)
+
+        def worker(index):
+            try:
+                barrier.wait()
+                results[index] = target(index)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def create_fixtures(self):
+        user = User.objects.create_user(username='stress', password='pass123')
+        rate = ExchangeRate.objects.create(
+            date=timezone.now().date(), bs_to_usd=Decimal('40'), updated_by=user,
+        )
+        product = make_product('STRESS-1', 'Concurrencia', stock='100')
+        order = SupplierOrder.objects.create(
+            supplier=Supplier.objects.create(name='Stress'), created_by=user,
+            total_usd=Decimal('10'), total_bs=Decimal('400'), exchange_rate_used=Decimal('40'),
+        )
+        SupplierOrderItem.objects.create(
+            order=order, product=product, quantity=Decimal('10'),
+            price_usd=Decimal('1.00'), price_bs=Decimal('40'),
+        )
+        return {'user': user, 'rate': rate, 'product': product, 'order': order}
+
+    def test_parallel_sales_keep_every_unit(self):
+        product = self.fixtures['product']
+
+        def sell(index):
+            for _ in range(self.SALES_PER_THREAD):
+                sale, error = _save_sale(
+                    {'items': [{'product_id': product.pk, 'quantity': '1'}]},
+                    None, self.fixtures['user'], self.fixtures['rate'],
+                )
+                self.assertIsNone(error)
+
+        self.run_threads(sell, self.THREADS)
+
+        sold = self.THREADS * self.SALES_PER_THREAD
+        stock, items, adjustments = self.run_threads(lambda i: (
+            Product.objects.get(pk=product.pk).stock,
+            SaleItem.objects.filter(product=product).count(),
+            InventoryAdjustment.objects.filter(product=product).count(),
+        ), 1)[0]
+        self.assertEqual(stock, Decimal('100') - sold)
+        self.assertEqual((items, adjustments), (sold, sold))
+
+    def test_parallel_receptions_apply_once(self):
+        order = self.fixtures['order']
+
+        def receive(index):
+            return _receive_order_locked(order.pk, self.fixtures['user'], True, '')[1]
+
+        results = self.run_threads(receive, self.THREADS)
+        self.assertEqual(sum(result is not None for result in results), 1)
+        stock = self.run_threads(
+            lambda i: Product.objects.get(pk=self.fixtures['product'].pk).stock, 1
+        )[0]
+        self.assertEqual(stock, Decimal('110'))
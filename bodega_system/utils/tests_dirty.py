@@ -0,0 +1,118 @@
+# utils/tests_dirty.py
+"""
+Tests para DirtyFieldsMixin (save() de solo los campos modificados):
+- El UPDATE lleva solo los campos cambiados (y auto_now)
+- Sin cambios no se escribe nada
+- Una instancia con versión vieja no pisa a la que guardó antes
+- refresh_from_db y los F() actualizan lo que se considera guardado
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from customers.models import Customer, CustomerCredit
+from inventory.models import Category, Product
+from sales.models import Sale
+from utils.concurrency import ConcurrentUpdateError
+
+User = get_user_model()
+
+
+def updates(ctx, table):
+    return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith(f'UPDATE "{table}"')]
+
+
+def set_clause(sql):
+    return sql.split(' SET ')[1].split(' WHERE ')[0]
+
+
+class DirtyFieldsTest(TestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name='Dirty')
+        created = Product.objects.create(
+            name='Arroz', barcode='DF-1', category=category, stock=Decimal('10'),
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'),
+        )
+        self.product = Product.objects.get(pk=created.pk)
+
+    def test_update_only_changed_fields(self):
+        self.assertEqual(self.product.get_dirty_fields(), set())
+        self.product.stock -= 1
+        self.assertEqual(self.product.get_dirty_fields(), {'stock'})
+        with CaptureQueriesContext(connection) as ctx:
+            self.product.save()
+        [sql] = updates(ctx, 'inventory_product')
+        self.assertIn('"stock"', set_clause(sql))
+        self.assertIn('"updated_at"', set_clause(sql))
+        self.assertNotIn('"name"', set_clause(sql))
+        self.assertEqual(self.product.get_dirty_fields(), set())
+
+    def test_no_changes_no_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.product.save()
+        self.assertEqual(ctx.captured_queries, [])
+
+    def test_concurrent_instances_do_not_overwrite(self):
+        other = Product.objects.get(pk=self.product.pk)
+        other.name = 'Arroz Mary'
+        other.save()
+        # Versión vieja: el compare-and-swap rechaza el guardado (utils/concurrency.py)
+        self.product.stock = Decimal('7')
+        with self.assertRaises(ConcurrentUpdateError), transaction.atomic():
+            self.product.save()
+        stored = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((stored.name, stored.stock), ('Arroz Mary', Decimal('10')))
+
+    def test_refresh_and_expressions(self):
+        self.product.stock = F('stock') - 2
+        self.product.save()
+        self.product.refresh_from_db(fields=['stock'])
+        self.assertEqual(self.product.stock, Decimal('8'))
+        self.assertEqual(self.product.get_dirty_fields(), set())
+
+        Product.objects.filter(pk=self.product.pk).update(name='Arroz integral')
+        self.product.refresh_from_db()
+        with CaptureQueriesContext(connection) as ctx:
+            self.product.save()
+        self.assertEqual(ctx.captured_queries, [])
+
+    def test_new_instances_save_everything(self):
+        copy = Product(
+            name='Arroz 2', barcode='DF-2', category=self.product.category,
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'),
+        )
+        self.assertIsNone(copy.get_dirty_fields())
+        copy.save()
+        copy.name = 'Arroz 2 kg'
+        self.assertEqual(copy.get_dirty_fields(), {'name'})
+
+
+class DirtyCreditTest(TestCase):
+
+    def test_fifo_payment_marks_only_paid_fields(self):
+        user = User.objects.create_user(username='df_user', password='pass123')
+        customer = Customer.objects.create(name='Cliente Dirty')
+        sale = Sale.objects.create(
+            user=user, customer=customer, total_usd=Decimal('10'), total_bs=Decimal('400'),
+            exchange_rate_used=Decimal('40'), payment_method='cash', is_credit=True,
+        )
+        CustomerCredit.objects.create(
+            customer=customer, sale=sale, amount_usd=Decimal('10'), amount_bs=Decimal('400'),
+            exchange_rate_used=Decimal('40'), date_due=date.today() + timedelta(days=30),
+        )
+        credit = CustomerCredit.objects.get(sale=sale)
+        credit.is_paid = True
+        credit.date_paid = timezone.now()
+        with CaptureQueriesContext(connection) as ctx:
+            credit.save()
+        [sql] = updates(ctx, 'customers_customercredit')
+        # is_paid, date_paid y row_version
+        self.assertEqual(set_clause(sql).count(' = '), 3)
@@ -0,0 +1,192 @@
+# utils/tests_pagination.py
+"""
+Tests para la paginación por cursor (keyset):
+- Codificación/decodificación de cursores
+- Recorrido completo sin huecos ni duplicados (incluye fechas repetidas)
+- Costo constante por página y total propagado en el cursor
+- Fragmentos HTMX "Cargar más" en sale_list y adjustment_list
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from sales.models import Sale
+from utils.pagination import (
+    KeysetPaginator, InvalidCursor, encode_cursor, decode_cursor
+)
+
+User = get_user_model()
+
+
+def make_sales(user, count, same_date=None):
+    sales = [
+        Sale.objects.create(
+            user=user,
+            total_bs=Decimal('100.00'),
+            total_usd=Decimal('2.00'),
+            exchange_rate_used=Decimal('50.00'),
+        )
+        for _ in range(count)
+    ]
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for i, sale in enumerate(sales):
+        # date es auto_now_add: se fija con update()
+        date = same_date or base + timedelta(minutes=i)
+        Sale.objects.filter(pk=sale.pk).update(date=date)
+    return sales
+
+
+class CursorEncodingTest(TestCase):
+
+    def test_roundtrip(self):
+        date = datetime(2024, 5, 17, 10, 30, 15, 123456)
+        token = encode_cursor(date, 42, total=900)
+        self.assertNotIn('=', token)
+        self.assertEqual(decode_cursor(token), (date, 42, 900))
+
+    def test_roundtrip_without_total(self):
+        date = datetime(2024, 5, 17, 10, 30)
+        self.assertEqual(decode_cursor(encode_cursor(date, 7)), (date, 7, None))
+
+    def test_garbage_raises_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            decode_cursor('no-es-un-cursor')
+
+
+class KeysetPaginatorTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='keyset_admin', password='pass123', is_admin=True)
+
+    def _walk(self, paginator):
+        seen = []
+        cursor = None
+        while True:
+            page = paginator.get_page(cursor)
+            seen.extend(obj.pk for obj in page)
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_walks_all_rows_in_order(self):
+        sales = make_sales(self.user, 23)
+        paginator = KeysetPaginator(Sale.objects.all(), per_page=5, date_field='date')
+        expected = [s.pk for s in reversed(sales)]
+        self.assertEqual(self._walk(paginator), expected)
+
+    def test_ties_on_date_are_broken_by_id(self):
+        sales = make_sales(self.user, 12, same_date=datetime(2024, 3, 3, 9, 0))
+        paginator = KeysetPaginator(Sale.objects.all(), per_page=5, date_field='date')
+        self.assertEqual(self._walk(paginator), sorted((s.pk for s in sales), reverse=True))
+
+    def test_total_counted_once_and_carried_in_cursor(self):
+        make_sales(self.user, 12)
+        paginator = KeysetPaginator(Sale.objects.all(), per_page=5, date_field='date', with_total=True)
+        first = paginator.get_page()
+        self.assertEqual(first.total, 12)
+        self.assertTrue(first.is_first)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = paginator.get_page(first.next_cursor)
+        self.assertEqual(second.total, 12)
+        self.assertFalse(second.is_first)
+        # Sin COUNT: una sola consulta por página
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('COUNT', ctx.captured_queries[0]['sql'].upper())
+
+    def test_deep_page_uses_no_offset(self):
+        make_sales(self.user, 30)
+        paginator = KeysetPaginator(Sale.objects.all(), per_page=5, date_field='date')
+        page = paginator.get_page()
+        for _ in range(4):
+            page = paginator.get_page(page.next_cursor)
+        with CaptureQueriesContext(connection) as ctx:
+            paginator.get_page(page.next_cursor)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'].upper())
+
+    def test_invalid_cursor_returns_first_page(self):
+        sales = make_sales(self.user, 3)
+        page = KeysetPaginator(Sale.objects.all(), per_page=5, date_field='date').get_page('xxx')
+        self.assertTrue(page.is_first)
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_next)
+        self.assertEqual(list(page)[0].pk, sales[-1].pk)
+
+
+class SaleListLoadMoreTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.admin = User.objects.create_user(username='keyset_view', password='pass123', is_admin=True)
+        self.sales = make_sales(self.admin, 20)
+        self.client.login(username='keyset_view', password='pass123')
+        self.url = reverse('sales:sale_list')
+
+    def test_full_page_keeps_filters_in_next_link(self):
+        response = self.client.get(self.url, {'credit_filter': 'cash'})
+        self.assertEqual(response.status_code, 200)
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 15)
+        self.assertTrue(page_obj.has_next)
+        self.assertIn('credit_filter=cash', page_obj.next_query)
+        self.assertEqual(response.context['sales_count'], 20)
+
+    def test_htmx_fragment_renders_only_rows(self):
+        first = self.client.get(self.url).context['page_obj']
+        response = self.client.get(
+            self.url,
+            {'cursor': first.next_cursor, 'fragment': 'rows'},
+            HTTP_HX_REQUEST='true',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'sales/sale_list_rows.html')
+        self.assertTemplateNotUsed(response, 'sales/sale_list.html')
+        pks = [s.pk for s in response.context['page_obj']]
+        self.assertEqual(pks, [s.pk for s in reversed(self.sales[:5])])
+
+
+class AdjustmentListLoadMoreTest(TestCase):
+
+    def setUp(self):
+        from inventory.models import Category, Product, InventoryAdjustment
+        cache.clear()
+        self.client = Client()
+        self.admin = User.objects.create_user(username='keyset_adj', password='pass123', is_admin=True)
+        product = Product.objects.create(
+            name='Arroz', barcode='KEY001', category=Category.objects.create(name='Granos'),
+            purchase_price_usd=Decimal('1.00'), selling_price_usd=Decimal('1.50'),
+        )
+        for i in range(25):
+            InventoryAdjustment.objects.create(
+                product=product, adjustment_type='add', quantity=Decimal('1'),
+                previous_stock=Decimal(i), new_stock=Decimal(i + 1),
+                reason='Reposición', adjusted_by=self.admin,
+            )
+        self.client.login(username='keyset_adj', password='pass123')
+        self.url = reverse('inventory:adjustment_list')
+
+    def test_full_page_reports_total(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].total, 25)
+        self.assertContains(response, 'Cargar más ajustes')
+
+    def test_htmx_cards_fragment_returns_tail(self):
+        first = self.client.get(self.url).context['page_obj']
+        response = self.client.get(
+            self.url,
+            {'cursor': first.next_cursor, 'fragment': 'cards'},
+            HTTP_HX_REQUEST='true',
+        )
+        self.assertTemplateUsed(response, 'inventory/adjustment_list_cards.html')
+        self.assertEqual(len(response.context['page_obj']), 5)
+        self.assertNotContains(response, 'Cargar más ajustes')
@@ -0,0 +1,97 @@
+# utils/tests_sqlite.py
+"""
+Tests para el perfil de producción de SQLite (utils/sqlite.py):
+- Cada conexión nueva recibe los PRAGMA de settings.SQLITE_PRAGMAS
+- Comandos de checkpoint, ANALYZE, VACUUM incremental e integridad
+- Un alias sin archivo da error sin crear el archivo
+"""
+
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import SimpleTestCase
+
+ALIAS = 'maintenance_test'
+
+
+class SqliteProfileTest(SimpleTestCase):
+    """Base en archivo con un alias propio (la de tests está en memoria)"""
+
+    # Las bases se resuelven en setUpClass, después de registrar ALIAS
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[ALIAS] = {**connections.settings['default'], 'NAME': ''}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        del connections[ALIAS]
+        del connections.settings[ALIAS]
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections[ALIAS].settings_dict['NAME'] = self.path
+        self.addCleanup(self.remove_file)
+
+    def remove_file(self):
+        connections[ALIAS].close()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def pragma(self, name):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def fill_and_free(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('CREATE TABLE IF NOT EXISTS filler (data BLOB)')
+            cursor.execute('INSERT INTO filler SELECT zeroblob(4000) FROM '
+                           '(WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 200) '
+                           'SELECT i FROM n)')
+            cursor.execute('DELETE FROM filler')
+
+    def test_new_connections_get_profile(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+    def test_maintenance_commands(self):
+        self.fill_and_free()
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, 'use --enable'):
+            call_command('sqlite_vacuum', '--database', ALIAS, stdout=out)
+        call_command('sqlite_vacuum', '--database', ALIAS, '--enable', stdout=out)
+        self.assertIn('auto_vacuum=INCREMENTAL activado', out.getvalue())
+        self.assertEqual(self.pragma('auto_vacuum'), 2)
+
+        self.fill_and_free()
+        self.assertGreater(self.pragma('freelist_count'), 0)
+        call_command('sqlite_vacuum', '--database', ALIAS, stdout=out)
+        self.assertEqual(self.pragma('freelist_count'), 0)
+
+        call_command('sqlite_checkpoint', '--database', ALIAS, stdout=out)
+        self.assertIn('pasadas a la base', out.getvalue())
+        self.assertEqual(os.path.getsize(self.path + '-wal'), 0)
+        call_command('sqlite_analyze', '--database', ALIAS, stdout=out)
+        self.assertIn('Estadísticas actualizadas', out.getvalue())
+        call_command('sqlite_integrity_check', '--database', ALIAS, '--quick', stdout=out)
+        self.assertIn('Base íntegra', out.getvalue())
+
+    def test_missing_file_is_not_created(self):
+        os.remove(self.path)
+        with self.assertRaisesMessage(CommandError, 'No existe el archivo'):
+            call_command('sqlite_integrity_check', '--database', ALIAS, stdout=StringIO())
+        self.assertFalse(os.path.exists(self.path))
+        with self.assertRaisesMessage(CommandError, 'no está en settings.DATABASES'):
+            call_command('sqlite_analyze', '--database', 'nope', stdout=StringIO())
@@ -0,0 +1,162 @@
+# utils/tests_versions.py
+"""
+Tests para la caché de consultas por versión de tabla (VersionedQuerySet):
+- La segunda lectura no consulta la base
+- save(), delete(), update(), bulk_create() y bulk_update() la invalidan
+- Los joins con tablas no versionadas no se cachean
+- ModelChoiceField y las vistas usan la consulta cacheada
+- Los contadores se comparten entre procesos (otro worker los ve)
+"""
+
+import subprocess
+import sys
+
+from django import forms
+from django.conf import settings
+from django.test import TestCase, Client
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventory.models import Category, InventoryValuation
+from suppliers.models import Supplier
+from utils.versions import TableVersions
+
+User = get_user_model()
+
+
+def table_queries(ctx, table):
+    return [q for q in ctx.captured_queries if table in q['sql']]
+
+
+# Otro worker: lee el contador de categorías y lo sube
+WORKER = """
+import django
+django.setup()
+from inventory.models import Category
+from utils.versions import TableVersions
+print(TableVersions.get([Category]))
+TableVersions.bump(Category)
+print(TableVersions.get([Category]))
+"""
+
+
+class CategoryChoiceForm(forms.Form):
+    category = forms.ModelChoiceField(queryset=Category.objects.cached())
+
+
+class VersionedQuerySetTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.bebidas = Category.objects.create(name='Bebidas')
+        Category.objects.create(name='Abarrotes')
+
+    def names(self):
+        return [category.name for category in Category.objects.order_by('name').cached()]
+
+    def test_second_read_hits_cache(self):
+        self.assertEqual(self.names(), ['Abarrotes', 'Bebidas'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.names(), ['Abarrotes', 'Bebidas'])
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_writes_invalidate(self):
+        self.names()
+        Category.objects.create(name='Charcutería')
+        self.assertEqual(self.names(), ['Abarrotes', 'Bebidas', 'Charcutería'])
+
+        self.bebidas.name = 'Refrescos'
+        self.bebidas.save()
+        self.assertEqual(self.names(), ['Abarrotes', 'Charcutería', 'Refrescos'])
+
+        Category.objects.filter(name='Refrescos').update(name='Jugos')
+        self.assertEqual(self.names(), ['Abarrotes', 'Charcutería', 'Jugos'])
+
+        Category.objects.bulk_create([Category(name='Limpieza')])
+        self.assertEqual(self.names(), ['Abarrotes', 'Charcutería', 'Jugos', 'Limpieza'])
+
+        self.bebidas.refresh_from_db()
+        self.bebidas.name = 'Bebidas'
+        Category.objects.bulk_update([self.bebidas], ['name'])
+        self.assertEqual(self.names(), ['Abarrotes', 'Bebidas', 'Charcutería', 'Limpieza'])
+
+        Category.objects.filter(name='Limpieza').delete()
+        self.assertEqual(self.names(), ['Abarrotes', 'Bebidas', 'Charcutería'])
+
+    def test_values_and_filters_have_own_keys(self):
+        cached = Category.objects.order_by('name').cached()
+        self.assertEqual(list(cached.values_list('name', flat=True)), ['Abarrotes', 'Bebidas'])
+        self.assertEqual([c.name for c in cached.filter(name='Bebidas')], ['Bebidas'])
+        self.assertEqual(cached.get(name='Abarrotes').name, 'Abarrotes')
+
+    def test_unversioned_join_is_not_cached(self):
+        InventoryValuation.objects.create(category=self.bebidas)
+        # El libro de valoración (InventoryValuation) no está versionado
+        cached = Category.objects.filter(valuation__isnull=False).cached()
+        self.assertEqual(len(cached), 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(cached.all()), 1)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_model_choice_field_uses_cache(self):
+        str(CategoryChoiceForm()['category'])
+        with CaptureQueriesContext(connection) as ctx:
+            html = str(CategoryChoiceForm()['category'])
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertIn('Bebidas', html)
+        self.assertTrue(CategoryChoiceForm({'category': self.bebidas.pk}).is_valid())
+
+
+class CachedListsInViewsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='qv_admin', password='pass123', is_admin=True)
+        self.client = Client()
+        self.client.login(username='qv_admin', password='pass123')
+        Supplier.objects.create(name='Distribuidora Norte')
+
+    def test_order_list_suppliers(self):
+        url = reverse('suppliers:order_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(table_queries(ctx, 'FROM "suppliers_supplier"'), [])
+        self.assertEqual([s.name for s in response.context['suppliers']], ['Distribuidora Norte'])
+
+        Supplier.objects.create(name='Almacén Sur')
+        response = self.client.get(url)
+        self.assertEqual([s.name for s in response.context['suppliers']],
+                         ['Almacén Sur', 'Distribuidora Norte'])
+
+    def test_sales_report_employee_list(self):
+        url = reverse('finances:sales_report')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        employees = [q for q in table_queries(ctx, 'accounts_user')
+                     if 'WHERE "accounts_user"."is_active"' in q['sql']]
+        self.assertEqual(employees, [])
+
+        User.objects.create_user(username='qv_nuevo', password='pass123')
+        response = self.client.get(url)
+        self.assertContains(response, 'qv_nuevo')
+
+
+class SharedVersionsTest(TestCase):
+
+    def test_counters_shared_between_processes(self):
+        TableVersions.bump(Category)
+        version = TableVersions.get([Category])
+        worker = subprocess.run(
+            [sys.executable, '-c', WORKER], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        seen, bumped = worker.stdout.split()
+        # El otro proceso lee el contador de este y este ve el que subió aquel
+        self.assertEqual(seen, version)
+        self.assertNotEqual(bumped, version)
+        self.assertEqual(TableVersions.get([Category]), bumped)
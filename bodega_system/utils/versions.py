@@ -0,0 +1,237 @@
+# utils/versions.py - VERSIONES DE DATOS POR TABLA
+
+"""
+Contadores de cambios por tabla para armar claves de caché
+
+Cada modelo registrado tiene un contador en la caché de settings.CACHES
+(compartida entre procesos) que sube al guardar o borrar una fila.
+Quien cachea un resultado pone en la clave las versiones de las tablas que
+leyó: un cambio no borra nada, la siguiente lectura simplemente usa otra
+clave y las viejas expiran solas.
+
+Los modelos registrados con `date_of` tienen además un contador histórico
+que solo sube cuando la fila escrita es de antes de hoy (o no se sabe su
+fecha). Un resultado de un período ya cerrado depende solo de ese contador,
+así que las ventas del día no lo invalidan.
+
+El contador sube en el momento y otra vez al confirmar la transacción, para
+que no quede en caché un resultado calculado antes del commit con la
+versión nueva.
+
+Las escrituras con update()/bulk_update()/bulk_create() no disparan señales:
+los modelos con VersionedManager suben el contador desde su QuerySet; en los
+demás esos caminos llaman a TableVersions.bump().
+
+VersionedQuerySet.cached() usa los mismos contadores para cachear consultas
+de lectura frecuente (categorías, proveedores activos, empleados) sin
+invalidación manual.
+"""
+
+import hashlib
+import time
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import models, transaction
+from django.db.models.query import NamedValuesListIterable
+from django.db.models.signals import post_delete, post_save
+
+KEY_PREFIX = 'table_version'
+
+# Las claves ya cambian con cada escritura: el tiempo solo limpia las viejas
+QUERY_CACHE_TIMEOUT = 60 * 60
+
+
+def _key(model, history=False):
+    key = f'{KEY_PREFIX}:{model._meta.label_lower}'
+    return f'{key}:history' if history else key
+
+
+def _initial():
+    # Un contador perdido (caché reiniciada) vuelve con un valor mayor que
+    # cualquiera de los anteriores: nunca se reutiliza una clave vieja
+    return time.time_ns()
+
+
+def _incr(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), None)
+
+
+def _counts(model, fields):
+    # Una escritura que solo toca campos que no cuentan no sube la versión
+    _date_of, counted = TableVersions._registry.get(model, (None, None))
+    return not counted or bool(counted & set(fields))
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class TableVersions:
+    """Registro de modelos versionados y lectura/incremento de sus contadores"""
+
+    # Modelo → (función que devuelve la fecha de una fila, campos que cuentan)
+    _registry = {}
+    # Tabla → modelo, para saber qué versiones lee una consulta
+    _tables = {}
+
+    @staticmethod
+    def register(model, date_of=None, fields=None):
+        """
+        Versiona un modelo: sus save()/delete() suben el contador
+
+        Args:
+            model: Clase del modelo
+            date_of: Función fila → fecha (date o datetime) a la que pertenecen
+                sus datos; sin ella toda escritura cuenta como histórica
+            fields: Si se indica, un save(update_fields=...), update() o
+                bulk_update() que no toca ninguno de estos campos no cuenta
+                (p. ej. last_login)
+        """
+        TableVersions._registry[model] = (date_of, frozenset(fields) if fields else None)
+        TableVersions._tables[model._meta.db_table] = model
+        uid = f'table_version_{model._meta.label_lower}'
+        post_save.connect(_bump_on_write, sender=model, dispatch_uid=f'{uid}_saved')
+        post_delete.connect(_bump_on_write, sender=model, dispatch_uid=f'{uid}_deleted')
+
+    @staticmethod
+    def bump(model, when=None):
+        """
+        Registra una escritura en la tabla de `model`
+
+        Args:
+            model: Clase del modelo
+            when: Fecha de las filas escritas; None si no se conoce
+        """
+        keys = [_key(model)]
+        when = _as_date(when)
+        if when is None or when < date.today():
+            keys.append(_key(model, history=True))
+        _incr(keys)
+        transaction.on_commit(lambda: _incr(keys))
+
+    @staticmethod
+    def get(models, closed=False):
+        """
+        Versión conjunta de varias tablas, para usar dentro de una clave
+
+        Args:
+            models: Clases de los modelos leídos
+            closed: Si el resultado es de un período ya cerrado (antes de hoy)
+
+        Returns:
+            str con un contador por tabla
+        """
+        keys = [_key(model, history=closed) for model in models]
+        values = cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                cache.add(key, _initial(), None)
+                values[key] = cache.get(key)
+        return '.'.join(str(values[key]) for key in keys)
+
+
+def _bump_on_write(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not _counts(sender, update_fields):
+        return
+    date_of, _fields = TableVersions._registry[sender]
+    TableVersions.bump(sender, date_of(instance) if date_of else None)
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    QuerySet de un modelo registrado en TableVersions
+
+    - update(), bulk_create() y bulk_update() suben el contador de la tabla
+      (no disparan post_save)
+    - cached() devuelve una copia que lee sus resultados de la caché, con la
+      versión de cada tabla consultada en la clave
+    """
+
+    _version_cached = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._version_cached = self._version_cached
+        return clone
+
+    def cached(self):
+        """
+        Copia del QuerySet cuyos resultados se cachean hasta que cambie
+        alguna de las tablas que lee (la del modelo y las de sus joins)
+
+        Sigue siendo un QuerySet: sirve para ModelChoiceField y se puede
+        seguir filtrando (cada consulta derivada tiene su propia clave). Si
+        la consulta lee una tabla no registrada se ejecuta normalmente.
+        """
+        clone = self._chain()
+        clone._version_cached = True
+        return clone
+
+    def _fetch_all(self):
+        if self._result_cache is None and self._version_cached:
+            self._result_cache = self._cached_results()
+        super()._fetch_all()
+
+    def iterator(self, chunk_size=None):
+        # ModelChoiceField itera con iterator(), que no pasa por _fetch_all()
+        if self._version_cached:
+            return iter(self._cached_results())
+        return super().iterator(chunk_size)
+
+    def _cached_results(self):
+        key = self._cache_key()
+        if key is None:
+            return list(self._iterable_class(self))
+        rows = cache.get(key)
+        if rows is None:
+            rows = list(self._iterable_class(self))
+            cache.set(key, rows, QUERY_CACHE_TIMEOUT)
+        return rows
+
+    def _cache_key(self):
+        if self._iterable_class is NamedValuesListIterable:
+            # Las namedtuple se crean al vuelo y no se pueden serializar
+            return None
+        # Compilar una copia: el compilador agrega los joins de select_related
+        query = self.query.clone()
+        try:
+            sql, params = query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+        tables = {join.table_name for join in query.alias_map.values()}
+        if not tables <= TableVersions._tables.keys():
+            return None
+        versioned = [TableVersions._tables[table] for table in sorted(tables)]
+        statement = repr((self.db, self._iterable_class.__name__, sql, params))
+        digest = hashlib.sha1(statement.encode()).hexdigest()
+        return f'{KEY_PREFIX}:query:{digest}:{TableVersions.get(versioned)}'
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows and _counts(self.model, kwargs):
+            TableVersions.bump(self.model)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            TableVersions.bump(self.model)
+        return created
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if rows and _counts(self.model, fields):
+            TableVersions.bump(self.model)
+        return rows
+
+
+class VersionedManager(models.Manager.from_queryset(VersionedQuerySet)):
+    """Manager de los modelos cuyas lecturas se cachean con cached()"""
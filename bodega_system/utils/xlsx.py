@@ -0,0 +1,162 @@
+# utils/xlsx.py - HOJAS XLSX EN STREAMING
+
+"""
+Escritor mínimo de archivos .xlsx sin dependencias externas
+
+Un .xlsx es un zip con XML. La hoja se escribe por bloques de filas dentro
+de la entrada del zip (zipfile comprime al vuelo), así que la memoria no
+depende del número de filas. Cubre lo que necesitan las exportaciones: una
+hoja, cabecera en negrita, números, texto, fechas y fechas con hora.
+"""
+
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Filas que se acumulan antes de escribir en el zip
+ROWS_PER_WRITE = 500
+
+# Día 0 de las fechas de Excel (con el bisiesto falso de 1900 ya descontado)
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Índices en cellXfs de _STYLES
+STYLE_HEADER = 1
+STYLE_DATE = 2
+STYLE_DATETIME = 3
+
+# Caracteres de control que XML 1.0 no admite
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_CONTENT_TYPES = _HEADER + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = _HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = _HEADER + (
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = _HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = _HEADER + (
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_START = _HEADER + (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _text(value):
+    return escape(_INVALID_XML.sub('', str(value)))
+
+
+def _cell(value, style=0):
+    """XML de una celda según el tipo del valor"""
+    if value is None or value == '':
+        return '<c/>'
+    style_attr = f' s="{style}"' if style else ''
+    if isinstance(value, bool):
+        value = 'Sí' if value else 'No'
+    if isinstance(value, datetime):
+        serial = (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="{STYLE_DATETIME}"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        serial = (value - EXCEL_EPOCH.date()).days
+        return f'<c s="{STYLE_DATE}"><v>{serial}</v></c>'
+    if isinstance(value, Decimal):
+        return f'<c{style_attr}><v>{value:f}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c{style_attr}><v>{value}</v></c>'
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{_text(value)}</t></is></c>'
+
+
+def _row(number, values, style=0):
+    return f'<row r="{number}">' + ''.join(_cell(v, style) for v in values) + '</row>'
+
+
+def write_xlsx(fileobj, headers, rows, sheet_name='Hoja1'):
+    """
+    Escribe un libro de una hoja en `fileobj`
+
+    Args:
+        fileobj: Archivo binario abierto para escritura (p. ej. SpooledTemporaryFile)
+        headers: Cabeceras de columna
+        rows: Iterable de filas (listas de valores); se consume una sola vez
+        sheet_name: Nombre de la hoja (Excel admite hasta 31 caracteres)
+
+    Returns:
+        Número de filas de datos escritas
+    """
+    count = 0
+    with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', _ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', _WORKBOOK.format(name=_text(sheet_name[:31])))
+        workbook.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        workbook.writestr('xl/styles.xml', _STYLES)
+
+        # force_zip64: el tamaño de la hoja no se conoce de antemano
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((_SHEET_START + _row(1, headers, STYLE_HEADER)).encode('utf-8'))
+            pending = []
+            for count, values in enumerate(rows, 1):
+                pending.append(_row(count + 1, values))
+                if len(pending) >= ROWS_PER_WRITE:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+            sheet.write((''.join(pending) + _SHEET_END).encode('utf-8'))
+    return count